@@ -0,0 +1,52 @@
+"""message read-state watermarks
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:40:05.000000
+
+Adds the message_read_state watermark table used by the ``watermark`` read-state
+backend, plus the range indexes both backends rely on. Existing message_not_seen
+rows are converted with ``app.services.read_state.backfill_watermarks`` (see
+``python -m app.services.read_state backfill``) before switching
+MESSAGE_READ_STATE_BACKEND to ``watermark``.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('message_read_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('person_id', sa.Integer(), nullable=False),
+    sa.Column('case_id', sa.Integer(), nullable=False),
+    sa.Column('thread_type', sa.String(length=20), nullable=False),
+    sa.Column('thread_id', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_read_message_id', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['case_id'], ['case.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['person_id'], ['person.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('person_id', 'case_id', 'thread_type', 'thread_id', name='uq_message_read_state_thread')
+    )
+    op.create_index(op.f('ix_message_read_state_id'), 'message_read_state', ['id'], unique=False)
+    op.create_index('ix_message_case_id', 'message', ['case_id', 'id'], unique=False)
+    op.create_index('ix_message_not_seen_person', 'message_not_seen', ['person_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_message_not_seen_person', table_name='message_not_seen')
+    op.drop_index('ix_message_case_id', table_name='message')
+    op.drop_index(op.f('ix_message_read_state_id'), table_name='message_read_state')
+    op.drop_table('message_read_state')
@@ -0,0 +1,51 @@
+"""message reaction counters
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:05:12.000000
+
+Adds message_reaction_count, the per-(message, emoji) counters message listings
+read instead of grouping message_person on every request, and fills it from the
+current message_person reactions. ``python -m app.services.reactions reconcile``
+rebuilds the counters later if they drift.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('message_reaction_count',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('message_id', sa.Integer(), nullable=False),
+    sa.Column('reaction', sa.String(length=10), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['message_id'], ['message.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('message_id', 'reaction', name='uq_message_reaction_count')
+    )
+    op.create_index(op.f('ix_message_reaction_count_id'), 'message_reaction_count', ['id'], unique=False)
+    op.execute(
+        """
+        INSERT INTO message_reaction_count (message_id, reaction, count)
+        SELECT message_id, reaction, COUNT(*)
+        FROM message_person
+        WHERE reaction IS NOT NULL
+        GROUP BY message_id, reaction
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_message_reaction_count_id'), table_name='message_reaction_count')
+    op.drop_table('message_reaction_count')
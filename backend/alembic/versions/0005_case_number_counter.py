@@ -0,0 +1,41 @@
+"""case number counter
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 15:20:41.000000
+
+Adds case_number_counter, one row per year holding the last case number sequence
+allocated. A year's row is created on its first allocation, seeded from the number
+of existing cases for that year so numbering continues where the old COUNT-based
+generator left off.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('case_number_counter',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('last_value', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('year', name='uq_case_number_counter_year')
+    )
+    op.create_index(op.f('ix_case_number_counter_id'), 'case_number_counter', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_case_number_counter_id'), table_name='case_number_counter')
+    op.drop_table('case_number_counter')
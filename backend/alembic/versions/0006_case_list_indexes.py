@@ -0,0 +1,40 @@
+"""case list indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 16:02:37.000000
+
+Indexes behind GET /cases: the access join (app_user_case by user, team_case by
+team, person by app user) and the keyset sort orders (subject name, intake date,
+creation time), each ending in the id tiebreaker.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_app_user_case_user', 'app_user_case', ['app_user_id', 'case_id'], unique=False)
+    op.create_index('ix_team_case_team', 'team_case', ['team_id', 'case_id'], unique=False)
+    op.create_index(op.f('ix_person_app_user_id'), 'person', ['app_user_id'], unique=False)
+    op.create_index('ix_subject_name', 'subject', ['last_name', 'first_name', 'id'], unique=False)
+    op.create_index('ix_case_date_intake', 'case', ['date_intake', 'id'], unique=False)
+    op.create_index('ix_case_created_at', 'case', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_case_created_at', table_name='case')
+    op.drop_index('ix_case_date_intake', table_name='case')
+    op.drop_index('ix_subject_name', table_name='subject')
+    op.drop_index(op.f('ix_person_app_user_id'), table_name='person')
+    op.drop_index('ix_team_case_team', table_name='team_case')
+    op.drop_index('ix_app_user_case_user', table_name='app_user_case')
@@ -0,0 +1,31 @@
+"""case header version
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 17:05:12.000000
+
+Adds case.header_version, incremented by every write to a section shown in the
+case header. The API caches header rows per process under this version and
+derives the header ETag from it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('case', sa.Column('header_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('case', 'header_version')
@@ -0,0 +1,319 @@
+"""
+Response optimisation middleware: conditional GET and compression.
+
+Pure ASGI (no BaseHTTPMiddleware), so streamed responses stay streamed.
+
+- Weak ETags: a complete ``200`` JSON answer to a GET without its own ETag gets
+  ``W/"r-<sha256(body)>"``. Opaque ids are session bound, so the body hash already
+  differs per session. When ``If-None-Match`` matches (a computed tag or one the
+  endpoint set), the client gets ``304`` with no body.
+- Compression: brotli (when the ``brotli`` package is installed) or gzip, chosen from
+  ``Accept-Encoding``, for compressible types once the body reaches
+  ``settings.response_compression_min_bytes``. Streamed bodies (``more_body``) are
+  compressed chunk by chunk, with each chunk flushed, so clients see data as it is produced.
+
+``response_stats.snapshot()`` (GET /admin/http/responses) reports bytes in/out, compression CPU time and 304s
+for this process; the same counters are exported at ``/metrics``.
+"""
+from __future__ import annotations
+
+import threading
+import time
+import zlib
+from hashlib import sha256
+from typing import Optional
+
+from app.core.config import settings
+from app.core.instrumentation import registry
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+# Headers that describe a body and must not be sent with a 304
+_BODY_HEADERS = {b"content-length", b"content-type", b"content-encoding", b"transfer-encoding"}
+
+
+def _header(headers: list, name: bytes) -> Optional[bytes]:
+    for k, v in headers:
+        if k.lower() == name:
+            return v
+    return None
+
+
+def _without(headers: list, *names: bytes) -> list:
+    return [(k, v) for k, v in headers if k.lower() not in names]
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported coding in an Accept-Encoding header: br, then gzip; None for identity."""
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name.strip().lower()] = q
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        if offered.get(coding, offered.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def if_none_match(value: str, etag: bytes) -> bool:
+    # Same weak comparison as app.api.http_cache.etag_matches
+    if value.strip() == "*":
+        return True
+    tag = etag.decode("latin-1")
+    wanted = tag[2:] if tag.startswith("W/") else tag
+    for t in value.split(","):
+        t = t.strip()
+        if (t[2:] if t.startswith("W/") else t) == wanted:
+            return True
+    return False
+
+
+class _Compressor:
+    def __init__(self, coding: str):
+        self.coding = coding
+        if coding == "br":
+            self._c = brotli.Compressor(quality=settings.response_compression_brotli_quality)
+        else:
+            self._c = zlib.compressobj(settings.response_compression_gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, more: bool) -> bytes:
+        if self.coding == "br":
+            out = self._c.process(data) if data else b""
+            return out + (self._c.flush() if more else self._c.finish())
+        out = self._c.compress(data)
+        return out + self._c.flush(zlib.Z_SYNC_FLUSH if more else zlib.Z_FINISH)
+
+
+class ResponseStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {
+            "responses_compressed": 0,
+            "responses_streamed": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "compress_seconds": 0.0,
+            "etags_computed": 0,
+            "not_modified": 0,
+            "not_modified_bytes_saved": 0,
+        }
+        self._by_encoding = {}
+
+    def add(self, **values) -> None:
+        with self._lock:
+            for k, v in values.items():
+                self._counters[k] += v
+
+    def compressed(self, coding: str, bytes_in: int, bytes_out: int, seconds: float) -> None:
+        with self._lock:
+            c = self._counters
+            c["bytes_in"] += bytes_in
+            c["bytes_out"] += bytes_out
+            c["compress_seconds"] += seconds
+            by = self._by_encoding.setdefault(coding, {"bytes_in": 0, "bytes_out": 0, "compress_seconds": 0.0})
+            by["bytes_in"] += bytes_in
+            by["bytes_out"] += bytes_out
+            by["compress_seconds"] += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            c = dict(self._counters)
+            by = {k: dict(v) for k, v in self._by_encoding.items()}
+        c["bytes_saved"] = c["bytes_in"] - c["bytes_out"] + c["not_modified_bytes_saved"]
+        c["compression_ratio"] = round(c["bytes_out"] / c["bytes_in"], 4) if c["bytes_in"] else None
+        c["by_encoding"] = by
+        c["brotli_available"] = brotli is not None
+        return c
+
+
+class ResponseOptimizerMiddleware:
+    def __init__(self, app, stats: Optional[ResponseStats] = None):
+        self.app = app
+        self.stats = stats or response_stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.response_compression_enabled:
+            await self.app(scope, receive, send)
+            return
+        request_headers = scope.get("headers") or []
+        method = scope.get("method", "GET")
+        accept = (_header(request_headers, b"accept-encoding") or b"").decode("latin-1")
+        inm = (_header(request_headers, b"if-none-match") or b"").decode("latin-1")
+        responder = _Responder(
+            send,
+            self.stats,
+            coding=choose_encoding(accept) if method != "HEAD" else None,
+            if_none_match=inm,
+            etag_enabled=method == "GET",
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    def __init__(self, send, stats: ResponseStats, *, coding: Optional[str], if_none_match: str, etag_enabled: bool):
+        self._send = send
+        self.stats = stats
+        self.coding = coding
+        self.if_none_match = if_none_match
+        self.etag_enabled = etag_enabled
+        self.start: Optional[dict] = None
+        self.passthrough = False
+        # Body messages of a response already answered with 304 are dropped
+        self.dropping = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def send(self, message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start = message
+            headers = list(message.get("headers") or [])
+            status = message["status"]
+            ctype = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+            etag = _header(headers, b"etag")
+            if etag is not None and self.if_none_match and status == 200 and if_none_match(self.if_none_match, etag):
+                # The endpoint tagged the response itself and the client holds it: no body
+                self.dropping = True
+                self.start = None
+                self.stats.add(not_modified=1)
+                await self._send_not_modified(headers)
+                return
+            compressible = (
+                status not in (204, 206, 304)
+                and _header(headers, b"content-encoding") is None
+                and ctype.startswith(COMPRESSIBLE_TYPES)
+                and not ctype.startswith("text/event-stream")
+            )
+            self.compressible = compressible
+            self.want_etag = self.etag_enabled and status == 200 and etag is None and ctype.startswith("application/json")
+            if not compressible and not self.want_etag:
+                self.passthrough = True
+                self.start = None
+                await self._send(message)
+            return
+
+        if kind != "http.response.body":
+            await self._send(message)
+            return
+        if self.dropping:
+            return
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not more:
+                await self._send_complete(start, body)
+                return
+            await self._start_stream(start)
+        await self._send_chunk(body, more)
+
+    async def _send_not_modified(self, headers: list) -> None:
+        await self._send({"type": "http.response.start", "status": 304, "headers": _without(headers, *_BODY_HEADERS)})
+        await self._send({"type": "http.response.body", "body": b""})
+
+    async def _send_complete(self, start: dict, body: bytes) -> None:
+        headers = list(start.get("headers") or [])
+        if self.want_etag:
+            etag = f'W/"r-{sha256(body).hexdigest()[:20]}"'.encode("latin-1")
+            headers.append((b"etag", etag))
+            if _header(headers, b"cache-control") is None:
+                headers.append((b"cache-control", b"private, no-cache"))
+            self.stats.add(etags_computed=1)
+            if self.if_none_match and if_none_match(self.if_none_match, etag):
+                self.stats.add(not_modified=1, not_modified_bytes_saved=len(body))
+                await self._send_not_modified(headers)
+                return
+        if self.compressible and self.coding and len(body) >= settings.response_compression_min_bytes:
+            started = time.perf_counter()
+            compressed = _Compressor(self.coding).compress(body, more=False)
+            self.stats.compressed(self.coding, len(body), len(compressed), time.perf_counter() - started)
+            self.stats.add(responses_compressed=1)
+            body = compressed
+            headers = _without(headers, b"content-length")
+            headers += [
+                (b"content-encoding", self.coding.encode("latin-1")),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ]
+            headers = self._vary(headers)
+        elif self.compressible:
+            headers = self._vary(headers)
+        await self._send({**start, "headers": headers})
+        await self._send({"type": "http.response.body", "body": body})
+
+    async def _start_stream(self, start: dict) -> None:
+        headers = list(start.get("headers") or [])
+        if self.compressible and self.coding:
+            self.compressor = _Compressor(self.coding)
+            headers = _without(headers, b"content-length") + [(b"content-encoding", self.coding.encode("latin-1"))]
+            self.stats.add(responses_compressed=1, responses_streamed=1)
+        if self.compressible:
+            headers = self._vary(headers)
+        await self._send({**start, "headers": headers})
+
+    async def _send_chunk(self, body: bytes, more: bool) -> None:
+        if self.compressor is not None:
+            started = time.perf_counter()
+            out = self.compressor.compress(body, more)
+            self.stats.compressed(self.coding, len(body), len(out), time.perf_counter() - started)
+            body = out
+        await self._send({"type": "http.response.body", "body": body, "more_body": more})
+
+    @staticmethod
+    def _vary(headers: list) -> list:
+        vary = _header(headers, b"vary")
+        if vary is None:
+            return headers + [(b"vary", b"Accept-Encoding")]
+        if b"accept-encoding" in vary.lower():
+            return headers
+        return _without(headers, b"vary") + [(b"vary", vary + b", Accept-Encoding")]
+
+
+response_stats = ResponseStats()
+
+
+def _metric_families():
+    s = response_stats.snapshot()
+    yield ("http_response_compressed_total", "counter", "Responses compressed", [({}, s["responses_compressed"])])
+    yield ("http_response_not_modified_total", "counter", "304 answers to If-None-Match", [({}, s["not_modified"])])
+    yield ("http_response_not_modified_bytes_saved_total", "counter", "Body bytes not sent thanks to 304s", [({}, s["not_modified_bytes_saved"])])
+    by = s["by_encoding"]
+    yield ("http_response_compression_bytes_in_total", "counter", "Bytes before compression",
+           [({"encoding": k}, v["bytes_in"]) for k, v in by.items()])
+    yield ("http_response_compression_bytes_out_total", "counter", "Bytes after compression",
+           [({"encoding": k}, v["bytes_out"]) for k, v in by.items()])
+    yield ("http_response_compression_seconds_total", "counter", "CPU time spent compressing",
+           [({"encoding": k}, v["compress_seconds"]) for k, v in by.items()])
+
+
+registry.add_collector(_metric_families)
+
+
+__all__ = [
+    "ResponseOptimizerMiddleware",
+    "ResponseStats",
+    "choose_encoding",
+    "response_stats",
+]
@@ -0,0 +1,31 @@
+"""Conditional GET helpers shared by endpoints that publish their own ETags."""
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    if inm.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" are equivalent for GET revalidation
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for tag in inm.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == wanted:
+            return True
+    return False
+
+
+def not_modified_or_tag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Return a 304 response when the client already holds ``etag``; otherwise set the
+    ETag on ``response`` (the one FastAPI injects) and return None.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,69 @@
+"""
+Fast JSON responses.
+
+``FastJSONResponse`` is the app's default response class. It renders with orjson
+but keeps the standard encoder's output: dates and times as ``isoformat()``,
+Decimals as int/float, sets as lists, and pydantic models dumped in JSON mode.
+
+Endpoints whose content is already validated can skip FastAPI's second pass
+(``response_model`` validation + ``jsonable_encoder``) by returning a response
+directly; ``response_model=`` can stay on the route for the OpenAPI schema:
+
+- ``validated_response(items, List[MessageRead])``: models serialized by pydantic
+  (field serializers, such as opaque ids, run once)
+- ``FastJSONResponse(rows)``: plain dict rows straight to orjson
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def _default(o: Any) -> Any:
+    # Same conversions as fastapi.encoders.jsonable_encoder for the types orjson leaves to us
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, BaseModel):
+        return o.model_dump(mode="json", by_alias=True)
+    if isinstance(o, Decimal):
+        return int(o) if o.as_tuple().exponent >= 0 else float(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if isinstance(o, Enum):
+        return o.value
+    if isinstance(o, bytes):
+        return o.decode()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def _adapter(tp) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def validated_response(content: Any, tp, status_code: int = 200) -> Response:
+    """Serialize ``content`` (already instances of ``tp``) without validating it again."""
+    return Response(
+        content=_adapter(tp).dump_json(content, by_alias=True),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+__all__ = ["FastJSONResponse", "dumps", "validated_response"]
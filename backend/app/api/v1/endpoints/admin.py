@@ -4,7 +4,41 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.dependencies import require_permission
 from app.db.session import get_db
 from app.core.id_codec import decode_id, OpaqueIdError
 
 router = APIRouter(prefix="/admin")
+
+
+@router.get(
+    "/maintenance/jobs",
+    summary="Maintenance scheduler jobs and their last run (this process)",
+    dependencies=[Depends(require_permission("ADMIN"))],
+)
+async def maintenance_jobs():
+    from app.services.scheduler import maintenance_scheduler
+
+    return maintenance_scheduler.stats()
+
+
+@router.get(
+    "/http/responses",
+    summary="Response compression and 304 counters (this process)",
+    dependencies=[Depends(require_permission("ADMIN"))],
+)
+async def http_response_stats():
+    from app.api.compression import response_stats
+
+    return response_stats.snapshot()
+
+
+@router.get(
+    "/db/slow-queries",
+    summary="Most recent slow SQL statements, normalised (this process)",
+    dependencies=[Depends(require_permission("ADMIN"))],
+)
+async def slow_query_log():
+    from app.core.instrumentation import slow_queries
+
+    return list(reversed(slow_queries))
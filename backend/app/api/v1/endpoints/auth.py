@@ -8,14 +8,13 @@ import uuid
 from app.db.session import get_db
 from app.schemas.auth import LoginRequest, TokenResponse, UserInfo, PasswordResetRequest, PasswordResetConfirm, MessageResponse
 from app.schemas.user import UserRead, UserCreate
-from app.services.auth import authenticate_user, create_user_session, invalidate_session, cleanup_expired_sessions, extend_session, validate_session, get_user_permission_codes
+from app.services.auth import authenticate_user, create_user_session, invalidate_session, extend_session, validate_session, get_user_permission_codes
 from app.core.security import create_access_token, get_password_hash
 from app.core.config import settings
 from app.api.dependencies import get_current_user, security, get_bearer_or_cookie_token, validate_csrf
 from app.db.models.app_user import AppUser
-from app.services.telegram import send_telegram_dm
 from app.services.user import create_user, get_user_by_email, get_user_by_id
-from app.services.email import send_email
+from app.services.notifications import enqueue_email, enqueue_telegram, notification_worker
 import logging
 
 router = APIRouter()
@@ -37,7 +36,8 @@ async def register(
     # Create new user
     user = await create_user(db, user_data)
 
-    # Notify admin about new registration (non-blocking in terms of success; log failures)
+    # Notify admin about new registration. Messages are queued and delivered by the
+    # notification worker, so a slow SMTP/Telegram round trip never delays the response.
     try:
         admin_email = getattr(settings, "admin_notification_email", None)
         if admin_email:
@@ -50,12 +50,14 @@ async def register(
                 f"Phone: {user.phone}\n"
                 f"Telegram: {user.telegram}\n"
             )
-            send_email(to=admin_email, subject=subject, text=text)
+            enqueue_email(db, to=admin_email, subject=subject, text=text)
             if user.telegram:
-                send_telegram_dm(to=user.telegram, text=text)
+                enqueue_telegram(db, to=user.telegram, text=text)
+            await db.commit()
+            notification_worker.wake()
     except Exception as e:
         logging.getLogger(__name__).warning(
-            "Failed to send admin registration notification: %s", e
+            "Failed to queue admin registration notification: %s", e
         )
 
     return user
@@ -129,12 +131,6 @@ async def login(
             detail="Account is inactive"
         )
 
-    # Occasionally cleanup old sessions (every ~1% of logins)
-    import random
-    if random.randint(1, 100) == 1:
-        await cleanup_expired_sessions(db, older_than_days=7)
-
-
     # Create session
     jti = str(uuid.uuid4())
     await create_user_session(
@@ -321,7 +317,7 @@ async def request_password_reset(
     """Request a password reset link to be emailed to the user.
     - Verifies the email exists (404 if not).
     - Creates a short-lived token stored in app_user_session.
-    - Sends an email containing a link with the token.
+    - Queues an email containing a link with the token.
     - Returns success on completion.
     """
     email = str(payload.email)
@@ -376,8 +372,10 @@ async def request_password_reset(
         """
     )
 
-    # Send email via configured backend (memory/console/smtp)
-    send_email(to=email, subject=subject, text=text, html=html)
+    # Queue the email with the token; the notification worker sends it via the configured backend
+    enqueue_email(db, to=email, subject=subject, text=text, html=html)
+    await db.commit()
+    notification_worker.wake()
 
     return {"message": "Password reset email sent"}
 
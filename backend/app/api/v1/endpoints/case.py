@@ -1,17 +1,20 @@
 from operator import truediv
 from typing import List, Optional
-from datetime import date as Date
+from datetime import date as Date, datetime
+import base64
+import json
 
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, Request, Response
 from sqlalchemy import select, asc, exists, or_, and_
 import sqlalchemy as sa
 from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from app.core.id_codec import decode_id, OpaqueIdError, encode_id
+from app.core.id_codec import decode_id, OpaqueIdError, encode_id, get_current_session
+from app.api.http_cache import etag_matches, not_modified_or_tag
 from app.api.dependencies import get_current_user, require_permission
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db.models.case import Case
 from app.db.models.subject import Subject
 from app.db.models.app_user_case import AppUserCase
@@ -25,17 +28,30 @@ from app.db.models.case_circumstances import CaseCircumstances
 from app.db.models.case_management import CaseManagement
 from app.db.models.case_pattern_of_life import CasePatternOfLife
 from app.db.models.ref_value import RefValue
-from app.db.models.case_disposition import CaseDisposition
+from app.services.reference_data import get_reference_data
+from app.services.victimology_catalog import get_victimology_catalog as load_victimology_catalog, victimology_catalog_cache
+from app.services.case_header import bump_case_header, case_header_etag, case_header_version, get_case_header_row
+from .case_utils import accessible_cases, case_number_or_id
 from app.db.models.case_exploitation import CaseExploitation
 from app.db.models.case_victimology import CaseVictimology
-from app.db.models.victimology import victimology as Victimology
-from app.db.models.victimology_category import victimologyCategory as VictimologyCategory
 from app.db.models.case_search_urgency import CaseSearchUrgency
 from app.schemas.case_search_urgency import CaseSearchUrgencyUpsert
 from app.schemas.case_demographics import CaseDemographicsUpsert
 from app.schemas.case_management import CaseManagementUpsert
 from app.schemas.case_pattern_of_life import CasePatternOfLifeUpsert
 from app.schemas.case_circumstances import CaseCircumstancesUpsert
+from app.schemas.case_intake import CaseIntakeSave
+from app.services.case_intake import (
+    circumstances_values,
+    decode_ref,
+    demographics_values,
+    management_values,
+    pattern_of_life_values,
+    save_case_intake,
+    search_urgency_values,
+    sync_case_exploitation,
+    upsert_case_section,
+)
 
 
 
@@ -51,6 +67,7 @@ from . import case_persons as _case_persons
 from . import case_subjects as _case_subjects
 from . import tasks as _case_tasks
 from . import ops_plans as _case_ops_plans
+from . import workspace as _case_workspace
 
 router.include_router(_case_files.router)
 router.include_router(_case_messages.router)
@@ -61,6 +78,7 @@ router.include_router(_case_persons.router)
 router.include_router(_case_subjects.router)
 router.include_router(_case_tasks.router)
 router.include_router(_case_ops_plans.router)
+router.include_router(_case_workspace.router)
 
 # ---------- Helper utilities ----------
 
@@ -113,7 +131,7 @@ async def can_user_access_case(db: AsyncSession, user_id: int, case_id: int) ->
 
 @router.get("/select", summary="List active cases for selection")
 async def list_cases_for_select(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AppUser = Depends(get_current_user),
 ):
     # Build base query: Only active cases
@@ -132,21 +150,8 @@ async def list_cases_for_select(
 
     # Apply access filtering unless user has CASES.ALL_CASES
     if not await user_has_permission(db, current_user.id, "CASES.ALL_CASES"):
-        # EXISTS subquery: direct user-case assignment
-        direct_exists = exists(
-            select(1).where(and_(AppUserCase.app_user_id == current_user.id, AppUserCase.case_id == Case.id))
-        )
-
-        # EXISTS subquery: team membership path person -> person_team -> team_case
-        team_exists = exists(
-            select(1)
-            .select_from(Person)
-            .join(PersonTeam, PersonTeam.person_id == Person.id)
-            .join(TeamCase, TeamCase.team_id == PersonTeam.team_id)
-            .where(and_(Person.app_user_id == current_user.id, TeamCase.case_id == Case.id))
-        )
-
-        q = q.where(or_(direct_exists, team_exists))
+        acl = accessible_cases(current_user.id)
+        q = q.join(acl, acl.c.case_id == Case.id)
 
     q = q.order_by(asc(Subject.last_name), asc(Subject.first_name))
 
@@ -165,288 +170,384 @@ async def list_cases_for_select(
     return items
 
 
-@router.get("/by-number/{case_number}", summary="Get case header by case number")
-async def get_case_by_number(
-    case_number: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: AppUser = Depends(get_current_user),
-):
-    # Locate the case by its public number
-    res = await db.execute(select(Case).where(Case.case_number == case_number))
-    case_row = res.scalar_one_or_none()
-    if case_row is None:
-        raise HTTPException(status_code=404, detail="Case not found")
+# ---------- Paginated case list ----------
 
-    # Access control
-    if not await can_user_access_case(db, current_user.id, int(case_row.id)):
-        raise HTTPException(status_code=404, detail="Case not found")
+CASE_LIST_FIELDS = (
+    "id", "raw_db_id", "case_number", "name", "photo_url", "subject_id",
+    "inactive", "date_intake", "date_missing", "state", "missing_status",
+)
+CASE_LIST_DEFAULT_FIELDS = ("id", "raw_db_id", "name", "photo_url", "case_number")
+CASE_LIST_MAX_LIMIT = 200
 
-    # Fetch joins: subject, demographics, circumstances, management, disposition + ref codes
-    SexRV = aliased(RefValue)
-    RaceRV = aliased(RefValue)
-    CsecRV = aliased(RefValue)
-    MstatRV = aliased(RefValue)
-    MclassRV = aliased(RefValue)
-    ReqByRV = aliased(RefValue)
-    # Disposition ref aliases
-    ScopeRV = aliased(RefValue)
-    ClassRV = aliased(RefValue)
-    StatusRV = aliased(RefValue)
-    LivingRV = aliased(RefValue)
-    FoundByRV = aliased(RefValue)
 
-    q = (
-        select(
-            Case.id.label("case_id"),
-            Case.case_number,
-            Case.date_intake,
-            Case.inactive,
-            Subject.id.label("subject_id"),
-            Subject.first_name,
-            Subject.last_name,
-            Subject.middle_name,
-            Subject.nicknames,
-            Subject.profile_pic.isnot(None).label("has_pic"),
-            CaseDemographics.age_when_missing,
-            CaseDemographics.date_of_birth,
-            CaseDemographics.height,
-            CaseDemographics.weight,
-            CaseDemographics.hair_color,
-            CaseDemographics.hair_length,
-            CaseDemographics.eye_color,
-            CaseDemographics.identifying_marks,
-            CaseDemographics.sex_id,
-            CaseDemographics.race_id,
-            SexRV.code.label("sex_code"),
-            RaceRV.code.label("race_code"),
-            CaseCircumstances.date_missing,
-            CaseManagement.consent_sent,
-            CaseManagement.consent_returned,
-            CaseManagement.flyer_complete,
-            CaseManagement.ottic,
-            CaseManagement.csec_id,
-            CaseManagement.missing_status_id,
-            CaseManagement.classification_id,
-            CaseManagement.requested_by_id,
-            CsecRV.code.label("csec_code"),
-            MstatRV.code.label("missing_status_code"),
-            MclassRV.code.label("classification_code"),
-            ReqByRV.code.label("requested_by_code"),
-            CaseManagement.ncic_case_number,
-            CaseManagement.ncmec_case_number,
-            CaseManagement.le_case_number,
-            CaseManagement.le_24hour_contact,
-            CaseManagement.ss_case_number,
-            CaseManagement.ss_24hour_contact,
-            CaseManagement.jpo_case_number,
-            CaseManagement.jpo_24hour_contact,
-            CasePatternOfLife.school,
-            CasePatternOfLife.grade,
-            CasePatternOfLife.missing_classes,
-            CasePatternOfLife.school_laptop,
-            CasePatternOfLife.school_laptop_taken,
-            CasePatternOfLife.school_address,
-            CasePatternOfLife.employed,
-            CasePatternOfLife.employer,
-            CasePatternOfLife.work_hours,
-            CasePatternOfLife.employer_address,
-            CasePatternOfLife.confidants,
-            # Disposition
-            CaseDisposition.shepherds_contributed_intel,
-            CaseDisposition.date_found,
-            CaseDisposition.scope_id,
-            CaseDisposition.class_id,
-            CaseDisposition.status_id,
-            CaseDisposition.living_id,
-            CaseDisposition.found_by_id,
-            ScopeRV.code.label("scope_code"),
-            ClassRV.code.label("class_code"),
-            StatusRV.code.label("status_code"),
-            LivingRV.code.label("living_code"),
-            FoundByRV.code.label("found_by_code"),
+def _case_sort_keys(sort: str):
+    """Keyset columns for a sort, ending in the case id tiebreaker."""
+    if sort == "name":
+        return [Subject.last_name, Subject.first_name, Case.id]
+    if sort == "case_number":
+        return [Case.case_number, Case.id]
+    if sort == "date_intake":
+        return [sa.func.coalesce(Case.date_intake, sa.literal(Date(1, 1, 1), sa.Date)), Case.id]
+    if sort == "created":
+        return [Case.created_at, Case.id]
+    raise HTTPException(status_code=400, detail="Invalid sort")
+
+
+def _encode_case_cursor(sort: str, values: list) -> str:
+    raw = json.dumps([sort, [v.isoformat() if isinstance(v, (Date, datetime)) else v for v in values]])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+# Kind of each keyset value before the case id tiebreaker, per sort (see _case_sort_keys)
+_CASE_CURSOR_KINDS = {
+    "name": ("text", "text"),
+    "case_number": ("text",),
+    "date_intake": ("date",),
+    "created": ("datetime",),
+}
+
+
+def _decode_case_cursor(sort: str, cursor: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, values = json.loads(raw)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort")
+    kinds = _CASE_CURSOR_KINDS.get(sort)
+    if kinds is None or not isinstance(values, list) or len(values) != len(kinds) + 1:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    *keys, case_id = values
+    if not isinstance(case_id, int) or isinstance(case_id, bool):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    decoded = []
+    for kind, value in zip(kinds, keys):
+        if kind == "text":
+            if value is not None and not isinstance(value, str):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            decoded.append(value)
+            continue
+        try:
+            decoded.append(Date.fromisoformat(value) if kind == "date" else datetime.fromisoformat(value))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return decoded + [case_id]
+
+
+async def _list_cases(
+    db: AsyncSession,
+    user_id: int,
+    *,
+    fields: Optional[List[str]] = None,
+    status: str = "active",
+    state_id: Optional[int] = None,
+    missing_status_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    intake_from: Optional[Date] = None,
+    intake_to: Optional[Date] = None,
+    missing_from: Optional[Date] = None,
+    missing_to: Optional[Date] = None,
+    sort: str = "name",
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> dict:
+    """One page of the cases ``user_id`` can access, plus the cursor for the next page."""
+    fields = list(fields or CASE_LIST_DEFAULT_FIELDS)
+    unknown = [f for f in fields if f not in CASE_LIST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order")
+    limit = max(1, min(int(limit), CASE_LIST_MAX_LIMIT))
+    keys = _case_sort_keys(sort)
+
+    needs_subject = sort == "name" or {"name", "photo_url", "subject_id"} & set(fields)
+    needs_management = missing_status_id is not None or "missing_status" in fields
+    needs_circumstances = (
+        state_id is not None or missing_from is not None or missing_to is not None
+        or {"state", "date_missing"} & set(fields)
+    )
+
+    columns = [Case.id.label("case_id"), Case.case_number, Case.inactive, Case.date_intake, Case.created_at, Case.subject_id]
+    q = select(*columns).select_from(Case)
+    if needs_subject:
+        q = q.join(Subject, Subject.id == Case.subject_id).add_columns(
+            Subject.first_name, Subject.last_name, Subject.profile_pic.isnot(None).label("has_pic")
         )
-        .join(Subject, Subject.id == Case.subject_id)
-        .join(CaseDemographics, CaseDemographics.case_id == Case.id, isouter=True)
-        .join(SexRV, SexRV.id == CaseDemographics.sex_id, isouter=True)
-        .join(RaceRV, RaceRV.id == CaseDemographics.race_id, isouter=True)
-        .join(CaseCircumstances, CaseCircumstances.case_id == Case.id, isouter=True)
-        .join(CaseManagement, CaseManagement.case_id == Case.id, isouter=True)
-        .join(CsecRV, CsecRV.id == CaseManagement.csec_id, isouter=True)
-        .join(MstatRV, MstatRV.id == CaseManagement.missing_status_id, isouter=True)
-        .join(MclassRV, MclassRV.id == CaseManagement.classification_id, isouter=True)
-        .join(ReqByRV, ReqByRV.id == CaseManagement.requested_by_id, isouter=True)
-        .join(CasePatternOfLife, CasePatternOfLife.case_id == Case.id, isouter=True)
-        .join(CaseDisposition, CaseDisposition.case_id == Case.id, isouter=True)
-        .join(ScopeRV, ScopeRV.id == CaseDisposition.scope_id, isouter=True)
-        .join(ClassRV, ClassRV.id == CaseDisposition.class_id, isouter=True)
-        .join(StatusRV, StatusRV.id == CaseDisposition.status_id, isouter=True)
-        .join(LivingRV, LivingRV.id == CaseDisposition.living_id, isouter=True)
-        .join(FoundByRV, FoundByRV.id == CaseDisposition.found_by_id, isouter=True)
-        .where(Case.id == case_row.id)
+    if needs_management:
+        q = q.outerjoin(CaseManagement, CaseManagement.case_id == Case.id).add_columns(CaseManagement.missing_status_id)
+    if needs_circumstances:
+        q = q.outerjoin(CaseCircumstances, CaseCircumstances.case_id == Case.id).add_columns(
+            CaseCircumstances.state_id, CaseCircumstances.date_missing
+        )
+
+    # Access resolves through one join unless the user can see every case
+    if not await user_has_permission(db, user_id, "CASES.ALL_CASES"):
+        acl = accessible_cases(user_id)
+        q = q.join(acl, acl.c.case_id == Case.id)
+
+    if status == "active":
+        q = q.where(Case.inactive == False)  # noqa: E712
+    elif status == "inactive":
+        q = q.where(Case.inactive == True)  # noqa: E712
+    elif status != "all":
+        raise HTTPException(status_code=400, detail="Invalid status")
+    if state_id is not None:
+        q = q.where(CaseCircumstances.state_id == state_id)
+    if missing_status_id is not None:
+        q = q.where(CaseManagement.missing_status_id == missing_status_id)
+    if team_id is not None:
+        q = q.where(Case.id.in_(select(TeamCase.case_id).where(TeamCase.team_id == team_id)))
+    if intake_from is not None:
+        q = q.where(Case.date_intake >= intake_from)
+    if intake_to is not None:
+        q = q.where(Case.date_intake <= intake_to)
+    if missing_from is not None:
+        q = q.where(CaseCircumstances.date_missing >= missing_from)
+    if missing_to is not None:
+        q = q.where(CaseCircumstances.date_missing <= missing_to)
+
+    if cursor:
+        after = sa.tuple_(*[sa.literal(v) for v in _decode_case_cursor(sort, cursor)])
+        q = q.where(sa.tuple_(*keys) > after if order == "asc" else sa.tuple_(*keys) < after)
+    q = q.add_columns(*[k.label(f"_k{i}") for i, k in enumerate(keys)])
+    q = q.order_by(*[k.asc() if order == "asc" else k.desc() for k in keys]).limit(limit + 1)
+
+    rows = (await db.execute(q)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    ref = await get_reference_data(db) if {"state", "missing_status"} & set(fields) else None
+    items = []
+    for r in rows:
+        item = {}
+        for f in fields:
+            if f == "id":
+                item["id"] = encode_id("case", int(r.case_id))
+            elif f == "raw_db_id":
+                item["raw_db_id"] = int(r.case_id)
+            elif f == "case_number":
+                item["case_number"] = r.case_number
+            elif f == "name":
+                item["name"] = f"{r.first_name} {r.last_name}".strip()
+            elif f == "photo_url":
+                item["photo_url"] = (
+                    f"/api/v1/media/pfp/subject/{encode_id('subject', int(r.subject_id))}?s=xs" if r.has_pic else "/images/pfp-generic.png"
+                )
+            elif f == "subject_id":
+                item["subject_id"] = encode_id("subject", int(r.subject_id))
+            elif f == "inactive":
+                item["inactive"] = bool(r.inactive)
+            elif f == "date_intake":
+                item["date_intake"] = r.date_intake.isoformat() if r.date_intake else None
+            elif f == "date_missing":
+                item["date_missing"] = r.date_missing.isoformat() if r.date_missing else None
+            elif f == "state":
+                item["state"] = ref.code(r.state_id)
+            elif f == "missing_status":
+                item["missing_status"] = ref.name(r.missing_status_id)
+        items.append(item)
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = _encode_case_cursor(sort, [getattr(last, f"_k{i}") for i in range(len(keys))])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _opt_decode(model: str, opaque_id: Optional[str]) -> Optional[int]:
+    return _decode_or_404(model, opaque_id) if opaque_id else None
+
+
+@router.get("", summary="List cases (filtered, sorted, keyset paginated)")
+async def list_cases(
+    fields: Optional[str] = None,
+    status: str = "active",
+    state_id: Optional[str] = None,
+    missing_status_id: Optional[str] = None,
+    team_id: Optional[str] = None,
+    intake_from: Optional[Date] = None,
+    intake_to: Optional[Date] = None,
+    missing_from: Optional[Date] = None,
+    missing_to: Optional[Date] = None,
+    sort: str = "name",
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AppUser = Depends(get_current_user),
+):
+    """
+    Cases the caller can access. ``fields`` is a comma-separated projection (default
+    id, raw_db_id, name, photo_url, case_number); ``status`` is active | inactive | all;
+    ``sort`` is name | case_number | date_intake | created. Pass ``next_cursor`` from the
+    previous page as ``cursor`` to continue.
+    """
+    return await _list_cases(
+        db,
+        int(current_user.id),
+        fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        status=status,
+        state_id=_opt_decode("ref_value", state_id),
+        missing_status_id=_opt_decode("ref_value", missing_status_id),
+        team_id=_opt_decode("team", team_id),
+        intake_from=intake_from,
+        intake_to=intake_to,
+        missing_from=missing_from,
+        missing_to=missing_to,
+        sort=sort,
+        order=order,
+        cursor=cursor,
+        limit=limit,
     )
-    row = (await db.execute(q)).first()
-    if not row:
-        raise HTTPException(status_code=404, detail="Case not found")
 
-    (
-        case_id,
-        case_number_val,
-        date_intake,
-        inactive,
-        subject_id,
-        first,
-        last,
-        middle,
-        nicknames,
-        has_pic,
-        age_when_missing,
-        date_of_birth,
-        height,
-        weight,
-        hair_color,
-        hair_length,
-        eye_color,
-        identifying_marks,
-        sex_id,
-        race_id,
-        sex_code,
-        race_code,
-        date_missing,
-        consent_sent,
-        consent_returned,
-        flyer_complete,
-        ottic,
-        csec_id,
-        missing_status_id,
-        classification_id,
-        mgmt_requested_by_id,
-        csec_code,
-        missing_status_code,
-        classification_code,
-        mgmt_requested_by_code,
-        ncic_case_number,
-        ncmec_case_number,
-        le_case_number,
-        le_24hour_contact,
-        ss_case_number,
-        ss_24hour_contact,
-        jpo_case_number,
-        jpo_24hour_contact,
-        pol_school,
-        pol_grade,
-        pol_missing_classes,
-        pol_school_laptop,
-        pol_school_laptop_taken,
-        pol_school_address,
-        pol_employed,
-        pol_employer,
-        pol_work_hours,
-        pol_employer_address,
-        pol_confidants,
-        disp_shep_intel,
-        disp_date_found,
-        disp_scope_id,
-        disp_class_id,
-        disp_status_id,
-        disp_living_id,
-        disp_found_by_id,
-        disp_scope_code,
-        disp_class_code,
-        disp_status_code,
-        disp_living_code,
-        disp_found_by_code,
-    ) = row
-
-    subject_opaque = encode_id("subject", int(subject_id))
-    case_opaque = encode_id("case", int(case_id))
+
+def _render_case_header(r: dict, ref) -> dict:
+    """Header response for a flat row from services.case_header; ref codes come from ``ref``."""
+    def _int(v):
+        return int(v) if v is not None else None
+
+    def _iso(v):
+        return v.isoformat() if v is not None else None
+
+    subject_opaque = encode_id("subject", int(r["subject_id"]))
+    case_opaque = encode_id("case", int(r["case_id"]))
+    has_pic = bool(r["has_pic"])
 
     return {
         "case": {
             "id": case_opaque,
-            "raw_db_id": int(case_id),
-            "case_number": case_number_val,
-            "date_intake": date_intake.isoformat() if date_intake is not None else None,
-            "inactive": bool(inactive) if inactive is not None else False,
+            "raw_db_id": int(r["case_id"]),
+            "case_number": r["case_number"],
+            "date_intake": _iso(r["date_intake"]),
+            "inactive": bool(r["inactive"]),
             "subject_id": subject_opaque,
         },
         "subject": {
             "id": subject_opaque,
-            "first_name": first,
-            "last_name": last,
-            "middle_name": middle,
-            "nicknames": nicknames,
-            "has_pic": bool(has_pic),
+            "first_name": r["first_name"],
+            "last_name": r["last_name"],
+            "middle_name": r["middle_name"],
+            "nicknames": r["nicknames"],
+            "has_pic": has_pic,
             "photo_url": f"/api/v1/media/pfp/subject/{subject_opaque}?s=sm" if has_pic else "/images/pfp-generic.png",
         },
         "demographics": {
-            "age_when_missing": int(age_when_missing) if age_when_missing is not None else None,
-            "date_of_birth": date_of_birth.isoformat() if date_of_birth is not None else None,
-            "height": height,
-            "weight": weight,
-            "hair_color": hair_color,
-            "hair_length": hair_length,
-            "eye_color": eye_color,
-            "identifying_marks": identifying_marks,
-            "sex_id": int(sex_id) if sex_id is not None else None,
-            "race_id": int(race_id) if race_id is not None else None,
-            "sex_code": sex_code,
-            "race_code": race_code,
+            "age_when_missing": _int(r["age_when_missing"]),
+            "date_of_birth": _iso(r["date_of_birth"]),
+            "height": r["height"],
+            "weight": r["weight"],
+            "hair_color": r["hair_color"],
+            "hair_length": r["hair_length"],
+            "eye_color": r["eye_color"],
+            "identifying_marks": r["identifying_marks"],
+            "sex_id": _int(r["sex_id"]),
+            "race_id": _int(r["race_id"]),
+            "sex_code": ref.code(r["sex_id"]),
+            "race_code": ref.code(r["race_id"]),
         },
         "circumstances": {
-            "date_missing": date_missing.isoformat() if date_missing is not None else None,
+            "date_missing": _iso(r["date_missing"]),
         },
         "management": {
-            "consent_sent": bool(consent_sent) if consent_sent is not None else False,
-            "consent_returned": bool(consent_returned) if consent_returned is not None else False,
-            "flyer_complete": bool(flyer_complete) if flyer_complete is not None else False,
-            "ottic": bool(ottic) if ottic is not None else False,
-            "csec_id": int(csec_id) if csec_id is not None else None,
-            "missing_status_id": int(missing_status_id) if missing_status_id is not None else None,
-            "classification_id": int(classification_id) if classification_id is not None else None,
-            "requested_by_id": int(mgmt_requested_by_id) if mgmt_requested_by_id is not None else None,
-            "csec_code": csec_code,
-            "missing_status_code": missing_status_code,
-            "classification_code": classification_code,
-            "requested_by_code": mgmt_requested_by_code,
-            "ncic_case_number": ncic_case_number,
-            "ncmec_case_number": ncmec_case_number,
-            "le_case_number": le_case_number,
-            "le_24hour_contact": le_24hour_contact,
-            "ss_case_number": ss_case_number,
-            "ss_24hour_contact": ss_24hour_contact,
-            "jpo_case_number": jpo_case_number,
-            "jpo_24hour_contact": jpo_24hour_contact,
+            "consent_sent": bool(r["consent_sent"]),
+            "consent_returned": bool(r["consent_returned"]),
+            "flyer_complete": bool(r["flyer_complete"]),
+            "ottic": bool(r["ottic"]),
+            "csec_id": _int(r["csec_id"]),
+            "missing_status_id": _int(r["missing_status_id"]),
+            "classification_id": _int(r["classification_id"]),
+            "requested_by_id": _int(r["requested_by_id"]),
+            "csec_code": ref.code(r["csec_id"]),
+            "missing_status_code": ref.code(r["missing_status_id"]),
+            "classification_code": ref.code(r["classification_id"]),
+            "requested_by_code": ref.code(r["requested_by_id"]),
+            "ncic_case_number": r["ncic_case_number"],
+            "ncmec_case_number": r["ncmec_case_number"],
+            "le_case_number": r["le_case_number"],
+            "le_24hour_contact": r["le_24hour_contact"],
+            "ss_case_number": r["ss_case_number"],
+            "ss_24hour_contact": r["ss_24hour_contact"],
+            "jpo_case_number": r["jpo_case_number"],
+            "jpo_24hour_contact": r["jpo_24hour_contact"],
         },
         "pattern_of_life": {
-            "school": pol_school,
-            "grade": pol_grade,
-            "missing_classes": bool(pol_missing_classes) if pol_missing_classes is not None else False,
-            "school_laptop": bool(pol_school_laptop) if pol_school_laptop is not None else False,
-            "school_laptop_taken": bool(pol_school_laptop_taken) if pol_school_laptop_taken is not None else False,
-            "school_address": pol_school_address,
-            "employed": bool(pol_employed) if pol_employed is not None else False,
-            "employer": pol_employer,
-            "work_hours": pol_work_hours,
-            "employer_address": pol_employer_address,
-            "confidants": pol_confidants,
+            "school": r["school"],
+            "grade": r["grade"],
+            "missing_classes": bool(r["missing_classes"]),
+            "school_laptop": bool(r["school_laptop"]),
+            "school_laptop_taken": bool(r["school_laptop_taken"]),
+            "school_address": r["school_address"],
+            "employed": bool(r["employed"]),
+            "employer": r["employer"],
+            "work_hours": r["work_hours"],
+            "employer_address": r["employer_address"],
+            "confidants": r["confidants"],
         },
         "disposition": {
-            "shepherds_contributed_intel": bool(disp_shep_intel) if disp_shep_intel is not None else False,
-            "date_found": disp_date_found.isoformat() if disp_date_found is not None else None,
-            "scope_id": int(disp_scope_id) if disp_scope_id is not None else None,
-            "class_id": int(disp_class_id) if disp_class_id is not None else None,
-            "status_id": int(disp_status_id) if disp_status_id is not None else None,
-            "living_id": int(disp_living_id) if disp_living_id is not None else None,
-            "found_by_id": int(disp_found_by_id) if disp_found_by_id is not None else None,
-            "scope_code": disp_scope_code,
-            "class_code": disp_class_code,
-            "status_code": disp_status_code,
-            "living_code": disp_living_code,
-            "found_by_code": disp_found_by_code,
+            "shepherds_contributed_intel": bool(r["shepherds_contributed_intel"]),
+            "date_found": _iso(r["date_found"]),
+            "scope_id": _int(r["disp_scope_id"]),
+            "class_id": _int(r["disp_class_id"]),
+            "status_id": _int(r["disp_status_id"]),
+            "living_id": _int(r["disp_living_id"]),
+            "found_by_id": _int(r["disp_found_by_id"]),
+            "scope_code": ref.code(r["disp_scope_id"]),
+            "class_code": ref.code(r["disp_class_id"]),
+            "status_code": ref.code(r["disp_status_id"]),
+            "living_code": ref.code(r["disp_living_id"]),
+            "found_by_code": ref.code(r["disp_found_by_id"]),
         }
     }
 
 
+async def _load_case_header(db: AsyncSession, case_db_id: int, version: Optional[int] = None) -> dict:
+    """
+    Composite case header (case, subject, demographics, circumstances, management,
+    pattern_of_life, disposition). Callers are responsible for authorization.
+    """
+    row = await get_case_header_row(db, int(case_db_id), version)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+    # Ref codes are resolved from the in-memory reference snapshot instead of
+    # joining ref_value once per coded column.
+    return _render_case_header(row, await get_reference_data(db))
+
+
+async def _case_header_response(request: Request, response: Response, db: AsyncSession, case_db_id: int, version: int):
+    ref = await get_reference_data(db)
+    etag = case_header_etag(case_db_id, version, ref.version, get_current_session())
+    not_modified = not_modified_or_tag(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    row = await get_case_header_row(db, case_db_id, version)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+    return _render_case_header(row, ref)
+
+
+@router.get("/by-number/{case_number}", summary="Get case header by case number")
+async def get_case_by_number(
+    case_number: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: AppUser = Depends(get_current_user),
+):
+    # Locate the case by its public number
+    res = await db.execute(select(Case.id, Case.header_version).where(Case.case_number == case_number))
+    case_row = res.first()
+    if case_row is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+
+    # Access control
+    if not await can_user_access_case(db, current_user.id, int(case_row.id)):
+        raise HTTPException(status_code=404, detail="Case not found")
+
+    return await _case_header_response(request, response, db, int(case_row.id), int(case_row.header_version))
+
 
 @router.put("/{case_id}/demographics", summary="Upsert case demographics")
 async def upsert_case_demographics(
@@ -460,39 +561,8 @@ async def upsert_case_demographics(
     if not await can_user_access_case(db, current_user.id, int(case_db_id)):
         raise HTTPException(status_code=404, detail="Case not found")
 
-    # Find existing demographics row for case
-    res = await db.execute(select(CaseDemographics).where(CaseDemographics.case_id == int(case_db_id)))
-    row = res.scalar_one_or_none()
-
-    # Decode optional ref ids (opaque -> int)
-    def _dec(model: str, oid: Optional[str]):
-        if not oid:
-            return None
-        try:
-            return decode_id(model, oid)
-        except Exception:
-            return None
-
-    updates = {
-        "date_of_birth": payload.date_of_birth,
-        "age_when_missing": payload.age_when_missing,
-        "height": payload.height,
-        "weight": payload.weight,
-        "hair_color": payload.hair_color,
-        "hair_length": payload.hair_length,
-        "eye_color": payload.eye_color,
-        "identifying_marks": payload.identifying_marks,
-        "sex_id": _dec("ref_value", payload.sex_id) if payload.sex_id is not None else None,
-        "race_id": _dec("ref_value", payload.race_id) if payload.race_id is not None else None,
-    }
-
-    if row is None:
-        row = CaseDemographics(case_id=int(case_db_id), **updates)
-        db.add(row)
-    else:
-        for k, v in updates.items():
-            setattr(row, k, v)
-
+    await upsert_case_section(db, CaseDemographics, int(case_db_id), demographics_values(payload))
+    await bump_case_header(db, case_id=int(case_db_id))
     await db.commit()
     return {"ok": True}
 
@@ -509,31 +579,8 @@ async def upsert_case_pattern_of_life(
     if not await can_user_access_case(db, current_user.id, int(case_db_id)):
         raise HTTPException(status_code=404, detail="Case not found")
 
-    # Find existing or create new
-    res = await db.execute(select(CasePatternOfLife).where(CasePatternOfLife.case_id == int(case_db_id)))
-    row = res.scalar_one_or_none()
-
-    updates = {
-        "school": payload.school,
-        "grade": payload.grade,
-        "missing_classes": bool(payload.missing_classes) if payload.missing_classes is not None else False,
-        "school_laptop": bool(payload.school_laptop) if payload.school_laptop is not None else False,
-        "school_laptop_taken": bool(payload.school_laptop_taken) if payload.school_laptop_taken is not None else False,
-        "school_address": payload.school_address,
-        "employed": bool(payload.employed) if payload.employed is not None else False,
-        "employer": payload.employer,
-        "work_hours": payload.work_hours,
-        "employer_address": payload.employer_address,
-        "confidants": payload.confidants,
-    }
-
-    if row is None:
-        row = CasePatternOfLife(case_id=int(case_db_id), **updates)
-        db.add(row)
-    else:
-        for k, v in updates.items():
-            setattr(row, k, v)
-
+    await upsert_case_section(db, CasePatternOfLife, int(case_db_id), pattern_of_life_values(payload))
+    await bump_case_header(db, case_id=int(case_db_id))
     await db.commit()
     return {"ok": True}
 
@@ -571,102 +618,64 @@ async def upsert_case_exploitation(
     if not await can_user_access_case(db, current_user.id, int(case_db_id)):
         raise HTTPException(status_code=404, detail="Case not found")
 
-    raw_ids = payload.get("exploitation_ids") or []
     # decode opaque ids or accept numeric strings; ignore invalid
-    dec_ids = []
-    for oid in raw_ids:
-        try:
-            s = str(oid)
-            if s.isdigit():
-                dec_ids.append(int(s))
-            else:
-                dec_ids.append(int(decode_id("ref_value", s)))
-        except Exception:
-            continue
-    dec_set = set(dec_ids)
-
-    # Fetch existing
-    existing_rows = (await db.execute(select(CaseExploitation).where(CaseExploitation.case_id == int(case_db_id)))).scalars().all()
-    existing_ids = set([int(r.exploitation_id) for r in existing_rows])
-
-    # Delete removed
-    for r in existing_rows:
-        if int(r.exploitation_id) not in dec_set:
-            await db.delete(r)
-
-    # Insert new
-    to_add = dec_set - existing_ids
-    for rid in to_add:
-        db.add(CaseExploitation(case_id=int(case_db_id), exploitation_id=int(rid)))
-
+    raw_ids = payload.get("exploitation_ids") or []
+    dec_ids = [i for i in (decode_ref(oid) for oid in raw_ids) if i is not None]
+    await sync_case_exploitation(db, int(case_db_id), dec_ids)
     await db.commit()
     return {"ok": True}
 
 
 @router.get("/victimology/catalog", summary="List victimology categories with questions")
 async def get_victimology_catalog(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     current_user: AppUser = Depends(get_current_user),
 ):
-    # Categories sorted by sort_order (nulls last), then category name
-    q_cat = (
-        select(VictimologyCategory)
-        .order_by(
-            sa.case((VictimologyCategory.sort_order.is_(None), 1), else_=0).asc(),
-            VictimologyCategory.sort_order.asc(),
-            VictimologyCategory.category.asc(),
-        )
+    # Compiled once per reference-data version; the JSON is cached per id-codec session
+    catalog = await load_victimology_catalog(db)
+    session_id = get_current_session()
+    headers = {"ETag": catalog.etag(session_id), "Cache-Control": "private, no-cache"}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=victimology_catalog_cache.document(catalog, session_id),
+        media_type="application/json",
+        headers=headers,
     )
-    cats = (await db.execute(q_cat)).scalars().all()
-
-    # Preload all victimology rows and bucket by category
-    q_vic = (
-        select(Victimology)
-        .order_by(
-            sa.case((Victimology.sort_order.is_(None), 1), else_=0).asc(),
-            Victimology.sort_order.asc(),
-            Victimology.id.asc(),
-        )
-    )
-    vics = (await db.execute(q_vic)).scalars().all()
-    by_cat = {}
-    for v in vics:
-        by_cat.setdefault(int(getattr(v, 'victimology_category_id')), []).append(v)
-
-    def enc(model, val):
-        return encode_id(model, int(val)) if val is not None else None
-
-    items = []
-    for c in cats:
-        items.append({
-            "id": enc("victimology_category", c.id),
-            "category": c.category,
-            "sort_order": int(c.sort_order) if c.sort_order is not None else None,
-            "questions": [
-                {
-                    "id": enc("victimology", v.id),
-                    "db_id": int(v.id),
-                    "question": v.question,
-                    "follow_up": getattr(v, "follow_up", None),
-                    "sort_order": int(v.sort_order) if v.sort_order is not None else None,
-                }
-                for v in by_cat.get(int(c.id), [])
-            ]
-        })
-
-    return items
 
 
 @router.get("/{case_id}/victimology", summary="List case victimology answers")
 async def get_case_victimology(
     case_id: str,
+    format: str = Query("list", pattern="^(list|map)$"),
     db: AsyncSession = Depends(get_db),
     current_user: AppUser = Depends(get_current_user),
 ):
+    """
+    ``format=list`` (default): one object per stored answer.
+    ``format=map``: ``{"answers": {question id: {"answer_id", "details"}}}``, keyed
+    like ``questions[].id`` in the catalog so the client merges it directly.
+    """
     case_db_id = _decode_or_404("case", case_id)
     if not await can_user_access_case(db, current_user.id, int(case_db_id)):
         raise HTTPException(status_code=404, detail="Case not found")
 
+    CV = CaseVictimology
+    if format == "map":
+        rows = (
+            await db.execute(select(CV.victimology_id, CV.answer_id, CV.details).where(CV.case_id == int(case_db_id)))
+        ).all()
+        return {
+            "answers": {
+                encode_id("victimology", int(r.victimology_id)): {
+                    "answer_id": encode_id("ref_value", int(r.answer_id)) if r.answer_id is not None else None,
+                    "details": r.details,
+                }
+                for r in rows
+            }
+        }
+
     rows = (
         await db.execute(
             select(CaseVictimology).where(CaseVictimology.case_id == int(case_db_id))
@@ -848,67 +857,11 @@ async def upsert_case_search_urgency(
     if not await can_user_access_case(db, current_user.id, int(case_db_id)):
         raise HTTPException(status_code=404, detail="Case not found")
 
-    # Find existing or create new
-    res = await db.execute(select(CaseSearchUrgency).where(CaseSearchUrgency.case_id == int(case_db_id)))
-    row = res.scalar_one_or_none()
-
-    def _dec_ref(oid):
-        if oid is None:
-            return None
-        s = str(oid)
-        if s == "":
-            return None
-        try:
-            return int(decode_id("ref_value", s)) if not s.isdigit() else int(s)
-        except Exception:
-            return None
-
-    updates = {
-        "age_id": _dec_ref(getattr(payload, 'age_id', None)) if hasattr(payload, 'age_id') else None,
-        "physical_condition_id": _dec_ref(getattr(payload, 'physical_condition_id', None)) if hasattr(payload, 'physical_condition_id') else None,
-        "medical_condition_id": _dec_ref(getattr(payload, 'medical_condition_id', None)) if hasattr(payload, 'medical_condition_id') else None,
-        "personal_risk_id": _dec_ref(getattr(payload, 'personal_risk_id', None)) if hasattr(payload, 'personal_risk_id') else None,
-        "online_risk_id": _dec_ref(getattr(payload, 'online_risk_id', None)) if hasattr(payload, 'online_risk_id') else None,
-        "family_risk_id": _dec_ref(getattr(payload, 'family_risk_id', None)) if hasattr(payload, 'family_risk_id') else None,
-        "behavioral_risk_id": _dec_ref(getattr(payload, 'behavioral_risk_id', None)) if hasattr(payload, 'behavioral_risk_id') else None,
-    }
-
-    if row is None:
-        row = CaseSearchUrgency(case_id=int(case_db_id), **updates)
-        db.add(row)
-    else:
-        for k, v in updates.items():
-            # Only set attribute if present in payload (allows partial updates)
-            if hasattr(payload, k):
-                setattr(row, k, v)
-
-    # Compute score if all seven selections present
-    sel_ids = [
-        getattr(row, 'age_id', None),
-        getattr(row, 'physical_condition_id', None),
-        getattr(row, 'medical_condition_id', None),
-        getattr(row, 'personal_risk_id', None),
-        getattr(row, 'online_risk_id', None),
-        getattr(row, 'family_risk_id', None),
-        getattr(row, 'behavioral_risk_id', None),
-    ]
-
-    score_val = None
-    if all(v is not None for v in sel_ids):
-        # Sum sort_order values for selected ref_values
-        vals = (
-            await db.execute(
-                select(RefValue.id, RefValue.sort_order).where(RefValue.id.in_([int(v) for v in sel_ids]))
-            )
-        ).all()
-        by_id = {int(i): (int(s) if s is not None else 0) for i, s in vals}
-        score_val = sum(by_id.get(int(v), 0) for v in sel_ids)
-        row.score = int(score_val)
-    else:
-        row.score = None
-
+    # Score: sum of the selections' sort orders once all seven are set
+    values = await search_urgency_values(db, payload)
+    await upsert_case_section(db, CaseSearchUrgency, int(case_db_id), values)
     await db.commit()
-    return {"ok": True, "score": score_val}
+    return {"ok": True, "score": values["score"]}
 
 
 @router.put("/{case_id}/circumstances", summary="Upsert case circumstances")
@@ -923,60 +876,8 @@ async def upsert_case_circumstances(
     if not await can_user_access_case(db, current_user.id, int(case_db_id)):
         raise HTTPException(status_code=404, detail="Case not found")
 
-    # Find existing or create new
-    res = await db.execute(select(CaseCircumstances).where(CaseCircumstances.case_id == int(case_db_id)))
-    row = res.scalar_one_or_none()
-
-    def _dec_ref(oid: Optional[str]):
-        if oid is None:
-            return None
-        s = str(oid)
-        if s == "":
-            return None
-        try:
-            return int(decode_id("ref_value", s)) if not s.isdigit() else int(s)
-        except Exception:
-            return None
-
-    updates = {
-        "date_missing": getattr(payload, 'date_missing', None),
-        "time_missing": getattr(payload, 'time_missing', None),
-        "date_reported": getattr(payload, 'date_reported', None),
-        "address": getattr(payload, 'address', None),
-        "city": getattr(payload, 'city', None),
-        "state_id": _dec_ref(getattr(payload, 'state_id', None)) if hasattr(payload, 'state_id') else None,
-        "point_last_seen": getattr(payload, 'point_last_seen', None),
-        "have_id_id": _dec_ref(getattr(payload, 'have_id_id', None)) if hasattr(payload, 'have_id_id') else None,
-        "id_taken_id": _dec_ref(getattr(payload, 'id_taken_id', None)) if hasattr(payload, 'id_taken_id') else None,
-        "have_money_id": _dec_ref(getattr(payload, 'have_money_id', None)) if hasattr(payload, 'have_money_id') else None,
-        "money_taken_id": _dec_ref(getattr(payload, 'money_taken_id', None)) if hasattr(payload, 'money_taken_id') else None,
-        "have_cc_id": _dec_ref(getattr(payload, 'have_cc_id', None)) if hasattr(payload, 'have_cc_id') else None,
-        "cc_taken_id": _dec_ref(getattr(payload, 'cc_taken_id', None)) if hasattr(payload, 'cc_taken_id') else None,
-        "vehicle_taken": bool(getattr(payload, 'vehicle_taken', False)),
-        "vehicle_desc": getattr(payload, 'vehicle_desc', None),
-        "with_whom": getattr(payload, 'with_whom', None),
-        "what_happened": getattr(payload, 'what_happened', None),
-        "clothing_top": getattr(payload, 'clothing_top', None),
-        "clothing_bottom": getattr(payload, 'clothing_bottom', None),
-        "clothing_shoes": getattr(payload, 'clothing_shoes', None),
-        "clothing_outerwear": getattr(payload, 'clothing_outerwear', None),
-        "clothing_innerwear": getattr(payload, 'clothing_innerwear', None),
-        "bags": getattr(payload, 'bags', None),
-        "other_items": getattr(payload, 'other_items', None),
-        "devices": getattr(payload, 'devices', None),
-        "mobile_carrier_id": _dec_ref(getattr(payload, 'mobile_carrier_id', None)) if hasattr(payload, 'mobile_carrier_id') else None,
-        "mobile_carrier_other": getattr(payload, 'mobile_carrier_other', None),
-        "voip_id": _dec_ref(getattr(payload, 'voip_id', None)) if hasattr(payload, 'voip_id') else None,
-        "wifi_only": bool(getattr(payload, 'wifi_only', False)),
-    }
-
-    if row is None:
-        row = CaseCircumstances(case_id=int(case_db_id), **updates)
-        db.add(row)
-    else:
-        for k, v in updates.items():
-            setattr(row, k, v)
-
+    await upsert_case_section(db, CaseCircumstances, int(case_db_id), circumstances_values(payload))
+    await bump_case_header(db, case_id=int(case_db_id))
     await db.commit()
     return {"ok": True}
 
@@ -993,46 +894,29 @@ async def upsert_case_management(
     if not await can_user_access_case(db, current_user.id, int(case_db_id)):
         raise HTTPException(status_code=404, detail="Case not found")
 
-    # Find existing or create new
-    res = await db.execute(select(CaseManagement).where(CaseManagement.case_id == int(case_db_id)))
-    row = res.scalar_one_or_none()
-
-    def _dec(oid: Optional[str]):
-        if not oid:
-            return None
-        try:
-            return decode_id("ref_value", oid)
-        except Exception:
-            return None
-
-    updates = {
-        "consent_sent": bool(payload.consent_sent) if payload.consent_sent is not None else False,
-        "consent_returned": bool(payload.consent_returned) if payload.consent_returned is not None else False,
-        "flyer_complete": bool(payload.flyer_complete) if payload.flyer_complete is not None else False,
-        "ottic": bool(payload.ottic) if payload.ottic is not None else False,
-        "csec_id": _dec(payload.csec_id) if payload.csec_id is not None else None,
-        "missing_status_id": _dec(payload.missing_status_id) if payload.missing_status_id is not None else None,
-        "classification_id": _dec(payload.classification_id) if payload.classification_id is not None else None,
-        "requested_by_id": _dec(payload.requested_by_id) if getattr(payload, 'requested_by_id', None) is not None else None,
-        "ncic_case_number": payload.ncic_case_number,
-        "ncmec_case_number": payload.ncmec_case_number,
-        "le_case_number": payload.le_case_number,
-        "le_24hour_contact": payload.le_24hour_contact,
-        "ss_case_number": payload.ss_case_number,
-        "ss_24hour_contact": payload.ss_24hour_contact,
-        "jpo_case_number": payload.jpo_case_number,
-        "jpo_24hour_contact": payload.jpo_24hour_contact,
-    }
+    await upsert_case_section(db, CaseManagement, int(case_db_id), management_values(payload))
+    await bump_case_header(db, case_id=int(case_db_id))
+    await db.commit()
+    return {"ok": True}
 
-    if row is None:
-        row = CaseManagement(case_id=int(case_db_id), **updates)
-        db.add(row)
-    else:
-        for k, v in updates.items():
-            setattr(row, k, v)
 
+@router.put("/{case_id}/intake", summary="Save several intake sections at once")
+async def save_case_intake_sections(
+    case_id: str,
+    payload: CaseIntakeSave = Body(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: AppUser = Depends(get_current_user),
+):
+    """
+    Batch form of the per-section PUTs (demographics, circumstances, management,
+    pattern-of-life, search-urgency, exploitation, victimology answers), applied in
+    one transaction. Each section is saved in its own savepoint; a failed section is
+    reported in ``sections`` and does not undo the others.
+    """
+    case_db_id = await case_number_or_id(db, current_user, case_id)
+    sections = await save_case_intake(db, int(case_db_id), payload)
     await db.commit()
-    return {"ok": True}
+    return {"ok": all(r["ok"] for r in sections.values()), "sections": sections}
 
 
 
@@ -1059,6 +943,8 @@ async def upsert_case_management(
 @router.get("/{case_id}/by-id", summary="Get case header by case id")
 async def get_case_by_id(
     case_id: str,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: AppUser = Depends(get_current_user),
 ):
@@ -1071,266 +957,7 @@ async def get_case_by_id(
     if not await can_user_access_case(db, current_user.id, int(case_db_id)):
         raise HTTPException(status_code=404, detail="Case not found")
 
-    # Aliases for ref tables (mirrors get_case_by_number)
-    SexRV = aliased(RefValue)
-    RaceRV = aliased(RefValue)
-    CsecRV = aliased(RefValue)
-    MstatRV = aliased(RefValue)
-    MclassRV = aliased(RefValue)
-    ReqByRV = aliased(RefValue)
-    ScopeRV = aliased(RefValue)
-    ClassRV = aliased(RefValue)
-    StatusRV = aliased(RefValue)
-    LivingRV = aliased(RefValue)
-    FoundByRV = aliased(RefValue)
-
-    q = (
-        select(
-            Case.id.label("case_id"),
-            Case.case_number,
-            Case.date_intake,
-            Case.inactive,
-            Subject.id.label("subject_id"),
-            Subject.first_name,
-            Subject.last_name,
-            Subject.middle_name,
-            Subject.nicknames,
-            Subject.profile_pic.isnot(None).label("has_pic"),
-            CaseDemographics.age_when_missing,
-            CaseDemographics.date_of_birth,
-            CaseDemographics.height,
-            CaseDemographics.weight,
-            CaseDemographics.hair_color,
-            CaseDemographics.hair_length,
-            CaseDemographics.eye_color,
-            CaseDemographics.identifying_marks,
-            CaseDemographics.sex_id,
-            CaseDemographics.race_id,
-            SexRV.code.label("sex_code"),
-            RaceRV.code.label("race_code"),
-            CaseCircumstances.date_missing,
-            CaseManagement.consent_sent,
-            CaseManagement.consent_returned,
-            CaseManagement.flyer_complete,
-            CaseManagement.ottic,
-            CaseManagement.csec_id,
-            CaseManagement.missing_status_id,
-            CaseManagement.classification_id,
-            CaseManagement.requested_by_id,
-            CsecRV.code.label("csec_code"),
-            MstatRV.code.label("missing_status_code"),
-            MclassRV.code.label("classification_code"),
-            ReqByRV.code.label("requested_by_code"),
-            CaseManagement.ncic_case_number,
-            CaseManagement.ncmec_case_number,
-            CaseManagement.le_case_number,
-            CaseManagement.le_24hour_contact,
-            CaseManagement.ss_case_number,
-            CaseManagement.ss_24hour_contact,
-            CaseManagement.jpo_case_number,
-            CaseManagement.jpo_24hour_contact,
-            CasePatternOfLife.school,
-            CasePatternOfLife.grade,
-            CasePatternOfLife.missing_classes,
-            CasePatternOfLife.school_laptop,
-            CasePatternOfLife.school_laptop_taken,
-            CasePatternOfLife.school_address,
-            CasePatternOfLife.employed,
-            CasePatternOfLife.employer,
-            CasePatternOfLife.work_hours,
-            CasePatternOfLife.employer_address,
-            CasePatternOfLife.confidants,
-            CaseDisposition.shepherds_contributed_intel,
-            CaseDisposition.date_found,
-            CaseDisposition.scope_id,
-            CaseDisposition.class_id,
-            CaseDisposition.status_id,
-            CaseDisposition.living_id,
-            CaseDisposition.found_by_id,
-            ScopeRV.code.label("scope_code"),
-            ClassRV.code.label("class_code"),
-            StatusRV.code.label("status_code"),
-            LivingRV.code.label("living_code"),
-            FoundByRV.code.label("found_by_code"),
-        )
-        .join(Subject, Subject.id == Case.subject_id)
-        .join(CaseDemographics, CaseDemographics.case_id == Case.id, isouter=True)
-        .join(SexRV, SexRV.id == CaseDemographics.sex_id, isouter=True)
-        .join(RaceRV, RaceRV.id == CaseDemographics.race_id, isouter=True)
-        .join(CaseCircumstances, CaseCircumstances.case_id == Case.id, isouter=True)
-        .join(CaseManagement, CaseManagement.case_id == Case.id, isouter=True)
-        .join(CsecRV, CsecRV.id == CaseManagement.csec_id, isouter=True)
-        .join(MstatRV, MstatRV.id == CaseManagement.missing_status_id, isouter=True)
-        .join(MclassRV, MclassRV.id == CaseManagement.classification_id, isouter=True)
-        .join(ReqByRV, ReqByRV.id == CaseManagement.requested_by_id, isouter=True)
-        .join(CasePatternOfLife, CasePatternOfLife.case_id == Case.id, isouter=True)
-        .join(CaseDisposition, CaseDisposition.case_id == Case.id, isouter=True)
-        .join(ScopeRV, ScopeRV.id == CaseDisposition.scope_id, isouter=True)
-        .join(ClassRV, ClassRV.id == CaseDisposition.class_id, isouter=True)
-        .join(StatusRV, StatusRV.id == CaseDisposition.status_id, isouter=True)
-        .join(LivingRV, LivingRV.id == CaseDisposition.living_id, isouter=True)
-        .join(FoundByRV, FoundByRV.id == CaseDisposition.found_by_id, isouter=True)
-        .where(Case.id == int(case_db_id))
-    )
-
-    row = (await db.execute(q)).first()
-    if not row:
+    version = await case_header_version(db, int(case_db_id))
+    if version is None:
         raise HTTPException(status_code=404, detail="Case not found")
-
-    (
-        case_id_val,
-        case_number_val,
-        date_intake,
-        inactive,
-        subject_id,
-        first,
-        last,
-        middle,
-        nicknames,
-        has_pic,
-        age_when_missing,
-        date_of_birth,
-        height,
-        weight,
-        hair_color,
-        hair_length,
-        eye_color,
-        identifying_marks,
-        sex_id,
-        race_id,
-        sex_code,
-        race_code,
-        date_missing,
-        consent_sent,
-        consent_returned,
-        flyer_complete,
-        ottic,
-        csec_id,
-        missing_status_id,
-        classification_id,
-        mgmt_requested_by_id,
-        csec_code,
-        missing_status_code,
-        classification_code,
-        mgmt_requested_by_code,
-        ncic_case_number,
-        ncmec_case_number,
-        le_case_number,
-        le_24hour_contact,
-        ss_case_number,
-        ss_24hour_contact,
-        jpo_case_number,
-        jpo_24hour_contact,
-        pol_school,
-        pol_grade,
-        pol_missing_classes,
-        pol_school_laptop,
-        pol_school_laptop_taken,
-        pol_school_address,
-        pol_employed,
-        pol_employer,
-        pol_work_hours,
-        pol_employer_address,
-        pol_confidants,
-        disp_shep_intel,
-        disp_date_found,
-        disp_scope_id,
-        disp_class_id,
-        disp_status_id,
-        disp_living_id,
-        disp_found_by_id,
-        disp_scope_code,
-        disp_class_code,
-        disp_status_code,
-        disp_living_code,
-        disp_found_by_code,
-    ) = row
-
-    subject_opaque = encode_id("subject", int(subject_id))
-    case_opaque = encode_id("case", int(case_id_val))
-
-    return {
-        "case": {
-            "id": case_opaque,
-            "raw_db_id": int(case_id_val),
-            "case_number": case_number_val,
-            "date_intake": date_intake.isoformat() if date_intake is not None else None,
-            "inactive": bool(inactive) if inactive is not None else False,
-            "subject_id": subject_opaque,
-        },
-        "subject": {
-            "id": subject_opaque,
-            "first_name": first,
-            "last_name": last,
-            "middle_name": middle,
-            "nicknames": nicknames,
-            "has_pic": bool(has_pic),
-            "photo_url": f"/api/v1/media/pfp/subject/{subject_opaque}?s=sm" if has_pic else "/images/pfp-generic.png",
-        },
-        "demographics": {
-            "age_when_missing": int(age_when_missing) if age_when_missing is not None else None,
-            "date_of_birth": date_of_birth.isoformat() if date_of_birth is not None else None,
-            "height": height,
-            "weight": weight,
-            "hair_color": hair_color,
-            "hair_length": hair_length,
-            "eye_color": eye_color,
-            "identifying_marks": identifying_marks,
-            "sex_id": int(sex_id) if sex_id is not None else None,
-            "race_id": int(race_id) if race_id is not None else None,
-            "sex_code": sex_code,
-            "race_code": race_code,
-        },
-        "circumstances": {
-            "date_missing": date_missing.isoformat() if date_missing is not None else None,
-        },
-        "management": {
-            "consent_sent": bool(consent_sent) if consent_sent is not None else False,
-            "consent_returned": bool(consent_returned) if consent_returned is not None else False,
-            "flyer_complete": bool(flyer_complete) if flyer_complete is not None else False,
-            "ottic": bool(ottic) if ottic is not None else False,
-            "csec_id": int(csec_id) if csec_id is not None else None,
-            "missing_status_id": int(missing_status_id) if missing_status_id is not None else None,
-            "classification_id": int(classification_id) if classification_id is not None else None,
-            "requested_by_id": int(mgmt_requested_by_id) if mgmt_requested_by_id is not None else None,
-            "csec_code": csec_code,
-            "missing_status_code": missing_status_code,
-            "classification_code": classification_code,
-            "requested_by_code": mgmt_requested_by_code,
-            "ncic_case_number": ncic_case_number,
-            "ncmec_case_number": ncmec_case_number,
-            "le_case_number": le_case_number,
-            "le_24hour_contact": le_24hour_contact,
-            "ss_case_number": ss_case_number,
-            "ss_24hour_contact": ss_24hour_contact,
-            "jpo_case_number": jpo_case_number,
-            "jpo_24hour_contact": jpo_24hour_contact,
-        },
-        "pattern_of_life": {
-            "school": pol_school,
-            "grade": pol_grade,
-            "missing_classes": bool(pol_missing_classes) if pol_missing_classes is not None else False,
-            "school_laptop": bool(pol_school_laptop) if pol_school_laptop is not None else False,
-            "school_laptop_taken": bool(pol_school_laptop_taken) if pol_school_laptop_taken is not None else False,
-            "school_address": pol_school_address,
-            "employed": bool(pol_employed) if pol_employed is not None else False,
-            "employer": pol_employer,
-            "work_hours": pol_work_hours,
-            "employer_address": pol_employer_address,
-            "confidants": pol_confidants,
-        },
-        "disposition": {
-            "shepherds_contributed_intel": bool(disp_shep_intel) if disp_shep_intel is not None else False,
-            "date_found": disp_date_found.isoformat() if disp_date_found is not None else None,
-            "scope_id": int(disp_scope_id) if disp_scope_id is not None else None,
-            "class_id": int(disp_class_id) if disp_class_id is not None else None,
-            "status_id": int(disp_status_id) if disp_status_id is not None else None,
-            "living_id": int(disp_living_id) if disp_living_id is not None else None,
-            "found_by_id": int(disp_found_by_id) if disp_found_by_id is not None else None,
-            "scope_code": disp_scope_code,
-            "class_code": disp_class_code,
-            "status_code": disp_status_code,
-            "living_code": disp_living_code,
-            "found_by_code": disp_found_by_code,
-        }
-    }
+    return await _case_header_response(request, response, db, int(case_db_id), version)
@@ -13,6 +13,7 @@ from app.db.models.app_user import AppUser
 from app.db.models.person import Person
 from app.db.models.person_case import PersonCase
 from app.db.models.ref_value import RefValue
+from app.services.reference_data import get_reference_data
 from app.core.id_codec import decode_id, OpaqueIdError, encode_id
 
 from .case_utils import _decode_or_404, can_user_access_case, case_number_or_id
@@ -43,13 +44,11 @@ async def get_case_person(
         else:
             raise HTTPException(status_code=404, detail="Person link not found")
 
-    RelRV = aliased(RefValue)
+    ref = await get_reference_data(db)
     q = (
         select(
             PersonCase.id.label("pc_id"),
             PersonCase.relationship_id,
-            RelRV.name.label("relationship_name"),
-            RelRV.code.label("relationship_code"),
             PersonCase.relationship_other,
             PersonCase.notes,
             Person.id.label("person_id"),
@@ -60,7 +59,6 @@ async def get_case_person(
             Organization.name.label("organization_name"),
         )
         .join(Person, Person.id == PersonCase.person_id)
-        .join(RelRV, RelRV.id == PersonCase.relationship_id, isouter=True)
         .join(Organization, Organization.id == Person.organization_id, isouter=True)
         .where(
             PersonCase.case_id == int(case_db_id),
@@ -75,8 +73,6 @@ async def get_case_person(
     (
         pc_id,
         rel_id,
-        rel_name,
-        rel_code,
         rel_other,
         notes,
         pid,
@@ -127,6 +123,12 @@ async def list_case_persons(
     # Decode and authorize
     case_db_id = await case_number_or_id(db, current_user, case_id)
 
+    return await _load_case_persons(db, int(case_db_id))
+
+
+async def _load_case_persons(db: AsyncSession, case_db_id: int) -> list[dict]:
+    """Agency personnel rows for a case. Callers are responsible for authorization."""
+
     RelRV = aliased(RefValue)
     q = (
         select(
@@ -170,8 +172,8 @@ async def list_case_persons(
             "id": encode_id("person_case", int(pc_id)),
             "raw_id": int(pc_id),
             "relationship_id": encode_id("ref_value", int(rel_id)) if rel_id is not None else None,
-            "relationship_name": rel_name,
-            "relationship_code": rel_code,
+            "relationship_name": ref.name(rel_id),
+            "relationship_code": ref.code(rel_id),
             "relationship_other": rel_other,
             "notes": notes,
             "person": {
@@ -12,6 +12,7 @@ from app.db.models.subject import Subject
 from app.db.models.subject_case import SubjectCase
 from app.db.models.ref_value import RefValue
 from app.db.models.case import Case
+from app.services.reference_data import get_reference_data
 from app.core.id_codec import decode_id, OpaqueIdError, encode_id
 
 from .case_utils import _decode_or_404, can_user_access_case, case_number_or_id
@@ -29,13 +30,17 @@ async def list_case_subjects(
     # Decode and authorize
     case_db_id = await case_number_or_id(db, current_user, case_id)
 
-    RelRV = aliased(RefValue)
+    return await _load_case_subjects(db, int(case_db_id))
+
+
+async def _load_case_subjects(db: AsyncSession, case_db_id: int) -> list[dict]:
+    """Subject rows for a case. Callers are responsible for authorization."""
+
+    ref = await get_reference_data(db)
     q = (
         select(
             SubjectCase.id.label("sc_id"),
             SubjectCase.relationship_id,
-            RelRV.name.label("relationship_name"),
-            RelRV.code.label("relationship_code"),
             SubjectCase.relationship_other,
             SubjectCase.legal_guardian,
             SubjectCase.notes,
@@ -50,7 +55,6 @@ async def list_case_subjects(
             Subject.danger,
         )
         .join(Subject, Subject.id == SubjectCase.subject_id)
-        .join(RelRV, RelRV.id == SubjectCase.relationship_id, isouter=True)
         .where(SubjectCase.case_id == int(case_db_id))
         .order_by(asc(Subject.last_name), asc(Subject.first_name))
     )
@@ -60,8 +64,6 @@ async def list_case_subjects(
     for (
         sc_id,
         rel_id,
-        rel_name,
-        rel_code,
         rel_other,
         legal_guardian,
         notes,
@@ -79,8 +81,8 @@ async def list_case_subjects(
             "id": encode_id("subject_case", int(sc_id)),
             "raw_id": int(sc_id),
             "relationship_id": encode_id("ref_value", int(rel_id)) if rel_id is not None else None,
-            "relationship_name": rel_name,
-            "relationship_code": rel_code,
+            "relationship_name": ref.name(rel_id),
+            "relationship_code": ref.code(rel_id),
             "relationship_other": rel_other,
             "legal_guardian": bool(legal_guardian) if legal_guardian is not None else False,
             "notes": notes,
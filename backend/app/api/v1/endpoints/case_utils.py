@@ -1,7 +1,7 @@
 from typing import Optional
 
 from fastapi import HTTPException
-from sqlalchemy import select, and_, exists
+from sqlalchemy import select, and_, exists, union
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.id_codec import decode_id, OpaqueIdError
@@ -91,6 +91,22 @@ async def can_user_access_case(db: AsyncSession, user_id: int, case_id: int) ->
     return team_exists
 
 
+def accessible_cases(user_id: int):
+    """
+    Subquery (column ``case_id``) of the cases the user is assigned to directly or
+    through a team. Join it to filter a case query in one pass; users with
+    CASES.ALL_CASES see every case and should skip the join.
+    """
+    direct = select(AppUserCase.case_id.label("case_id")).where(AppUserCase.app_user_id == user_id)
+    via_team = (
+        select(TeamCase.case_id.label("case_id"))
+        .join(PersonTeam, PersonTeam.team_id == TeamCase.team_id)
+        .join(Person, Person.id == PersonTeam.person_id)
+        .where(Person.app_user_id == user_id)
+    )
+    return union(direct, via_team).subquery("accessible_cases")
+
+
 async def list_user_ids_for_case(db: AsyncSession, case_id: int) -> list[int]:
     """
     Return distinct AppUser IDs who can access the case via:
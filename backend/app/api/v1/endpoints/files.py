@@ -6,7 +6,7 @@ import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_current_user
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db.models.app_user import AppUser
 from app.db.models.person import Person as PersonModel
 from app.db.models.person_case import PersonCase
@@ -28,12 +28,18 @@ router = APIRouter()
 @router.get("/{case_id}/files", summary="List files for a case")
 async def list_files(
     case_id: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AppUser = Depends(get_current_user),
 ):
 
     pk = await case_number_or_id(db, current_user, case_id)
 
+    return await _load_files(db, int(pk))
+
+
+async def _load_files(db: AsyncSession, pk: int) -> list[dict]:
+    """Files for a case. Callers are responsible for authorization."""
+
     P = PersonModel
     R = Rfi
     F = OtherFile
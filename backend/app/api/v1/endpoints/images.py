@@ -6,7 +6,7 @@ import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_current_user
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db.models.app_user import AppUser
 from app.db.models.subject import Subject
 from app.db.models.person import Person as PersonModel
@@ -26,7 +26,7 @@ router = APIRouter()
 @router.get("/{case_id}/images", summary="List images for a case")
 async def list_images(
     case_id: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AppUser = Depends(get_current_user),
 ):
     pk = _decode_or_404("case", case_id)
@@ -35,6 +35,12 @@ async def list_images(
         if not await can_user_access_case(db, current_user.id, pk):
             raise HTTPException(status_code=404, detail="Case not found")
 
+    return await _load_images(db, int(pk))
+
+
+async def _load_images(db: AsyncSession, pk: int) -> list[dict]:
+    """Images for a case, with linked subjects. Callers are responsible for authorization."""
+
     # Join to gather creator/rfi names
     P = PersonModel
     R = Rfi
@@ -1,36 +1,80 @@
-from dataclasses import dataclass
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, replace
 from io import BytesIO
 import math
-from typing import Any, Dict
-
-import numpy as np
-from fastapi import APIRouter, File, HTTPException, UploadFile
-
-# Optional imports: we want this endpoint to work even if OCR is unavailable.
-try:
-    import cv2  # type: ignore
-    _HAS_CV2 = True
-except Exception:
-    cv2 = None  # type: ignore
-    _HAS_CV2 = False
-
-try:
-    from PIL import Image
-    _HAS_PIL = True
-except Exception:
-    Image = None  # type: ignore
-    _HAS_PIL = False
-
-try:
-    import pytesseract  # type: ignore
-    _HAS_TESSERACT = True
-except Exception:
-    pytesseract = None  # type: ignore
-    _HAS_TESSERACT = False
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+
+from app.api.dependencies import get_current_user
+from app.core.config import settings
+from app.db.models.app_user import AppUser
+
+# numpy, OpenCV, Pillow and pytesseract are imported by _load_libs() on first use,
+# not when the router is imported. OCR is optional: the endpoint works without it.
+np = None  # type: ignore
+cv2 = None  # type: ignore
+Image = None  # type: ignore
+pytesseract = None  # type: ignore
+_HAS_CV2 = _HAS_PIL = _HAS_TESSERACT = False
+_LIBS_LOADED = False
+_TESSERACT_OK: Optional[bool] = None
+
+
+def _load_libs() -> None:
+    global np, cv2, Image, pytesseract, _HAS_CV2, _HAS_PIL, _HAS_TESSERACT, _LIBS_LOADED
+    if _LIBS_LOADED:
+        return
+    import numpy
+    np = numpy
+
+    try:
+        import cv2 as _cv2  # type: ignore
+        cv2, _HAS_CV2 = _cv2, True
+    except Exception:
+        pass
+
+    try:
+        from PIL import Image as _Image
+        Image, _HAS_PIL = _Image, True
+    except Exception:
+        pass
+
+    try:
+        import pytesseract as _pytesseract  # type: ignore
+        pytesseract, _HAS_TESSERACT = _pytesseract, True
+    except Exception:
+        pass
+    _LIBS_LOADED = True
+
+
+def tesseract_available() -> bool:
+    """pytesseract is importable and the tesseract binary runs (checked once per process)."""
+    global _TESSERACT_OK
+    _load_libs()
+    if _TESSERACT_OK is None:
+        try:
+            _TESSERACT_OK = _HAS_TESSERACT and bool(pytesseract.get_tesseract_version())
+        except Exception:
+            _TESSERACT_OK = False
+    return _TESSERACT_OK
 
 
 router = APIRouter()
 
+# rule_based_score's normalisation constants were tuned on features of images decoded at
+# full size and LANCZOS-resized to this many pixels (load_image_from_bytes). Features taken
+# at another size or with another resampling shift the score, so analysis stays at this
+# size until the constants are recalibrated on a labelled set.
+CALIBRATION_SIDE = 1600
+
+# The text feature can only raise the score: by at most TEXT_WEIGHT * TEXT_CAP.
+TEXT_WEIGHT = 2.5
+TEXT_CAP = 2.0
+MAX_TEXT_SCORE = TEXT_WEIGHT * TEXT_CAP
+
 
 @dataclass
 class Features:
@@ -43,6 +87,7 @@ class Features:
 
 
 def _ensure_libs_available() -> None:
+    _load_libs()
     if not _HAS_PIL:
         raise HTTPException(status_code=500, detail="Pillow is required on the server")
     if not _HAS_CV2:
@@ -50,8 +95,9 @@ def _ensure_libs_available() -> None:
         raise HTTPException(status_code=500, detail="OpenCV (opencv-python) is required on the server")
 
 
-def load_image_from_bytes(data: bytes, max_side: int = 1600) -> np.ndarray:
+def load_image_from_bytes(data: bytes, max_side: int = CALIBRATION_SIDE) -> np.ndarray:
     """Load image via Pillow from bytes, convert to RGB ndarray. Optionally resize for speed."""
+    _load_libs()
     if not data:
         raise HTTPException(status_code=400, detail="Empty file")
     try:
@@ -67,14 +113,15 @@ def load_image_from_bytes(data: bytes, max_side: int = 1600) -> np.ndarray:
 
 
 def grayscale_entropy(gray: np.ndarray) -> float:
-    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).flatten()
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
     p = hist / (hist.sum() + 1e-9)
     ent = -np.sum(p * np.log2(p + 1e-12))
     return float(ent)
 
 
-def largest_contour_rectangularity(gray: np.ndarray) -> float:
-    edges = cv2.Canny(gray, 100, 200)
+def largest_contour_rectangularity(gray: np.ndarray, edges: Optional[np.ndarray] = None) -> float:
+    if edges is None:
+        edges = cv2.Canny(gray, 100, 200)
     contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     if not contours:
         return 0.0
@@ -86,7 +133,7 @@ def largest_contour_rectangularity(gray: np.ndarray) -> float:
 
 
 def ocr_text_area_ratio(rgb: np.ndarray) -> float:
-    if not _HAS_TESSERACT:
+    if not tesseract_available():
         return 0.0
     try:
         data = pytesseract.image_to_data(rgb, output_type=pytesseract.Output.DICT)
@@ -112,31 +159,29 @@ def ocr_text_area_ratio(rgb: np.ndarray) -> float:
         return 0.0
 
 
-def compute_features_from_rgb(rgb: np.ndarray) -> Features:
+def image_features(rgb: np.ndarray) -> Features:
+    """Every feature except OCR (text_area_ratio=0), from one gray image and one edge map."""
+    _load_libs()
     gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
 
     # Texture / sharpness
-    lap_var = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    _, lap_std = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_64F))
+    lap_var = float(lap_std[0, 0] ** 2)
 
-    # Edge density
+    # Edge density and rectangularity share the edge map
     edges = cv2.Canny(gray, 100, 200)
-    edge_density = float(edges.mean() / 255.0)
-
-    # Rectangularity
-    rectangularity = largest_contour_rectangularity(gray)
+    edge_density = cv2.countNonZero(edges) / float(edges.size)
+    rectangularity = largest_contour_rectangularity(gray, edges)
 
     # Colorfulness (HSV saturation mean)
     hsv = cv2.cvtColor(rgb, cv2.COLOR_RGB2HSV)
-    saturation_mean = float(hsv[..., 1].mean() / 255.0)
+    saturation_mean = float(cv2.mean(hsv)[1] / 255.0)
 
     # Entropy
     entropy = grayscale_entropy(gray)
 
-    # OCR text area ratio (optional)
-    text_ratio = ocr_text_area_ratio(rgb)
-
     return Features(
-        text_area_ratio=text_ratio,
+        text_area_ratio=0.0,
         laplacian_var=lap_var,
         edge_density=edge_density,
         rectangularity=rectangularity,
@@ -145,6 +190,12 @@ def compute_features_from_rgb(rgb: np.ndarray) -> Features:
     )
 
 
+def compute_features_from_rgb(rgb: np.ndarray) -> Features:
+    """All features of ``rgb`` at its own size, OCR included whenever it is available."""
+    feat = image_features(rgb)
+    return replace(feat, text_area_ratio=ocr_text_area_ratio(rgb))
+
+
 def logistic(x: float) -> float:
     return 1.0 / (1.0 + math.exp(-x))
 
@@ -156,10 +207,10 @@ def rule_based_score(feat: Features) -> float:
     sat_norm = -min(feat.saturation_mean / 0.5, 2.0)
     ent_norm = -min(feat.entropy_gray / 7.5, 2.0)
     rect_norm = min(feat.rectangularity / 0.8, 2.0)
-    text_norm = min(feat.text_area_ratio / 0.15, 2.0)
+    text_norm = min(feat.text_area_ratio / 0.15, TEXT_CAP)
 
     score = (
-        2.5 * text_norm
+        TEXT_WEIGHT * text_norm
         + 1.6 * rect_norm
         + 1.2 * ent_norm
         + 1.0 * sat_norm
@@ -176,13 +227,59 @@ def classify(feat: Features):
     return label, prob_doc, score
 
 
-@router.post("/is_document", summary="Classify an uploaded image as document vs photo")
-async def is_document(file: UploadFile = File(...)) -> Dict[str, Any]:
-    """Accepts an uploaded image and returns classification JSON (document vs photo)."""
-    _ensure_libs_available()
+def needs_ocr(score: float, band: float) -> bool:
+    """
+    Whether OCR can still change the label of an image whose score without text is ``score``.
+    Text only raises the score, so images already at the threshold stay documents. Images more
+    than ``band`` below it stay photos. With band >= MAX_TEXT_SCORE the label is the same as
+    always running OCR.
+    """
+    return -band < score < 0.0
+
 
-    # Basic size/type check up-front using header filename and a small sniff on content
-    content = await file.read()
+@dataclass
+class Analysis:
+    features: Features
+    label: str
+    prob_doc: float
+    score: float
+    ocr: str  # "run", "skipped" (score outside the uncertain band) or "unavailable"
+
+
+def analyze_image(
+    data: bytes,
+    analysis_side: Optional[int] = None,
+    ocr_side: Optional[int] = None,
+    ocr_band: Optional[float] = None,
+) -> Analysis:
+    """
+    Classify image bytes in stages (blocking; run off the event loop).
+
+    Stage one computes the cheap features from one gray image and one edge map of the
+    image at most ``analysis_side`` pixels long (CALIBRATION_SIDE by default; other sizes
+    are uncalibrated). Stage two runs OCR at ``ocr_side``, reusing the stage-one image when
+    the sizes match, but only when Tesseract is installed and the stage-one score is within
+    ``ocr_band`` below the threshold (see needs_ocr). Defaults come from settings.is_document_*.
+    """
+    analysis_side = analysis_side or settings.is_document_analysis_side
+    ocr_side = ocr_side or settings.is_document_ocr_side
+    ocr_band = settings.is_document_ocr_band if ocr_band is None else ocr_band
+
+    rgb = load_image_from_bytes(data, analysis_side)
+    feat = image_features(rgb)
+    if not tesseract_available():
+        ocr = "unavailable"
+    elif needs_ocr(rule_based_score(feat), ocr_band):
+        ocr_rgb = rgb if ocr_side == analysis_side else load_image_from_bytes(data, ocr_side)
+        feat = replace(feat, text_area_ratio=ocr_text_area_ratio(ocr_rgb))
+        ocr = "run"
+    else:
+        ocr = "skipped"
+    label, prob_doc, score = classify(feat)
+    return Analysis(features=feat, label=label, prob_doc=prob_doc, score=score, ocr=ocr)
+
+
+def _check_image(content: bytes) -> None:
     if not content:
         raise HTTPException(status_code=400, detail="Empty file")
 
@@ -200,15 +297,20 @@ async def is_document(file: UploadFile = File(...)) -> Dict[str, Any]:
         except Exception:
             raise HTTPException(status_code=400, detail="Unsupported image format")
 
-    rgb = load_image_from_bytes(content)
-    feat = compute_features_from_rgb(rgb)
-    label, prob_doc, score = classify(feat)
 
-    out = {
-        "image": file.filename or "uploaded_image",
-        "prediction": label,
-        "prob_document": round(prob_doc, 4),
-        "score": round(score, 4),
+def _analyze_upload(content: bytes) -> Analysis:
+    _check_image(content)
+    return analyze_image(content)
+
+
+def _result(filename: Optional[str], analysis: Analysis) -> Dict[str, Any]:
+    feat = analysis.features
+    return {
+        "image": filename or "uploaded_image",
+        "prediction": analysis.label,
+        "prob_document": round(analysis.prob_doc, 4),
+        "score": round(analysis.score, 4),
+        "ocr": analysis.ocr,
         "features": {
             "text_area_ratio": round(feat.text_area_ratio, 6),
             "laplacian_var": round(feat.laplacian_var, 3),
@@ -217,9 +319,69 @@ async def is_document(file: UploadFile = File(...)) -> Dict[str, Any]:
             "saturation_mean": round(feat.saturation_mean, 6),
             "entropy_gray": round(feat.entropy_gray, 6),
         },
-        "notes": (
-            "If prob_document >= 0.5 we predict 'document'. "
-            "OCR features require pytesseract + Tesseract; if absent, text_area_ratio=0."
-        ),
     }
-    return out
+
+
+NOTES = (
+    "If prob_document >= 0.5 we predict 'document'. "
+    "OCR features require pytesseract + Tesseract; if absent (ocr='unavailable'), text_area_ratio=0. "
+    "OCR only runs when it could change the prediction; otherwise ocr='skipped' and text_area_ratio=0."
+)
+
+
+async def _read_capped(file: UploadFile) -> bytes:
+    """The upload's bytes; 413 beyond settings.is_document_max_bytes, checked before reading when the size is known."""
+    limit = settings.is_document_max_bytes
+    if file.size is not None and file.size > limit:
+        raise HTTPException(status_code=413, detail=f"Image larger than {limit} bytes")
+    content = await file.read(limit + 1)
+    if len(content) > limit:
+        raise HTTPException(status_code=413, detail=f"Image larger than {limit} bytes")
+    return content
+
+
+@router.post("/is_document", summary="Classify an uploaded image as document vs photo")
+async def is_document(
+    file: UploadFile = File(...),
+    current_user: AppUser = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """Accepts an uploaded image and returns classification JSON (document vs photo)."""
+    _ensure_libs_available()
+    content = await _read_capped(file)
+    analysis = await asyncio.to_thread(_analyze_upload, content)
+    return {**_result(file.filename, analysis), "notes": NOTES}
+
+
+@router.post("/is_document/batch", summary="Classify several uploaded images as document vs photo")
+async def is_document_batch(
+    files: List[UploadFile] = File(...),
+    current_user: AppUser = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Classifies up to settings.is_document_batch_max images in one request, in upload order.
+    An image that cannot be read, or is over settings.is_document_max_bytes, gets an
+    ``error`` entry instead of failing the batch.
+    """
+    _ensure_libs_available()
+    if len(files) > settings.is_document_batch_max:
+        raise HTTPException(status_code=400, detail=f"At most {settings.is_document_batch_max} images per batch")
+    # Each entry is the image bytes or the HTTPException that rejected it
+    uploads: List[Any] = []
+    for f in files:
+        try:
+            uploads.append(await _read_capped(f))
+        except HTTPException as e:
+            uploads.append(e)
+
+    def run() -> List[Dict[str, Any]]:
+        results = []
+        for f, upload in zip(files, uploads):
+            try:
+                if isinstance(upload, HTTPException):
+                    raise upload
+                results.append(_result(f.filename, _analyze_upload(upload)))
+            except HTTPException as e:
+                results.append({"image": f.filename or "uploaded_image", "error": e.detail})
+        return results
+
+    return {"results": await asyncio.to_thread(run), "notes": NOTES}
@@ -7,25 +7,21 @@ from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, timezone
 
-from app.api.dependencies import get_current_user, get_bearer_or_cookie_token
-from app.db.session import get_db
+from app.api.dependencies import get_current_user, get_bearer_or_cookie_token, require_permission
+from app.db.session import get_db, get_read_db
 from app.db.models.app_user import AppUser
 from app.db.models.person import Person
 from app.db.models.message import Message
 from app.db.models.message_person import MessagePerson
-from app.db.models.message_not_seen import MessageNotSeen
-from app.db.models.person_team import PersonTeam
-from app.db.models.team_case import TeamCase
-from app.db.models.person_case import PersonCase
-from app.db.models.app_user_role import AppUserRole
-from app.db.models.role_permission import RolePermission
-from app.db.models.permission import Permission
 from app.core.id_codec import decode_id, OpaqueIdError, encode_id
 from app.db.models.file import File as OtherFile
 from app.services.s3 import get_download_link
+from app.services.reactions import reaction_counts, set_reaction
+from app.services.read_state import MAIN_THREAD, get_read_state_store, thread_of
 
 from .case_utils import _decode_or_404, can_user_access_case, case_number_or_id
 from app.schemas.message import MessageRead
+from app.api.responses import validated_response
 
 router = APIRouter()
 
@@ -62,27 +58,10 @@ class MessageReactionsRead(_BaseModel_MSG):
     my_reaction: _Optional_MSG[str] = None
 
 async def _build_reaction_map(db: AsyncSession, mids: list[int]) -> dict[int, list[dict]]:
-    """Aggregate reactions across all persons per message ids in `mids`.
+    """Reactions across all persons per message ids in `mids`, read from the maintained counters.
     Returns a mapping: raw_message_id -> [{ emoji, count }, ...]
     """
-    reaction_map: dict[int, list[dict]] = {}
-    if not mids:
-        return reaction_map
-    MP = MessagePerson
-    agg_q = (
-        select(MP.message_id, MP.reaction, sa.func.count().label("cnt"))
-        .where(MP.message_id.in_(mids), MP.reaction.is_not(None))
-        .group_by(MP.message_id, MP.reaction)
-    )
-    agg_rows = (await db.execute(agg_q)).all()
-    for ar in agg_rows:
-        mid = int(ar.message_id)
-        emoji = ar.reaction
-        cnt = int(getattr(ar, "cnt", 0) or 0)
-        if emoji is None or cnt <= 0:
-            continue
-        reaction_map.setdefault(mid, []).append({"emoji": emoji, "count": cnt})
-    return reaction_map
+    return await reaction_counts(db, mids)
 
 # ------------------------------------------------------------
 # Get messages for a case
@@ -92,12 +71,25 @@ async def list_case_messages(
     case_id: str,
     filter_by_field_name: Optional[str] = None,
     filter_by_field_id: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AppUser = Depends(get_current_user),
 ):
 
     pk = await case_number_or_id(db, current_user, case_id)
 
+    items = await _load_case_messages(db, int(pk), current_user, filter_by_field_name, filter_by_field_id)
+    return validated_response(items, List[MessageRead])
+
+
+async def _load_case_messages(
+    db: AsyncSession,
+    pk: int,
+    current_user: AppUser,
+    filter_by_field_name: Optional[str] = None,
+    filter_by_field_id: Optional[str] = None,
+) -> list[MessageRead]:
+    """Messages for a case as seen by ``current_user``. Callers are responsible for authorization."""
+
     # Resolve current user's person id
     pid = (await db.execute(select(Person.id).where(Person.app_user_id == current_user.id))).scalar_one_or_none()
     if pid is None:
@@ -111,7 +103,7 @@ async def list_case_messages(
     M = Message
     MP = MessagePerson
     M2 = aliased(M)
-    MNS = MessageNotSeen
+    RS, rs_on, seen_expr = get_read_state_store().seen_join(M, int(pid))
 
     # Optional filtering by related field id when provided
     conditions = [M.case_id == pk]
@@ -143,8 +135,8 @@ async def list_case_messages(
             M.updated_at,
             (P.first_name + sa.literal(" ") + P.last_name).label("writer_name"),
             P.profile_pic.isnot(None).label("writer_has_pic"),
-            # seen = no corresponding MessageNotSeen row for this user
-            (MNS.id.is_(None)).label("seen"),
+            # seen flag comes from the configured read-state store
+            seen_expr.label("seen"),
             MP.reaction.label("reaction"),
             M2.message.label("reply_to_text"),
             OtherFile.id.label("file_id"),
@@ -157,7 +149,7 @@ async def list_case_messages(
         .join(P, P.id == M.written_by_id, isouter=True)
         .join(MP, sa.and_(MP.message_id == M.id, MP.person_id == pid), isouter=True)
         .join(M2, M2.id == M.reply_to_id, isouter=True)
-        .join(MNS, sa.and_(MNS.message_id == M.id, MNS.person_id == pid), isouter=True)
+        .join(RS, rs_on, isouter=True)
         .join(OtherFile, OtherFile.id == M.file_id, isouter=True)
         .where(*conditions)
         .order_by(sa.asc(M.created_at), sa.asc(M.id))
@@ -262,68 +254,12 @@ async def create_case_message(
     await db.commit()
     await db.refresh(msg)
 
-    # Insert MessageNotSeen rows for all viewers of this case except the author
+    # Stage read state for the case's watchers except the author (rows backend;
+    # the watermark backend writes nothing per message)
+    # (expired rows are collected by the maintenance scheduler, not on this path)
+    read_state = get_read_state_store()
     try:
-        case_pk = int(msg.case_id)
-        author_pid = int(pid)
-
-        # Cleanup: remove any stale MessageNotSeen entries older than 2 days (global)
-        try:
-            cutoff = datetime.now(timezone.utc) - timedelta(days=2)
-            await db.execute(sa.delete(MessageNotSeen).where(MessageNotSeen.created_at < cutoff))
-            await db.commit()
-        except Exception:
-            # Ignore cleanup errors; do not block message creation
-            try:
-                await db.rollback()
-            except Exception:
-                pass
-
-        # Persons via team membership on teams linked to case
-        PT = PersonTeam
-        TC = TeamCase
-        team_rows = (
-            await db.execute(
-                select(sa.distinct(PT.person_id))
-                .select_from(PT)
-                .join(TC, TC.team_id == PT.team_id)
-                .where(TC.case_id == case_pk)
-            )
-        ).scalars().all()
-
-        # Persons directly linked to case
-        PC = PersonCase
-        direct_rows = (
-            await db.execute(
-                select(sa.distinct(PC.person_id)).where(PC.case_id == case_pk)
-            )
-        ).scalars().all()
-
-        # Persons whose linked user has CASES.ALL_CASES permission
-        P = Person
-        AUR = AppUserRole
-        RP = RolePermission
-        Perm = Permission
-        admin_rows = (
-            await db.execute(
-                select(sa.distinct(P.id))
-                .select_from(P)
-                .join(AUR, AUR.app_user_id == P.app_user_id)
-                .join(RP, RP.role_id == AUR.role_id)
-                .join(Perm, Perm.id == RP.permission_id)
-                .where(Perm.code == "CASES.ALL_CASES")
-            )
-        ).scalars().all()
-
-        person_ids = {int(x) for x in (team_rows or [])}
-        person_ids.update(int(x) for x in (direct_rows or []))
-        person_ids.update(int(x) for x in (admin_rows or []))
-        # Exclude the author themselves
-        person_ids.discard(author_pid)
-
-        if person_ids:
-            # Prepare objects; rely on unique constraint to avoid dups if concurrent
-            db.add_all([MessageNotSeen(message_id=int(msg.id), person_id=pid_val) for pid_val in person_ids])
+        if await read_state.on_message_created(db, int(msg.id), int(msg.case_id), int(pid)):
             await db.commit()
     except Exception:
         # Best-effort: do not fail message creation if notification staging fails
@@ -403,11 +339,11 @@ async def create_case_message(
         my_photo_url=None,  # filled per-connection in ws manager
     )
 
-    # Publish to subscribers of this case (per-connection fields will be added by manager)
+    # Publish to subscribers of this thread (per-connection fields are added by the manager);
+    # everyone on the case except the author gains an unseen message
     try:
-        ws_payload = msg_model.model_dump(mode="json")
-        ws_payload["author_person_id"] = int(pid)
-        await _ws_manager.publish_count_change(int(msg.case_id))
+        thread = thread_of(msg.rfi_id, msg.ops_plan_id, msg.task_id)
+        await _ws_manager.publish_message_created(int(msg.case_id), msg_model, thread, int(current_user.id))
     except Exception:
         # Do not fail the request if broadcasting fails
         pass
@@ -444,18 +380,10 @@ async def set_message_reaction(
     if owns is None:
         raise HTTPException(status_code=404, detail="Message not found")
 
-    # Upsert message_person for this (message, person)
-    row = (
-        await db.execute(select(MessagePerson).where(MessagePerson.message_id == mid, MessagePerson.person_id == pid))
-    ).scalars().first()
-
     reaction_val = payload.reaction if (payload and hasattr(payload, 'reaction')) else None
 
-    if row:
-        row.reaction = reaction_val
-    else:
-        db.add(MessagePerson(message_id=mid, person_id=int(pid), reaction=reaction_val))
-
+    # Upsert message_person for this (message, person) and adjust the reaction counters
+    await set_reaction(db, int(mid), int(pid), reaction_val)
     await db.commit()
 
     # Broadcast unified message change event (covers reaction updates)
@@ -540,15 +468,33 @@ async def get_case_message(
     if owns is None:
         raise HTTPException(status_code=404, detail="Message not found")
 
-    # Precompute current user's photo URL once
-    me_has_pic = (await db.execute(select(Person.profile_pic.isnot(None)).where(Person.id == pid))).scalar() or False
-    my_photo_url = f"/api/v1/media/pfp/person/{encode_id('person', int(pid))}?s=xs" if me_has_pic else "/images/pfp-generic.png"
+    item = await _load_case_message(db, int(pk), int(mid), int(pid))
+    if item is None:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return item
+
 
+async def _load_case_message(db: AsyncSession, pk: int, mid: int, pid: Optional[int]) -> Optional[MessageRead]:
+    """
+    One message in the list_case_messages shape. With ``pid`` the per-viewer fields
+    (seen, reaction, is_mine, my_photo_url) are filled for that person; without it they
+    are left empty so the result can be shared and completed per recipient.
+    Callers are responsible for authorization.
+    """
     P = Person
     M = Message
     MP = MessagePerson
     M2 = aliased(M)
-    MNS = MessageNotSeen
+
+    my_photo_url = None
+    if pid is not None:
+        # Precompute current user's photo URL once
+        me_has_pic = (await db.execute(select(Person.profile_pic.isnot(None)).where(Person.id == pid))).scalar() or False
+        my_photo_url = f"/api/v1/media/pfp/person/{encode_id('person', int(pid))}?s=xs" if me_has_pic else "/images/pfp-generic.png"
+        RS, rs_on, seen_expr = get_read_state_store().seen_join(M, int(pid))
+        viewer_columns = [seen_expr.label("seen"), MP.reaction.label("reaction")]
+    else:
+        viewer_columns = [sa.null().label("seen"), sa.null().label("reaction")]
 
     q = (
         select(
@@ -558,12 +504,12 @@ async def get_case_message(
             M.message,
             M.reply_to_id,
             M.rule_out,
+            M.task_id,
             M.created_at,
             M.updated_at,
             (P.first_name + sa.literal(" ") + P.last_name).label("writer_name"),
             P.profile_pic.isnot(None).label("writer_has_pic"),
-            (MNS.id.is_(None)).label("seen"),
-            MP.reaction.label("reaction"),
+            *viewer_columns,
             M2.message.label("reply_to_text"),
             OtherFile.id.label("file_id"),
             OtherFile.file_name.label("file_name"),
@@ -573,21 +519,26 @@ async def get_case_message(
         )
         .select_from(M)
         .join(P, P.id == M.written_by_id, isouter=True)
-        .join(MP, sa.and_(MP.message_id == M.id, MP.person_id == pid), isouter=True)
         .join(M2, M2.id == M.reply_to_id, isouter=True)
-        .join(MNS, sa.and_(MNS.message_id == M.id, MNS.person_id == pid), isouter=True)
         .join(OtherFile, OtherFile.id == M.file_id, isouter=True)
         .where(M.case_id == pk, M.id == mid)
     )
+    if pid is not None:
+        q = (
+            q.join(MP, sa.and_(MP.message_id == M.id, MP.person_id == pid), isouter=True)
+            .join(RS, rs_on, isouter=True)
+        )
     r = (await db.execute(q)).first()
     if not r:
-        raise HTTPException(status_code=404, detail="Message not found")
+        return None
 
     # Aggregate reactions for this message
     reaction_map: dict[int, list[dict]] = await _build_reaction_map(db, [mid])
 
     written_by_id = int(r.written_by_id) if r.written_by_id is not None else None
-    is_mine = (written_by_id == int(pid)) if written_by_id is not None else False
+    is_mine = None
+    if pid is not None:
+        is_mine = (written_by_id == int(pid)) if written_by_id is not None else False
     writer_photo_url = (
         f"/api/v1/media/pfp/person/{encode_id('person', int(written_by_id))}?s=xs" if getattr(r, "writer_has_pic", False) and written_by_id is not None else "/images/pfp-generic.png"
     )
@@ -619,11 +570,11 @@ async def get_case_message(
         created_at=r.created_at,
         updated_at=r.updated_at,
         writer_name=getattr(r, "writer_name", None),
-        seen=bool(getattr(r, "seen", False)),
+        seen=bool(r.seen) if pid is not None else None,
         reaction=getattr(r, "reaction", None),
         reactions=reaction_map.get(int(r.id), []),
         reply_to_text=getattr(r, "reply_to_text", None),
-        is_mine=bool(is_mine),
+        is_mine=is_mine,
         writer_photo_url=writer_photo_url,
         my_photo_url=my_photo_url,
     )
@@ -721,13 +672,15 @@ async def delete_message(
     if (now - created) > timedelta(hours=1):
         raise HTTPException(status_code=403, detail="Delete window has expired")
 
+    thread = thread_of(row.rfi_id, row.ops_plan_id, row.task_id)
+
     # Proceed to delete; rely on ON DELETE constraints for related rows
     await db.delete(row)
     await db.commit()
 
     # Broadcast both: the message changed (deleted) and counts may have changed
     try:
-        await _ws_manager.publish_message_change(pk, mid)
+        await _ws_manager.publish_message_deleted(pk, mid, thread)
     except Exception:
         pass
     try:
@@ -746,12 +699,12 @@ async def list_new_case_messages(
     case_id: str,
     filter_by_field_name: Optional[str] = None,
     filter_by_field_id: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AppUser = Depends(get_current_user),
 ):
-    """Return messages for the given case that are currently marked as not seen
-    by the current user (i.e., there exists a message_not_seen record for the
-    message and this person). The payload shape matches list_case_messages.
+    """Return messages for the given case that are currently not seen by the
+    current user according to the configured read-state store. The payload
+    shape matches list_case_messages.
     """
     pk = await case_number_or_id(db, current_user, case_id)
 
@@ -768,10 +721,10 @@ async def list_new_case_messages(
     M = Message
     MP = MessagePerson
     M2 = aliased(M)
-    MNS = MessageNotSeen
+    RS, rs_on, seen_expr = get_read_state_store().seen_join(M, int(pid))
 
     # Optional filtering by related field id when provided
-    conditions = [M.case_id == pk]
+    conditions = [M.case_id == pk, sa.not_(seen_expr)]
     if filter_by_field_name and filter_by_field_id:
         allowed = {"rfi_id": "rfi", "ops_plan_id": "ops_plan", "task_id": "task"}
         if filter_by_field_name not in allowed:
@@ -799,8 +752,8 @@ async def list_new_case_messages(
             M.updated_at,
             (P.first_name + sa.literal(" ") + P.last_name).label("writer_name"),
             P.profile_pic.isnot(None).label("writer_has_pic"),
-            # seen = no corresponding MessageNotSeen row (but here we INNER JOIN MNS, so this is always False)
-            (MNS.id.is_(None)).label("seen"),
+            # only unseen messages are selected, so this is always False
+            seen_expr.label("seen"),
             MP.reaction.label("reaction"),
             M2.message.label("reply_to_text"),
             OtherFile.id.label("file_id"),
@@ -813,7 +766,7 @@ async def list_new_case_messages(
         .join(P, P.id == M.written_by_id, isouter=True)
         .join(MP, sa.and_(MP.message_id == M.id, MP.person_id == pid), isouter=True)
         .join(M2, M2.id == M.reply_to_id, isouter=True)
-        .join(MNS, sa.and_(MNS.message_id == M.id, MNS.person_id == pid))
+        .join(RS, rs_on, isouter=True)
         .join(OtherFile, OtherFile.id == M.file_id, isouter=True)
         .where(*conditions)
         .order_by(sa.asc(M.created_at), sa.asc(M.id))
@@ -868,11 +821,11 @@ async def list_new_case_messages(
                 my_photo_url=my_photo_url,
             )
         )
-    return items
+    return validated_response(items, List[MessageRead])
 
 
 # ------------------------------------------------------------
-# Delete message_not_seen records
+# Mark messages seen
 # ------------------------------------------------------------
 @router.post("/{case_id}/messages/mark_seen_up_to/{message_id}", summary="Mark messages as seen up to the given message id (inclusive) for current user", response_model=MarkSeenUpToResponse)
 async def mark_messages_seen_up_to(
@@ -898,28 +851,14 @@ async def mark_messages_seen_up_to(
     if owns is None:
         raise HTTPException(status_code=404, detail="Message not found")
 
-    # Count how many unseen rows would be cleared
-    M = Message
-    MNS = MessageNotSeen
-    count_q = (
-        select(sa.func.count())
-        .select_from(MNS)
-        .join(M, M.id == MNS.message_id)
-        .where(MNS.person_id == pid, M.case_id == pk, M.id <= mid)
-    )
-    to_clear = int((await db.execute(count_q)).scalar() or 0)
+    # Clear unseen state up to this message and report how many were cleared
+    to_clear = await get_read_state_store().mark_seen_up_to(db, int(pid), int(pk), int(mid))
 
     if to_clear:
-        # Delete matching rows
-        del_stmt = (
-            sa.delete(MNS)
-            .where(MNS.person_id == pid)
-            .where(MNS.message_id.in_(select(M.id).where(M.case_id == pk, M.id <= mid)))
-        )
-        await db.execute(del_stmt)
         await db.commit()
         try:
-            await _ws_manager.publish_count_change(int(pk))
+            # Only the reader's counts changed
+            await _ws_manager.publish_count_change(int(pk), user_ids=[int(current_user.id)])
         except Exception:
 
             pass
@@ -935,7 +874,7 @@ async def mark_messages_seen_up_to(
 # ------------------------------------------------------------
 async def unseen_counts_all_cases(encrypted_user_id: str, session_id: str) -> dict[str, int]:
     from app.core.id_codec import set_current_session, reset_current_session, decode_id, encode_id, OpaqueIdError
-    from app.db.session import async_session_maker
+    from app.db.session import db_router
 
     # Establish id_codec session context so decode_id/encode_id work
     ctx_token = set_current_session(session_id)
@@ -947,30 +886,16 @@ async def unseen_counts_all_cases(encrypted_user_id: str, session_id: str) -> di
             # Propagate a clear error for caller
             raise OpaqueIdError("Invalid encrypted user id or session context")
 
-        async with async_session_maker() as db:
+        # Counts are read-only: serve them from the replica unless this session just wrote
+        async with db_router.reader_for(session_id)() as db:
             # Resolve person's id linked to the user
             pid = (await db.execute(select(Person.id).where(Person.app_user_id == user_id))).scalar_one_or_none()
             if pid is None:
                 # No linked person; treat as invalid usage
                 raise ValueError("User is not linked to a person")
 
-            M = Message
-            MNS = MessageNotSeen
-
             # Single grouped query: by case and mutually exclusive dimension ids
-            q = (
-                select(
-                    M.case_id.label("case_id"),
-                    M.rfi_id.label("rfi_id"),
-                    M.ops_plan_id.label("ops_plan_id"),
-                    M.task_id.label("task_id"),
-                    sa.func.count().label("cnt"),
-                )
-                .select_from(MNS)
-                .join(M, M.id == MNS.message_id)
-                .where(MNS.person_id == pid)
-                .group_by(M.case_id, M.rfi_id, M.ops_plan_id, M.task_id)
-            )
+            q = get_read_state_store().unseen_counts_query(int(pid))
 
             # Get the SQL
             #sql = str(q.compile(compile_kwargs={"literal_binds": True}))
@@ -1087,7 +1012,7 @@ async def get_unseen_messages_counts(
 
 import asyncio
 import logging
-from typing import Dict, Set, Any
+from typing import Dict, Set, Any, Awaitable, Callable, Iterable
 from jose import jwt, JWTError
 from fastapi import status
 from app.core.config import settings
@@ -1095,17 +1020,74 @@ from app.db.session import async_session_maker
 from app.services.auth import validate_session
 
 
+WS_PROTOCOL_VERSION = 2
+# Thread types a protocol-2 client may subscribe to, with the entity that must belong to the case
+_WS_THREAD_TYPES = ("rfi", "ops_plan", "task")
+
+
 class _WSConnection:
     def __init__(self, websocket: WebSocket, user_id: int, session_id: str):
         self.websocket = websocket
         self.user_id = int(user_id)
         self.session_id = str(session_id)
+        # 1: thin events sent as they happen (legacy clients).
+        # 2: after "hello"; full payloads for subscribed cases/threads, sent in batch frames.
+        self.protocol = 1
+        self.person_id: Optional[int] = None
+        self.my_photo_url: Optional[str] = None
+        # (case_id, None) follows every thread of a case; (case_id, (thread_type, thread_id)) one thread
+        self.subscriptions: Set[tuple] = set()
+        # Events waiting for the next batch tick (protocol 2)
+        self.outbox: List[dict] = []
+
+    def follows(self, case_id: int, thread: tuple) -> bool:
+        return (case_id, None) in self.subscriptions or (case_id, tuple(thread)) in self.subscriptions
 
 class _CaseWSManager:
-    def __init__(self) -> None:
+    """
+    Per-user WebSocket fan-out.
+
+    counts.update is addressed to the users whose unseen counts changed, not to every
+    user on the case. Requests for the same user within ``debounce_seconds`` are
+    coalesced into one recount and one frame per connection; ``stats()`` reports how
+    many frames that saved.
+
+    Protocol-2 connections subscribe to cases or single threads and receive full
+    MessageRead payloads for them, so the client does not refetch after each event.
+    Their frames are queued and sent as one ``batch`` frame per tick.
+    """
+
+    def __init__(
+        self,
+        counts_fn: Optional[Callable[[str, str], Awaitable[dict]]] = None,
+        debounce_seconds: Optional[float] = None,
+        batch_tick_ms: Optional[int] = None,
+        session_maker=None,
+    ) -> None:
         # Keyed by raw user_id
         self._subs_by_user: Dict[int, Set[_WSConnection]] = {}
         self._lock = asyncio.Lock()
+        # Defaults to the app's primary session maker; injectable for tests
+        self._session_maker = session_maker
+        self.batch_tick_seconds = max(0.005, float(settings.ws_batch_tick_ms if batch_tick_ms is None else batch_tick_ms) / 1000.0)
+        self._ticker: Optional[asyncio.Task] = None
+        # (encrypted_user_id, session_id) -> counts dict; unseen_counts_all_cases unless injected (tests)
+        self._counts_fn = counts_fn
+        self.debounce_seconds = float(settings.ws_counts_debounce_seconds if debounce_seconds is None else debounce_seconds)
+        # Users with a counts.update waiting for the debounce window to close
+        self._pending_counts: Set[int] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._stats: Dict[str, int] = {
+            "counts_requested": 0,      # per-user counts.update requests
+            "counts_coalesced": 0,      # merged into an already pending update
+            "counts_not_connected": 0,  # user had no open socket
+            "counts_recomputed": 0,     # unseen count queries run
+            "counts_frames_sent": 0,
+            "event_frames_sent": 0,     # messages.change / reactions.update
+            "events_batched": 0,        # protocol-2 events queued for a batch frame
+            "batch_frames_sent": 0,
+            "send_errors": 0,
+        }
         #print("WS Manager initialized")
 
     # SUBSCRIBE -------------------------------------------------
@@ -1113,12 +1095,6 @@ class _CaseWSManager:
         async with self._lock:
             s = self._subs_by_user.setdefault(int(conn.user_id), set())
             s.add(conn)
-            #print("subscribed", {
-            #    "event": "subscribe_user",
-            #    "user_id": conn.user_id,
-            #    "session_id": conn.session_id,
-            #    "sub_count": len(s),
-            #})
 
     # DISCONNECT -------------------------------------------------
     async def disconnect(self, conn: _WSConnection) -> None:
@@ -1126,96 +1102,375 @@ class _CaseWSManager:
             for uid, s in list(self._subs_by_user.items()):
                 if conn in s:
                     s.remove(conn)
-                    """ print("disconnected", {
-                        "event": "disconnect",
-                        "user_id": conn.user_id,
-                        "session_id": conn.session_id,
-                        "sub_count": len(s),
-                    })"""
                     if not s:
                         self._subs_by_user.pop(uid, None)
 
+    # STATS -------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        conns = [c for s in self._subs_by_user.values() for c in s]
+        return {
+            **self._stats,
+            # counts.update frames not sent because an update for the same user was already pending
+            "frames_suppressed": self._stats["counts_coalesced"],
+            "pending_users": len(self._pending_counts),
+            "connected_users": len(self._subs_by_user),
+            "connections": len(conns),
+            "protocol2_connections": sum(1 for c in conns if c.protocol >= 2),
+            "subscriptions": sum(len(c.subscriptions) for c in conns),
+            # Events waiting for the next batch tick; grows when sends fall behind
+            "queued_events": sum(len(c.outbox) for c in conns),
+            "approx_bytes": self.approx_bytes(),
+            "debounce_seconds": self.debounce_seconds,
+            "batch_tick_ms": int(self.batch_tick_seconds * 1000),
+        }
+
+    def approx_bytes(self) -> int:
+        """Rough size of what the manager holds: connection records, subscriptions, outboxes, pending users."""
+        return _approx_size(self._subs_by_user, self._pending_counts)
+
+    def _sessions(self):
+        return self._session_maker or async_session_maker
+
+    async def _drop(self, conn: _WSConnection) -> None:
+        self._stats["send_errors"] += 1
+        try:
+            await conn.websocket.close()
+        except Exception:
+            pass
+        await self.disconnect(conn)
+
+    async def _recipients(self, case_id: int) -> Set[int]:
+        from .case_utils import list_user_ids_for_case
+        async with self._sessions()() as db:
+            return {int(u) for u in await list_user_ids_for_case(db, int(case_id))}
+
+    async def _followers(self, case_id: int, thread: tuple) -> List[_WSConnection]:
+        """Protocol-2 connections subscribed to ``thread`` of ``case_id`` (or to the whole case)."""
+        async with self._lock:
+            return [c for s in self._subs_by_user.values() for c in s if c.protocol >= 2 and c.follows(case_id, thread)]
+
+    # PROTOCOL 2 / SUBSCRIPTIONS ---------------------------------
+    def upgrade(self, conn: _WSConnection, person_id: Optional[int], my_photo_url: Optional[str]) -> None:
+        conn.protocol = WS_PROTOCOL_VERSION
+        conn.person_id = int(person_id) if person_id is not None else None
+        conn.my_photo_url = my_photo_url
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.create_task(self._tick_loop())
+
+    def set_subscription(self, conn: _WSConnection, case_id: int, thread: Optional[tuple], subscribed: bool) -> None:
+        key = (int(case_id), tuple(thread) if thread is not None else None)
+        if subscribed:
+            conn.subscriptions.add(key)
+        else:
+            conn.subscriptions.discard(key)
+
+    def _enqueue(self, conn: _WSConnection, frame: dict) -> None:
+        conn.outbox.append(frame)
+        self._stats["events_batched"] += 1
+
+    async def _tick_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.batch_tick_seconds)
+            await self.flush_batches()
+            async with self._lock:
+                if not any(c.protocol >= 2 for s in self._subs_by_user.values() for c in s):
+                    return
+
+    async def flush_batches(self) -> None:
+        """Send each protocol-2 connection its queued events as one ``batch`` frame."""
+        async with self._lock:
+            conns = [c for s in self._subs_by_user.values() for c in s if c.outbox]
+        for conn in conns:
+            events, conn.outbox = conn.outbox, []
+            try:
+                await conn.websocket.send_json({"type": "batch", "events": events})
+                self._stats["batch_frames_sent"] += 1
+            except Exception:
+                await self._drop(conn)
+
     # PUBLISH Message Count Change ---------------------------
-    async def publish_count_change(self, case_id: int):
-        await self.publish( "counts.update", case_id)
+    async def publish_count_change(
+        self,
+        case_id: int,
+        user_ids: Optional[Iterable[int]] = None,
+        exclude_user_ids: Iterable[int] = (),
+    ) -> None:
+        """
+        Schedule counts.update for ``user_ids`` (default: every user who can see the
+        case), minus ``exclude_user_ids``. Frames go out after the debounce window.
+        """
+        if user_ids is None:
+            from .case_utils import list_user_ids_for_case
+            async with async_session_maker() as db:
+                user_ids = await list_user_ids_for_case(db, int(case_id))
+        excluded = {int(u) for u in exclude_user_ids}
+        await self.queue_count_update(int(u) for u in user_ids if int(u) not in excluded)
+
+    async def queue_count_update(self, user_ids: Iterable[int]) -> None:
+        async with self._lock:
+            for uid in user_ids:
+                uid = int(uid)
+                self._stats["counts_requested"] += 1
+                if uid not in self._subs_by_user:
+                    self._stats["counts_not_connected"] += 1
+                elif uid in self._pending_counts:
+                    self._stats["counts_coalesced"] += 1
+                else:
+                    self._pending_counts.add(uid)
+            if self._pending_counts and (self._flush_task is None or self._flush_task.done()):
+                self._flush_task = asyncio.create_task(self._flush_counts_after_debounce())
+
+    async def _flush_counts_after_debounce(self) -> None:
+        if self.debounce_seconds > 0:
+            await asyncio.sleep(self.debounce_seconds)
+        await self.flush_counts()
+
+    async def flush_counts(self) -> None:
+        """Send counts.update now to every user with a pending request."""
+        from app.core.id_codec import set_current_session, reset_current_session, encode_id
+
+        async with self._lock:
+            pending, self._pending_counts = self._pending_counts, set()
+            subs_map = {uid: list(self._subs_by_user.get(uid, ())) for uid in pending}
+        counts_fn = self._counts_fn or unseen_counts_all_cases
+
+        for uid, conns in subs_map.items():
+            # Counts only differ per session in how ids are encrypted
+            by_session: Dict[str, dict] = {}
+            for conn in conns:
+                try:
+                    counts = by_session.get(conn.session_id)
+                    if counts is None:
+                        # Build encrypted user id specific to this connection's session
+                        ctx = set_current_session(conn.session_id)
+                        try:
+                            enc_uid = encode_id("app_user", int(uid))
+                        finally:
+                            reset_current_session(ctx)
+                        counts = await counts_fn(enc_uid, conn.session_id)
+                        by_session[conn.session_id] = counts
+                        self._stats["counts_recomputed"] += 1
+                    frame = {"type": "counts.update", "counts": counts}
+                    if conn.protocol >= 2:
+                        self._enqueue(conn, frame)
+                        continue
+                    await conn.websocket.send_json(frame)
+                    self._stats["counts_frames_sent"] += 1
+                except Exception:
+                    await self._drop(conn)
 
     # PUBLISH New Reaction ---------------------------
     async def publish_new_reaction(self, case_id: int, message_id: int, reaction: str):
         # Legacy alias: publish a reactions.update event (kept for backward compatibility)
         await self.publish("reactions.update", case_id, message_id=message_id, content=reaction)
 
+    # PUBLISH Message Created ---------------------------
+    async def publish_message_created(self, case_id: int, message: MessageRead, thread: tuple, author_user_id: int) -> None:
+        """
+        Push a new message to protocol-2 followers of its thread and schedule
+        counts.update for everyone else on the case except the author.
+        """
+        from app.core.id_codec import set_current_session, reset_current_session
+
+        case_id = int(case_id)
+        recipients = await self._recipients(case_id)
+        for conn in await self._followers(case_id, thread):
+            if conn.user_id not in recipients:
+                continue
+            mine = conn.person_id is not None and conn.person_id == message.written_by_id
+            personal = message.model_copy(update={"is_mine": mine, "seen": mine, "my_photo_url": conn.my_photo_url})
+            ctx = set_current_session(conn.session_id)
+            try:
+                frame = {
+                    "type": "message",
+                    "event": "created",
+                    **_ws_thread_ref(case_id, thread),
+                    "message": personal.model_dump(mode="json"),
+                }
+            finally:
+                reset_current_session(ctx)
+            self._enqueue(conn, frame)
+        await self.queue_count_update(u for u in recipients if u != int(author_user_id))
+
     # PUBLISH Message Change ---------------------------
     async def publish_message_change(self, case_id: int, message_id: int):
+        """
+        Thin messages.change for protocol-1 connections; the updated message (with
+        each viewer's own reaction) for protocol-2 followers of its thread.
+        """
         await self.publish("messages.change", case_id, message_id=message_id)
+        await self._publish_full_message(int(case_id), int(message_id))
+
+    async def _publish_full_message(self, case_id: int, message_id: int) -> None:
+        from app.core.id_codec import set_current_session, reset_current_session
+
+        async with self._lock:
+            any_followers = any(c.protocol >= 2 and any(k[0] == case_id for k in c.subscriptions) for s in self._subs_by_user.values() for c in s)
+        if not any_followers:
+            return
+        async with self._sessions()() as db:
+            row = (
+                await db.execute(
+                    select(Message.rfi_id, Message.ops_plan_id, Message.task_id).where(Message.id == message_id, Message.case_id == case_id)
+                )
+            ).first()
+            if row is None:
+                return
+            thread = thread_of(row.rfi_id, row.ops_plan_id, row.task_id)
+            followers = await self._followers(case_id, thread)
+            if not followers:
+                return
+            base = await _load_case_message(db, case_id, message_id, None)
+            if base is None:
+                return
+            person_ids = {c.person_id for c in followers if c.person_id is not None}
+            my_reactions = {}
+            # The base row is loaded without a viewer, so ``seen`` is filled per follower
+            seen_ids = await get_read_state_store().seen_by(db, message_id, person_ids)
+            if person_ids:
+                my_reactions = dict(
+                    (
+                        await db.execute(
+                            select(MessagePerson.person_id, MessagePerson.reaction).where(
+                                MessagePerson.message_id == message_id, MessagePerson.person_id.in_(person_ids)
+                            )
+                        )
+                    ).all()
+                )
+        recipients = await self._recipients(case_id)
+        for conn in followers:
+            if conn.user_id not in recipients:
+                continue
+            personal = base.model_copy(update={
+                "is_mine": conn.person_id is not None and conn.person_id == base.written_by_id,
+                "reaction": my_reactions.get(conn.person_id),
+                "seen": conn.person_id in seen_ids if conn.person_id is not None else None,
+                "my_photo_url": conn.my_photo_url,
+            })
+            ctx = set_current_session(conn.session_id)
+            try:
+                frame = {
+                    "type": "message",
+                    "event": "updated",
+                    **_ws_thread_ref(case_id, thread),
+                    "message": personal.model_dump(mode="json"),
+                }
+            finally:
+                reset_current_session(ctx)
+            self._enqueue(conn, frame)
+
+    # PUBLISH Message Deleted ---------------------------
+    async def publish_message_deleted(self, case_id: int, message_id: int, thread: tuple) -> None:
+        from app.core.id_codec import set_current_session, reset_current_session, encode_id
+
+        await self.publish("messages.change", case_id, message_id=message_id)
+        case_id = int(case_id)
+        recipients = await self._recipients(case_id)
+        for conn in await self._followers(case_id, thread):
+            if conn.user_id not in recipients:
+                continue
+            ctx = set_current_session(conn.session_id)
+            try:
+                frame = {
+                    "type": "message",
+                    "event": "deleted",
+                    **_ws_thread_ref(case_id, thread),
+                    "message_id": encode_id("message", int(message_id)),
+                }
+            finally:
+                reset_current_session(ctx)
+            self._enqueue(conn, frame)
 
     # PUBLISH -------------------------------------------------
     async def publish(self, type: str, case_id: int, message_id: int = None, content: str = None) -> None:
+        if type == "counts.update":
+            await self.publish_count_change(case_id)
+            return
 
-        # print("publish", type, case_id, message_id, content)
-
-        # Determine which users can see this case, then push counts to connected users
-        from .case_utils import list_user_ids_for_case
+        # Determine which users can see this case, then push the event to connected users
         from app.core.id_codec import set_current_session, reset_current_session, encode_id
-        async with async_session_maker() as db:
-            user_ids = await list_user_ids_for_case(db, int(case_id))
         async with self._lock:
-            # Snapshot of all current connections keyed by user id
-            subs_map = {uid: list(conns) for uid, conns in self._subs_by_user.items() if uid in set(user_ids)}
-        """print("publishing", {
-            "type": type,
-            "case_id": int(case_id),
-            "message_id": message_id,
-            "content": content,
-        })"""
+            if not any(c.protocol < 2 for s in self._subs_by_user.values() for c in s):
+                return
+        user_ids = await self._recipients(int(case_id))
+        async with self._lock:
+            # Snapshot of protocol-1 connections keyed by user id (protocol 2 gets full payloads instead)
+            subs_map = {uid: [c for c in conns if c.protocol < 2] for uid, conns in self._subs_by_user.items() if uid in user_ids}
         for uid, conns in subs_map.items():
             for conn in conns:
                 try:
-                    # Build encrypted user id specific to this connection's session
+                    # Encode IDs under this connection's session context to ensure correct encryption
                     ctx = set_current_session(conn.session_id)
                     try:
-                        enc_uid = encode_id("app_user", int(uid))
+                        enc_case = encode_id("case", int(case_id))
+                        enc_mid = encode_id("message", int(message_id)) if message_id is not None else None
                     finally:
-                        try:
-                            reset_current_session(ctx)
-                        except Exception:
-                            pass
-
-                    if type == "counts.update":
-                        # Compute counts for this user under their session id
-                        counts = await unseen_counts_all_cases(enc_uid, conn.session_id)
-                        await conn.websocket.send_json({
-                            "type": type,
-                            "counts": counts,
-                        })
-                        # print("delivered_counts", counts)
-                    else:
-                        # Encode IDs under this connection's session context to ensure correct encryption
-                        from app.core.id_codec import set_current_session as _set_sess2, reset_current_session as _reset_sess2, encode_id as _enc2
-                        _ctx2 = _set_sess2(conn.session_id)
-                        try:
-                            enc_case = _enc2("case", int(case_id))
-                            enc_mid = _enc2("message", int(message_id)) if message_id is not None else None
-                        finally:
-                            try:
-                                _reset_sess2(_ctx2)
-                            except Exception:
-                                pass
-                        await conn.websocket.send_json({
-                            "type": type,
-                            "case_id": enc_case,
-                            "message_id": enc_mid,
-                            "reaction": content,
-                        })
-                        # print("delivered_reaction", content)
+                        reset_current_session(ctx)
+                    await conn.websocket.send_json({
+                        "type": type,
+                        "case_id": enc_case,
+                        "message_id": enc_mid,
+                        "reaction": content,
+                    })
+                    self._stats["event_frames_sent"] += 1
                 except Exception:
-                    try:
-                        await conn.websocket.close()
-                    except Exception:
-                        pass
-                    await self.disconnect(conn)
+                    await self._drop(conn)
+
+
+def _approx_size(*objs) -> int:
+    """sys.getsizeof summed over containers and their contents (each object counted once; sockets not followed)."""
+    import sys
+
+    seen: Set[int] = set()
+    total = 0
+    stack = list(objs)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, WebSocket):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, _WSConnection):
+            stack.append(obj.__dict__)
+    return total
+
+
+def _ws_thread_ref(case_id: int, thread: tuple) -> dict:
+    """Encoded case_id/thread fields of a protocol-2 message frame; encode under the connection's session."""
+    from app.core.id_codec import encode_id
+
+    ref = {"case_id": encode_id("case", int(case_id)), "thread": None}
+    if tuple(thread) != MAIN_THREAD:
+        ref["thread"] = {"type": thread[0], "id": encode_id(thread[0], int(thread[1]))}
+    return ref
+
 
 _ws_manager = _CaseWSManager()
 
+
+def _ws_metric_families():
+    s = _ws_manager.stats()
+    yield ("ws_connections", "gauge", "Open message WebSockets in this process", [({}, s["connections"])])
+    yield ("ws_subscriptions", "gauge", "Protocol-2 case/thread subscriptions", [({}, s["subscriptions"])])
+    yield ("ws_queued_events", "gauge", "Protocol-2 events waiting for the next batch frame", [({}, s["queued_events"])])
+    yield ("ws_manager_bytes", "gauge", "Approximate memory held by the WebSocket manager", [({}, s["approx_bytes"])])
+    yield ("ws_frames_sent_total", "counter", "WebSocket frames sent by kind", [
+        ({"kind": "batch"}, s["batch_frames_sent"]),
+        ({"kind": "counts"}, s["counts_frames_sent"]),
+        ({"kind": "event"}, s["event_frames_sent"]),
+    ])
+    yield ("ws_send_errors_total", "counter", "Sends that failed and dropped the connection", [({}, s["send_errors"])])
+
+
+from app.core.instrumentation import registry as _metrics_registry
+
+_metrics_registry.add_collector(_ws_metric_families)
+
 async def _auth_ws_and_get_user(websocket: WebSocket) -> Optional[tuple[AppUser, str]]:
     token: Optional[str] = None
     auth_header = websocket.headers.get("authorization") or websocket.headers.get("Authorization")
@@ -1251,6 +1506,72 @@ async def _auth_ws_and_get_user(websocket: WebSocket) -> Optional[tuple[AppUser,
             return None
         return (user, jti)
 
+async def _ws_hello(conn: _WSConnection, data: dict) -> dict:
+    """Switch a connection to protocol 2 when the client asks for it."""
+    try:
+        requested = int(data.get("protocol") or 1)
+    except (TypeError, ValueError):
+        requested = 1
+    if requested < WS_PROTOCOL_VERSION:
+        return {"type": "hello", "protocol": conn.protocol}
+    async with async_session_maker() as db:
+        row = (
+            await db.execute(select(Person.id, Person.profile_pic.isnot(None)).where(Person.app_user_id == conn.user_id))
+        ).first()
+    person_id, has_pic = (int(row[0]), bool(row[1])) if row else (None, False)
+    from app.core.id_codec import set_current_session, reset_current_session
+    ctx = set_current_session(conn.session_id)
+    try:
+        my_photo_url = f"/api/v1/media/pfp/person/{encode_id('person', person_id)}?s=xs" if has_pic else "/images/pfp-generic.png"
+    finally:
+        reset_current_session(ctx)
+    _ws_manager.upgrade(conn, person_id, my_photo_url)
+    return {"type": "hello", "protocol": conn.protocol, "batch_ms": int(_ws_manager.batch_tick_seconds * 1000)}
+
+
+async def _ws_subscription(conn: _WSConnection, action: str, data: dict) -> dict:
+    """
+    subscribe / unsubscribe {case_id, thread?: {type: rfi|ops_plan|task, id}} with
+    opaque ids. Subscribing checks case access and that the thread belongs to the case.
+    """
+    from app.core.id_codec import set_current_session, reset_current_session
+    from app.db.models.rfi import Rfi
+    from app.db.models.ops_plan import OpsPlan
+    from app.db.models.task import Task
+
+    if conn.protocol < WS_PROTOCOL_VERSION:
+        return {"type": "error", "action": action, "detail": "hello with protocol 2 first"}
+    raw_thread = data.get("thread")
+    ctx = set_current_session(conn.session_id)
+    try:
+        case_id = int(decode_id("case", str(data.get("case_id") or "")))
+        thread = None
+        if raw_thread:
+            thread_type = str(raw_thread.get("type") or "")
+            if thread_type not in _WS_THREAD_TYPES:
+                return {"type": "error", "action": action, "detail": "Invalid thread type"}
+            thread = (thread_type, int(decode_id(thread_type, str(raw_thread.get("id") or ""))))
+    except (OpaqueIdError, AttributeError):
+        return {"type": "error", "action": action, "detail": "Invalid id"}
+    finally:
+        reset_current_session(ctx)
+
+    if action == "subscribe":
+        async with async_session_maker() as db:
+            if not await can_user_access_case(db, conn.user_id, case_id):
+                return {"type": "error", "action": action, "detail": "Case not found"}
+            if thread is not None:
+                entity = {"rfi": Rfi, "ops_plan": OpsPlan, "task": Task}[thread[0]]
+                owner = (await db.execute(select(entity.case_id).where(entity.id == thread[1]))).scalar_one_or_none()
+                if owner is None or int(owner) != case_id:
+                    return {"type": "error", "action": action, "detail": "Thread not found"}
+    _ws_manager.set_subscription(conn, case_id, thread, action == "subscribe")
+    reply = {"type": "subscribed" if action == "subscribe" else "unsubscribed", "case_id": data.get("case_id")}
+    if raw_thread:
+        reply["thread"] = raw_thread
+    return reply
+
+
 # ------------------------------------------------------------
 # Call from client to setup a websocket
 # ------------------------------------------------------------
@@ -1298,6 +1619,10 @@ async def websocket_messages(websocket: WebSocket):
             action = (data or {}).get("action")
             if action == "ping":
                 await websocket.send_json({"type": "pong"})
+            elif action == "hello":
+                await websocket.send_json(await _ws_hello(conn, data))
+            elif action in ("subscribe", "unsubscribe"):
+                await websocket.send_json(await _ws_subscription(conn, action, data))
             else:
                 # no-op for unknown/legacy actions
                 await websocket.send_json({"type": "ok"})
@@ -1309,3 +1634,15 @@ async def websocket_messages(websocket: WebSocket):
 
     finally:
         await _ws_manager.disconnect(conn)
+
+
+# ------------------------------------------------------------
+# WebSocket delivery stats (this process)
+# ------------------------------------------------------------
+@router.get(
+    "/messages/ws/stats",
+    summary="WebSocket delivery counters for this process",
+    dependencies=[Depends(require_permission("ADMIN"))],
+)
+async def websocket_stats():
+    return _ws_manager.stats()
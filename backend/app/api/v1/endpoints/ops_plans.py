@@ -12,6 +12,7 @@ from app.core.id_codec import decode_id, OpaqueIdError
 
 from .case_utils import _decode_or_404, can_user_access_case, case_number_or_id
 from app.schemas.ops_plan import OpsPlanRead, OpsPlanUpsert
+from app.api.responses import validated_response
 
 router = APIRouter()
 
@@ -109,6 +110,13 @@ async def list_ops_plans(
 ):
     case_db_id = await case_number_or_id(db, current_user, case_id)
 
+    items = await _load_ops_plans(db, int(case_db_id))
+    return validated_response(items, List[OpsPlanRead])
+
+
+async def _load_ops_plans(db: AsyncSession, case_db_id: int) -> List[OpsPlanRead]:
+    """Ops plans for a case. Callers are responsible for authorization."""
+
     rows = (
         await db.execute(
             select(OpsPlan).where(OpsPlan.case_id == int(case_db_id)).order_by(asc(OpsPlan.id))
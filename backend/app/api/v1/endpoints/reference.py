@@ -1,56 +1,46 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-import sqlalchemy as sa
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.schemas.reference import StateRead, RefValueRead, RefValueCreate
 from app.db.models.ref_value import RefValue
 from app.db.models.ref_type import RefType
+from app.api.http_cache import not_modified_or_tag
+from app.core.id_codec import get_current_session
+from app.services.reference_data import get_reference_data, bump_reference_version, reference_cache
 
 router = APIRouter()
 
 
 @router.get("/states", response_model=List[StateRead], summary="List states")
-async def list_states(db: AsyncSession = Depends(get_db)) -> List[StateRead]:
-    # Return only RefValue entries where RefType.code == "STATE"
-    stmt = (
-        select(RefValue)
-        .join(RefType, RefValue.ref_type_id == RefType.id)
-        .where(RefType.code == "STATE")
-        .order_by(
-            sa.case((RefValue.sort_order.is_(None), 1), else_=0).asc(),
-            RefValue.sort_order.asc(),
-            RefValue.name.asc(),
-        )
-    )
-    result = await db.execute(stmt)
-    rows = result.scalars().all()
-    return rows
+async def list_states(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+) -> List[StateRead]:
+    # Served from the in-memory reference snapshot (ref_type.code == "STATE")
+    snap = await get_reference_data(db)
+    not_modified = not_modified_or_tag(request, response, snap.etag("STATE", get_current_session()))
+    if not_modified is not None:
+        return not_modified
+    return list(snap.values("STATE"))
 
 
 @router.get("/reference/{code}/values", response_model=List[RefValueRead], summary="List reference values for a type code")
 async def list_ref_values(
+    request: Request,
+    response: Response,
     code: str = Path(..., description="ref_type.code to filter by"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> List[RefValueRead]:
-    # Find ref_type id by code and then list values
-    rt_result = await db.execute(select(RefType).where(RefType.code == code))
-    ref_type = rt_result.scalars().first()
-    if not ref_type:
-        return []
-    result = await db.execute(
-        select(RefValue)
-        .where(RefValue.ref_type_id == ref_type.id)
-        .order_by(
-            sa.case((RefValue.sort_order.is_(None), 1), else_=0).asc(),
-            RefValue.sort_order.asc(),
-            RefValue.name.asc(),
-        )
-    )
-    return result.scalars().all()
+    snap = await get_reference_data(db)
+    not_modified = not_modified_or_tag(request, response, snap.etag(code, get_current_session()))
+    if not_modified is not None:
+        return not_modified
+    return list(snap.values(code))
 
 
 @router.post("/reference/{code}/values", response_model=RefValueRead, summary="Create reference value for a type code")
@@ -79,5 +69,8 @@ async def create_ref_value(
     db.add(obj)
     await db.flush()
     await db.refresh(obj)
+    await bump_reference_version(db)
     await db.commit()
+    # Drop again after commit so a concurrent reload cannot keep pre-commit data
+    reference_cache.invalidate()
     return obj
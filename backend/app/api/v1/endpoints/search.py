@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import sqlalchemy as sa
 
 from app.api.dependencies import get_current_user
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db.models.app_user import AppUser
 from app.db.models.case import Case
 from app.db.models.subject import Subject
@@ -65,10 +65,10 @@ def _build_core_union(q_like: str, wanted: set[str] | set) -> sa.sql.Selectable:
             sa.literal("").label("column_name"),
             sa.literal(-1).label("record_id"),
         ).where(sa.text("1=0"))
-    core = parts[0]
-    for p in parts[1:]:
-        core = core.union_all(p)
-    return core
+    if len(parts) == 1:
+        return parts[0]
+    # One flat UNION ALL (a CompoundSelect has no .union_all to chain a third part)
+    return sa.union_all(*parts)
 
 
 def _access_filter_case(db_user_id: int):
@@ -107,7 +107,7 @@ async def global_search(
     q: str = Query(..., min_length=1),
     types: Optional[str] = Query(None, description="CSV of entity tables to search (case,task,message)"),
     limit: int = Query(20, ge=1, le=50),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AppUser = Depends(get_current_user),
 ):
     q_like = f"%{q}%"
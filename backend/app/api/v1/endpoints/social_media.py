@@ -6,12 +6,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
 
 from app.api.dependencies import get_current_user
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db.models.app_user import AppUser
 from app.db.models.ref_value import RefValue
 from app.db.models.social_media import SocialMedia
 from app.db.models.subject import Subject
 from app.db.models.social_media_alias import SocialMediaAlias
+from app.services.reference_data import get_reference_data
 from app.core.id_codec import decode_id, OpaqueIdError, encode_id
 
 from .case_utils import _decode_or_404, can_user_access_case, case_number_or_id
@@ -37,16 +38,20 @@ class SocialMediaCreate(BaseModel):
 @router.get("/{case_id}/social-media", summary="List social media for a case")
 async def list_social_media(
     case_id: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AppUser = Depends(get_current_user),
 ):
     case_db_id = _decode_or_404("case", case_id)
     if not await can_user_access_case(db, current_user.id, int(case_db_id)):
         raise HTTPException(status_code=404, detail="Case not found")
 
-    plat = aliased(RefValue)
-    stat = aliased(RefValue)
-    inv = aliased(RefValue)
+    return await _load_social_media(db, int(case_db_id))
+
+
+async def _load_social_media(db: AsyncSession, case_db_id: int) -> list[dict]:
+    """Social media rows for a case. Callers are responsible for authorization."""
+
+    ref = await get_reference_data(db)
     q = (
         select(
             SocialMedia.id,
@@ -58,19 +63,10 @@ async def list_social_media(
             SocialMedia.status_id,
             SocialMedia.investigated_id,
             SocialMedia.rule_out,
-            plat.name,
-            plat.code,
-            stat.name,
-            stat.code,
-            inv.name,
-            inv.code,
             Subject.first_name,
             Subject.last_name,
             Subject.profile_pic,
         )
-        .join(plat, plat.id == SocialMedia.platform_id, isouter=True)
-        .join(stat, stat.id == SocialMedia.status_id, isouter=True)
-        .join(inv, inv.id == SocialMedia.investigated_id, isouter=True)
         .join(Subject, Subject.id == SocialMedia.subject_id, isouter=True)
         .where(SocialMedia.case_id == int(case_db_id))
         .order_by(asc(SocialMedia.id))
@@ -88,12 +84,6 @@ async def list_social_media(
         status_id,
         investigated_id,
         rule_out,
-        platform_name,
-        platform_code,
-        status_name,
-        status_code,
-        inv_name,
-        inv_code,
         first_name,
         last_name,
         profile_pic,
@@ -112,14 +102,14 @@ async def list_social_media(
             "platform_other": platform_other,
             "notes": notes,
             "url": url,
-            "platform_name": platform_name,
-            "platform_code": platform_code,
+            "platform_name": ref.name(platform_id),
+            "platform_code": ref.code(platform_id),
             "status_id": encode_id("ref_value", int(status_id)) if status_id is not None else None,
-            "status_name": status_name,
-            "status_code": status_code,
+            "status_name": ref.name(status_id),
+            "status_code": ref.code(status_id),
             "investigated_id": encode_id("ref_value", int(investigated_id)) if investigated_id is not None else None,
-            "investigated_name": inv_name,
-            "investigated_code": inv_code,
+            "investigated_name": ref.name(investigated_id),
+            "investigated_code": ref.code(investigated_id),
             "rule_out": bool(rule_out) if rule_out is not None else False,
         })
 
@@ -19,6 +19,7 @@ from app.db.models.team_case import TeamCase
 from app.db.models.case import Case
 from app.db.models.app_user import AppUser
 from app.services.auth import user_has_permission
+from app.services.case_header import bump_case_header
 from app.db.models.file_subject import FileSubject
 from app.db.models.file import File
 
@@ -265,6 +266,8 @@ async def update_subject(
     if "danger" in fields_set:
         subj.danger = _clean(payload.danger)
 
+    # Name fields appear in the header of every case this is the primary subject of
+    await bump_case_header(db, subject_id=int(sid))
     await db.commit()
     await db.refresh(subj)
     return subj
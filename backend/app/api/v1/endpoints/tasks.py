@@ -13,6 +13,7 @@ from app.core.id_codec import decode_id, OpaqueIdError, encode_id
 
 from .case_utils import _decode_or_404, can_user_access_case, case_number_or_id
 from app.schemas.task import TaskRead, TaskCreate, TaskPartial
+from app.api.responses import validated_response
 
 router = APIRouter()
 
@@ -27,6 +28,18 @@ async def list_tasks(
 ):
     case_db_id = await case_number_or_id(db, current_user, case_id)
 
+    items = await _load_tasks(db, int(case_db_id), q=q, completed=completed)
+    return validated_response(items, List[TaskRead])
+
+
+async def _load_tasks(
+    db: AsyncSession,
+    case_db_id: int,
+    q: Optional[str] = None,
+    completed: Optional[bool] = None,
+) -> List[TaskRead]:
+    """Tasks for a case. Callers are responsible for authorization."""
+
     conditions = [Task.case_id == int(case_db_id)]
 
     # Filter completed state if provided; default is show non-completed when completed == False
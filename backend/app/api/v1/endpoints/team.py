@@ -8,7 +8,7 @@ from sqlalchemy import select, func, asc
 from sqlalchemy.sql import expression as sql_expr
 
 from app.api.dependencies import require_permission
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db.models.team import Team
 from app.db.models.person import Person
 from app.db.models.person_team import PersonTeam
@@ -18,6 +18,7 @@ from app.db.models.subject import Subject
 from app.db.models.event import Event
 from app.db.models.ref_value import RefValue
 from app.schemas.team import TeamRead, TeamUpsert, TeamMemberSummary, TeamCaseSummary
+from app.services.reference_data import get_reference_data
 from app.core.id_codec import decode_id, OpaqueIdError, encode_id
 
 
@@ -29,7 +30,7 @@ router = APIRouter(dependencies=[Depends(require_permission("TEAMS"))])
 
 
 @router.get("/teams", response_model=List[TeamRead], summary="List teams")
-async def list_teams(db: AsyncSession = Depends(get_db)) -> List[TeamRead]:
+async def list_teams(db: AsyncSession = Depends(get_read_db)) -> List[TeamRead]:
     # Base teams
     team_result = await db.execute(select(Team))
     teams = list(team_result.scalars().all())
@@ -46,7 +47,8 @@ async def list_teams(db: AsyncSession = Depends(get_db)) -> List[TeamRead]:
         for eid, name in er.all():
             event_name_map[int(eid)] = name
 
-    # Members by team
+    # Members by team; role name/code/sort order come from the reference snapshot
+    ref = await get_reference_data(db)
     members_map: Dict[int, List[TeamMemberSummary]] = {tid: [] for tid in team_ids}
     mres = await db.execute(
         select(
@@ -55,24 +57,21 @@ async def list_teams(db: AsyncSession = Depends(get_db)) -> List[TeamRead]:
             Person.first_name,
             Person.last_name,
             Person.profile_pic.isnot(None).label("has_pic"),
-            RefValue.name.label("role_name"),
-            RefValue.id.label("role_id"),
-            RefValue.code.label("role_code"),
+            PersonTeam.team_role_id,
             Person.phone,
             Person.email,
             Person.telegram,
         )
         .join(Person, Person.id == PersonTeam.person_id)
-        .join(RefValue, RefValue.id == PersonTeam.team_role_id)
         .where(PersonTeam.team_id.in_(team_ids))
-        .order_by(
-            PersonTeam.team_id,
-            sql_expr.nulls_last(asc(RefValue.sort_order)),
-            asc(Person.last_name),
-            asc(Person.first_name),
-        )
+        .order_by(PersonTeam.team_id, asc(Person.last_name), asc(Person.first_name))
     )
-    for team_id, person_id, first, last, has_pic, role_name, role_id, role_code, phone, email, telegram in mres.all():
+    member_rows = [r for r in mres.all() if ref.get(r.team_role_id) is not None]
+    # Stable sort keeps last/first name order within the same role rank (NULL sort_order last)
+    member_rows.sort(key=lambda r: (r.team_id, ref.sort_order(r.team_role_id) is None, ref.sort_order(r.team_role_id) or 0))
+    for team_id, person_id, first, last, has_pic, role_id, phone, email, telegram in member_rows:
+        role_name = ref.name(role_id)
+        role_code = ref.code(role_id)
         name = f"{first} {last}".strip()
         photo_url = (
             f"/api/v1/media/pfp/person/{encode_id('person', int(person_id))}?s=xs"
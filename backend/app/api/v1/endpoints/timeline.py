@@ -7,11 +7,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
 
 from app.api.dependencies import get_current_user
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db.models.app_user import AppUser
 from app.db.models.subject import Subject
 from app.db.models.ref_value import RefValue
 from app.db.models.timeline import Timeline
+from app.services.reference_data import get_reference_data
+from app.api.responses import FastJSONResponse
 
 from .case_utils import _decode_or_404, can_user_access_case, case_number_or_id
 from app.core.id_codec import decode_id, OpaqueIdError, encode_id
@@ -22,14 +24,20 @@ router = APIRouter()
 @router.get("/{case_id}/timeline", summary="List timeline entries for a case")
 async def list_timeline(
     case_id: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AppUser = Depends(get_current_user),
 ):
     # Decode and authorize
     case_db_id = await case_number_or_id(db, current_user, case_id)
 
-    # Join Subject for who display and RefValue for type
-    type_ref = aliased(RefValue)
+    return FastJSONResponse(await _load_timeline(db, int(case_db_id)))
+
+
+async def _load_timeline(db: AsyncSession, case_db_id: int) -> list[dict]:
+    """Timeline rows for a case. Callers are responsible for authorization."""
+
+    # Join Subject for who display; type name/code come from the reference snapshot
+    ref = await get_reference_data(db)
     q = (
         select(
             Timeline.id,
@@ -45,11 +53,8 @@ async def list_timeline(
             Timeline.questions,
             Subject.first_name,
             Subject.last_name,
-            type_ref.name,
-            type_ref.code,
         )
         .join(Subject, Subject.id == Timeline.who_id, isouter=True)
-        .join(type_ref, type_ref.id == Timeline.type_id, isouter=True)
         .where(Timeline.case_id == int(case_db_id))
         .order_by(asc(Timeline.date), asc(Timeline.time), asc(Timeline.id))
     )
@@ -70,8 +75,6 @@ async def list_timeline(
         questions,
         first,
         last,
-        type_name,
-        type_code,
     ) in rows:
         items.append({
             "id": encode_id("timeline", int(tl_id)),
@@ -84,8 +87,8 @@ async def list_timeline(
             "rule_out": bool(rule_out) if rule_out is not None else False,
             "type_id": encode_id("ref_value", int(type_id)) if type_id is not None else None,
             "type_other": type_other,
-            "type_name": type_name,
-            "type_code": type_code,
+            "type_name": ref.name(type_id),
+            "type_code": ref.code(type_id),
             "comments": comments,
             "questions": questions,
         })
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.dependencies import get_current_user
+from app.db.session import get_read_db, get_read_session_maker
+from app.db.models.app_user import AppUser
+from app.core.id_codec import encode_id, get_current_session, set_current_session, reset_current_session
+
+from .case_utils import case_number_or_id
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+# ------------------------------------------------------------
+# Section loaders. Each receives its own session; authorization has already
+# been done once for the whole workspace request.
+# ------------------------------------------------------------
+async def _section_header(db: AsyncSession, pk: int, user: AppUser):
+    from .case import _load_case_header
+    return await _load_case_header(db, pk)
+
+
+async def _section_subjects(db: AsyncSession, pk: int, user: AppUser):
+    from .case_subjects import _load_case_subjects
+    return await _load_case_subjects(db, pk)
+
+
+async def _section_persons(db: AsyncSession, pk: int, user: AppUser):
+    from .case_persons import _load_case_persons
+    return await _load_case_persons(db, pk)
+
+
+async def _section_timeline(db: AsyncSession, pk: int, user: AppUser):
+    from .timeline import _load_timeline
+    return await _load_timeline(db, pk)
+
+
+async def _section_tasks(db: AsyncSession, pk: int, user: AppUser):
+    from .tasks import _load_tasks
+    return await _load_tasks(db, pk)
+
+
+async def _section_ops_plans(db: AsyncSession, pk: int, user: AppUser):
+    from .ops_plans import _load_ops_plans
+    return await _load_ops_plans(db, pk)
+
+
+async def _section_files(db: AsyncSession, pk: int, user: AppUser):
+    from .files import _load_files
+    return await _load_files(db, pk)
+
+
+async def _section_images(db: AsyncSession, pk: int, user: AppUser):
+    from .images import _load_images
+    return await _load_images(db, pk)
+
+
+async def _section_social_media(db: AsyncSession, pk: int, user: AppUser):
+    from .social_media import _load_social_media
+    return await _load_social_media(db, pk)
+
+
+async def _section_messages(db: AsyncSession, pk: int, user: AppUser):
+    from .messages import _load_case_messages
+    return await _load_case_messages(db, pk, user)
+
+
+async def _section_counts(db: AsyncSession, pk: int, user: AppUser):
+    # unseen_counts_all_cases manages its own session; the one passed in stays unused
+    from .messages import unseen_counts_all_cases
+    return await unseen_counts_all_cases(encode_id("app_user", int(user.id)), get_current_session())
+
+
+SECTIONS = {
+    "header": _section_header,
+    "subjects": _section_subjects,
+    "persons": _section_persons,
+    "timeline": _section_timeline,
+    "tasks": _section_tasks,
+    "ops_plans": _section_ops_plans,
+    "files": _section_files,
+    "images": _section_images,
+    "social_media": _section_social_media,
+    "messages": _section_messages,
+    "counts": _section_counts,
+}
+
+DEFAULT_SECTIONS = ["header", "subjects", "timeline", "tasks", "counts"]
+
+
+def _ndjson_line(payload: dict) -> bytes:
+    return (json.dumps(jsonable_encoder(payload), separators=(",", ":")) + "\n").encode("utf-8")
+
+
+async def _run_section(
+    name: str,
+    pk: int,
+    user: AppUser,
+    session_maker: async_sessionmaker,
+    session_id: Optional[str],
+) -> dict:
+    # Each section runs on its own pooled connection so they can overlap
+    ctx_token = set_current_session(session_id)
+    try:
+        async with session_maker() as db:
+            data = await SECTIONS[name](db, pk, user)
+        return {"section": name, "data": data}
+    except HTTPException as e:
+        return {"section": name, "error": {"status": e.status_code, "detail": e.detail}}
+    except Exception:
+        # Driver/DB messages can carry SQL and constraint names; keep them in the log
+        logger.exception("Workspace section %s failed for case %s", name, pk)
+        return {"section": name, "error": {"status": 500, "detail": "Internal error"}}
+    finally:
+        reset_current_session(ctx_token)
+
+
+@router.get("/{case_id}/workspace", summary="Stream several case sections in one round trip (NDJSON)")
+async def get_case_workspace(
+    case_id: str,
+    sections: Optional[str] = Query(None, description="Comma-separated section names; defaults to header,subjects,timeline,tasks,counts"),
+    db: AsyncSession = Depends(get_read_db),
+    session_maker: async_sessionmaker = Depends(get_read_session_maker),
+    current_user: AppUser = Depends(get_current_user),
+):
+    """
+    Authorizes the case once, then runs the requested sections concurrently and
+    streams one JSON object per line as each finishes:
+    ``{"section": name, "data": ...}`` or ``{"section": name, "error": {...}}``.
+    The stream ends with ``{"done": true}``.
+    """
+    names = [s.strip() for s in (sections or "").split(",") if s.strip()] or list(DEFAULT_SECTIONS)
+    unknown = [n for n in names if n not in SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown)}")
+    # Preserve order, drop duplicates
+    names = list(dict.fromkeys(names))
+
+    pk = int(await case_number_or_id(db, current_user, case_id))
+    # Release the auth connection before fanning out
+    await db.close()
+
+    # The id codec session context is reset once the handler returns, so capture it
+    # now and re-bind it inside each section task.
+    session_id = get_current_session()
+
+    async def _stream():
+        tasks = [
+            asyncio.create_task(_run_section(name, pk, current_user, session_maker, session_id))
+            for name in names
+        ]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                result = await fut
+                ctx_token = set_current_session(session_id)
+                try:
+                    line = _ndjson_line(result)
+                finally:
+                    reset_current_session(ctx_token)
+                yield line
+            yield _ndjson_line({"done": True})
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
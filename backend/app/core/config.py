@@ -12,6 +12,84 @@ class Settings(BaseSettings):
     # Read DATABASE_URL directly from environment when constructing settings,
     # falling back to the default sqlite URL.
     database_url: str = Field(default_factory=lambda: os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./app.db"))
+    # Optional read replica used by listing/search endpoints; falls back to the primary when unset.
+    database_read_url: Optional[str] = Field(default_factory=lambda: os.getenv("DATABASE_READ_URL") or None)
+    # After a session writes, its reads stay on the primary for this many seconds (read-your-writes).
+    read_after_write_pin_seconds: float = 5.0
+    # Cookie carrying that pin to whichever worker serves the next request
+    read_after_write_cookie_name: str = "primary_until"
+    # How often each process re-checks the reference-data version row
+    reference_cache_check_seconds: float = 30.0
+    # Lifetime of the in-memory system_setting snapshot
+    system_settings_ttl_seconds: float = 60.0
+    # Case headers kept in memory per process (validated against case.header_version)
+    case_header_cache_size: int = 2048
+
+    # Message read state: rows (message_not_seen per recipient) | watermark (message_read_state)
+    message_read_state_backend: str = "rows"
+    # counts.update requests for the same user within this window go out as one frame
+    ws_counts_debounce_seconds: float = 0.25
+    # Protocol-2 sockets receive queued events as one batch frame per tick
+    ws_batch_tick_ms: int = 50
+    # Negotiate permessage-deflate on WebSocket upgrades (uvicorn websockets implementation)
+    ws_per_message_deflate: bool = True
+
+    # HTTP responses: weak ETags / 304 for GET JSON and gzip or brotli (when installed) compression
+    response_compression_enabled: bool = True
+    response_compression_min_bytes: int = 1024
+    response_compression_gzip_level: int = 6
+    response_compression_brotli_quality: int = 4
+
+    # Instrumentation: Prometheus text at /metrics (off by default; set metrics_token to require
+    # a bearer token, startup warns when it is on without one), slow-query log threshold and the
+    # per-request repeat count reported as a likely N+1
+    metrics_enabled: bool = False
+    metrics_token: Optional[str] = None
+    slow_query_ms: float = 200.0
+    n_plus_one_threshold: int = 10
+
+    # torch/torchvision and OpenCV/Tesseract load on first use; set to import them and load the
+    # classifier in the background at startup instead (workers that classify most uploads)
+    ml_warmup: bool = False
+    # Image classifier: weights file (default best_model.pt next to the module), memory-mapped so
+    # worker processes share the weight pages, torch threads per worker (0: CPUs / WEB_CONCURRENCY)
+    classifier_weights_path: Optional[str] = None
+    # torch (fp32 eager) | quantized (int8 TorchScript) | onnx (ONNX Runtime); the last two need
+    # `python -m app.services.image_classifier.export` and fall back to torch without it
+    classifier_backend: str = "torch"
+    classifier_mmap: bool = True
+    classifier_threads: int = 0
+    # /is_document: longest side the image features are computed at (the scoring constants are
+    # calibrated for 1600; smaller is faster but shifts scores until they are recalibrated),
+    # longest side OCR reads, how far below the threshold a score without text still runs OCR
+    # (5.0, the most text can add, gives the same labels as always running it; lower skips more),
+    # images per batch call and the largest upload accepted per image
+    is_document_analysis_side: int = 1600
+    is_document_ocr_side: int = 1600
+    is_document_ocr_band: float = 5.0
+    is_document_batch_max: int = 32
+    is_document_max_bytes: int = 20 * 1024 * 1024
+
+    # Outbound notification queue (notification_outbox)
+    notification_batch_size: int = 20
+    notification_max_attempts: int = 8
+    notification_retry_base_seconds: float = 30.0
+    notification_poll_seconds: float = 5.0
+    # How long a claimed batch is hidden from other workers while it is being sent
+    notification_lease_seconds: float = 300.0
+    notification_sent_retention_days: float = 7.0
+    notification_dead_retention_days: float = 30.0
+
+    # Maintenance scheduler (one leader per database via a PostgreSQL advisory lock)
+    maintenance_enabled: bool = True
+    maintenance_tick_seconds: float = 30.0
+    maintenance_batch_size: int = 1000
+    maintenance_max_batches: int = 10
+    maintenance_sessions_interval_seconds: float = 3600.0
+    maintenance_unseen_interval_seconds: float = 600.0
+    maintenance_s3_interval_seconds: float = 86400.0
+    maintenance_reactions_interval_seconds: float = 3600.0
+    maintenance_notifications_interval_seconds: float = 3600.0
 
     # JWT
     jwt_secret_key: str = "your-super-secret-key-change-this-in-production"
@@ -22,6 +100,10 @@ class Settings(BaseSettings):
     # 32-byte base64 key recommended; if not provided, derived from jwt_secret_key
     id_secret_key: Optional[str] = None
     id_codec_version: int = 1
+    # Off: ids are passed through as plain integers
+    id_encryption_enabled: bool = False
+    # Per-session AES-SIV keys kept derived (LRU)
+    id_codec_cache_size: int = 1024
 
     # Password reset
     password_reset_token_expire_minutes: int = 60
@@ -75,11 +157,13 @@ class Settings(BaseSettings):
         # default to development
         return self.frontend_base_url
 
-    @field_validator("database_url")
+    @field_validator("database_url", "database_read_url")
     @classmethod
-    def validate_database_url(cls, v: str) -> str:
+    def validate_database_url(cls, v: Optional[str]) -> Optional[str]:
         # Normalize to psycopg3 driver for application runtime while leaving Alembic to use DATABASE_URL directly.
         # Handle common Postgres URL variants and coerce to psycopg.
+        if not v:
+            return v
         if v.startswith("postgres://"):
             # Old-style URLs sometimes used by cloud providers
             v = v.replace("postgres://", "postgresql://", 1)
@@ -3,9 +3,25 @@ Centralized opaque ID codec using authenticated encryption (Option B).
 
 - encode_id(model: str, pk: int) -> str
 - decode_id(model: str, eid: str) -> int
+- encode_many(model, pks) / decode_many(model, eids) for whole result sets
 
-Uses Fernet (AES128-CBC + HMAC via cryptography) with a version prefix to support
-future key rotation. Output is URL-safe.
+Tokens are deterministic per (session, model, pk): AES-SIV with a key derived by
+HKDF from the master secret and the request's session id. Token format (v3):
+
+    "3." + base64url(key_version byte || AES-SIV(model tag || varint(pk)))
+
+The model name is also the AES-SIV associated data, and the 2-byte model tag lets
+decode reject a token for another model without parsing further. A 1,000,000 pk
+token is 32 characters. Version 2 tokens (JSON payload) still decode.
+
+Derived AESSIV instances are cached per (key version, session) in a bounded LRU
+(``settings.id_codec_cache_size``), so a request pays for HKDF once, not once per id;
+the per-model constants are cached separately and hold no keys. Key rotation: the current key is
+``settings.id_secret_key`` (or the JWT secret) under ``settings.id_codec_version``;
+older secrets stay decodable by adding them to ``_KEYRING`` under their version.
+
+``settings.id_encryption_enabled`` switches encryption on. While it is off, ids
+pass through as plain integers (and numeric strings decode), as before.
 
 Security notes:
 - Tokens are bound to the `model` namespace so a token for one model cannot be
@@ -15,12 +31,12 @@ Security notes:
 from __future__ import annotations
 
 import base64
+import functools
 import json
-import os
+import threading
 import typing as _t
-from dataclasses import dataclass
+from collections import OrderedDict
 from contextvars import ContextVar, Token as CtxToken
-from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives.ciphers.aead import AESSIV
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives import hashes
@@ -33,90 +49,121 @@ class OpaqueIdError(Exception):
     pass
 
 
-@dataclass(frozen=True)
-class _KeyEntry:
-    version: int
-    key: bytes  # fernet key (base64 32-byte key)
-
+# Older id secrets by key version, so tokens issued before a rotation still decode.
+# The current secret is settings.id_secret_key (or jwt_secret_key) under settings.id_codec_version.
+_KEYRING: dict[int, bytes] = { }
 
-def _derive_fernet_key_from_secret(secret: str) -> bytes:
-    """
-    Accepts either a raw 32-byte base64 fernet key, or derives a fernet key
-    from an arbitrary secret by hashing to 32 bytes and base64-encoding.
-    """
-    s = secret.strip()
-    # If it looks like a Fernet key (urlsafe base64, 32 bytes when decoded), use directly
-    try:
-        raw = base64.urlsafe_b64decode(s)
-        if len(raw) == 32:
-            return base64.urlsafe_b64encode(raw)
-    except Exception:
-        pass
-    # Derive from arbitrary secret with SHA-256
-    digest = sha256(s.encode("utf-8")).digest()  # 32 bytes
-    return base64.urlsafe_b64encode(digest)
+# Session context for deterministic IDs (per session/table)
+_SESSION_ID: ContextVar[_t.Optional[str]] = ContextVar("opaque_session_id", default=None)
 
+_TOKEN_PREFIX = "3."
+_LEGACY_PREFIX = "2."
 
-def _current_key_entry() -> _KeyEntry:
-    # Prefer explicit id_secret_key; fall back to jwt_secret_key (derived)
-    secret = settings.id_secret_key or settings.jwt_secret_key
-    fkey = _derive_fernet_key_from_secret(secret)
-    return _KeyEntry(version=int(getattr(settings, "id_codec_version", 1)), key=fkey)
 
+def _current_secret() -> bytes:
+    return (settings.id_secret_key or settings.jwt_secret_key or "").encode("utf-8")
 
-# In future, we could maintain a keyring keyed by version.
-_KEYRING: dict[int, bytes] = { }
 
-# Session context for deterministic IDs (per session/table)
-_SESSION_ID: ContextVar[_t.Optional[str]] = ContextVar("opaque_session_id", default=None)
+def _current_key_version() -> int:
+    return int(getattr(settings, "id_codec_version", 1))
 
 
-def _get_fernet_for_version(version: int) -> Fernet:
-    if version == _current_key_entry().version:
-        return Fernet(_current_key_entry().key)
-    # Legacy lookup
-    key = _KEYRING.get(version)
-    if not key:
-        raise OpaqueIdError("Unknown opaque ID key version")
-    return Fernet(key)
+def _derive_master_bytes(secret: bytes) -> bytes:
+    # 32 bytes master from SHA-256 of secret
+    return sha256(secret or b"").digest()
 
 
-def _derive_master_bytes(secret: str) -> bytes:
-    # 32 bytes master from SHA-256 of secret
-    return sha256((secret or "").encode("utf-8")).digest()
+def _master_for_version(version: int) -> bytes:
+    if version == _current_key_version():
+        return _derive_master_bytes(_current_secret())
+    secret = _KEYRING.get(version)
+    if not secret:
+        raise OpaqueIdError("Unknown opaque ID key version")
+    return _derive_master_bytes(secret)
 
 
-def _derive_session_key(master: bytes, session_id: str) -> bytes:
+def _derive_session_key(master: bytes, session_id: str, info_prefix: bytes) -> bytes:
     # Derive a 64-byte key suitable for AESSIV
     hkdf = HKDF(
         algorithm=hashes.SHA256(),
         length=64,
         salt=None,
-        info=b"idcodec|v2|session:" + session_id.encode("utf-8"),
+        info=info_prefix + session_id.encode("utf-8"),
     )
     return hkdf.derive(master)
 
 
-def _aessiv_encrypt_for_session(model: str, pk: int, session_id: str) -> str:
-    master = _derive_master_bytes(settings.id_secret_key or settings.jwt_secret_key)
-    key = _derive_session_key(master, session_id)
-    aead = AESSIV(key)
-    payload = {"m": model, "k": pk}
-    blob = json.dumps(payload, separators=(",", ":")).encode("utf-8")
-    ct = aead.encrypt(blob, [model.encode("utf-8")])
-    return "2." + base64.urlsafe_b64encode(ct).decode("utf-8")
+class _AeadCache:
+    """Bounded LRU of (format, key version, session id) -> AESSIV."""
 
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[tuple, AESSIV]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
-def _aessiv_decrypt_for_session(model: str, token: str, session_id: str) -> dict:
-    master = _derive_master_bytes(settings.id_secret_key or settings.jwt_secret_key)
-    key = _derive_session_key(master, session_id)
-    aead = AESSIV(key)
-    try:
-        pt = aead.decrypt(base64.urlsafe_b64decode(token.encode("utf-8")), [model.encode("utf-8")])
-        payload = json.loads(pt.decode("utf-8"))
-        return payload
-    except Exception:
-        raise OpaqueIdError("Invalid opaque ID token")
+    def get(self, fmt: int, key_version: int, session_id: str) -> AESSIV:
+        key = (fmt, key_version, session_id)
+        with self._lock:
+            aead = self._entries.get(key)
+            if aead is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return aead
+        master = _master_for_version(key_version)
+        info = b"idcodec|v2|session:" if fmt == 2 else b"idcodec|v3|session:"
+        aead = AESSIV(_derive_session_key(master, session_id, info))
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = aead
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return aead
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_aead_cache = _AeadCache(settings.id_codec_cache_size)
+
+
+def _model_tag(model: str) -> bytes:
+    return sha256(model.encode("utf-8")).digest()[:2]
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _read_varint(data: bytes) -> int:
+    n = 0
+    shift = 0
+    for i, b in enumerate(data):
+        n |= (b & 0x7F) << shift
+        if not b & 0x80:
+            if i != len(data) - 1:
+                raise OpaqueIdError("Invalid opaque ID token")
+            return n
+        shift += 7
+    raise OpaqueIdError("Invalid opaque ID token")
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(s: str) -> bytes:
+    return base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
 
 
 def set_current_session(session_id: _t.Optional[str]) -> CtxToken:
@@ -127,6 +174,11 @@ def set_current_session(session_id: _t.Optional[str]) -> CtxToken:
     return _SESSION_ID.set(session_id)
 
 
+def get_current_session() -> _t.Optional[str]:
+    """Return the session identifier bound to the current request context, if any."""
+    return _SESSION_ID.get()
+
+
 def reset_current_session(token: CtxToken) -> None:
     try:
         _SESSION_ID.reset(token)
@@ -135,65 +187,149 @@ def reset_current_session(token: CtxToken) -> None:
         pass
 
 
-def encode_id(model: str, pk: int) -> str:
-    # EARLY RETURN: Disable encryption; pass through raw numeric ID as string.
-    # Keep the original implementation below for easy re-enabling later.
-    if isinstance(pk, (int,)):
-        return str(int(pk))
-    # Fallback to original validation for unexpected inputs
-    if not isinstance(pk, int) or pk < 0:
-        raise OpaqueIdError("Primary key must be a non-negative integer")
+def _check_model(model: str) -> str:
     model = (model or "").strip()
     if not model:
         raise OpaqueIdError("Model namespace is required")
+    return model
 
-    # Require a stable session identifier; no fallback to v1 allowed
+
+def _require_session() -> str:
+    # Require a stable session identifier; there is no session-less token format
     session_id = _SESSION_ID.get()
     if not session_id:
-        raise OpaqueIdError("Session context required to encode opaque ID")
-    return _aessiv_encrypt_for_session(model, pk, session_id)
+        raise OpaqueIdError("Session context required for opaque IDs")
+    return session_id
 
 
-def decode_id(model: str, eid: str) -> int:
-    # EARLY RETURN: Disable decryption; accept plain numeric IDs.
-    # If eid is an int or numeric string, return it as int immediately.
-    model = (model or "").strip()
-    if not model:
-        raise OpaqueIdError("Model namespace is required")
-    if isinstance(eid, int):
-        return int(eid)
-    try:
-        s = str(eid).strip()
-        if s.isdigit():
-            return int(s)
-    except Exception:
-        pass
+class _ModelCodec:
+    """
+    Per-model constants (associated data, tag) for encrypting and decrypting pks.
+    Holds no keys: the session's AESSIV always comes from ``_aead_cache``, so the
+    ``id_codec_cache_size`` bound is the only thing keeping derived keys alive.
+    """
 
-    # Legacy/opaque path: leave original secure decoding in place for backward compatibility
-    if not eid or "." not in str(eid):
+    def __init__(self, model: str):
+        self.model = model
+        self.ad = [model.encode("utf-8")]
+        self.tag = _model_tag(model)
+
+    def encode(self, aead: AESSIV, key_version: int, pk) -> str:
+        if isinstance(pk, bool) or not isinstance(pk, int) or pk < 0:
+            raise OpaqueIdError("Primary key must be a non-negative integer")
+        ct = aead.encrypt(self.tag + _varint(pk), self.ad)
+        return _TOKEN_PREFIX + _b64encode(bytes([key_version]) + ct)
+
+    def decode(self, session_id: str, eid) -> int:
+        if isinstance(eid, bool):
+            raise OpaqueIdError("Invalid opaque ID format")
+        if isinstance(eid, int):
+            return int(eid)
+        s = str(eid or "").strip()
+        if s.startswith(_TOKEN_PREFIX):
+            try:
+                raw = _b64decode(s[len(_TOKEN_PREFIX):])
+                key_version, ct = raw[0], raw[1:]
+                pt = _aead_cache.get(3, key_version, session_id).decrypt(ct, self.ad)
+            except OpaqueIdError:
+                raise
+            except Exception:
+                raise OpaqueIdError("Invalid opaque ID token")
+            if pt[:2] != self.tag:
+                raise OpaqueIdError("Opaque ID model mismatch")
+            return _read_varint(pt[2:])
+        if s.startswith(_LEGACY_PREFIX):
+            return self._decode_v2(session_id, s[len(_LEGACY_PREFIX):])
         raise OpaqueIdError("Invalid opaque ID format")
 
-    try:
-        vs, token = str(eid).split(".", 1)
-        version = int(vs)
-    except Exception:
-        raise OpaqueIdError("Invalid opaque ID version prefix")
-
-    if version == 2:
-        session_id = _SESSION_ID.get()
-        if not session_id:
-            raise OpaqueIdError("Session context required to decode opaque ID")
-        payload = _aessiv_decrypt_for_session(model, token, session_id)
-    else:
-        # Disallow legacy versions entirely
-        raise OpaqueIdError("Unsupported opaque ID version")
-
-    if payload.get("m") != model:
-        raise OpaqueIdError("Opaque ID model mismatch")
-    pk = payload.get("k")
-    if not isinstance(pk, int):
-        raise OpaqueIdError("Opaque ID missing integer primary key")
-    return pk
-
-
-__all__ = ["encode_id", "decode_id", "OpaqueIdError", "set_current_session", "reset_current_session"]
+    def _decode_v2(self, session_id: str, token: str) -> int:
+        aead = _aead_cache.get(2, _current_key_version(), session_id)
+        try:
+            pt = aead.decrypt(base64.urlsafe_b64decode(token.encode("utf-8")), self.ad)
+            payload = json.loads(pt.decode("utf-8"))
+        except Exception:
+            raise OpaqueIdError("Invalid opaque ID token")
+        if payload.get("m") != self.model:
+            raise OpaqueIdError("Opaque ID model mismatch")
+        pk = payload.get("k")
+        if not isinstance(pk, int):
+            raise OpaqueIdError("Opaque ID missing integer primary key")
+        return pk
+
+
+@functools.lru_cache(maxsize=256)
+def _codec(model: str) -> _ModelCodec:
+    return _ModelCodec(model)
+
+
+def _plain_decode(eid) -> int:
+    if isinstance(eid, int) and not isinstance(eid, bool):
+        return int(eid)
+    s = str(eid).strip()
+    if s.isdigit():
+        return int(s)
+    raise OpaqueIdError("Invalid opaque ID format")
+
+
+def encode_id(model: str, pk: int) -> str:
+    if not settings.id_encryption_enabled:
+        # Encryption off: pass through raw numeric ID as string
+        if isinstance(pk, int):
+            return str(int(pk))
+        raise OpaqueIdError("Primary key must be a non-negative integer")
+    key_version = _current_key_version()
+    aead = _aead_cache.get(3, key_version, _require_session())
+    return _codec(_check_model(model)).encode(aead, key_version, pk)
+
+
+def decode_id(model: str, eid: str) -> int:
+    model = _check_model(model)
+    if not settings.id_encryption_enabled:
+        return _plain_decode(eid)
+    if isinstance(eid, int) and not isinstance(eid, bool):
+        # Internal callers pass raw pks through
+        return int(eid)
+    return _codec(model).decode(_require_session(), eid)
+
+
+def encode_many(model: str, pks: _t.Iterable[int]) -> list[str]:
+    """encode_id for every pk, deriving the session key once."""
+    if not settings.id_encryption_enabled:
+        return [encode_id(model, pk) for pk in pks]
+    codec = _codec(_check_model(model))
+    key_version = _current_key_version()
+    aead = _aead_cache.get(3, key_version, _require_session())
+    return [codec.encode(aead, key_version, pk) for pk in pks]
+
+
+def decode_many(model: str, eids: _t.Iterable[str]) -> list[int]:
+    """decode_id for every token; raises OpaqueIdError on the first invalid one."""
+    model = _check_model(model)
+    if not settings.id_encryption_enabled:
+        return [_plain_decode(e) for e in eids]
+    codec, session_id = _codec(model), _require_session()
+    return [codec.decode(session_id, e) for e in eids]
+
+
+def codec_stats() -> dict:
+    return {
+        "encryption_enabled": bool(settings.id_encryption_enabled),
+        "key_version": _current_key_version(),
+        "cached_sessions": len(_aead_cache._entries),
+        "cache_size": _aead_cache.max_entries,
+        "cache_hits": _aead_cache.hits,
+        "cache_misses": _aead_cache.misses,
+    }
+
+
+__all__ = [
+    "encode_id",
+    "decode_id",
+    "encode_many",
+    "decode_many",
+    "codec_stats",
+    "OpaqueIdError",
+    "set_current_session",
+    "get_current_session",
+    "reset_current_session",
+]
@@ -0,0 +1,328 @@
+"""
+In-process performance instrumentation (no external collector needed).
+
+- ``InstrumentationMiddleware`` (pure ASGI) times every HTTP request into a latency
+  histogram per route template (``/api/v1/cases/{case_id}/messages``, never the raw
+  path) and binds a ``RequestTrace`` to the request context.
+- ``install_query_hooks(engine)`` adds ``before/after_cursor_execute`` listeners that
+  count statements and DB time into the current ``RequestTrace``. Statements slower
+  than ``settings.slow_query_ms`` go to the ``app.slow_query`` logger (normalised SQL:
+  literals and bind values replaced by ``?``, IN lists collapsed) and to a bounded
+  in-memory log. One normalised statement run ``settings.n_plus_one_threshold`` times
+  in a single request is reported as a likely N+1.
+- With ``settings.debug`` on, responses carry ``Server-Timing: app;dur=..,
+  db;dur=..;desc="N queries"``.
+- ``registry.render()`` is the Prometheus text exposition served at ``/metrics``.
+  Other subsystems add their own counters with ``registry.add_collector``.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.instrumentation")
+slow_query_logger = logging.getLogger("app.slow_query")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, v in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_fmt(v)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labelnames: Tuple[str, ...] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[labels] = series
+            series[0][i] += 1
+            series[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._series.items())
+        for labels, (counts, total) in items:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {running}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+        # Callables returning (name, type, help, [(labels dict, value), ...]) for external state
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, list]]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn: Callable[[], Iterable[Tuple[str, str, str, list]]]) -> None:
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                families = list(collect())
+            except Exception:
+                logger.exception("Metrics collector %r failed", collect)
+                continue
+            for name, kind, doc, samples in families:
+                lines.append(f"# HELP {name} {doc}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    names = tuple(labels)
+                    lines.append(f"{name}{_labels(names, tuple(labels[n] for n in names))} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status"),
+))
+http_request_db_seconds = registry.register(Histogram(
+    "http_request_db_seconds", "Database time spent per HTTP request", ("route",),
+))
+http_request_queries = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ("route",), buckets=QUERY_COUNT_BUCKETS,
+))
+db_queries_total = registry.register(Counter("db_queries_total", "SQL statements executed"))
+db_slow_queries_total = registry.register(Counter("db_slow_queries_total", "SQL statements slower than slow_query_ms"))
+db_n_plus_one_total = registry.register(Counter(
+    "db_n_plus_one_total", "Requests where one statement repeated n_plus_one_threshold times", ("route",),
+))
+
+
+# ---------------------------------------------------------------------------
+# Per-request trace
+# ---------------------------------------------------------------------------
+class RequestTrace:
+    __slots__ = ("scope", "started", "queries", "db_seconds", "statements")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope or {}
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        # normalised SQL -> executions in this request
+        self.statements: Dict[str, int] = {}
+
+    @property
+    def route(self) -> str:
+        # Known once the router has matched (it sets scope["route"])
+        return _route_template(self.scope)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        return sorted(((s, n) for s, n in self.statements.items() if n >= threshold), key=lambda x: -x[1])
+
+
+_TRACE: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _TRACE.get()
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):(?!:)\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """SQL with literals and bind markers replaced by ``?`` and IN lists collapsed to ``(?)``."""
+    s = _STRING.sub("?", sql)
+    s = _PARAM.sub("?", s)
+    s = _NUMBER.sub("?", s)
+    s = _IN_LIST.sub("(?)", s)
+    return _SPACE.sub(" ", s).strip()
+
+
+# Most recent slow statements (this process), newest last
+slow_queries: "deque[dict]" = deque(maxlen=100)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._instr_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_instr_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    db_queries_total.inc()
+    trace = _TRACE.get()
+    normalized = None
+    if trace is not None:
+        trace.queries += 1
+        trace.db_seconds += elapsed
+        normalized = normalize_sql(statement)
+        trace.statements[normalized] = trace.statements.get(normalized, 0) + 1
+    if elapsed * 1000.0 >= settings.slow_query_ms:
+        normalized = normalized or normalize_sql(statement)
+        db_slow_queries_total.inc()
+        route = trace.route if trace is not None else None
+        slow_queries.append({"sql": normalized, "ms": round(elapsed * 1000.0, 2), "route": route, "at": time.time()})
+        slow_query_logger.warning("Slow query (%.1f ms) route=%s: %s", elapsed * 1000.0, route, normalized)
+
+
+def install_query_hooks(engine) -> None:
+    """Instrument a (sync or async) engine; safe to call more than once."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------------------------------------------------------------------------
+# ASGI middleware
+# ---------------------------------------------------------------------------
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+def _server_timing(trace: RequestTrace) -> bytes:
+    app_ms = (time.perf_counter() - trace.started) * 1000.0
+    return (
+        f'app;dur={app_ms:.1f}, db;dur={trace.db_seconds * 1000.0:.1f};desc="{trace.queries} queries"'
+    ).encode("latin-1")
+
+
+class InstrumentationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = RequestTrace(scope)
+        ctx_token = _TRACE.set(trace)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if settings.debug:
+                    headers = list(message.get("headers") or [])
+                    headers.append((b"server-timing", _server_timing(trace)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _TRACE.reset(ctx_token)
+            self._record(scope, trace, status["code"])
+
+    @staticmethod
+    def _record(scope, trace: RequestTrace, status: int) -> None:
+        route = trace.route
+        http_request_duration.observe(time.perf_counter() - trace.started, scope.get("method", ""), route, str(status))
+        http_request_db_seconds.observe(trace.db_seconds, route)
+        http_request_queries.observe(trace.queries, route)
+        threshold = settings.n_plus_one_threshold
+        if threshold > 0:
+            repeated = trace.repeated(threshold)
+            if repeated:
+                db_n_plus_one_total.inc(route)
+                sql, n = repeated[0]
+                logger.warning("Possible N+1 on %s %s: %d executions of %s", scope.get("method"), route, n, sql)
+
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "InstrumentationMiddleware",
+    "Registry",
+    "RequestTrace",
+    "current_trace",
+    "install_query_hooks",
+    "normalize_sql",
+    "registry",
+    "slow_queries",
+]
@@ -13,6 +13,7 @@ from .models import case_demographics  # noqa: F401
 from .models import case_disposition  # noqa: F401
 from .models import case_exploitation  # noqa: F401
 from .models import case_management  # noqa: F401
+from .models import case_number_counter  # noqa: F401
 from .models import case_pattern_of_life  # noqa: F401
 from .models import case_search_urgency  # noqa: F401
 from .models import case_victimology  # noqa: F401
@@ -50,6 +51,14 @@ from .models import timeline  # noqa: F401
 from .models import victimology  # noqa: F401
 from .models import victimology_category  # noqa: F401
 from .models import task  # noqa: F401
+from .models import notification_outbox  # noqa: F401
+from .models import message_not_seen  # noqa: F401
+from .models import message_read_state  # noqa: F401
+from .models import message_person  # noqa: F401
+from .models import message_reaction_count  # noqa: F401
+from .models import file_subject  # noqa: F401
+from .models import qualification  # noqa: F401
+from .models import system_setting  # noqa: F401
 
 
 __all__ = ["Base", "TimestampMixin"]
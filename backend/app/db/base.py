@@ -11,7 +11,6 @@ class TimestampMixin:
 
 
 
-from alembic import op
 import sqlalchemy as sa
 
 def seed(table_name: str, rows) -> int | list[int]:
@@ -33,6 +32,8 @@ def seed(table_name: str, rows) -> int | list[int]:
         - If an empty list is provided, returns an empty list immediately.
         - Primary key detection assumes a single-column PK; falls back to 'id' if present.
     """
+    from alembic import op  # migration-time only; keeps alembic out of app startup
+
     bind = op.get_bind()
 
     # Reflect the table structure against the current migration connection
@@ -113,6 +114,8 @@ def get_record_by_code(table_name: str, code: str) -> int:
         RuntimeError: If multiple rows are found for the given code, or if a
             unique primary key column cannot be determined.
     """
+    from alembic import op
+
     bind = op.get_bind()
 
     # Reflect table structure on the current migration connection
@@ -180,6 +183,8 @@ def get_ref_value_id(ref_type_code: str, ref_value_code: str) -> int:
     # First resolve the ref_type.id from its code
     ref_type_id = get_record_by_code('ref_type', ref_type_code)
 
+    from alembic import op
+
     bind = op.get_bind()
 
     # Reflect the ref_value table on the current migration connection
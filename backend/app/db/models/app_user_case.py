@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.sql import func
 
 from app.db import Base
@@ -8,6 +8,7 @@ class AppUserCase(Base):
     __tablename__ = "app_user_case"
     __table_args__ = (
         UniqueConstraint("case_id", "app_user_id", name="uq_app_user_case_case_user"),
+        Index("ix_app_user_case_user", "app_user_id", "case_id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Time, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Time, Boolean, DateTime, Index
 from sqlalchemy.sql import func
 
 from app.db import Base
@@ -6,12 +6,18 @@ from app.db import Base
 
 class Case(Base):
     __tablename__ = "case"
+    __table_args__ = (
+        Index("ix_case_date_intake", "date_intake", "id"),
+        Index("ix_case_created_at", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     subject_id = Column(Integer, ForeignKey("subject.id"), nullable=False)
     case_number = Column(String(120), nullable=False, unique=True)
     inactive = Column(Boolean, nullable=False, server_default="false")
     date_intake = Column(Date, nullable=True)
+    # Incremented whenever a section shown in the case header changes (see services.case_header)
+    header_version = Column(Integer, nullable=False, server_default="0")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
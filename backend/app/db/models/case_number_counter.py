@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db import Base
+
+
+class CaseNumberCounter(Base):
+    """Last case number sequence handed out for a year (the ### in YY-ST-MM###)."""
+
+    __tablename__ = "case_number_counter"
+    __table_args__ = (
+        UniqueConstraint('year', name='uq_case_number_counter_year'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    year = Column(Integer, nullable=False)
+    last_value = Column(Integer, nullable=False, server_default="0")
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
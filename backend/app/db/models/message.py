@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 
 from app.db import Base
@@ -6,6 +6,10 @@ from app.db import Base
 
 class Message(Base):
     __tablename__ = "message"
+    __table_args__ = (
+        # Unseen counts and read watermarks scan a case's recent messages by range
+        Index("ix_message_case_id", "case_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     case_id = Column(Integer, ForeignKey("case.id", ondelete="CASCADE"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, UniqueConstraint, String
+from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, UniqueConstraint, String, Index
 from sqlalchemy.sql import func
 
 from app.db import Base
@@ -8,6 +8,7 @@ class MessageNotSeen(Base):
     __tablename__ = "message_not_seen"
     __table_args__ = (
         UniqueConstraint('message_id', 'person_id', name='uq_message_person_not_seen'),
+        Index('ix_message_not_seen_person', 'person_id'),
     )
 
     id = Column(Integer, primary_key=True, index=True)
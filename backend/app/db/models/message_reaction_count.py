@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+
+from app.db import Base
+
+
+class MessageReactionCount(Base):
+    """Number of people who reacted to a message with an emoji; derived from message_person.reaction."""
+
+    __tablename__ = "message_reaction_count"
+    __table_args__ = (
+        UniqueConstraint('message_id', 'reaction', name='uq_message_reaction_count'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    message_id = Column(Integer, ForeignKey("message.id", ondelete="CASCADE"), nullable=False)
+    reaction = Column(String(10), nullable=False)
+    count = Column(Integer, nullable=False, server_default="0")
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db import Base
+
+
+class MessageReadState(Base):
+    """Per-(person, case, thread) read watermark: every message in the thread with id <= last_read_message_id is seen."""
+
+    __tablename__ = "message_read_state"
+    __table_args__ = (
+        UniqueConstraint('person_id', 'case_id', 'thread_type', 'thread_id', name='uq_message_read_state_thread'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    person_id = Column(Integer, ForeignKey("person.id", ondelete="CASCADE"), nullable=False)
+    case_id = Column(Integer, ForeignKey("case.id", ondelete="CASCADE"), nullable=False)
+    # case (main chat, thread_id 0) | rfi | ops_plan | task
+    thread_type = Column(String(20), nullable=False)
+    thread_id = Column(Integer, nullable=False, server_default="0")
+    last_read_message_id = Column(Integer, nullable=False, server_default="0")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
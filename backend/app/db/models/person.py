@@ -15,7 +15,7 @@ class Person(Base):
     telegram = Column(String(50), nullable=True)
     organization_id = Column(Integer, ForeignKey("organization.id"), nullable=True)
     profile_pic = Column(LargeBinary, nullable=True)
-    app_user_id = Column(Integer, ForeignKey("app_user.id"), nullable=True)
+    app_user_id = Column(Integer, ForeignKey("app_user.id"), nullable=True, index=True)
 
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, LargeBinary
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, LargeBinary, Index
 from sqlalchemy.sql import func
 
 from app.db import Base
@@ -6,6 +6,9 @@ from app.db import Base
 
 class Subject(Base):
     __tablename__ = "subject"
+    __table_args__ = (
+        Index("ix_subject_name", "last_name", "first_name", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String(120), nullable=False)
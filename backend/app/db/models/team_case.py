@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 
 from app.db import Base
@@ -6,6 +6,9 @@ from app.db import Base
 
 class TeamCase(Base):
     __tablename__ = "team_case"
+    __table_args__ = (
+        Index("ix_team_case_team", "team_id", "case_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     team_id = Column(Integer, ForeignKey("team.id", ondelete="CASCADE"), nullable=False)
@@ -1,5 +1,16 @@
+import hashlib
+import hmac
+import re
+import time
+from contextvars import ContextVar, Token
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from app.core.config import settings
+from app.core.id_codec import get_current_session
+from app.core.instrumentation import install_query_hooks
 
 engine = create_async_engine(
     settings.database_url,
@@ -13,9 +24,201 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False
 )
 
+# Read replica (optional). Without DATABASE_READ_URL every read goes to the primary.
+if settings.database_read_url and settings.database_read_url != settings.database_url:
+    read_engine = create_async_engine(
+        settings.database_read_url,
+        echo=settings.debug,
+        future=True
+    )
+    async_read_session_maker = async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+else:
+    read_engine = engine
+    async_read_session_maker = async_session_maker
+
+# Per-request query counts / DB time, slow-query log (app.core.instrumentation)
+install_query_hooks(engine)
+install_query_hooks(read_engine)
+
+
+# Tables whose writes should not pin a session to the primary. Every authenticated
+# request touches app_user_session.last_used_at, which would otherwise pin everyone.
+_UNPINNED_TABLES = frozenset({"app_user_session"})
+
+_TEXT_WRITE_TARGET = re.compile(r"^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+\"?(\w+)", re.IGNORECASE)
+_TEXT_READ = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+
+
+def _text_write_table(sql: str) -> Optional[str]:
+    """
+    For a ``text()`` statement, the table it writes to, or None for a read. Anything
+    but a plain SELECT counts as a write; a write whose target cannot be read off the
+    SQL returns "" (never one of the unpinned tables).
+    """
+    if _TEXT_READ.match(sql):
+        return None
+    m = _TEXT_WRITE_TARGET.match(sql)
+    return m.group(1).lower() if m else ""
+
+
+# Set per request from the client's pin cookie (see ReadWriteRouter.pin_cookie)
+_CLIENT_PINNED: ContextVar[bool] = ContextVar("client_pinned_to_primary", default=False)
+
+
+def set_client_pinned(pinned: bool) -> Token:
+    return _CLIENT_PINNED.set(pinned)
+
+
+def reset_client_pinned(token: Token) -> None:
+    _CLIENT_PINNED.reset(token)
+
+
+class ReadWriteRouter:
+    """
+    Chooses between the primary and the read replica for read-only work.
+
+    A session key (the JWT jti bound by the opaque-id middleware) that recently wrote
+    through the primary is pinned there for ``pin_seconds`` so the caller reads its
+    own writes while the replica catches up.
+
+    The pin map only covers this process. So that a read served by another worker
+    honours the pin too, the pin is also handed to the client as a signed
+    "primary until" token (``pin_cookie``), bound to the session key; the middleware
+    checks it on the next request (``client_pinned``) and flags the request context.
+    """
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replica: Optional[async_sessionmaker] = None,
+        pin_seconds: float = 5.0,
+        secret: str = "",
+    ):
+        self.primary = primary
+        self.replica = replica or primary
+        self.pin_seconds = float(pin_seconds)
+        self._secret = secret.encode("utf-8")
+        self._pins: Dict[str, float] = {}
+        self._next_prune = 0.0
+
+    @property
+    def has_replica(self) -> bool:
+        return self.replica is not self.primary
+
+    def pin(self, key: Optional[str]) -> None:
+        if not key or not self.has_replica:
+            return
+        now = time.monotonic()
+        if now >= self._next_prune:
+            # Keys that write and never read again would otherwise stay forever
+            self._pins = {k: until for k, until in self._pins.items() if until > now}
+            self._next_prune = now + max(self.pin_seconds, 1.0)
+        self._pins[key] = now + self.pin_seconds
+
+    def _remaining(self, key: Optional[str]) -> float:
+        if not key:
+            return 0.0
+        until = self._pins.get(key)
+        if until is None:
+            return 0.0
+        remaining = until - time.monotonic()
+        if remaining <= 0:
+            self._pins.pop(key, None)
+            return 0.0
+        return remaining
+
+    def is_pinned(self, key: Optional[str]) -> bool:
+        return self._remaining(key) > 0
+
+    def _sign(self, key: str, until: int) -> str:
+        return hmac.new(self._secret, f"{key}:{until}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def pin_cookie(self, key: Optional[str]) -> Optional[str]:
+        """Signed token carrying ``key``'s pin (wall-clock expiry), or None when not pinned here."""
+        remaining = self._remaining(key)
+        if remaining <= 0:
+            return None
+        until = int(time.time() + remaining) + 1
+        return f"{until}.{self._sign(key, until)}"
+
+    def client_pinned(self, key: Optional[str], token: Optional[str]) -> bool:
+        """True when ``token`` is a valid, unexpired pin for ``key`` issued by any process."""
+        if not key or not token or not self.has_replica:
+            return False
+        until_s, _, sig = token.partition(".")
+        try:
+            until = int(until_s)
+        except ValueError:
+            return False
+        if until <= time.time():
+            return False
+        return hmac.compare_digest(sig, self._sign(key, until))
+
+    def reader_for(self, key: Optional[str]) -> async_sessionmaker:
+        if not self.has_replica or _CLIENT_PINNED.get() or self.is_pinned(key):
+            return self.primary
+        return self.replica
+
+    def track_writes(self, session: AsyncSession, key: Optional[str]) -> None:
+        """Pin ``key`` to the primary whenever ``session`` flushes or executes a write."""
+        if not key or not self.has_replica:
+            return
+        sync_session = session.sync_session
+
+        def _after_flush(sess, flush_context):
+            for obj in list(sess.new) + list(sess.dirty) + list(sess.deleted):
+                if getattr(obj, "__tablename__", None) not in _UNPINNED_TABLES:
+                    self.pin(key)
+                    return
+
+        def _on_execute(orm_execute_state):
+            statement = orm_execute_state.statement
+            if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+                table = getattr(getattr(statement, "table", None), "name", None)
+            elif isinstance(statement, TextClause):
+                table = _text_write_table(statement.text)
+                if table is None:
+                    return
+            else:
+                return
+            if table not in _UNPINNED_TABLES:
+                self.pin(key)
+
+        event.listen(sync_session, "after_flush", _after_flush)
+        event.listen(sync_session, "do_orm_execute", _on_execute)
+
+
+db_router = ReadWriteRouter(
+    async_session_maker,
+    async_read_session_maker,
+    pin_seconds=settings.read_after_write_pin_seconds,
+    secret=settings.jwt_secret_key,
+)
+
+
 async def get_db() -> AsyncSession:
     async with async_session_maker() as session:
+        db_router.track_writes(session, get_current_session())
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_read_db() -> AsyncSession:
+    """Session for read-only endpoints: the replica, unless the caller recently wrote."""
+    maker = db_router.reader_for(get_current_session())
+    async with maker() as session:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+def get_read_session_maker() -> async_sessionmaker:
+    """Session factory for read-only work that fans out over several connections."""
+    return db_router.reader_for(get_current_session())
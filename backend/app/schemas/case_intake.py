@@ -0,0 +1,40 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+from app.schemas.case_circumstances import CaseCircumstancesUpsert
+from app.schemas.case_demographics import CaseDemographicsUpsert
+from app.schemas.case_management import CaseManagementUpsert
+from app.schemas.case_pattern_of_life import CasePatternOfLifeUpsert
+from app.schemas.case_search_urgency import CaseSearchUrgencyUpsert
+
+
+# The case comes from the path, so sections in a batch do not repeat case_id
+class IntakeDemographics(CaseDemographicsUpsert):
+    case_id: Optional[str] = None
+
+
+class IntakeManagement(CaseManagementUpsert):
+    case_id: Optional[str] = None
+
+
+class IntakePatternOfLife(CasePatternOfLifeUpsert):
+    case_id: Optional[str] = None
+
+
+class IntakeVictimologyAnswer(BaseModel):
+    victimology_id: str
+    answer_id: Optional[str] = None
+    details: Optional[str] = None
+
+
+class CaseIntakeSave(BaseModel):
+    """Any subset of the intake sections; omitted sections are left untouched."""
+    demographics: Optional[IntakeDemographics] = None
+    circumstances: Optional[CaseCircumstancesUpsert] = None
+    management: Optional[IntakeManagement] = None
+    pattern_of_life: Optional[IntakePatternOfLife] = None
+    search_urgency: Optional[CaseSearchUrgencyUpsert] = None
+    # Full selection; ids not listed are removed
+    exploitation_ids: Optional[List[str]] = None
+    # Answers to upsert; questions not listed are left as they are
+    victimology: Optional[List[IntakeVictimologyAnswer]] = None
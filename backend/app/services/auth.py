@@ -86,19 +86,22 @@ async def invalidate_session(db: AsyncSession, jti: str) -> bool:
     return False
 
 
-async def cleanup_expired_sessions(db: AsyncSession, older_than_days: int = 7):
+async def cleanup_expired_sessions(db: AsyncSession, older_than_days: int = 7, limit: Optional[int] = None) -> int:
     """
-    Delete expired sessions older than specified days.
+    Delete expired sessions older than specified days (at most ``limit`` when given).
     Returns the number of deleted sessions.
     """
     cutoff_date = datetime.now(timezone.utc) - timedelta(days=older_than_days)
 
-    stmt = delete(AppUserSession).where(
-        AppUserSession.expires_at < cutoff_date
-    )
+    condition = AppUserSession.expires_at < cutoff_date
+    if limit is not None:
+        expired_ids = select(AppUserSession.id).where(condition).limit(int(limit)).scalar_subquery()
+        condition = AppUserSession.id.in_(expired_ids)
+    stmt = delete(AppUserSession).where(condition)
 
     result = await db.execute(stmt)
     await db.commit()
+    return int(result.rowcount or 0)
 
 
 
@@ -185,8 +188,6 @@ async def user_has_permission(
             )
             .limit(1)
         )
-        #print(stmt.compile(compile_kwargs={"literal_binds": True}))
-
         result = await db.execute(stmt)
         return result.first() is not None
 
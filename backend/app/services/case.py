@@ -1,12 +1,55 @@
 from __future__ import annotations
 
 from datetime import date as Date
-from typing import Optional
+from typing import List, Optional
 
+import sqlalchemy as sa
 from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.case import Case
+from app.db.models.case_number_counter import CaseNumberCounter
+
+
+def _validate_state_code(state_code: str) -> str:
+    if not state_code or len(state_code.strip()) != 2 or not state_code.strip().isalpha():
+        raise ValueError("state_code must be a two-letter alphabetic code, e.g., 'CA'")
+    return state_code.strip().upper()
+
+
+def format_case_number(state_code: str, when: Date, seq: int) -> str:
+    """YY-[STATE]-MM### for sequence ``seq`` of the year of ``when``."""
+    return f"{when:%y}-{state_code}-{when:%m}{seq:03d}"
+
+
+async def allocate_case_sequences(db: AsyncSession, year: int, count: int = 1) -> int:
+    """
+    Reserve ``count`` consecutive sequence numbers for ``year``; returns the first.
+
+    A single ``UPDATE ... SET last_value = last_value + count RETURNING`` on the
+    year's counter row: the row lock serializes concurrent intakes until their
+    transactions end, and a rollback returns the numbers, so committed numbers have
+    no gaps. The year's row is created on first use, seeded from the existing case
+    count for that year (the only time ``case`` is scanned). The caller commits.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    C = CaseNumberCounter
+    bump = sa.update(C).where(C.year == year).values(last_value=C.last_value + count).returning(C.last_value)
+    last = (await db.execute(bump)).scalar_one_or_none()
+    if last is None:
+        existing = (
+            await db.execute(select(func.count()).select_from(Case).where(Case.case_number.like(f"{year % 100:02d}-%")))
+        ).scalar_one()
+        try:
+            async with db.begin_nested():
+                db.add(C(year=year, last_value=int(existing or 0) + count))
+            last = int(existing or 0) + count
+        except IntegrityError:
+            # Another intake created the year's row first
+            last = (await db.execute(bump)).scalar_one()
+    return int(last) - count + 1
 
 
 async def create_case_number(db: AsyncSession, state_code: str, when: Optional[Date] = None) -> str:
@@ -16,32 +59,27 @@ async def create_case_number(db: AsyncSession, state_code: str, when: Optional[D
     - YY: last two digits of the year from the date
     - STATE: provided two-letter state code (normalized to upper-case)
     - MM: zero-padded month from the date
-    - ###: zero-padded sequence number for that year (COUNT + 1 based on existing records
-      where case_number LIKE 'YY-%')
+    - ###: zero-padded sequence number for that year, from the per-year counter
+      (see allocate_case_sequences); unique under concurrency
 
     Args:
-        db: Async SQLAlchemy session
+        db: Async SQLAlchemy session; the number is final once the caller commits
         state_code: Two-letter state code (e.g., "CA")
         when: Optional date to use; if None, uses today's date
 
     Returns:
         The newly generated case number string.
     """
-    if not state_code or len(state_code.strip()) != 2 or not state_code.strip().isalpha():
-        raise ValueError("state_code must be a two-letter alphabetic code, e.g., 'CA'")
-
-    when = when or Date.today()
-
-    yy = f"{when:%y}"
-    mm = f"{when:%m}"
-    st = state_code.strip().upper()
+    [case_number] = await reserve_case_numbers(db, state_code, 1, when)
+    return case_number
 
-    # Count existing cases for the year prefix 'YY-%'
-    like_prefix = f"{yy}-%"
-    stmt = select(func.count()).select_from(Case).where(Case.case_number.like(like_prefix))
-    result = await db.execute(stmt)
-    count_for_year: int = int(result.scalar_one() or 0)
 
-    seq = count_for_year + 1
-    case_number = f"{yy}-{st}-{mm}{seq:03d}"
-    return case_number
+async def reserve_case_numbers(db: AsyncSession, state_code: str, count: int, when: Optional[Date] = None) -> List[str]:
+    """
+    Reserve ``count`` consecutive case numbers in one counter update (bulk imports).
+    The caller commits; rolling back releases the whole block.
+    """
+    st = _validate_state_code(state_code)
+    when = when or Date.today()
+    first = await allocate_case_sequences(db, when.year, count)
+    return [format_case_number(st, when, seq) for seq in range(first, first + count)]
@@ -0,0 +1,210 @@
+"""
+Cached case-header projection.
+
+The case header (case, subject, demographics, circumstances, management, pattern
+of life, disposition) is read on every navigation inside a case but changes only
+when one of those sections is saved. The flat header row is cached per process,
+keyed by case id, and tagged with ``case.header_version``:
+
+- Writers call ``bump_case_header(db, case_id=...)`` (or ``subject_id=...``) in
+  their transaction. That increments ``header_version`` on the affected cases and
+  drops this process's entries. Other processes see the new version on their next
+  read, because every read checks ``header_version`` first (a primary key lookup).
+- The loader reads the row together with its ``header_version`` and caches it
+  under that version, so a concurrent write can never be cached under a version
+  it does not belong to.
+
+Ref codes and opaque ids are applied when the header is rendered, not cached, so
+reference-data changes and session-bound ids need no invalidation here.
+``case_header_etag`` combines the case version, the reference-data version and the
+id-codec session, so clients can revalidate with ``If-None-Match``.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Any, Dict, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.case import Case
+from app.db.models.case_circumstances import CaseCircumstances
+from app.db.models.case_demographics import CaseDemographics
+from app.db.models.case_disposition import CaseDisposition
+from app.db.models.case_management import CaseManagement
+from app.db.models.case_pattern_of_life import CasePatternOfLife
+from app.db.models.subject import Subject
+
+
+class CaseHeaderCache:
+    """LRU of case id -> (header_version, flat header row)."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = int(max_entries)
+        self._entries: "OrderedDict[int, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, case_id: int, version: int) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(case_id)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(case_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, case_id: int, version: int, row: Dict[str, Any]) -> None:
+        current = self._entries.get(case_id)
+        if current is not None and current[0] > version:
+            # A newer version is already cached; keep it
+            return
+        self._entries[case_id] = (version, row)
+        self._entries.move_to_end(case_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, case_id: Optional[int] = None) -> None:
+        if case_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(int(case_id), None)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+case_header_cache = CaseHeaderCache(max_entries=settings.case_header_cache_size)
+
+
+def _header_query():
+    return (
+        select(
+            Case.id.label("case_id"),
+            Case.header_version,
+            Case.case_number,
+            Case.date_intake,
+            Case.inactive,
+            Subject.id.label("subject_id"),
+            Subject.first_name,
+            Subject.last_name,
+            Subject.middle_name,
+            Subject.nicknames,
+            Subject.profile_pic.isnot(None).label("has_pic"),
+            CaseDemographics.age_when_missing,
+            CaseDemographics.date_of_birth,
+            CaseDemographics.height,
+            CaseDemographics.weight,
+            CaseDemographics.hair_color,
+            CaseDemographics.hair_length,
+            CaseDemographics.eye_color,
+            CaseDemographics.identifying_marks,
+            CaseDemographics.sex_id,
+            CaseDemographics.race_id,
+            CaseCircumstances.date_missing,
+            CaseManagement.consent_sent,
+            CaseManagement.consent_returned,
+            CaseManagement.flyer_complete,
+            CaseManagement.ottic,
+            CaseManagement.csec_id,
+            CaseManagement.missing_status_id,
+            CaseManagement.classification_id,
+            CaseManagement.requested_by_id,
+            CaseManagement.ncic_case_number,
+            CaseManagement.ncmec_case_number,
+            CaseManagement.le_case_number,
+            CaseManagement.le_24hour_contact,
+            CaseManagement.ss_case_number,
+            CaseManagement.ss_24hour_contact,
+            CaseManagement.jpo_case_number,
+            CaseManagement.jpo_24hour_contact,
+            CasePatternOfLife.school,
+            CasePatternOfLife.grade,
+            CasePatternOfLife.missing_classes,
+            CasePatternOfLife.school_laptop,
+            CasePatternOfLife.school_laptop_taken,
+            CasePatternOfLife.school_address,
+            CasePatternOfLife.employed,
+            CasePatternOfLife.employer,
+            CasePatternOfLife.work_hours,
+            CasePatternOfLife.employer_address,
+            CasePatternOfLife.confidants,
+            CaseDisposition.shepherds_contributed_intel,
+            CaseDisposition.date_found,
+            CaseDisposition.scope_id.label("disp_scope_id"),
+            CaseDisposition.class_id.label("disp_class_id"),
+            CaseDisposition.status_id.label("disp_status_id"),
+            CaseDisposition.living_id.label("disp_living_id"),
+            CaseDisposition.found_by_id.label("disp_found_by_id"),
+        )
+        .join(Subject, Subject.id == Case.subject_id)
+        .join(CaseDemographics, CaseDemographics.case_id == Case.id, isouter=True)
+        .join(CaseCircumstances, CaseCircumstances.case_id == Case.id, isouter=True)
+        .join(CaseManagement, CaseManagement.case_id == Case.id, isouter=True)
+        .join(CasePatternOfLife, CasePatternOfLife.case_id == Case.id, isouter=True)
+        .join(CaseDisposition, CaseDisposition.case_id == Case.id, isouter=True)
+    )
+
+
+async def case_header_version(db: AsyncSession, case_id: int) -> Optional[int]:
+    """Current header_version of the case, or None when it does not exist."""
+    version = (await db.execute(select(Case.header_version).where(Case.id == int(case_id)))).scalar_one_or_none()
+    return int(version) if version is not None else None
+
+
+async def get_case_header_row(db: AsyncSession, case_id: int, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Flat header row (column name -> value) for the case, from the cache when it holds
+    ``version`` (looked up when not given). None when the case does not exist.
+    """
+    case_id = int(case_id)
+    if version is None:
+        version = await case_header_version(db, case_id)
+        if version is None:
+            return None
+    row = case_header_cache.get(case_id, int(version))
+    if row is not None:
+        return row
+    result = (await db.execute(_header_query().where(Case.id == case_id))).first()
+    if result is None:
+        return None
+    row = dict(result._mapping)
+    case_header_cache.put(case_id, int(row["header_version"] or 0), row)
+    return row
+
+
+async def bump_case_header(db: AsyncSession, *, case_id: Optional[int] = None, subject_id: Optional[int] = None) -> None:
+    """
+    Mark the header of ``case_id`` (or of every case whose primary subject is
+    ``subject_id``) as changed, in the caller's transaction. Does not commit.
+    """
+    if case_id is None and subject_id is None:
+        raise ValueError("case_id or subject_id is required")
+    stmt = sa.update(Case).values(header_version=Case.header_version + 1)
+    if case_id is not None:
+        stmt = stmt.where(Case.id == int(case_id))
+        case_header_cache.invalidate(int(case_id))
+    else:
+        stmt = stmt.where(Case.subject_id == int(subject_id))
+        ids = (await db.execute(select(Case.id).where(Case.subject_id == int(subject_id)))).scalars().all()
+        for cid in ids:
+            case_header_cache.invalidate(int(cid))
+    await db.execute(stmt.execution_options(synchronize_session=False))
+
+
+def case_header_etag(case_id: int, version: int, reference_version: str, session_id: Optional[str] = None) -> str:
+    token = f"{int(case_id)}|{int(version)}|{reference_version}|{session_id or ''}"
+    return f'W/"case-{sha256(token.encode("utf-8")).hexdigest()[:20]}"'
+
+
+__all__ = [
+    "CaseHeaderCache",
+    "bump_case_header",
+    "case_header_cache",
+    "case_header_etag",
+    "case_header_version",
+    "get_case_header_row",
+]
@@ -0,0 +1,295 @@
+"""
+Set-based saves for the case intake sections.
+
+Every one-row-per-case section (demographics, circumstances, management, pattern
+of life, search urgency) is written with a single ``INSERT ... ON CONFLICT
+(case_id) DO UPDATE``. Victimology answers are written as one multi-row upsert on
+(case_id, victimology_id). The exploitation selection is synced with one DELETE
+and one ``INSERT ... ON CONFLICT DO NOTHING``.
+
+``save_case_intake`` applies any subset of the sections in the caller's
+transaction. Each section runs in its own savepoint, so a section that fails
+(e.g. a reference id that does not exist) is rolled back and reported without
+losing the others. Nothing here commits.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.id_codec import OpaqueIdError, decode_id
+from app.db.models.case_circumstances import CaseCircumstances
+from app.db.models.case_demographics import CaseDemographics
+from app.db.models.case_exploitation import CaseExploitation
+from app.db.models.case_management import CaseManagement
+from app.db.models.case_pattern_of_life import CasePatternOfLife
+from app.db.models.case_search_urgency import CaseSearchUrgency
+from app.db.models.case_victimology import CaseVictimology
+from app.db.models.victimology import victimology as Victimology
+from app.schemas.case_intake import CaseIntakeSave
+from app.services.case_header import bump_case_header
+from app.services.reference_data import get_reference_data
+
+URGENCY_FIELDS = (
+    "age_id",
+    "physical_condition_id",
+    "medical_condition_id",
+    "personal_risk_id",
+    "online_risk_id",
+    "family_risk_id",
+    "behavioral_risk_id",
+)
+
+
+def decode_ref(oid: Optional[str], model: str = "ref_value") -> Optional[int]:
+    """
+    Opaque id -> int via decode_id (so plain numbers only when id encryption is off);
+    None for empty or invalid values.
+    """
+    if oid is None or str(oid) == "":
+        return None
+    try:
+        return int(decode_id(model, str(oid)))
+    except OpaqueIdError:
+        return None
+
+
+def _flag(v: Optional[bool]) -> bool:
+    return bool(v) if v is not None else False
+
+
+# ---------- Section values (payload -> column values) ----------
+
+def demographics_values(payload) -> Dict[str, Any]:
+    return {
+        "date_of_birth": payload.date_of_birth,
+        "age_when_missing": payload.age_when_missing,
+        "height": payload.height,
+        "weight": payload.weight,
+        "hair_color": payload.hair_color,
+        "hair_length": payload.hair_length,
+        "eye_color": payload.eye_color,
+        "identifying_marks": payload.identifying_marks,
+        "sex_id": decode_ref(payload.sex_id),
+        "race_id": decode_ref(payload.race_id),
+    }
+
+
+def pattern_of_life_values(payload) -> Dict[str, Any]:
+    return {
+        "school": payload.school,
+        "grade": payload.grade,
+        "missing_classes": _flag(payload.missing_classes),
+        "school_laptop": _flag(payload.school_laptop),
+        "school_laptop_taken": _flag(payload.school_laptop_taken),
+        "school_address": payload.school_address,
+        "employed": _flag(payload.employed),
+        "employer": payload.employer,
+        "work_hours": payload.work_hours,
+        "employer_address": payload.employer_address,
+        "confidants": payload.confidants,
+    }
+
+
+def circumstances_values(payload) -> Dict[str, Any]:
+    # getattr: not every column is on the upsert schema (e.g. devices)
+    return {
+        "date_missing": getattr(payload, "date_missing", None),
+        "time_missing": getattr(payload, "time_missing", None),
+        "date_reported": getattr(payload, "date_reported", None),
+        "address": getattr(payload, "address", None),
+        "city": getattr(payload, "city", None),
+        "state_id": decode_ref(getattr(payload, "state_id", None)),
+        "point_last_seen": getattr(payload, "point_last_seen", None),
+        "have_id_id": decode_ref(getattr(payload, "have_id_id", None)),
+        "id_taken_id": decode_ref(getattr(payload, "id_taken_id", None)),
+        "have_money_id": decode_ref(getattr(payload, "have_money_id", None)),
+        "money_taken_id": decode_ref(getattr(payload, "money_taken_id", None)),
+        "have_cc_id": decode_ref(getattr(payload, "have_cc_id", None)),
+        "cc_taken_id": decode_ref(getattr(payload, "cc_taken_id", None)),
+        "vehicle_taken": _flag(getattr(payload, "vehicle_taken", None)),
+        "vehicle_desc": getattr(payload, "vehicle_desc", None),
+        "with_whom": getattr(payload, "with_whom", None),
+        "what_happened": getattr(payload, "what_happened", None),
+        "clothing_top": getattr(payload, "clothing_top", None),
+        "clothing_bottom": getattr(payload, "clothing_bottom", None),
+        "clothing_shoes": getattr(payload, "clothing_shoes", None),
+        "clothing_outerwear": getattr(payload, "clothing_outerwear", None),
+        "clothing_innerwear": getattr(payload, "clothing_innerwear", None),
+        "bags": getattr(payload, "bags", None),
+        "other_items": getattr(payload, "other_items", None),
+        "devices": getattr(payload, "devices", None),
+        "mobile_carrier_id": decode_ref(getattr(payload, "mobile_carrier_id", None)),
+        "mobile_carrier_other": getattr(payload, "mobile_carrier_other", None),
+        "voip_id": decode_ref(getattr(payload, "voip_id", None)),
+        "wifi_only": _flag(getattr(payload, "wifi_only", None)),
+    }
+
+
+def management_values(payload) -> Dict[str, Any]:
+    return {
+        "consent_sent": _flag(payload.consent_sent),
+        "consent_returned": _flag(payload.consent_returned),
+        "flyer_complete": _flag(payload.flyer_complete),
+        "ottic": _flag(payload.ottic),
+        "csec_id": decode_ref(payload.csec_id),
+        "missing_status_id": decode_ref(payload.missing_status_id),
+        "classification_id": decode_ref(payload.classification_id),
+        "requested_by_id": decode_ref(getattr(payload, "requested_by_id", None)),
+        "ncic_case_number": payload.ncic_case_number,
+        "ncmec_case_number": payload.ncmec_case_number,
+        "le_case_number": payload.le_case_number,
+        "le_24hour_contact": payload.le_24hour_contact,
+        "ss_case_number": payload.ss_case_number,
+        "ss_24hour_contact": payload.ss_24hour_contact,
+        "jpo_case_number": payload.jpo_case_number,
+        "jpo_24hour_contact": payload.jpo_24hour_contact,
+    }
+
+
+async def search_urgency_values(db: AsyncSession, payload) -> Dict[str, Any]:
+    """Selections plus ``score``: the sum of the selections' sort orders once all seven are set."""
+    values = {name: decode_ref(getattr(payload, name, None)) for name in URGENCY_FIELDS}
+    selected = [values[name] for name in URGENCY_FIELDS]
+    score = None
+    if all(v is not None for v in selected):
+        ref = await get_reference_data(db)
+        score = sum(ref.sort_order(v) or 0 for v in selected)
+    values["score"] = score
+    return values
+
+
+# ---------- Statements ----------
+
+def _insert(db: AsyncSession, table):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert is not supported on {dialect}")
+    return insert(table)
+
+
+async def upsert_case_section(db: AsyncSession, model, case_id: int, values: Dict[str, Any]) -> None:
+    """Insert or replace the one ``model`` row of the case in a single statement."""
+    stmt = _insert(db, model.__table__).values(case_id=int(case_id), **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[model.__table__.c.case_id],
+        set_={**{k: stmt.excluded[k] for k in values}, "updated_at": sa.func.now()},
+    )
+    await db.execute(stmt)
+
+
+async def sync_case_exploitation(db: AsyncSession, case_id: int, exploitation_ids: Iterable[int]) -> Dict[str, int]:
+    """Make the case's exploitation selection exactly ``exploitation_ids``."""
+    ids = sorted({int(i) for i in exploitation_ids})
+    CE = CaseExploitation
+    delete = sa.delete(CE).where(CE.case_id == int(case_id))
+    if ids:
+        delete = delete.where(CE.exploitation_id.not_in(ids))
+    removed = (await db.execute(delete.execution_options(synchronize_session=False))).rowcount or 0
+    added = 0
+    if ids:
+        stmt = _insert(db, CE.__table__).values([{"case_id": int(case_id), "exploitation_id": i} for i in ids])
+        stmt = stmt.on_conflict_do_nothing(index_elements=[CE.__table__.c.case_id, CE.__table__.c.exploitation_id])
+        added = (await db.execute(stmt)).rowcount or 0
+    return {"added": int(added), "removed": int(removed)}
+
+
+async def upsert_case_victimology_answers(db: AsyncSession, case_id: int, answers: List[Any]) -> Dict[str, Any]:
+    """
+    Upsert answers in one statement. Answers for unknown questions or without an
+    answer are skipped and reported by the id the client sent.
+    """
+    rows: Dict[int, Dict[str, Any]] = {}
+    skipped: List[str] = []
+    decoded = [(a, decode_ref(a.victimology_id, "victimology"), decode_ref(a.answer_id)) for a in answers]
+    wanted = {vid for _a, vid, _ans in decoded if vid is not None}
+    known = set()
+    if wanted:
+        known = set((await db.execute(select(Victimology.id).where(Victimology.id.in_(wanted)))).scalars().all())
+    for a, vid, answer_id in decoded:
+        if vid is None or vid not in known or answer_id is None:
+            skipped.append(a.victimology_id)
+            continue
+        # Last answer wins when a question appears twice
+        rows[vid] = {"case_id": int(case_id), "victimology_id": vid, "answer_id": answer_id, "details": a.details}
+    if rows:
+        table = CaseVictimology.__table__
+        stmt = _insert(db, table).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.case_id, table.c.victimology_id],
+            set_={"answer_id": stmt.excluded.answer_id, "details": stmt.excluded.details, "updated_at": sa.func.now()},
+        )
+        await db.execute(stmt)
+    return {"saved": len(rows), "skipped": skipped}
+
+
+# ---------- Batch ----------
+
+HEADER_SECTIONS = {"demographics", "circumstances", "management", "pattern_of_life"}
+
+
+async def save_case_intake(db: AsyncSession, case_id: int, payload: CaseIntakeSave) -> Dict[str, Any]:
+    """
+    Apply every section present in ``payload``; returns section -> result, where a
+    result is ``{"ok": True, ...}`` or ``{"ok": False, "error": ...}``.
+    """
+    case_id = int(case_id)
+    single = {
+        "demographics": (CaseDemographics, demographics_values),
+        "circumstances": (CaseCircumstances, circumstances_values),
+        "management": (CaseManagement, management_values),
+        "pattern_of_life": (CasePatternOfLife, pattern_of_life_values),
+    }
+    results: Dict[str, Any] = {}
+
+    async def run(section: str, fn) -> None:
+        try:
+            async with db.begin_nested():
+                results[section] = {"ok": True, **(await fn() or {})}
+        except SQLAlchemyError as e:
+            results[section] = {"ok": False, "error": e.__class__.__name__}
+
+    for section, (model, build) in single.items():
+        section_payload = getattr(payload, section)
+        if section_payload is not None:
+            await run(section, lambda m=model, b=build, p=section_payload: upsert_case_section(db, m, case_id, b(p)))
+
+    if payload.search_urgency is not None:
+        async def _urgency():
+            values = await search_urgency_values(db, payload.search_urgency)
+            await upsert_case_section(db, CaseSearchUrgency, case_id, values)
+            return {"score": values["score"]}
+        await run("search_urgency", _urgency)
+
+    if payload.exploitation_ids is not None:
+        ids = [i for i in (decode_ref(oid) for oid in payload.exploitation_ids) if i is not None]
+        await run("exploitation", lambda: sync_case_exploitation(db, case_id, ids))
+
+    if payload.victimology is not None:
+        await run("victimology", lambda: upsert_case_victimology_answers(db, case_id, payload.victimology))
+
+    if any(results.get(s, {}).get("ok") for s in HEADER_SECTIONS):
+        await bump_case_header(db, case_id=case_id)
+    return results
+
+
+__all__ = [
+    "circumstances_values",
+    "decode_ref",
+    "demographics_values",
+    "management_values",
+    "pattern_of_life_values",
+    "save_case_intake",
+    "search_urgency_values",
+    "sync_case_exploitation",
+    "upsert_case_section",
+    "upsert_case_victimology_answers",
+]
@@ -4,6 +4,7 @@ from email.message import EmailMessage
 from app.core.config import settings
 from threading import Lock
 import sys
+import time
 
 Address = Union[str, tuple[str, str]]  # "email" or ("Name", "email")
 
@@ -29,7 +30,7 @@ def _format_address(addr: Address) -> str:
     return addr
 
 
-def send_email(
+def build_email_message(
     to: Union[Address, Iterable[Address]],
     subject: str,
     text: Optional[str] = None,
@@ -38,20 +39,14 @@ def send_email(
     cc: Optional[Iterable[Address]] = None,
     bcc: Optional[Iterable[Address]] = None,
     reply_to: Optional[Address] = None,
-) -> None:
+) -> tuple[EmailMessage, str, list[str]]:
     """
-    Send an email. Backend is chosen by settings.email_backend:
-      - "smtp" (default): real SMTP delivery
-      - "console": write the email to stdout
-      - "memory": store the email in an in-memory outbox for tests
-
-    Supports plain text and HTML.
+    Build an EmailMessage. Returns (message, from_addr, all_recipients) where
+    all_recipients includes Bcc addresses (which are not written to headers).
     """
     if not text and not html:
         raise ValueError("Either text or html content must be provided")
 
-    backend = getattr(settings, "email_backend", "smtp").lower().strip()
-
     # Determine sender
     from_addr = _format_address(sender) if sender else (settings.smtp_from or settings.smtp_username or "")
     if not from_addr:
@@ -93,7 +88,105 @@ def send_email(
     else:
         msg.set_content(text or "")
 
-    all_recipients = to_addrs + cc_addrs + bcc_addrs
+    return msg, from_addr, to_addrs + cc_addrs + bcc_addrs
+
+
+class SMTPConnection:
+    """
+    A reusable SMTP connection. The socket is opened lazily and kept across sends.
+    A connection idle for more than ``probe_after`` seconds is checked with NOOP
+    before use and re-opened if the server dropped it. A failure during a send is
+    never retried here: once MAIL FROM has gone out the server may already have
+    accepted the message, and a permanent refusal will not go away on resend. The
+    connection is closed and the error is left to the caller (the outbox retries).
+    Not thread-safe; callers that share one (e.g. the notification worker)
+    serialize their sends.
+    """
+
+    def __init__(self, idle_timeout: float = 60.0, probe_after: float = 5.0):
+        self.idle_timeout = float(idle_timeout)
+        self.probe_after = float(probe_after)
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used: float = 0.0
+
+    def _open(self) -> smtplib.SMTP:
+        host = settings.smtp_host
+        port = settings.smtp_port
+        if not host or not port:
+            raise RuntimeError("SMTP host/port not configured")
+        server = smtplib.SMTP(host, port, timeout=30)
+        server.ehlo()
+        if settings.smtp_use_tls:
+            server.starttls()
+            server.ehlo()
+        if settings.smtp_username and settings.smtp_password:
+            server.login(settings.smtp_username, settings.smtp_password)
+        return server
+
+    def _connection(self) -> smtplib.SMTP:
+        idle = time.monotonic() - self._last_used
+        if self._server is not None and idle > self.idle_timeout:
+            # Most servers drop idle clients anyway; start fresh instead of failing mid-send
+            self.close()
+        if self._server is not None and idle > self.probe_after:
+            # No transaction is open yet, so a dead socket can safely be replaced
+            try:
+                code, _ = self._server.noop()
+            except (smtplib.SMTPServerDisconnected, OSError):
+                code = None
+            if code != 250:
+                self.close()
+        if self._server is None:
+            self._server = self._open()
+        return self._server
+
+    def send(self, msg: EmailMessage, from_addr: str, to_addrs: list[str]) -> None:
+        server = self._connection()
+        try:
+            server.send_message(msg, from_addr=from_addr, to_addrs=to_addrs)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server answered (and smtplib reset the transaction); the session is still usable
+            raise
+        except Exception:
+            # State after a failed transaction is unknown; the next send reconnects
+            self.close()
+            raise
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+
+def send_email(
+    to: Union[Address, Iterable[Address]],
+    subject: str,
+    text: Optional[str] = None,
+    html: Optional[str] = None,
+    sender: Optional[Address] = None,
+    cc: Optional[Iterable[Address]] = None,
+    bcc: Optional[Iterable[Address]] = None,
+    reply_to: Optional[Address] = None,
+    connection: Optional[SMTPConnection] = None,
+) -> None:
+    """
+    Send an email. Backend is chosen by settings.email_backend:
+      - "smtp" (default): real SMTP delivery
+      - "console": write the email to stdout
+      - "memory": store the email in an in-memory outbox for tests
+
+    Supports plain text and HTML. With the smtp backend, pass ``connection`` to
+    reuse an open SMTPConnection instead of connecting per message.
+    """
+    msg, from_addr, all_recipients = build_email_message(
+        to, subject, text=text, html=html, sender=sender, cc=cc, bcc=bcc, reply_to=reply_to
+    )
+
+    backend = getattr(settings, "email_backend", "smtp").lower().strip()
 
     if backend == "memory":
         with _outbox_lock:
@@ -104,12 +197,12 @@ def send_email(
         out = sys.stdout
         print("=== EMAIL (console backend) ===", file=out)
         print(f"From: {from_addr}", file=out)
-        if to_addrs:
-            print(f"To: {', '.join(to_addrs)}", file=out)
-        if cc_addrs:
-            print(f"Cc: {', '.join(cc_addrs)}", file=out)
-        if bcc_addrs:
-            print(f"Bcc: {', '.join(bcc_addrs)}", file=out)
+        if msg["To"]:
+            print(f"To: {msg['To']}", file=out)
+        if msg["Cc"]:
+            print(f"Cc: {msg['Cc']}", file=out)
+        if bcc:
+            print(f"Bcc: {', '.join(_format_address(a) for a in ([bcc] if isinstance(bcc, (str, tuple)) else bcc))}", file=out)
         print(f"Subject: {subject}", file=out)
         print("\n-- Body (text) --", file=out)
         if text:
@@ -121,22 +214,15 @@ def send_email(
         return
 
     # Default: SMTP backend
-    host = settings.smtp_host
-    port = settings.smtp_port
-    username = settings.smtp_username
-    password = settings.smtp_password
-
-    if not host or not port:
-        raise RuntimeError("SMTP host/port not configured")
+    if connection is not None:
+        connection.send(msg, from_addr, all_recipients)
+        return
 
-    with smtplib.SMTP(host, port) as server:
-        server.ehlo()
-        if settings.smtp_use_tls:
-            server.starttls()
-            server.ehlo()
-        if username and password:
-            server.login(username, password)
-        server.send_message(msg, from_addr=from_addr, to_addrs=all_recipients)
+    one_shot = SMTPConnection()
+    try:
+        one_shot.send(msg, from_addr, all_recipients)
+    finally:
+        one_shot.close()
 
 
-__all__ = ["send_email", "get_outbox", "clear_outbox"]
+__all__ = ["send_email", "build_email_message", "SMTPConnection", "get_outbox", "clear_outbox"]
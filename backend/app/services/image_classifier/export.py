@@ -0,0 +1,163 @@
+"""
+Export the photo/document classifier for the faster inference backends.
+
+- ``quantized``: static post-training int8 quantisation of the whole network. It
+  uses torchvision's quantizable resnet18: conv+bn+relu are fused, observers are
+  calibrated on sample images, and the result is saved as TorchScript with the
+  quantized engine it was built for. Dynamic quantisation would only cover the
+  final Linear layer of a ResNet, so it does not speed it up.
+- ``onnx``: an fp32 ONNX graph with a dynamic batch axis for ONNX Runtime (needs
+  the ``onnx`` package to export and ``onnxruntime`` to serve).
+
+The files go next to the weights (best_model.int8.pt, best_model.onnx), where
+``settings.classifier_backend`` looks for them.
+
+Usage (from backend/):
+    python -m app.services.image_classifier.export [--backend quantized onnx] [--weights best_model.pt]
+        [--calibration-dir DIR]
+
+The default calibration directory is tests/test_images: two images, enough to check that
+the export works but not to set production activation ranges. For a model you ship, point
+``--calibration-dir`` at a few hundred representative uploads (documents and photos), kept
+separate from the images used to check accuracy.
+"""
+import argparse
+import logging
+import warnings
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from app.services.image_classifier.image_classifier import (
+    IMG_SIZE,
+    LABEL_MAP,
+    MODEL_NAME,
+    build_eval_transform,
+    build_model,
+    onnx_path,
+    quantized_path,
+    weights_path,
+)
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff"}
+DEFAULT_CALIBRATION_DIR = Path(__file__).resolve().parents[3] / "tests" / "test_images"
+# Fewer calibration images than this gets a warning: int8 ranges would fit a handful of samples
+MIN_CALIBRATION_IMAGES = 100
+
+
+def _load_state(weights: Path):
+    import torch
+
+    return torch.load(weights, map_location="cpu", weights_only=True)
+
+
+def calibration_batches(paths: Iterable[Path], copies: int = 4) -> List:
+    """Preprocessed (1, 3, H, W) tensors for each image plus flipped/cropped variants."""
+    import torch
+    from PIL import Image, ImageOps
+
+    transform = build_eval_transform(IMG_SIZE)
+    batches = []
+    for path in paths:
+        with Image.open(path) as im:
+            im = im.convert("RGB")
+        w, h = im.size
+        variants = [im, ImageOps.mirror(im)]
+        for i in range(max(0, copies - 2)):
+            # Progressively tighter centre crops
+            f = 0.9 - 0.1 * i
+            cw, ch = int(w * f), int(h * f)
+            variants.append(im.crop(((w - cw) // 2, (h - ch) // 2, (w + cw) // 2, (h + ch) // 2)))
+        batches.extend(transform(v).unsqueeze(0) for v in variants)
+    if not batches:
+        raise ValueError("no calibration images")
+    return [torch.cat(batches[i:i + 8]) for i in range(0, len(batches), 8)]
+
+
+def _engine() -> str:
+    import torch
+
+    supported = torch.backends.quantized.supported_engines
+    return next((e for e in ("x86", "fbgemm", "qnnpack") if e in supported), supported[0])
+
+
+def export_quantized(weights: Path, out: Path, calibration: List, engine: Optional[str] = None) -> Path:
+    """Static int8 resnet18 from fp32 ``weights``, calibrated on ``calibration`` batches."""
+    import torch
+    from torchvision.models.quantization import resnet18 as quantizable_resnet18
+
+    engine = engine or _engine()
+    with warnings.catch_warnings():
+        # torch.ao eager-mode quantization and TorchScript are deprecated (torchao / torch.export),
+        # but torch.export cannot yet save a quantized engine model we can load without torchao
+        warnings.simplefilter("ignore")
+        torch.backends.quantized.engine = engine
+        model = quantizable_resnet18(weights=None, quantize=False)
+        model.fc = torch.nn.Linear(model.fc.in_features, len(LABEL_MAP))
+        model.load_state_dict(_load_state(weights), strict=True)
+        model.eval()
+        model.fuse_model(is_qat=False)
+        model.qconfig = torch.ao.quantization.get_default_qconfig(engine)
+        torch.ao.quantization.prepare(model, inplace=True)
+        with torch.inference_mode():
+            for batch in calibration:
+                model(batch)
+        torch.ao.quantization.convert(model, inplace=True)
+        scripted = torch.jit.script(model)
+        torch.jit.save(scripted, str(out), _extra_files={"quantized_engine": engine})
+    return out
+
+
+def export_onnx(weights: Path, out: Path, opset: int = 17) -> Path:
+    """fp32 ONNX graph (input ``input`` N x 3 x 224 x 224, output ``logits``)."""
+    import torch
+
+    model, img_size = build_model(MODEL_NAME, num_classes=len(LABEL_MAP))
+    model.load_state_dict(_load_state(weights), strict=True)
+    model.eval()
+    dummy = torch.zeros(1, 3, img_size, img_size)
+    torch.onnx.export(
+        model, (dummy,), str(out),
+        input_names=["input"], output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset, dynamo=False,
+    )
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", nargs="+", default=["quantized", "onnx"], choices=["quantized", "onnx"])
+    parser.add_argument("--weights", type=Path, default=None, help="fp32 state dict (default: the app's weights path)")
+    parser.add_argument(
+        "--calibration-dir", type=Path, default=DEFAULT_CALIBRATION_DIR,
+        help=f"sample images for int8 calibration (use {MIN_CALIBRATION_IMAGES}+ representative uploads for production)",
+    )
+    parser.add_argument("--engine", default=None, help="quantized engine (default: x86, fbgemm or qnnpack, whichever is supported)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    weights = (args.weights or weights_path()).resolve()
+    if not weights.exists():
+        raise SystemExit(f"weights not found: {weights}")
+    if "quantized" in args.backend:
+        images = sorted(p for p in args.calibration_dir.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        if len(images) < MIN_CALIBRATION_IMAGES:
+            logger.warning(
+                "Only %d calibration images in %s: fine for a smoke test, not for production "
+                "(use %d+ representative uploads)",
+                len(images), args.calibration_dir, MIN_CALIBRATION_IMAGES,
+            )
+        out = export_quantized(weights, quantized_path(weights), calibration_batches(images), engine=args.engine)
+        logger.info("Wrote %s (%d calibration images)", out, len(images))
+    if "onnx" in args.backend:
+        try:
+            out = export_onnx(weights, onnx_path(weights))
+        except Exception as e:
+            raise SystemExit(f"ONNX export failed: {e} (it needs `pip install onnx`)")
+        logger.info("Wrote %s", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,303 @@
+import logging
+import os
+import sys
+import threading
+import warnings
 from io import BytesIO
 from pathlib import Path
+from typing import Optional
 
-from PIL import Image
+# torch/torchvision take seconds to import; they are imported on first use so
+# importing the app (and every worker that never classifies an image) stays fast.
+# The onnx backend does not import them at all.
 
-import torch
-import torch.nn as nn
+logger = logging.getLogger(__name__)
 
-from torchvision import transforms
-from torchvision.models import resnet18
+MODEL_NAME = "resnet18"
+LABEL_MAP = {0: "document", 1: "photo"}
+DEFAULT_WEIGHTS_PATH = Path(__file__).resolve().parent / "best_model.pt"
+IMG_SIZE = 224
+NORM_MEAN = (0.485, 0.456, 0.406)
+NORM_STD = (0.229, 0.224, 0.225)
+
+# settings.classifier_backend values; anything but "torch" falls back to it when its
+# exported model or runtime is missing
+BACKENDS = ("torch", "quantized", "onnx")
+
+
+def warm_up() -> None:
+    """Import the inference stack now instead of on the first upload (see settings.ml_warmup)."""
+    from app.core.config import settings
+
+    from PIL import Image  # noqa: F401
+    import numpy  # noqa: F401
+    if settings.classifier_backend == "onnx":
+        try:
+            import onnxruntime  # noqa: F401
+            return
+        except ImportError:
+            pass
+    import torch  # noqa: F401
+    import torchvision.models  # noqa: F401
+    import torchvision.transforms  # noqa: F401
+
+
+def build_eval_transform(img_size: int = IMG_SIZE):
+    from torchvision import transforms
 
-def build_eval_transform(img_size: int = 224):
-    mean = [0.485, 0.456, 0.406]
-    std  = [0.229, 0.224, 0.225]
     return transforms.Compose([
         transforms.Resize(int(img_size * 1.14)),
         transforms.CenterCrop(img_size),
         transforms.ToTensor(),
-        transforms.Normalize(mean, std),
+        transforms.Normalize(NORM_MEAN, NORM_STD),
     ])
 
 
+def preprocess_numpy(im, img_size: int = IMG_SIZE):
+    """build_eval_transform() with Pillow and numpy only: (1, 3, H, W) float32 for the ONNX graph."""
+    import numpy as np
+    from PIL import Image
+
+    resize = int(img_size * 1.14)
+    w, h = im.size
+    short, long = (w, h) if w <= h else (h, w)
+    new_short, new_long = resize, int(resize * long / short)
+    size = (new_short, new_long) if w <= h else (new_long, new_short)
+    if size != (w, h):
+        im = im.resize(size, Image.BILINEAR)
+    w, h = im.size
+    top, left = int(round((h - img_size) / 2.0)), int(round((w - img_size) / 2.0))
+    im = im.crop((left, top, left + img_size, top + img_size))
+    x = np.asarray(im, dtype=np.float32) / 255.0
+    x = (x - np.asarray(NORM_MEAN, dtype=np.float32)) / np.asarray(NORM_STD, dtype=np.float32)
+    return np.ascontiguousarray(x.transpose(2, 0, 1)[None])
+
+
 def build_model(model_name: str, num_classes: int = 2):
+    import torch.nn as nn
+    from torchvision.models import resnet18
+
     model_name = model_name.lower()
     if model_name == "resnet18":
         model = resnet18(weights=None)
         in_features = model.fc.in_features
         model.fc = nn.Linear(in_features, num_classes)
-        img_size = 224
+        img_size = IMG_SIZE
     else:
         raise ValueError(f"Unsupported model: {model_name}")
     return model, img_size
 
 
-def predict_photo_probability(image_bytes: bytes) -> float:
+def _open_rgb(image_bytes: bytes):
+    from PIL import Image
+
+    with Image.open(BytesIO(image_bytes)) as im:
+        return im.convert("RGB")
+
+
+def _photo_idx() -> int:
+    return next((k for k, v in LABEL_MAP.items() if str(v).lower() == "photo"), 1)
+
+
+class PhotoClassifier:
+    """An eval-mode model with its transform; ``predict`` returns P(photo) for image bytes."""
+
+    backend = "torch"
+
+    def __init__(self, model, transform, photo_idx: int):
+        self.model = model
+        self.transform = transform
+        self.photo_idx = photo_idx
+
+    def predict(self, image_bytes: bytes) -> float:
+        import torch
+
+        tensor = self.transform(_open_rgb(image_bytes)).unsqueeze(0)
+        with torch.inference_mode():
+            logits = self.model(tensor)
+            probs = torch.softmax(logits, dim=1)[0]
+        return float(probs[self.photo_idx])
+
+
+class QuantizedPhotoClassifier(PhotoClassifier):
+    """Static int8 TorchScript model written by ``export.export_quantized``."""
+
+    backend = "quantized"
+
+
+class OnnxPhotoClassifier:
+    """ONNX Runtime session over the graph written by ``export.export_onnx``; no torch needed."""
+
+    backend = "onnx"
+
+    def __init__(self, session, photo_idx: int):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        self.photo_idx = photo_idx
+
+    def predict(self, image_bytes: bytes) -> float:
+        import numpy as np
+
+        logits = self.session.run(None, {self.input_name: preprocess_numpy(_open_rgb(image_bytes))})[0][0]
+        e = np.exp(logits - logits.max())
+        return float(e[self.photo_idx] / e.sum())
+
+
+def weights_path() -> Path:
+    from app.core.config import settings
+
+    return Path(settings.classifier_weights_path).resolve() if settings.classifier_weights_path else DEFAULT_WEIGHTS_PATH
+
+
+def quantized_path(weights: Optional[Path] = None) -> Path:
+    """Where the int8 export of ``weights`` lives (best_model.pt -> best_model.int8.pt)."""
+    weights = weights or weights_path()
+    return weights.with_name(weights.stem + ".int8.pt")
+
+
+def onnx_path(weights: Optional[Path] = None) -> Path:
+    weights = weights or weights_path()
+    return weights.with_suffix(".onnx")
+
+
+def _load_torch(path: Path, mmap: bool) -> PhotoClassifier:
+    import torch
+
+    _apply_torch_threads()
+    model, img_size = build_model(MODEL_NAME, num_classes=len(LABEL_MAP))
+    state = torch.load(path, map_location="cpu", mmap=mmap, weights_only=True)
+    # assign=True keeps the loaded (mapped) storages instead of copying into fresh parameters
+    model.load_state_dict(state, strict=True, assign=mmap)
+    model.eval()
+    for p in model.parameters():
+        p.requires_grad_(False)
+    return PhotoClassifier(model, build_eval_transform(img_size), _photo_idx())
+
+
+def _load_quantized(path: Path) -> QuantizedPhotoClassifier:
+    import torch
+
+    _apply_torch_threads()
+    extra = {"quantized_engine": ""}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)  # TorchScript deprecation notice
+        model = torch.jit.load(str(path), map_location="cpu", _extra_files=extra)
+    engine = extra["quantized_engine"]
+    engine = engine.decode() if isinstance(engine, bytes) else engine
+    if engine:
+        if engine not in torch.backends.quantized.supported_engines:
+            raise RuntimeError(f"quantized engine {engine!r} not supported on this CPU")
+        torch.backends.quantized.engine = engine
+    model.eval()
+    return QuantizedPhotoClassifier(model, build_eval_transform(IMG_SIZE), _photo_idx())
+
+
+def _load_onnx(path: Path) -> OnnxPhotoClassifier:
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = thread_count()
+    options.inter_op_num_threads = 1
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = ort.InferenceSession(str(path), sess_options=options, providers=["CPUExecutionProvider"])
+    return OnnxPhotoClassifier(session, _photo_idx())
+
+
+def load_classifier(path: Optional[Path] = None, mmap: Optional[bool] = None, backend: Optional[str] = None):
     """
-    Self-contained single-image predictor. Builds model and transform, loads label_map and weights,
-    performs inference, and returns P(photo) as a float.
+    Load the classifier for ``backend`` (default ``settings.classifier_backend``).
 
-    Assumptions:
-    - Uses defaults: weights at ./output/best_model.pt, label_map at ./output/label_map.json,
-      and model architecture 'resnet18' (same defaults as training).
-    - Paths are resolved relative to this script if not absolute.
+    ``quantized`` and ``onnx`` read the files written by
+    ``python -m app.services.image_classifier.export`` next to the weights. When
+    that file or its runtime is missing, they log a warning and use the torch
+    backend instead. For torch, ``mmap`` keeps the tensors backed by the weights
+    file, so every process loading the same file shares its page-cache pages.
     """
-    # Resolve resources relative to this script
-    script_dir = Path(__file__).resolve().parent
-    weights_path = (script_dir / "./best_model.pt").resolve()
-    model_name = "resnet18"
-
-    # Device selection (no external flags; fully self-contained)
-    device = torch.device("cpu")
-
-    # Load label map and identify photo index
-    label_map = {0: "document", 1: "photo"}
-    photo_idx = None
-    for k, v in label_map.items():
-        if str(v).lower() == "photo":
-            photo_idx = k
-            break
-    if photo_idx is None:
-        photo_idx = 1  # sensible fallback
-
-    # Build model and load weights
-    model, img_size = build_model(model_name, num_classes=len(label_map))
-    state = torch.load(weights_path, map_location="cpu")
-    model.load_state_dict(state, strict=True)
-    model.to(device)
-    model.eval()
+    from app.core.config import settings
 
-    # Build transform
-    transform = build_eval_transform(img_size)
+    path = path or weights_path()
+    mmap = settings.classifier_mmap if mmap is None else mmap
+    backend = backend or settings.classifier_backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown classifier backend {backend!r}; expected one of {BACKENDS}")
+    if backend != "torch":
+        exported = quantized_path(path) if backend == "quantized" else onnx_path(path)
+        try:
+            if not exported.exists():
+                raise FileNotFoundError(f"{exported} not found (run the export step)")
+            return _load_quantized(exported) if backend == "quantized" else _load_onnx(exported)
+        except Exception as e:
+            logger.warning("Classifier backend %r unavailable (%s); using torch", backend, e)
+    return _load_torch(path, mmap)
 
-    # Load image from bytes
-    with Image.open(BytesIO(image_bytes)) as im:
-        im = im.convert("RGB")
-    tensor = transform(im).unsqueeze(0).to(device)
-
-    with torch.no_grad():
-        logits = model(tensor)
-        probs = torch.softmax(logits, dim=1).detach().cpu().numpy()[0]
-        prob_photo = float(probs[int(photo_idx)])
-    return prob_photo
\ No newline at end of file
+
+_classifier = None
+_classifier_lock = threading.Lock()
+_threads: Optional[int] = None
+
+
+def thread_count(workers: Optional[int] = None) -> int:
+    """``settings.classifier_threads`` or CPUs / workers (``WEB_CONCURRENCY`` by default), at least 1."""
+    from app.core.config import settings
+
+    if workers is None:
+        if _threads is not None:
+            return _threads
+        workers = int(os.getenv("WEB_CONCURRENCY", "1") or 1)
+    return settings.classifier_threads or max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _apply_torch_threads() -> None:
+    torch = sys.modules.get("torch")
+    if torch is not None and _threads is not None:
+        torch.set_num_threads(_threads)
+
+
+def configure_threads(workers: Optional[int] = None) -> int:
+    """
+    Limit this process's inference threads to ``thread_count(workers)``.
+    Without it every worker starts one thread per CPU and they oversubscribe the host.
+    Applies to torch now if it is loaded; backends loaded later pick it up.
+    """
+    global _threads
+    _threads = thread_count(workers)
+    _apply_torch_threads()
+    return _threads
+
+
+def get_classifier():
+    """This process's classifier, loaded on first use (or inherited from a preloading parent)."""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                if _threads is None:
+                    configure_threads()
+                _classifier = load_classifier()
+    return _classifier
+
+
+def preload_model() -> bool:
+    """
+    Load the classifier now. Call in the gunicorn master before workers fork
+    (gunicorn.conf.py), so they share the weights and the torch runtime
+    copy-on-write, or at worker startup (settings.ml_warmup). Returns False
+    when there is no weights file.
+    """
+    path = weights_path()
+    if not path.exists():
+        logger.warning("Classifier weights not found at %s; not preloading", path)
+        return False
+    get_classifier()
+    return True
+
+
+def predict_photo_probability(image_bytes: bytes) -> float:
+    """
+    P(photo) for one image, from the process-wide classifier.
+
+    The resnet18 weights are loaded once per process from ``best_model.pt``
+    next to this module. ``settings.classifier_weights_path`` overrides the
+    location and ``settings.classifier_backend`` picks the inference backend.
+    """
+    return get_classifier().predict(image_bytes)
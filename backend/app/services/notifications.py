@@ -0,0 +1,328 @@
+"""
+Durable outbound notifications (email and Telegram).
+
+Request handlers call ``enqueue_email`` / ``enqueue_telegram`` with their own
+session; the rows are committed with the rest of the request and the response
+returns immediately. A background ``NotificationWorker`` (started from the app
+lifespan) drains ``notification_outbox`` in batches:
+
+- email goes out over one reusable SMTP connection per batch (``SMTPConnection``)
+- Telegram goes through the per-process ``TelegramSender``
+- a rate limit (``RateLimited`` / Telethon ``FloodWaitError``) reschedules the row
+  and every remaining row on that channel for the requested number of seconds,
+  without counting as a failed attempt
+- other failures back off exponentially; after ``max_attempts`` the row is
+  marked ``dead`` and kept for inspection
+- each batch is leased in a short transaction and sent with none open, so a slow
+  SMTP server or Telegram does not hold a connection, a transaction or row locks
+- sent and dead rows are deleted after ``notification_*_retention_days`` by the
+  maintenance scheduler (``purge_notifications``)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Protocol
+
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.models.notification_outbox import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_DEAD = "dead"
+
+CHANNEL_EMAIL = "email"
+CHANNEL_TELEGRAM = "telegram"
+
+
+class RateLimited(Exception):
+    """Raised by a transport when the remote side asks us to wait ``seconds``."""
+
+    def __init__(self, seconds: float):
+        super().__init__(f"Rate limited for {seconds}s")
+        self.seconds = float(seconds)
+
+
+class Transport(Protocol):
+    async def send(self, item: NotificationOutbox) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class EmailTransport:
+    """Delivers email rows through send_email, reusing one SMTP connection."""
+
+    def __init__(self) -> None:
+        from app.services.email import SMTPConnection
+
+        self._connection = SMTPConnection()
+
+    async def send(self, item: NotificationOutbox) -> None:
+        from app.services.email import send_email
+
+        # smtplib is blocking; keep it off the event loop
+        await asyncio.to_thread(
+            send_email,
+            to=item.recipient,
+            subject=item.subject or "",
+            text=item.body_text,
+            html=item.body_html,
+            connection=self._connection,
+        )
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._connection.close)
+
+
+class TelegramTransport:
+    """Delivers Telegram rows through the shared per-process client."""
+
+    async def send(self, item: NotificationOutbox) -> None:
+        from telethon.errors import FloodWaitError
+        from app.services.telegram import telegram_sender
+
+        try:
+            await telegram_sender.send(item.recipient, item.body_text or "")
+        except FloodWaitError as e:
+            raise RateLimited(e.seconds)
+
+    async def close(self) -> None:
+        from app.services.telegram import telegram_sender
+
+        await telegram_sender.close()
+
+
+def enqueue_email(
+    db: AsyncSession,
+    to: str,
+    subject: str,
+    text: Optional[str] = None,
+    html: Optional[str] = None,
+) -> NotificationOutbox:
+    """Queue an email in the caller's transaction; it is sent after commit by the worker."""
+    if not text and not html:
+        raise ValueError("Either text or html content must be provided")
+    item = NotificationOutbox(channel=CHANNEL_EMAIL, recipient=to, subject=subject, body_text=text, body_html=html)
+    db.add(item)
+    return item
+
+
+def enqueue_telegram(db: AsyncSession, to: str, text: str) -> NotificationOutbox:
+    """Queue a Telegram DM in the caller's transaction; it is sent after commit by the worker."""
+    item = NotificationOutbox(channel=CHANNEL_TELEGRAM, recipient=to, body_text=text)
+    db.add(item)
+    return item
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class NotificationWorker:
+    def __init__(
+        self,
+        session_maker: Optional[async_sessionmaker] = None,
+        transports: Optional[Dict[str, Transport]] = None,
+        batch_size: int = 20,
+        max_attempts: int = 8,
+        retry_base_seconds: float = 30.0,
+        retry_max_seconds: float = 3600.0,
+        poll_seconds: float = 5.0,
+        lease_seconds: float = 300.0,
+    ):
+        self._session_maker = session_maker
+        self._transports = transports
+        self.batch_size = int(batch_size)
+        self.max_attempts = int(max_attempts)
+        self.retry_base_seconds = float(retry_base_seconds)
+        self.retry_max_seconds = float(retry_max_seconds)
+        self.poll_seconds = float(poll_seconds)
+        self.lease_seconds = float(lease_seconds)
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._stopping = False
+
+    @property
+    def transports(self) -> Dict[str, Transport]:
+        if self._transports is None:
+            self._transports = {CHANNEL_EMAIL: EmailTransport(), CHANNEL_TELEGRAM: TelegramTransport()}
+        return self._transports
+
+    def _backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.retry_base_seconds * (2 ** max(attempts - 1, 0)), self.retry_max_seconds))
+
+    async def _claim(self, db: AsyncSession) -> list:
+        """
+        Lease up to ``batch_size`` due rows and commit. The lease moves ``next_attempt_at``
+        ``lease_seconds`` ahead, so other workers skip the rows while they are being sent,
+        and a worker that dies mid-batch only delays them.
+        """
+        now = _utcnow()
+        q = (
+            select(NotificationOutbox)
+            .where(
+                NotificationOutbox.status == STATUS_PENDING,
+                NotificationOutbox.next_attempt_at <= now,
+                NotificationOutbox.channel.in_(list(self.transports)),
+            )
+            .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+            .limit(self.batch_size)
+        )
+        if db.bind is not None and db.bind.dialect.name == "postgresql":
+            # Several workers (one per process) can drain the same table safely
+            q = q.with_for_update(skip_locked=True)
+        items = list((await db.execute(q)).scalars().all())
+        if items:
+            await db.execute(
+                sa.update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_([item.id for item in items]))
+                .values(next_attempt_at=now + timedelta(seconds=self.lease_seconds))
+            )
+        # Unattached copies: sending reads only these, never the session
+        columns = [c.key for c in NotificationOutbox.__table__.columns]
+        claimed = [NotificationOutbox(**{key: getattr(item, key) for key in columns}) for item in items]
+        await db.commit()
+        return claimed
+
+    async def run_once(self, db: AsyncSession) -> int:
+        """
+        Deliver one batch of due rows using ``db``; returns the number of rows handled.
+        Rows are claimed in one short transaction, sent with no transaction open, and the
+        outcomes are written in a second one.
+        """
+        items = await self._claim(db)
+        if not items:
+            return 0
+
+        # Channels that hit a rate limit in this batch, and until when
+        paused: Dict[str, datetime] = {}
+        outcomes = []
+        for item in items:
+            outcome = {"id": item.id}
+            outcomes.append(outcome)
+            if item.channel in paused:
+                outcome["next_attempt_at"] = paused[item.channel]
+                continue
+            try:
+                await self.transports[item.channel].send(item)
+            except RateLimited as e:
+                until = _utcnow() + timedelta(seconds=max(e.seconds, 1.0))
+                paused[item.channel] = until
+                outcome.update(next_attempt_at=until, last_error=str(e))
+                logger.warning("Notification channel %s rate limited for %ss", item.channel, e.seconds)
+            except Exception as e:
+                attempts = int(item.attempts or 0) + 1
+                outcome.update(attempts=attempts, last_error=f"{e.__class__.__name__}: {e}")
+                if attempts >= self.max_attempts:
+                    outcome["status"] = STATUS_DEAD
+                    logger.error("Notification %s dead-lettered after %s attempts: %s", item.id, attempts, e)
+                else:
+                    outcome["next_attempt_at"] = _utcnow() + self._backoff(attempts)
+            else:
+                outcome.update(status=STATUS_SENT, sent_at=_utcnow(), last_error=None)
+        for outcome in outcomes:
+            row_id = outcome.pop("id")
+            await db.execute(sa.update(NotificationOutbox).where(NotificationOutbox.id == row_id).values(**outcome))
+        await db.commit()
+        return len(items)
+
+    async def drain(self, db: AsyncSession) -> int:
+        """Run batches until nothing is due; returns the total number of rows handled."""
+        total = 0
+        while True:
+            handled = await self.run_once(db)
+            if handled == 0:
+                return total
+            total += handled
+
+    def wake(self) -> None:
+        """Ask the background loop to look for work now instead of at the next poll."""
+        self._wake.set()
+
+    async def _loop(self) -> None:
+        from app.db.session import async_session_maker
+
+        maker = self._session_maker or async_session_maker
+        while not self._stopping:
+            try:
+                async with maker() as db:
+                    handled = await self.run_once(db)
+            except Exception:
+                logger.exception("Notification worker batch failed")
+                handled = 0
+            if handled:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._loop(), name="notification-worker")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        task, self._task = self._task, None
+        if task is not None:
+            try:
+                await asyncio.wait_for(task, timeout=10)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                task.cancel()
+        if self._transports:
+            for transport in self._transports.values():
+                try:
+                    await transport.close()
+                except Exception:
+                    logger.debug("Closing notification transport failed", exc_info=True)
+
+
+notification_worker = NotificationWorker(
+    batch_size=settings.notification_batch_size,
+    max_attempts=settings.notification_max_attempts,
+    retry_base_seconds=settings.notification_retry_base_seconds,
+    poll_seconds=settings.notification_poll_seconds,
+    lease_seconds=settings.notification_lease_seconds,
+)
+
+
+async def purge_notifications(
+    db: AsyncSession,
+    sent_older_than: timedelta,
+    dead_older_than: timedelta,
+    limit: int = 1000,
+) -> int:
+    """Delete up to ``limit`` sent rows and dead rows past their retention; the caller commits."""
+    now = _utcnow()
+    N = NotificationOutbox
+    expired = sa.or_(
+        sa.and_(N.status == STATUS_SENT, N.sent_at < now - sent_older_than),
+        sa.and_(N.status == STATUS_DEAD, N.updated_at < now - dead_older_than),
+    )
+    ids = list((await db.execute(select(N.id).where(expired).order_by(N.id).limit(limit))).scalars().all())
+    if ids:
+        await db.execute(sa.delete(N).where(N.id.in_(ids)))
+    return len(ids)
+
+
+__all__ = [
+    "enqueue_email",
+    "enqueue_telegram",
+    "purge_notifications",
+    "NotificationWorker",
+    "notification_worker",
+    "EmailTransport",
+    "TelegramTransport",
+    "RateLimited",
+]
@@ -0,0 +1,178 @@
+"""
+Message reaction counters.
+
+``message_person.reaction`` (one emoji per person per message) is the source of
+truth. ``message_reaction_count`` keeps the per-(message, emoji) totals so message
+listings read a few counter rows instead of grouping message_person for every id
+on the page. ``set_reaction`` updates both in the caller's transaction;
+``reconcile_reaction_counts`` rebuilds counters from message_person when they may
+have drifted (``python -m app.services.reactions reconcile``).
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.message_person import MessagePerson
+from app.db.models.message_reaction_count import MessageReactionCount
+
+
+async def set_reaction(db: AsyncSession, message_id: int, person_id: int, reaction: Optional[str]) -> Optional[str]:
+    """
+    Set (or clear, with None) the person's reaction to a message and adjust the
+    counters. Does not commit; returns the previous reaction.
+    """
+    row = (
+        await db.execute(
+            select(MessagePerson)
+            .where(MessagePerson.message_id == message_id, MessagePerson.person_id == person_id)
+            .with_for_update()
+        )
+    ).scalars().first()
+    previous = row.reaction if row is not None else None
+    if row is None:
+        db.add(MessagePerson(message_id=int(message_id), person_id=int(person_id), reaction=reaction))
+    else:
+        row.reaction = reaction
+    if previous != reaction:
+        if previous is not None:
+            await _bump(db, message_id, previous, -1)
+        if reaction is not None:
+            await _bump(db, message_id, reaction, 1)
+    return previous
+
+
+async def _bump(db: AsyncSession, message_id: int, reaction: str, delta: int) -> None:
+    C = MessageReactionCount
+    updated = await db.execute(
+        sa.update(C)
+        .where(C.message_id == message_id, C.reaction == reaction)
+        .values(count=C.count + delta)
+    )
+    if delta < 0:
+        await db.execute(sa.delete(C).where(C.message_id == message_id, C.reaction == reaction, C.count <= 0))
+        return
+    if updated.rowcount:
+        return
+    try:
+        async with db.begin_nested():
+            db.add(C(message_id=int(message_id), reaction=reaction, count=delta))
+    except IntegrityError:
+        # A concurrent first reaction with the same emoji created the row
+        await db.execute(
+            sa.update(C).where(C.message_id == message_id, C.reaction == reaction).values(count=C.count + delta)
+        )
+
+
+async def reaction_counts(db: AsyncSession, message_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    """raw message id -> [{"emoji", "count"}, ...] in the order each emoji was first used."""
+    mids = [int(m) for m in message_ids]
+    reaction_map: Dict[int, List[dict]] = {}
+    if not mids:
+        return reaction_map
+    C = MessageReactionCount
+    rows = (
+        await db.execute(
+            select(C.message_id, C.reaction, C.count)
+            .where(C.message_id.in_(mids), C.count > 0)
+            .order_by(C.message_id, C.id)
+        )
+    ).all()
+    for r in rows:
+        reaction_map.setdefault(int(r.message_id), []).append({"emoji": r.reaction, "count": int(r.count)})
+    return reaction_map
+
+
+async def reconcile_reaction_counts(db: AsyncSession, message_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Make message_reaction_count match message_person for ``message_ids`` (default:
+    every message). Does not commit; returns the number of counter rows changed.
+
+    Safe to run next to ``set_reaction``: the message_person rows and then the counter
+    rows are locked (the order ``set_reaction`` takes them) before counting, so a
+    concurrent reaction has either committed and is counted, or bumps the counter
+    after this transaction has written it.
+    """
+    MP = MessagePerson
+    C = MessageReactionCount
+    mids = [int(m) for m in message_ids] if message_ids is not None else None
+
+    lock_q = select(MP.id).with_for_update()
+    truth_q = (
+        select(MP.message_id, MP.reaction, sa.func.count().label("cnt"))
+        .where(MP.reaction.is_not(None))
+        .group_by(MP.message_id, MP.reaction)
+    )
+    counter_q = select(C).with_for_update()
+    if mids is not None:
+        lock_q = lock_q.where(MP.message_id.in_(mids))
+        truth_q = truth_q.where(MP.message_id.in_(mids))
+        counter_q = counter_q.where(C.message_id.in_(mids))
+
+    await db.execute(lock_q)
+    counters = (await db.execute(counter_q)).scalars().all()
+    truth: Dict[Tuple[int, str], int] = {
+        (int(r.message_id), r.reaction): int(r.cnt) for r in (await db.execute(truth_q)).all()
+    }
+    changed = 0
+    for counter in counters:
+        key = (int(counter.message_id), counter.reaction)
+        expected = truth.pop(key, 0)
+        if expected <= 0:
+            await db.delete(counter)
+            changed += 1
+        elif int(counter.count) != expected:
+            counter.count = expected
+            changed += 1
+    for (message_id, reaction), cnt in truth.items():
+        await _insert_counter(db, message_id, reaction, cnt)
+        changed += 1
+    return changed
+
+
+async def _insert_counter(db: AsyncSession, message_id: int, reaction: str, cnt: int) -> None:
+    C = MessageReactionCount
+    try:
+        async with db.begin_nested():
+            db.add(C(message_id=int(message_id), reaction=reaction, count=cnt))
+    except IntegrityError:
+        # A concurrent first reaction created the row (and has committed): count again under its lock
+        await db.execute(select(C.id).where(C.message_id == message_id, C.reaction == reaction).with_for_update())
+        MP = MessagePerson
+        actual = (
+            await db.execute(
+                select(sa.func.count()).select_from(MP).where(MP.message_id == message_id, MP.reaction == reaction)
+            )
+        ).scalar_one()
+        await db.execute(
+            sa.update(C).where(C.message_id == message_id, C.reaction == reaction).values(count=int(actual))
+        )
+
+
+async def _main(argv) -> None:
+    from app.db.session import async_session_maker
+
+    if list(argv[1:]) != ["reconcile"]:
+        raise SystemExit("usage: python -m app.services.reactions reconcile")
+    async with async_session_maker() as db:
+        changed = await reconcile_reaction_counts(db)
+        await db.commit()
+    print(f"message_reaction_count rows changed: {changed}")
+
+
+__all__ = [
+    "reaction_counts",
+    "reconcile_reaction_counts",
+    "set_reaction",
+]
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    asyncio.run(_main(sys.argv))
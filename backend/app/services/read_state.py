@@ -0,0 +1,507 @@
+"""
+Message read state ("seen" flags and unseen counts) behind a pluggable store.
+
+The backend is chosen with ``settings.message_read_state_backend``:
+
+- ``rows`` (default, the original model): one ``message_not_seen`` row per
+  recipient per message, deleted as the recipient reads. Posting a message costs
+  one insert per watcher of the case.
+- ``watermark``: one ``message_read_state`` row per (person, case, thread) holding
+  the last read message id. Posting writes nothing; a message is seen when its id is
+  at or below the reader's watermark for its thread, and unseen counts are range
+  scans over ``message`` (``ix_message_case_id``).
+
+A thread is the main case chat (``case``, id 0) or the rfi / ops_plan / task a
+message is attached to. Both backends only track the last ``READ_STATE_RETENTION``;
+older messages count as seen, which is what the old garbage collection of
+``message_not_seen`` amounted to.
+
+Moving an existing database to watermarks: apply migration 0003, run
+``python -m app.services.read_state backfill`` and then set
+``MESSAGE_READ_STATE_BACKEND=watermark``.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.app_user_role import AppUserRole
+from app.db.models.case import Case
+from app.db.models.message import Message
+from app.db.models.message_not_seen import MessageNotSeen
+from app.db.models.message_read_state import MessageReadState
+from app.db.models.permission import Permission
+from app.db.models.person import Person
+from app.db.models.person_case import PersonCase
+from app.db.models.person_team import PersonTeam
+from app.db.models.role_permission import RolePermission
+from app.db.models.team_case import TeamCase
+
+READ_STATE_RETENTION = timedelta(days=2)
+
+MAIN_THREAD: Tuple[str, int] = ("case", 0)
+
+
+def retention_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - READ_STATE_RETENTION
+
+
+# ------------------------------------------------------------
+# Threads and recipients
+# ------------------------------------------------------------
+def thread_of(rfi_id: Optional[int], ops_plan_id: Optional[int], task_id: Optional[int]) -> Tuple[str, int]:
+    """(thread_type, thread_id) of a message; rfi, ops_plan and task are mutually exclusive in that order."""
+    if rfi_id is not None:
+        return ("rfi", int(rfi_id))
+    if ops_plan_id is not None:
+        return ("ops_plan", int(ops_plan_id))
+    if task_id is not None:
+        return ("task", int(task_id))
+    return MAIN_THREAD
+
+
+def thread_type_expr(M=Message):
+    return sa.case(
+        (M.rfi_id.isnot(None), sa.literal("rfi")),
+        (M.ops_plan_id.isnot(None), sa.literal("ops_plan")),
+        (M.task_id.isnot(None), sa.literal("task")),
+        else_=sa.literal("case"),
+    )
+
+
+def thread_id_expr(M=Message):
+    return sa.func.coalesce(M.rfi_id, M.ops_plan_id, M.task_id, 0)
+
+
+async def case_recipient_person_ids(db: AsyncSession, case_id: int) -> Set[int]:
+    """
+    Persons who receive unread state for messages in a case:
+      - members of teams linked to the case
+      - persons directly linked to the case
+      - persons whose user has CASES.ALL_CASES
+    """
+    team_rows = (
+        await db.execute(
+            select(sa.distinct(PersonTeam.person_id))
+            .select_from(PersonTeam)
+            .join(TeamCase, TeamCase.team_id == PersonTeam.team_id)
+            .where(TeamCase.case_id == case_id)
+        )
+    ).scalars().all()
+
+    direct_rows = (
+        await db.execute(select(sa.distinct(PersonCase.person_id)).where(PersonCase.case_id == case_id))
+    ).scalars().all()
+
+    admin_rows = (
+        await db.execute(
+            select(sa.distinct(Person.id))
+            .select_from(Person)
+            .join(AppUserRole, AppUserRole.app_user_id == Person.app_user_id)
+            .join(RolePermission, RolePermission.role_id == AppUserRole.role_id)
+            .join(Permission, Permission.id == RolePermission.permission_id)
+            .where(Permission.code == "CASES.ALL_CASES")
+        )
+    ).scalars().all()
+
+    person_ids = {int(x) for x in (team_rows or [])}
+    person_ids.update(int(x) for x in (direct_rows or []))
+    person_ids.update(int(x) for x in (admin_rows or []))
+    return person_ids
+
+
+def _recipient_cases(person_id: int):
+    """Subquery (column ``case_id``) of the cases whose messages ``person_id`` receives; mirrors case_recipient_person_ids."""
+    via_team = (
+        select(TeamCase.case_id.label("case_id"))
+        .join(PersonTeam, PersonTeam.team_id == TeamCase.team_id)
+        .where(PersonTeam.person_id == person_id)
+    )
+    direct = select(PersonCase.case_id.label("case_id")).where(PersonCase.person_id == person_id)
+    is_admin = sa.exists(
+        select(1)
+        .select_from(Person)
+        .join(AppUserRole, AppUserRole.app_user_id == Person.app_user_id)
+        .join(RolePermission, RolePermission.role_id == AppUserRole.role_id)
+        .join(Permission, Permission.id == RolePermission.permission_id)
+        .where(Person.id == person_id, Permission.code == "CASES.ALL_CASES")
+    )
+    all_cases = select(Case.id.label("case_id")).where(is_admin)
+    return sa.union(via_team, direct, all_cases).subquery("recipient_cases")
+
+
+# ------------------------------------------------------------
+# Stores
+# ------------------------------------------------------------
+class RowsReadState:
+    """One message_not_seen row per recipient per message."""
+
+    name = "rows"
+
+    async def purge_expired(self, db: AsyncSession, limit: Optional[int] = None) -> int:
+        """Delete rows past the retention window (at most ``limit``); the caller commits."""
+        condition = MessageNotSeen.created_at < retention_cutoff()
+        if limit is not None:
+            expired_ids = select(MessageNotSeen.id).where(condition).limit(int(limit)).scalar_subquery()
+            condition = MessageNotSeen.id.in_(expired_ids)
+        result = await db.execute(sa.delete(MessageNotSeen).where(condition))
+        return int(result.rowcount or 0)
+
+    async def on_message_created(self, db: AsyncSession, message_id: int, case_id: int, author_person_id: int) -> int:
+        """Stage unread state for a new message; returns the number of rows written. The caller commits."""
+        person_ids = await case_recipient_person_ids(db, int(case_id))
+        person_ids.discard(int(author_person_id))
+        if person_ids:
+            # Rely on the unique constraint to avoid dups if concurrent
+            db.add_all([MessageNotSeen(message_id=int(message_id), person_id=pid) for pid in person_ids])
+        return len(person_ids)
+
+    def seen_join(self, M, person_id: int):
+        """(target, onclause, seen) for an outer join that yields a per-message ``seen`` expression."""
+        MNS = aliased(MessageNotSeen)
+        onclause = sa.and_(MNS.message_id == M.id, MNS.person_id == person_id)
+        # seen = no corresponding MessageNotSeen row for this person
+        return MNS, onclause, MNS.id.is_(None)
+
+    async def seen_by(self, db: AsyncSession, message_id: int, person_ids: Set[int]) -> Set[int]:
+        """Which of ``person_ids`` have seen ``message_id`` (one query; same rule as seen_join)."""
+        if not person_ids:
+            return set()
+        unseen = (
+            await db.execute(
+                select(MessageNotSeen.person_id).where(
+                    MessageNotSeen.message_id == message_id, MessageNotSeen.person_id.in_(person_ids)
+                )
+            )
+        ).scalars().all()
+        return set(person_ids) - set(unseen)
+
+    def unseen_counts_query(self, person_id: int):
+        """Rows of (case_id, rfi_id, ops_plan_id, task_id, cnt) for the person's unseen messages."""
+        M = Message
+        MNS = MessageNotSeen
+        return (
+            select(
+                M.case_id.label("case_id"),
+                M.rfi_id.label("rfi_id"),
+                M.ops_plan_id.label("ops_plan_id"),
+                M.task_id.label("task_id"),
+                sa.func.count().label("cnt"),
+            )
+            .select_from(MNS)
+            .join(M, M.id == MNS.message_id)
+            .where(MNS.person_id == person_id)
+            .group_by(M.case_id, M.rfi_id, M.ops_plan_id, M.task_id)
+        )
+
+    async def mark_seen_up_to(self, db: AsyncSession, person_id: int, case_id: int, message_id: int) -> int:
+        """Mark every message of the case up to ``message_id`` seen; returns how many were unseen. The caller commits."""
+        M = Message
+        MNS = MessageNotSeen
+        count_q = (
+            select(sa.func.count())
+            .select_from(MNS)
+            .join(M, M.id == MNS.message_id)
+            .where(MNS.person_id == person_id, M.case_id == case_id, M.id <= message_id)
+        )
+        to_clear = int((await db.execute(count_q)).scalar() or 0)
+        if to_clear:
+            await db.execute(
+                sa.delete(MNS)
+                .where(MNS.person_id == person_id)
+                .where(MNS.message_id.in_(select(M.id).where(M.case_id == case_id, M.id <= message_id)))
+            )
+        return to_clear
+
+
+class WatermarkReadState:
+    """One message_read_state row per (person, case, thread) with the last read message id."""
+
+    name = "watermark"
+
+    async def purge_expired(self, db: AsyncSession, limit: Optional[int] = None) -> int:
+        # Watermarks do not grow with traffic; nothing to collect
+        return 0
+
+    async def on_message_created(self, db: AsyncSession, message_id: int, case_id: int, author_person_id: int) -> int:
+        return 0
+
+    def _watermark_join(self, M, person_id: int):
+        W = aliased(MessageReadState)
+        onclause = sa.and_(
+            W.person_id == person_id,
+            W.case_id == M.case_id,
+            W.thread_type == thread_type_expr(M),
+            W.thread_id == thread_id_expr(M),
+        )
+        return W, onclause, sa.func.coalesce(W.last_read_message_id, 0)
+
+    def _unseen_condition(self, M, person_id: int, watermark):
+        return sa.and_(
+            M.written_by_id != person_id,
+            M.created_at >= retention_cutoff(),
+            M.id > watermark,
+        )
+
+    def seen_join(self, M, person_id: int):
+        W, onclause, watermark = self._watermark_join(M, person_id)
+        return W, onclause, sa.not_(self._unseen_condition(M, person_id, watermark))
+
+    async def seen_by(self, db: AsyncSession, message_id: int, person_ids: Set[int]) -> Set[int]:
+        """Which of ``person_ids`` have seen ``message_id`` (two queries; same rule as seen_join)."""
+        if not person_ids:
+            return set()
+        M = Message
+        msg = (
+            await db.execute(
+                select(
+                    M.written_by_id,
+                    M.case_id,
+                    thread_type_expr(M).label("thread_type"),
+                    thread_id_expr(M).label("thread_id"),
+                    (M.created_at < retention_cutoff()).label("expired"),
+                ).where(M.id == message_id)
+            )
+        ).first()
+        if msg is None:
+            return set()
+        if msg.expired:
+            return set(person_ids)
+        W = MessageReadState
+        seen = set(
+            (
+                await db.execute(
+                    select(W.person_id).where(
+                        W.person_id.in_(person_ids),
+                        W.case_id == msg.case_id,
+                        W.thread_type == msg.thread_type,
+                        W.thread_id == msg.thread_id,
+                        W.last_read_message_id >= message_id,
+                    )
+                )
+            ).scalars().all()
+        )
+        if msg.written_by_id in person_ids:
+            seen.add(int(msg.written_by_id))
+        return seen
+
+    def _scan_floor(self, person_id: int, case_id_col):
+        """
+        Message id below which nothing in the case can be unseen for the person: the
+        lowest of their watermarks once the main chat has one (marking the main chat
+        writes a watermark for every thread with recent messages), else 0. Lets the
+        counts query range-scan only the unread tail of ``ix_message_case_id``.
+        """
+        F = aliased(MessageReadState)
+        lowest = (
+            select(sa.func.min(F.last_read_message_id))
+            .where(F.person_id == person_id, F.case_id == case_id_col)
+            .scalar_subquery()
+        )
+        has_main = sa.exists(
+            select(1).select_from(F).where(
+                F.person_id == person_id, F.case_id == case_id_col, F.thread_type == MAIN_THREAD[0]
+            )
+        )
+        return sa.case((has_main, sa.func.coalesce(lowest, 0)), else_=0)
+
+    def unseen_counts_query(self, person_id: int):
+        M = Message
+        cases = _recipient_cases(person_id)
+        W, onclause, watermark = self._watermark_join(M, person_id)
+        return (
+            select(
+                M.case_id.label("case_id"),
+                M.rfi_id.label("rfi_id"),
+                M.ops_plan_id.label("ops_plan_id"),
+                M.task_id.label("task_id"),
+                sa.func.count().label("cnt"),
+            )
+            .select_from(cases)
+            .join(M, sa.and_(M.case_id == cases.c.case_id, M.id > self._scan_floor(person_id, cases.c.case_id)))
+            .join(W, onclause, isouter=True)
+            .where(self._unseen_condition(M, person_id, watermark))
+            .group_by(M.case_id, M.rfi_id, M.ops_plan_id, M.task_id)
+        )
+
+    async def mark_seen_up_to(self, db: AsyncSession, person_id: int, case_id: int, message_id: int) -> int:
+        """
+        Advance the person's watermark(s) to ``message_id``. A message in the main chat
+        covers every thread of the case (the main chat lists them all), a thread message
+        only its own thread. Returns how many messages were unseen. The caller commits.
+        """
+        M = Message
+        target = (
+            await db.execute(select(M.rfi_id, M.ops_plan_id, M.task_id).where(M.id == message_id, M.case_id == case_id))
+        ).first()
+        if target is None:
+            return 0
+        thread = thread_of(target.rfi_id, target.ops_plan_id, target.task_id)
+
+        W, onclause, watermark = self._watermark_join(M, person_id)
+        conditions = [M.case_id == case_id, M.id <= message_id, self._unseen_condition(M, person_id, watermark)]
+        if thread != MAIN_THREAD:
+            conditions += [thread_type_expr(M) == thread[0], thread_id_expr(M) == thread[1]]
+        to_clear = int(
+            (await db.execute(select(sa.func.count()).select_from(M).join(W, onclause, isouter=True).where(*conditions))).scalar()
+            or 0
+        )
+
+        if thread == MAIN_THREAD:
+            rows = (
+                await db.execute(
+                    select(thread_type_expr(M), thread_id_expr(M))
+                    .where(M.case_id == case_id, M.id <= message_id, M.created_at >= retention_cutoff())
+                    .distinct()
+                )
+            ).all()
+            threads = {(str(t), int(i)) for t, i in rows}
+            threads.add(MAIN_THREAD)
+        else:
+            threads = {thread}
+        await _advance_watermarks(db, person_id, case_id, {t: int(message_id) for t in threads})
+        return to_clear
+
+
+async def _advance_watermarks(
+    db: AsyncSession,
+    person_id: int,
+    case_id: int,
+    marks: Dict[Tuple[str, int], int],
+    overwrite: bool = False,
+) -> int:
+    """Raise (or with ``overwrite`` set) the person's watermarks for the given threads; returns rows written."""
+    existing = {
+        (row.thread_type, int(row.thread_id)): row
+        for row in (
+            await db.execute(
+                select(MessageReadState).where(
+                    MessageReadState.person_id == person_id, MessageReadState.case_id == case_id
+                )
+            )
+        ).scalars().all()
+    }
+    written = 0
+    for (thread_type, thread_id), last_id in marks.items():
+        row = existing.get((thread_type, thread_id))
+        if row is None:
+            db.add(
+                MessageReadState(
+                    person_id=int(person_id),
+                    case_id=int(case_id),
+                    thread_type=thread_type,
+                    thread_id=int(thread_id),
+                    last_read_message_id=int(last_id),
+                )
+            )
+            written += 1
+        elif overwrite or int(row.last_read_message_id or 0) < int(last_id):
+            row.last_read_message_id = int(last_id)
+            written += 1
+    return written
+
+
+_STORES = {
+    RowsReadState.name: RowsReadState(),
+    WatermarkReadState.name: WatermarkReadState(),
+}
+
+
+def get_read_state_store(name: Optional[str] = None):
+    """The configured read-state store (``settings.message_read_state_backend``), or the named one."""
+    key = (name or settings.message_read_state_backend or RowsReadState.name).strip().lower()
+    try:
+        return _STORES[key]
+    except KeyError:
+        raise ValueError(f"Unknown message read-state backend: {key!r}")
+
+
+# ------------------------------------------------------------
+# Migration from message_not_seen rows
+# ------------------------------------------------------------
+async def backfill_watermarks(db: AsyncSession) -> int:
+    """
+    Derive watermarks from the current message_not_seen rows so switching backends
+    keeps every reader's unseen messages. For each recipient and each thread with
+    messages in the retention window the watermark is just below the oldest unseen
+    message, or the newest message when nothing is unseen. Returns rows written;
+    the caller commits.
+    """
+    M = Message
+    cutoff = retention_cutoff()
+    tt = thread_type_expr(M)
+    tid = thread_id_expr(M)
+
+    newest = (
+        await db.execute(
+            select(M.case_id, tt.label("thread_type"), tid.label("thread_id"), sa.func.max(M.id).label("max_id"))
+            .where(M.created_at >= cutoff)
+            .group_by(M.case_id, tt, tid)
+        )
+    ).all()
+    oldest_unseen = {
+        (int(r.person_id), int(r.case_id), str(r.thread_type), int(r.thread_id)): int(r.min_id)
+        for r in (
+            await db.execute(
+                select(
+                    MessageNotSeen.person_id,
+                    M.case_id,
+                    tt.label("thread_type"),
+                    tid.label("thread_id"),
+                    sa.func.min(M.id).label("min_id"),
+                )
+                .join(M, M.id == MessageNotSeen.message_id)
+                .where(M.created_at >= cutoff)
+                .group_by(MessageNotSeen.person_id, M.case_id, tt, tid)
+            )
+        ).all()
+    }
+
+    threads_by_case: Dict[int, Dict[Tuple[str, int], int]] = {}
+    for r in newest:
+        threads_by_case.setdefault(int(r.case_id), {})[(str(r.thread_type), int(r.thread_id))] = int(r.max_id)
+
+    written = 0
+    for case_id, threads in threads_by_case.items():
+        for person_id in await case_recipient_person_ids(db, case_id):
+            marks = {}
+            for thread, max_id in threads.items():
+                first_unseen = oldest_unseen.get((person_id, case_id, thread[0], thread[1]))
+                marks[thread] = (first_unseen - 1) if first_unseen is not None else max_id
+            written += await _advance_watermarks(db, person_id, case_id, marks, overwrite=True)
+    return written
+
+
+async def _main(argv) -> None:
+    from app.db.session import async_session_maker
+
+    if list(argv[1:]) != ["backfill"]:
+        raise SystemExit("usage: python -m app.services.read_state backfill")
+    async with async_session_maker() as db:
+        written = await backfill_watermarks(db)
+        await db.commit()
+    print(f"message_read_state rows written: {written}")
+
+
+__all__ = [
+    "READ_STATE_RETENTION",
+    "RowsReadState",
+    "WatermarkReadState",
+    "get_read_state_store",
+    "case_recipient_person_ids",
+    "backfill_watermarks",
+    "thread_of",
+]
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    asyncio.run(_main(sys.argv))
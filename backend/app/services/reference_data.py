@@ -0,0 +1,208 @@
+"""
+In-process cache of reference data (ref_type / ref_value).
+
+Reference values are joined into almost every read but change very rarely. The
+cache keeps two compact maps:
+
+- by_id:   ref_value.id -> RefEntry (code, name, sort order, owning type code)
+- by_type: ref_type.code -> tuple of RefEntry ordered like the dropdown endpoints
+
+Invalidation is version based. Writers call ``bump_reference_version(db)`` inside
+their transaction, which rewrites the ``system_reference_version`` row in
+``system_setting``. Every process re-checks that row at most once per
+``settings.reference_cache_check_seconds`` and reloads when it changed; the
+writing process also drops its own snapshot immediately.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.ref_type import RefType
+from app.db.models.ref_value import RefValue
+from app.db.models.system_setting import SystemSetting
+
+REFERENCE_VERSION_SETTING = "system_reference_version"
+
+
+@dataclass(frozen=True)
+class RefEntry:
+    id: int
+    name: str
+    description: str
+    code: str
+    inactive: bool
+    num_value: Optional[int]
+    sort_order: Optional[int]
+    ref_type_id: int
+    type_code: Optional[str]
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    version: str
+    by_id: Dict[int, RefEntry]
+    by_type: Dict[str, Tuple[RefEntry, ...]]
+
+    def get(self, ref_id: Optional[int]) -> Optional[RefEntry]:
+        if ref_id is None:
+            return None
+        return self.by_id.get(int(ref_id))
+
+    def code(self, ref_id: Optional[int]) -> Optional[str]:
+        entry = self.get(ref_id)
+        return entry.code if entry else None
+
+    def name(self, ref_id: Optional[int]) -> Optional[str]:
+        entry = self.get(ref_id)
+        return entry.name if entry else None
+
+    def sort_order(self, ref_id: Optional[int]) -> Optional[int]:
+        entry = self.get(ref_id)
+        return entry.sort_order if entry else None
+
+    def values(self, type_code: str) -> Tuple[RefEntry, ...]:
+        return self.by_type.get(type_code, ())
+
+    def etag(self, scope: str, session_id: Optional[str] = None) -> str:
+        # Opaque ids may be session bound, so the validator includes the session
+        token = f"{self.version}|{scope}|{session_id or ''}"
+        return f'W/"ref-{sha256(token.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def _order_key(entry: RefEntry):
+    # NULL sort_order last, then sort_order, then name (matches the SQL ordering used before)
+    return (entry.sort_order is None, entry.sort_order or 0, entry.name)
+
+
+async def _read_version(db: AsyncSession) -> str:
+    value = (
+        await db.execute(select(SystemSetting.value).where(SystemSetting.name == REFERENCE_VERSION_SETTING))
+    ).scalars().first()
+    return value or "0"
+
+
+async def _load_snapshot(db: AsyncSession) -> ReferenceSnapshot:
+    version = await _read_version(db)
+    rows = (
+        await db.execute(
+            select(
+                RefValue.id,
+                RefValue.name,
+                RefValue.description,
+                RefValue.code,
+                RefValue.inactive,
+                RefValue.num_value,
+                RefValue.sort_order,
+                RefValue.ref_type_id,
+                RefType.code.label("type_code"),
+            ).join(RefType, RefType.id == RefValue.ref_type_id)
+        )
+    ).all()
+
+    by_id: Dict[int, RefEntry] = {}
+    grouped: Dict[str, list] = {}
+    for r in rows:
+        entry = RefEntry(
+            id=int(r.id),
+            name=r.name,
+            description=r.description or "",
+            code=r.code,
+            inactive=bool(r.inactive),
+            num_value=r.num_value,
+            sort_order=r.sort_order,
+            ref_type_id=int(r.ref_type_id),
+            type_code=r.type_code,
+        )
+        by_id[entry.id] = entry
+        if entry.type_code is not None:
+            grouped.setdefault(entry.type_code, []).append(entry)
+
+    by_type = {code: tuple(sorted(entries, key=_order_key)) for code, entries in grouped.items()}
+    return ReferenceSnapshot(version=version, by_id=by_id, by_type=by_type)
+
+
+class ReferenceCache:
+    def __init__(self, check_interval: float = 30.0):
+        self.check_interval = float(check_interval)
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._checked_at: float = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+        self._checked_at = 0.0
+
+    async def get(self, db: AsyncSession) -> ReferenceSnapshot:
+        snap = self._snapshot
+        if snap is not None and (time.monotonic() - self._checked_at) < self.check_interval:
+            return snap
+        async with self._lock:
+            snap = self._snapshot
+            now = time.monotonic()
+            if snap is not None and (now - self._checked_at) < self.check_interval:
+                return snap
+            if snap is not None and await _read_version(db) == snap.version:
+                self._checked_at = now
+                return snap
+            snap = await _load_snapshot(db)
+            self._snapshot = snap
+            self._checked_at = time.monotonic()
+            return snap
+
+
+reference_cache = ReferenceCache(check_interval=settings.reference_cache_check_seconds)
+
+
+async def get_reference_data(db: AsyncSession) -> ReferenceSnapshot:
+    """Return the current reference snapshot, reloading it if the version row moved."""
+    return await reference_cache.get(db)
+
+
+async def warm_reference_cache() -> None:
+    """Load the snapshot at startup; failures (e.g. tables not migrated yet) are logged, not raised."""
+    from app.db.session import async_session_maker
+
+    try:
+        async with async_session_maker() as db:
+            await reference_cache.get(db)
+    except Exception:
+        logging.getLogger("uvicorn.error").warning("Reference data cache warm-up failed", exc_info=True)
+
+
+async def bump_reference_version(db: AsyncSession) -> str:
+    """
+    Record a reference-data change in the caller's transaction and drop this
+    process's snapshot. Other processes pick the new version up on their next check.
+    """
+    version = uuid.uuid4().hex
+    row = (
+        await db.execute(select(SystemSetting).where(SystemSetting.name == REFERENCE_VERSION_SETTING))
+    ).scalars().first()
+    if row:
+        row.value = version
+    else:
+        db.add(SystemSetting(name=REFERENCE_VERSION_SETTING, value=version))
+    reference_cache.invalidate()
+    return version
+
+
+__all__ = [
+    "RefEntry",
+    "ReferenceSnapshot",
+    "ReferenceCache",
+    "reference_cache",
+    "get_reference_data",
+    "bump_reference_version",
+    "warm_reference_cache",
+    "REFERENCE_VERSION_SETTING",
+]
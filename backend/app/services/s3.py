@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import os
-from typing import BinaryIO, Optional, Union, Dict
+from datetime import datetime
+from typing import BinaryIO, Optional, Union, Dict, List, Tuple
 
 # boto3/botocore are the standard, well-supported S3 client libraries and
 # work with Backblaze B2's S3-compatible API.
@@ -205,8 +206,43 @@ def get_download_link(
         )
 
 
+def is_configured() -> bool:
+    """True when the S3 environment variables are set and boto3 is importable."""
+    return boto3 is not None and all(os.getenv(n) for n in ("S3_APP_KEY_ID", "S3_APP_KEY", "S3_BUCKET", "S3_ENDPOINT"))
+
+
+def list_objects(start_after: Optional[str] = None, limit: int = 1000) -> List[Tuple[str, datetime]]:
+    """Up to `limit` (key, last_modified) pairs in key order, starting after `start_after`."""
+    s3, bucket = _get_client_and_bucket()
+    params: Dict[str, object] = {"Bucket": bucket, "MaxKeys": int(limit)}
+    if start_after:
+        params["StartAfter"] = start_after
+    try:
+        resp = s3.list_objects_v2(**params)
+    except (ClientError, BotoCoreError) as e:  # pragma: no cover
+        raise RuntimeError(f"Failed to list objects in bucket '{bucket}': {e}")
+    return [(o["Key"], o["LastModified"]) for o in resp.get("Contents", [])]
+
+
+def delete_objects(keys: List[str]) -> int:
+    """Delete the given object keys (batched 1000 per request). Returns the number deleted."""
+    s3, bucket = _get_client_and_bucket()
+    deleted = 0
+    for i in range(0, len(keys), 1000):
+        chunk = keys[i:i + 1000]
+        try:
+            resp = s3.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": k} for k in chunk], "Quiet": True})
+        except (ClientError, BotoCoreError) as e:  # pragma: no cover
+            raise RuntimeError(f"Failed to delete objects from bucket '{bucket}': {e}")
+        deleted += len(chunk) - len(resp.get("Errors", []))
+    return deleted
+
+
 __all__ = [
     "create_file",
     "delete_file",
+    "delete_objects",
     "get_download_link",
+    "is_configured",
+    "list_objects",
 ]
@@ -0,0 +1,355 @@
+"""
+In-process maintenance scheduler.
+
+Started from the app lifespan in every worker process; one of them becomes the
+leader and runs the jobs. On PostgreSQL leadership is a session-level advisory lock
+(``pg_try_advisory_lock``) held on a dedicated connection: if the leader exits or
+loses its connection the lock is released and another process picks it up on its
+next tick. Other databases (SQLite in development and tests) always run the jobs.
+
+Each job is ``async fn(db, limit) -> int`` processing at most ``limit`` rows and
+returning how many it handled. A run repeats the job, committing after every batch,
+until a batch comes back short or ``max_batches`` is reached, so no run holds
+locks or a transaction for long.
+
+Jobs:
+
+- ``expired_sessions``: app_user_session rows expired for more than 7 days
+- ``message_not_seen``: rows-backend read state past the retention window
+- ``orphaned_s3_objects``: ``file-<id>`` objects whose row no longer exists
+- ``reaction_counters``: rebuild message_reaction_count from message_person
+- ``notification_outbox``: sent and dead notification_outbox rows past retention
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_lock key for maintenance leadership (any constant unique to this app)
+LEADER_LOCK_KEY = 0x4C6F6F6D61  # "Looma"
+
+JobFn = Callable[[AsyncSession, int], Awaitable[int]]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class MaintenanceJob:
+    def __init__(self, name: str, fn: JobFn, interval_seconds: float):
+        self.name = name
+        self.fn = fn
+        self.interval_seconds = float(interval_seconds)
+        self.next_run_at = 0.0  # monotonic; 0 runs on the first leader tick
+        self.runs = 0
+        self.failures = 0
+        self.last_started_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_processed: Optional[int] = None
+        self.last_batches: Optional[int] = None
+        self.last_error: Optional[str] = None
+        self.total_processed = 0
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_duration_ms": self.last_duration_ms,
+            "last_processed": self.last_processed,
+            "last_batches": self.last_batches,
+            "last_error": self.last_error,
+            "total_processed": self.total_processed,
+            "next_run_in_seconds": max(0.0, round(self.next_run_at - time.monotonic(), 1)) if self.runs else 0.0,
+        }
+
+
+class MaintenanceScheduler:
+    def __init__(
+        self,
+        jobs: List[MaintenanceJob],
+        session_maker: Optional[async_sessionmaker] = None,
+        tick_seconds: float = 30.0,
+        batch_size: int = 1000,
+        max_batches: int = 10,
+    ):
+        self.jobs: Dict[str, MaintenanceJob] = {job.name: job for job in jobs}
+        self._session_maker = session_maker
+        self.tick_seconds = float(tick_seconds)
+        self.batch_size = int(batch_size)
+        self.max_batches = int(max_batches)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._wake = asyncio.Event()
+        # Dedicated connection holding the PostgreSQL leader lock
+        self._leader_conn = None
+        self.is_leader = False
+
+    @property
+    def session_maker(self) -> async_sessionmaker:
+        if self._session_maker is None:
+            from app.db.session import async_session_maker
+
+            self._session_maker = async_session_maker
+        return self._session_maker
+
+    def stats(self) -> dict:
+        return {
+            "is_leader": self.is_leader,
+            "tick_seconds": self.tick_seconds,
+            "batch_size": self.batch_size,
+            "max_batches": self.max_batches,
+            "jobs": [job.stats() for job in self.jobs.values()],
+        }
+
+    async def _ensure_leader(self) -> bool:
+        engine = self.session_maker.kw.get("bind")
+        if engine is None or engine.dialect.name != "postgresql":
+            self.is_leader = True
+            return True
+        if self._leader_conn is not None:
+            try:
+                # Still connected means we still hold the lock. Commit so the connection is
+                # not left idle in transaction (holding back vacuum, or killed by
+                # idle_in_transaction_session_timeout)
+                await self._leader_conn.execute(sa.text("SELECT 1"))
+                await self._leader_conn.commit()
+                return True
+            except Exception:
+                await self._release_leader()
+        conn = await engine.connect()
+        try:
+            acquired = (await conn.execute(sa.text("SELECT pg_try_advisory_lock(:k)"), {"k": LEADER_LOCK_KEY})).scalar()
+            # End the implicit transaction; the session-level lock survives it
+            await conn.commit()
+        except Exception:
+            await conn.close()
+            raise
+        if acquired:
+            self._leader_conn = conn
+            self.is_leader = True
+            logger.info("Maintenance scheduler acquired leadership")
+        else:
+            await conn.close()
+            self.is_leader = False
+        return self.is_leader
+
+    async def _release_leader(self) -> None:
+        conn, self._leader_conn = self._leader_conn, None
+        self.is_leader = False
+        if conn is not None:
+            try:
+                await conn.execute(sa.text("SELECT pg_advisory_unlock(:k)"), {"k": LEADER_LOCK_KEY})
+                await conn.commit()
+            except Exception:
+                pass
+            try:
+                await conn.close()
+            except Exception:
+                pass
+
+    async def run_job(self, name: str) -> int:
+        """Run one job now (batches until short or ``max_batches``); returns rows processed."""
+        job = self.jobs[name]
+        job.last_started_at = _utcnow()
+        started = time.perf_counter()
+        processed = 0
+        batches = 0
+        try:
+            async with self.session_maker() as db:
+                while batches < self.max_batches:
+                    handled = int(await job.fn(db, self.batch_size) or 0)
+                    await db.commit()
+                    batches += 1
+                    processed += handled
+                    if handled < self.batch_size:
+                        break
+        except Exception as e:
+            job.failures += 1
+            job.last_error = f"{e.__class__.__name__}: {e}"
+            logger.exception("Maintenance job %s failed", name)
+        else:
+            job.last_error = None
+        finally:
+            job.runs += 1
+            job.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            job.last_processed = processed
+            job.last_batches = batches
+            job.total_processed += processed
+            job.next_run_at = time.monotonic() + job.interval_seconds
+        return processed
+
+    async def tick(self) -> None:
+        """Run every due job if this process is the leader."""
+        try:
+            if not await self._ensure_leader():
+                return
+        except Exception:
+            logger.exception("Maintenance leader election failed")
+            return
+        now = time.monotonic()
+        for job in self.jobs.values():
+            if self._stopping:
+                return
+            if job.next_run_at <= now:
+                await self.run_job(job.name)
+
+    async def _loop(self) -> None:
+        while not self._stopping:
+            await self.tick()
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.tick_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._loop(), name="maintenance-scheduler")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        task, self._task = self._task, None
+        if task is not None:
+            try:
+                await asyncio.wait_for(task, timeout=10)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                task.cancel()
+        await self._release_leader()
+
+
+# ------------------------------------------------------------
+# Jobs
+# ------------------------------------------------------------
+async def purge_expired_sessions(db: AsyncSession, limit: int) -> int:
+    from app.services.auth import cleanup_expired_sessions
+
+    return await cleanup_expired_sessions(db, older_than_days=7, limit=limit)
+
+
+async def purge_message_not_seen(db: AsyncSession, limit: int) -> int:
+    from app.services.read_state import get_read_state_store
+
+    return await get_read_state_store().purge_expired(db, limit=limit)
+
+
+async def purge_notification_outbox(db: AsyncSession, limit: int) -> int:
+    from app.services.notifications import purge_notifications
+
+    return await purge_notifications(
+        db,
+        sent_older_than=timedelta(days=settings.notification_sent_retention_days),
+        dead_older_than=timedelta(days=settings.notification_dead_retention_days),
+        limit=limit,
+    )
+
+
+# Objects newer than this may belong to an upload whose row is not committed yet
+S3_ORPHAN_GRACE = timedelta(days=1)
+
+
+class OrphanedS3Objects:
+    """Walks the bucket in key order, one page per batch, resuming where the last batch stopped."""
+
+    def __init__(self) -> None:
+        self.cursor: Optional[str] = None
+
+    async def __call__(self, db: AsyncSession, limit: int) -> int:
+        from app.db.models.file import File
+        from app.services import s3
+
+        # Tables whose rows own ``<table>-<id>[-thumbnail]`` objects
+        owners = {"file": File}
+
+        if not s3.is_configured():
+            return 0
+        page = await asyncio.to_thread(s3.list_objects, self.cursor, limit)
+        if len(page) < limit:
+            # End of the bucket: start over next run
+            self.cursor = None
+        else:
+            self.cursor = page[-1][0]
+
+        cutoff = _utcnow() - S3_ORPHAN_GRACE
+        candidates: Dict[str, Dict[int, List[str]]] = {}
+        for key, last_modified in page:
+            table, _, rest = key.partition("-")
+            record_id = rest[: -len("-thumbnail")] if rest.endswith("-thumbnail") else rest
+            if table not in owners or not record_id.isdigit() or last_modified > cutoff:
+                continue
+            candidates.setdefault(table, {}).setdefault(int(record_id), []).append(key)
+
+        orphaned: List[str] = []
+        for table, by_id in candidates.items():
+            model = owners[table]
+            existing = set((await db.execute(select(model.id).where(model.id.in_(list(by_id))))).scalars().all())
+            for record_id, keys in by_id.items():
+                if record_id not in existing:
+                    orphaned.extend(keys)
+        if orphaned:
+            deleted = await asyncio.to_thread(s3.delete_objects, orphaned)
+            logger.info("Deleted %s orphaned S3 objects", deleted)
+        return len(page)
+
+
+class ReactionCounterSweep:
+    """Reconciles reaction counters for ``limit`` messages per batch, cycling through message ids."""
+
+    def __init__(self) -> None:
+        self.cursor = 0
+
+    async def __call__(self, db: AsyncSession, limit: int) -> int:
+        from app.db.models.message import Message
+        from app.services.reactions import reconcile_reaction_counts
+
+        ids = list(
+            (await db.execute(select(Message.id).where(Message.id > self.cursor).order_by(Message.id).limit(limit))).scalars().all()
+        )
+        self.cursor = int(ids[-1]) if len(ids) == limit else 0
+        if ids:
+            changed = await reconcile_reaction_counts(db, ids)
+            if changed:
+                logger.info("Reconciled %s reaction counter rows", changed)
+        return len(ids)
+
+
+def default_jobs() -> List[MaintenanceJob]:
+    return [
+        MaintenanceJob("expired_sessions", purge_expired_sessions, settings.maintenance_sessions_interval_seconds),
+        MaintenanceJob("message_not_seen", purge_message_not_seen, settings.maintenance_unseen_interval_seconds),
+        MaintenanceJob("orphaned_s3_objects", OrphanedS3Objects(), settings.maintenance_s3_interval_seconds),
+        MaintenanceJob("reaction_counters", ReactionCounterSweep(), settings.maintenance_reactions_interval_seconds),
+        MaintenanceJob("notification_outbox", purge_notification_outbox, settings.maintenance_notifications_interval_seconds),
+    ]
+
+
+maintenance_scheduler = MaintenanceScheduler(
+    default_jobs(),
+    tick_seconds=settings.maintenance_tick_seconds,
+    batch_size=settings.maintenance_batch_size,
+    max_batches=settings.maintenance_max_batches,
+)
+
+
+__all__ = [
+    "MaintenanceJob",
+    "MaintenanceScheduler",
+    "maintenance_scheduler",
+    "default_jobs",
+]
@@ -1,5 +1,25 @@
-from sqlalchemy import select
-
+"""
+System settings (the ``system_setting`` table) backed by an in-memory snapshot.
+
+The whole table is read in one query and kept for ``settings.system_settings_ttl_seconds``.
+``set_setting`` writes through to both the database and the snapshot (once committed), and
+``invalidate_settings_cache()`` forces a reload on the next read (e.g. after an
+out-of-band change).
+
+Every function accepts an optional ``db`` session. ``set_setting`` writes through it,
+joining the caller's transaction (it only flushes and leaves the commit to the caller);
+without a session a short-lived one is opened, as before. The snapshot itself is
+always loaded through its own session: it is shared by every request, so it must not
+pick up a caller's uncommitted (and possibly rolled-back) writes.
+"""
+import asyncio
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
 from app.db.models.system_setting import SystemSetting
 from app.db.session import async_session_maker
 
@@ -8,64 +28,147 @@ class SettingNotFoundError(KeyError):
     """Raised when a requested system setting does not exist."""
 
 
-async def has_setting(setting_name: str) -> bool:
+class _SettingsSnapshot:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = float(ttl_seconds)
+        self._values: Optional[Dict[str, str]] = None
+        self._loaded_at: float = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._values is not None and (time.monotonic() - self._loaded_at) < self.ttl_seconds
+
+    def invalidate(self) -> None:
+        self._values = None
+        self._loaded_at = 0.0
+
+    def put(self, name: str, value: str) -> None:
+        if self._values is not None:
+            self._values[name] = value
+
+    async def _load(self, db: AsyncSession) -> Dict[str, str]:
+        rows = (await db.execute(select(SystemSetting.name, SystemSetting.value))).all()
+        return {r.name: r.value for r in rows}
+
+    async def values(self) -> Dict[str, str]:
+        if self._fresh():
+            return self._values  # type: ignore[return-value]
+        async with self._lock:
+            if self._fresh():
+                return self._values  # type: ignore[return-value]
+            # Never the caller's session: it may hold uncommitted system_setting writes
+            async with async_session_maker() as own_db:
+                values = await self._load(own_db)
+            self._values = values
+            self._loaded_at = time.monotonic()
+            return values
+
+
+_snapshot = _SettingsSnapshot(ttl_seconds=settings.system_settings_ttl_seconds)
+
+
+def invalidate_settings_cache() -> None:
+    """Drop the snapshot; the next read reloads the table."""
+    _snapshot.invalidate()
+
+
+async def get_all_settings(db: Optional[AsyncSession] = None) -> Dict[str, str]:
+    """Return a copy of all system settings (name -> value)."""
+    return dict(await _snapshot.values())
+
+
+async def has_setting(setting_name: str, db: Optional[AsyncSession] = None) -> bool:
     """Return True if a system setting with the given name exists, else False."""
-    async with async_session_maker() as db:
-        stmt = select(SystemSetting.id).where(SystemSetting.name == setting_name).limit(1)
-        result = await db.execute(stmt)
-        return result.scalar_one_or_none() is not None
+    return setting_name in await _snapshot.values()
 
 
-async def get_setting(setting_name: str) -> str:
+async def get_setting(setting_name: str, db: Optional[AsyncSession] = None) -> str:
     """
     Look up a system setting by name and return its value.
 
     Raises SettingNotFoundError if the setting does not exist.
     """
-    async with async_session_maker() as db:
-        stmt = select(SystemSetting).where(SystemSetting.name == setting_name)
-        result = await db.execute(stmt)
-        setting = result.scalars().first()
-        if not setting:
-            raise SettingNotFoundError(f"System setting not found: {setting_name}")
-        return setting.value
+    values = await _snapshot.values()
+    if setting_name not in values:
+        raise SettingNotFoundError(f"System setting not found: {setting_name}")
+    return values[setting_name]
 
 
-async def get_setting_int(setting_name: str) -> int:
+async def get_setting_int(setting_name: str, db: Optional[AsyncSession] = None) -> int:
     """
     Retrieve a system setting by name and return it as an integer.
 
     Uses get_setting to obtain the string value, then converts it to int.
     Raises ValueError if the value is not a properly formatted integer.
     """
-    value = await get_setting(setting_name)
+    value = await get_setting(setting_name, db)
     try:
         return int(value.strip())
     except Exception:
         raise ValueError(f"System setting '{setting_name}' has non-integer value: {value!r}")
 
 
-async def set_setting(setting_name: str, value: str) -> str:
+async def _upsert(db: AsyncSession, setting_name: str, value: str) -> None:
+    stmt = select(SystemSetting).where(SystemSetting.name == setting_name)
+    result = await db.execute(stmt)
+    setting = result.scalars().first()
+
+    if setting:
+        setting.value = value
+    else:
+        setting = SystemSetting(name=setting_name, value=value)
+        db.add(setting)
+
+
+async def set_setting(setting_name: str, value: str, db: Optional[AsyncSession] = None) -> str:
     """
     Create or update a system setting with the given name and value.
 
     If the record exists, it is updated. Otherwise, it is created.
+    With a caller session the change is flushed but not committed; the snapshot
+    takes the new value when that session commits (a rollback discards it).
     Returns the stored value.
     """
-    async with async_session_maker() as db:
-        stmt = select(SystemSetting).where(SystemSetting.name == setting_name)
-        result = await db.execute(stmt)
-        setting = result.scalars().first()
+    if db is not None:
+        await _upsert(db, setting_name, value)
+        await db.flush()
+        _put_on_commit(db, setting_name, value)
+    else:
+        async with async_session_maker() as own_db:
+            await _upsert(own_db, setting_name, value)
+            await own_db.commit()
+        # Write through so the next read in this process sees the new value
+        _snapshot.put(setting_name, value)
+    return value
+
+
+_PENDING_KEY = "system_settings_pending"
+
+
+def _apply_pending(session) -> None:
+    for name, value in session.info.pop(_PENDING_KEY, {}).items():
+        _snapshot.put(name, value)
+
+
+def _discard_pending(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
 
-        if setting:
-            setting.value = value
-        else:
-            setting = SystemSetting(name=setting_name, value=value)
-            db.add(setting)
 
-        await db.commit()
-        # No need to refresh since we only return the value
-        return value
+def _put_on_commit(db: AsyncSession, setting_name: str, value: str) -> None:
+    """Queue a snapshot write for when ``db`` commits, so no request sees a value that may roll back."""
+    sync = db.sync_session
+    if not event.contains(sync, "after_commit", _apply_pending):
+        event.listen(sync, "after_commit", _apply_pending)
+        event.listen(sync, "after_rollback", _discard_pending)
+    sync.info.setdefault(_PENDING_KEY, {})[setting_name] = value
 
 
-__all__ = ["get_setting", "get_setting_int", "set_setting", "has_setting", "SettingNotFoundError"]
+__all__ = [
+    "get_setting",
+    "get_setting_int",
+    "set_setting",
+    "has_setting",
+    "get_all_settings",
+    "invalidate_settings_cache",
+    "SettingNotFoundError",
+]
@@ -1,15 +1,22 @@
-from app.services.system_settings import get_setting, set_setting, get_setting_int
+import asyncio
+import logging
+from typing import Optional
+
+from app.services.system_settings import get_setting, set_setting, get_setting_int, get_all_settings
 
 
 from telethon import TelegramClient
 from telethon.errors import FloodWaitError
+from telethon.sessions import StringSession
 
 async def get_client() -> TelegramClient:
     """
     Creates a TelegramClient using a StringSession loaded from DB.
     If not present, raises so you can provision the session out-of-band.
     """
-    session_str = await get_setting("system_telegram_session")
+    # One snapshot read for all three values
+    values = await get_all_settings()
+    session_str = values.get("system_telegram_session")
     if not session_str:
         raise RuntimeError(
             "No session found. Run the provisioning script once to create a StringSession "
@@ -17,7 +24,7 @@ async def get_client() -> TelegramClient:
         )
     # Build client with the stored session
     api_id: int = await get_setting_int("system_telegram_api_id")
-    api_hash: str = await get_setting("system_telegram_api_hash")
+    api_hash: str = values["system_telegram_api_hash"]
     client = TelegramClient(StringSession(session_str), api_id, api_hash)
     await client.connect()
     # After connecting, Telethon may refresh the session; re-save if it changed.
@@ -26,16 +33,69 @@ async def get_client() -> TelegramClient:
         await set_setting("system_telegram_session", new_session_str)
     return client
 
+class TelegramSender:
+    """
+    One long-lived, connected TelegramClient per process.
+
+    The client is created on first use and reconnected if the connection drops.
+    The session string is written back to system_setting only when Telethon
+    actually changed it. FloodWaitError is propagated so callers (the notification
+    worker) can reschedule instead of dropping the message.
+    """
+
+    def __init__(self) -> None:
+        self._client: Optional[TelegramClient] = None
+        self._saved_session: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_client(self) -> TelegramClient:
+        if self._client is None:
+            self._client = await get_client()
+            self._saved_session = self._client.session.save()
+        elif not self._client.is_connected():
+            await self._client.connect()
+        return self._client
+
+    async def _persist_session(self) -> None:
+        if self._client is None:
+            return
+        current = self._client.session.save()
+        if current != self._saved_session:
+            await set_setting("system_telegram_session", current)
+            self._saved_session = current
+
+    async def send(self, to: str, text: str) -> None:
+        # Telethon clients are not meant for concurrent sends from several tasks
+        async with self._lock:
+            client = await self._ensure_client()
+            try:
+                await client.send_message(to, text)
+            except (ConnectionError, OSError):
+                # Dropped connection: reconnect once and retry
+                await client.disconnect()
+                await client.connect()
+                await client.send_message(to, text)
+            await self._persist_session()
+
+    async def close(self) -> None:
+        async with self._lock:
+            client, self._client = self._client, None
+            if client is not None:
+                try:
+                    await client.disconnect()
+                except Exception:
+                    pass
+
+
+telegram_sender = TelegramSender()
+
+
 async def send_telegram_dm(to: str, text: str) -> None:
-    client = await get_client()
+    """Send a DM through the shared per-process client. Prefer enqueueing via app.services.notifications."""
     try:
-        await client.send_message(to, text)
-        # Save any session updates after activity
-        await set_setting("system_telegram_session", client.session.save())
+        await telegram_sender.send(to, text)
     except FloodWaitError as e:
-        print(f"Rate limited. Sleep {e.seconds}s, then retry.")
-    finally:
-        await client.disconnect()
+        logging.getLogger(__name__).warning("Telegram rate limited; message to %s not sent (retry after %ss)", to, e.seconds)
 
 
 
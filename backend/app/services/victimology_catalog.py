@@ -0,0 +1,182 @@
+"""
+Compiled victimology catalog (victimology_category -> victimology questions).
+
+The catalog is reference data: it is compiled once per process into an immutable
+tree and versioned with the reference snapshot, so a change that calls
+``bump_reference_version`` (as every reference-data writer does) also rebuilds the
+catalog. Because opaque ids may be session bound, the serialized JSON document is
+cached per id-codec session (bounded LRU) next to the compiled tree.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.id_codec import encode_id
+from app.db.models.victimology import victimology as Victimology
+from app.db.models.victimology_category import victimologyCategory as VictimologyCategory
+from app.services.reference_data import get_reference_data
+
+CATALOG_ETAG_SCOPE = "VICTIMOLOGY_CATALOG"
+
+
+@dataclass(frozen=True)
+class CatalogQuestion:
+    id: int
+    question: str
+    follow_up: Optional[str]
+    sort_order: Optional[int]
+
+
+@dataclass(frozen=True)
+class CatalogCategory:
+    id: int
+    category: str
+    sort_order: Optional[int]
+    questions: Tuple[CatalogQuestion, ...]
+
+
+@dataclass(frozen=True)
+class VictimologyCatalog:
+    version: str
+    categories: Tuple[CatalogCategory, ...]
+
+    def etag(self, session_id: Optional[str] = None) -> str:
+        token = f"{self.version}|{CATALOG_ETAG_SCOPE}|{session_id or ''}"
+        return f'W/"vic-{sha256(token.encode("utf-8")).hexdigest()[:20]}"'
+
+    def render(self) -> list:
+        """Response shape of GET /cases/victimology/catalog (ids encoded for the current session)."""
+        return [
+            {
+                "id": encode_id("victimology_category", c.id),
+                "category": c.category,
+                "sort_order": c.sort_order,
+                "questions": [
+                    {
+                        "id": encode_id("victimology", q.id),
+                        "db_id": q.id,
+                        "question": q.question,
+                        "follow_up": q.follow_up,
+                        "sort_order": q.sort_order,
+                    }
+                    for q in c.questions
+                ],
+            }
+            for c in self.categories
+        ]
+
+
+async def _load_catalog(db: AsyncSession, version: str) -> VictimologyCatalog:
+    # Categories and questions sorted by sort_order (nulls last), then name / id
+    cats = (
+        await db.execute(
+            select(VictimologyCategory.id, VictimologyCategory.category, VictimologyCategory.sort_order).order_by(
+                sa.case((VictimologyCategory.sort_order.is_(None), 1), else_=0).asc(),
+                VictimologyCategory.sort_order.asc(),
+                VictimologyCategory.category.asc(),
+            )
+        )
+    ).all()
+    vics = (
+        await db.execute(
+            select(
+                Victimology.id,
+                Victimology.victimology_category_id,
+                Victimology.question,
+                Victimology.follow_up,
+                Victimology.sort_order,
+            ).order_by(
+                sa.case((Victimology.sort_order.is_(None), 1), else_=0).asc(),
+                Victimology.sort_order.asc(),
+                Victimology.id.asc(),
+            )
+        )
+    ).all()
+    by_cat = {}
+    for v in vics:
+        by_cat.setdefault(int(v.victimology_category_id), []).append(
+            CatalogQuestion(
+                id=int(v.id),
+                question=v.question,
+                follow_up=v.follow_up,
+                sort_order=int(v.sort_order) if v.sort_order is not None else None,
+            )
+        )
+    categories = tuple(
+        CatalogCategory(
+            id=int(c.id),
+            category=c.category,
+            sort_order=int(c.sort_order) if c.sort_order is not None else None,
+            questions=tuple(by_cat.get(int(c.id), ())),
+        )
+        for c in cats
+    )
+    return VictimologyCatalog(version=version, categories=categories)
+
+
+class VictimologyCatalogCache:
+    def __init__(self, max_documents: int = 256):
+        self.max_documents = int(max_documents)
+        self._catalog: Optional[VictimologyCatalog] = None
+        # id-codec session -> serialized document for the current catalog
+        self._documents: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._catalog = None
+        self._documents.clear()
+
+    async def get(self, db: AsyncSession) -> VictimologyCatalog:
+        version = (await get_reference_data(db)).version
+        catalog = self._catalog
+        if catalog is not None and catalog.version == version:
+            return catalog
+        async with self._lock:
+            catalog = self._catalog
+            if catalog is None or catalog.version != version:
+                catalog = await _load_catalog(db, version)
+                self._catalog = catalog
+                self._documents.clear()
+            return catalog
+
+    def document(self, catalog: VictimologyCatalog, session_id: Optional[str]) -> bytes:
+        """Serialized catalog for ``session_id``; built once per session and catalog version."""
+        key = session_id or ""
+        if catalog is not self._catalog:
+            # A stale catalog (replaced while this request ran): do not cache its document
+            return json.dumps(catalog.render(), separators=(",", ":")).encode("utf-8")
+        doc = self._documents.get(key)
+        if doc is None:
+            doc = json.dumps(catalog.render(), separators=(",", ":")).encode("utf-8")
+            self._documents[key] = doc
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        else:
+            self._documents.move_to_end(key)
+        return doc
+
+
+victimology_catalog_cache = VictimologyCatalogCache()
+
+
+async def get_victimology_catalog(db: AsyncSession) -> VictimologyCatalog:
+    return await victimology_catalog_cache.get(db)
+
+
+__all__ = [
+    "CATALOG_ETAG_SCOPE",
+    "CatalogCategory",
+    "CatalogQuestion",
+    "VictimologyCatalog",
+    "get_victimology_catalog",
+    "victimology_catalog_cache",
+]
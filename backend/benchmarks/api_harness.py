@@ -0,0 +1,206 @@
+"""
+In-process API benchmark harness shared by ``benchmarks.run`` and ``benchmarks/bench_api.py``.
+
+The app is driven through ``httpx.ASGITransport`` (no server, no network) against
+the database in ``DATABASE_URL``. ``configure(url)`` must run before anything
+imports ``app``: the whole app, including the session middleware and background
+writers, then uses the benchmark database exactly as it uses the real one.
+S3 is replaced by an in-memory fake (``install_fake_s3``).
+
+Each scenario is ``(method, path builder, request kwargs builder, untimed setup)``;
+``time_scenario`` runs warmups then timed repeats and reports latency percentiles
+plus the per-request SQL statement count and DB time taken from ``Server-Timing``
+(instrumentation runs with ``debug`` on for the benchmark) and the bytes on the wire.
+"""
+import io
+import os
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+_SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def configure(url: str) -> None:
+    """Point the app at ``url``; call before importing ``app``/``main``."""
+    if "app.core.config" in __import__("sys").modules:
+        from app.core.config import settings
+
+        if settings.database_url != url:
+            raise RuntimeError("configure() must run before the app is imported")
+    os.environ["DATABASE_URL"] = url
+    os.environ.pop("DATABASE_READ_URL", None)
+    os.environ.setdefault("EMAIL_BACKEND", "memory")
+
+
+class FakeS3Client:
+    """The subset of the boto3 S3 client used by app.services.s3, kept in memory."""
+
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = bytes(Body)
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None):
+        self.objects[Key] = Fileobj.read()
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+    def delete_objects(self, Bucket, Delete):
+        for o in Delete["Objects"]:
+            self.objects.pop(o["Key"], None)
+        return {}
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn):
+        # Same length class as a real SigV4 URL
+        return f"https://s3.bench.example.com/{Params['Bucket']}/{Params['Key']}?X-Amz-Expires={ExpiresIn}&X-Amz-Signature={'0' * 64}"
+
+    def list_objects_v2(self, Bucket, MaxKeys=1000, StartAfter=None):
+        keys = sorted(k for k in self.objects if StartAfter is None or k > StartAfter)[:MaxKeys]
+        return {"Contents": [{"Key": k, "LastModified": None} for k in keys]}
+
+
+def install_fake_s3() -> FakeS3Client:
+    from app.services import s3
+
+    client = FakeS3Client()
+    s3._get_client_and_bucket = lambda: (client, "bench")
+    s3.is_configured = lambda: True
+    return client
+
+
+@dataclass
+class BenchContext:
+    client: object
+    dataset: object
+    case: str
+    last_message_id: Optional[str] = None
+    extra: dict = field(default_factory=dict)
+
+
+async def open_context(dataset) -> BenchContext:
+    """Logged-in client for the dataset's benchmark user (release it with ``close_context``)."""
+    import httpx
+    from app.core.config import settings
+    from main import app
+
+    settings.debug = True  # Server-Timing on responses (engines were built with echo off)
+    install_fake_s3()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    resp = await client.post("/api/v1/auth/login", json={"email": dataset.email, "password": dataset.password})
+    resp.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+    ctx = BenchContext(client=client, dataset=dataset, case=dataset.hot_case_number)
+    messages = (await client.get(f"/api/v1/cases/{ctx.case}/messages")).json()
+    ctx.last_message_id = messages[-1]["id"]
+    return ctx
+
+
+async def close_context(ctx: BenchContext) -> None:
+    """Close the client and dispose both engines so no pooled connection outlives the event loop."""
+    from app.db.session import engine, read_engine
+
+    await ctx.client.aclose()
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+
+async def _restore_unseen(ctx: BenchContext) -> None:
+    # mark_seen empties the user's unseen rows; put them back so every run does the same work
+    from sqlalchemy import text
+    from app.db.session import async_session_maker
+
+    async with async_session_maker() as db:
+        await db.execute(
+            text(
+                "INSERT INTO message_not_seen (message_id, person_id, created_at) "
+                "SELECT id, 1, CURRENT_TIMESTAMP FROM message WHERE case_id = :case_id AND written_by_id <> 1 "
+                "ON CONFLICT (message_id, person_id) DO NOTHING"
+            ),
+            {"case_id": ctx.dataset.hot_case_id},
+        )
+        await db.commit()
+
+
+_PDF = b"%PDF-1.4\n" + b"0" * 200_000 + b"\n%%EOF\n"
+
+
+@dataclass
+class Scenario:
+    method: str
+    path: Callable[[BenchContext], str]
+    kwargs: Callable[[BenchContext], dict] = lambda ctx: {}
+    setup: Optional[Callable[[BenchContext], Awaitable[None]]] = None
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "search": Scenario("GET", lambda c: "/api/v1/search", lambda c: {"params": {"q": c.dataset.search_term}}),
+    "case_open": Scenario("GET", lambda c: f"/api/v1/cases/by-number/{c.case}"),
+    "case_workspace": Scenario("GET", lambda c: f"/api/v1/cases/{c.case}/workspace"),
+    "message_list": Scenario("GET", lambda c: f"/api/v1/cases/{c.case}/messages"),
+    "message_post": Scenario(
+        "POST", lambda c: f"/api/v1/cases/{c.case}/messages", lambda c: {"json": {"message": "Benchmark update: no new sightings"}},
+    ),
+    "unseen_counts": Scenario("GET", lambda c: "/api/v1/cases/messages/unseen_messages_counts"),
+    "mark_seen": Scenario(
+        "POST", lambda c: f"/api/v1/cases/{c.case}/messages/mark_seen_up_to/{c.last_message_id}", setup=_restore_unseen,
+    ),
+    "team_list": Scenario("GET", lambda c: "/api/v1/teams"),
+    "upload": Scenario(
+        "POST",
+        lambda c: f"/api/v1/cases/{c.case}/files/upload",
+        lambda c: {"files": {"file": ("report.pdf", io.BytesIO(_PDF), "application/pdf")}, "data": {"source": "Bench"}},
+    ),
+}
+
+
+async def call(ctx: BenchContext, name: str):
+    scenario = SCENARIOS[name]
+    resp = await ctx.client.request(scenario.method, scenario.path(ctx), **scenario.kwargs(ctx))
+    if resp.status_code >= 400:
+        raise RuntimeError(f"{name}: HTTP {resp.status_code}: {resp.text[:300]}")
+    return resp
+
+
+def _percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+async def time_scenario(ctx: BenchContext, name: str, repeats: int = 20, warmup: int = 2) -> dict:
+    scenario = SCENARIOS[name]
+    samples, queries, db_ms, sizes = [], [], [], []
+    for i in range(warmup + repeats):
+        if scenario.setup is not None:
+            await scenario.setup(ctx)
+        started = time.perf_counter()
+        resp = await call(ctx, name)
+        await resp.aread()
+        elapsed = (time.perf_counter() - started) * 1000.0
+        if i < warmup:
+            continue
+        samples.append(elapsed)
+        sizes.append(resp.num_bytes_downloaded)
+        m = _SERVER_TIMING.search(resp.headers.get("server-timing", ""))
+        if m:
+            db_ms.append(float(m.group(1)))
+            queries.append(int(m.group(2)))
+    return {
+        "n": len(samples),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(_percentile(samples, 95), 3),
+        "min_ms": round(min(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "queries": round(statistics.median(queries), 1) if queries else None,
+        "db_ms": round(statistics.median(db_ms), 3) if db_ms else None,
+        "wire_bytes": int(statistics.median(sizes)),
+    }
+
+
+__all__ = ["SCENARIOS", "BenchContext", "FakeS3Client", "call", "close_context", "configure", "install_fake_s3", "open_context", "time_scenario"]
@@ -0,0 +1,63 @@
+"""
+pytest-benchmark suite for the top API endpoints (in-process, fake S3).
+
+Not collected by the regular test run (file name); run it explicitly, on its own:
+
+    pip install pytest-benchmark
+    pytest benchmarks/bench_api.py [--benchmark-json=bench.json] [--benchmark-compare]
+
+``BENCH_DATABASE_URL`` selects the database (default: a temp SQLite file; use a
+local PostgreSQL URL for production-like numbers) and ``BENCH_SCALE`` the datagen
+scale (default ``small``). ``python -m benchmarks.run`` is the same suite without
+pytest.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks import api_harness  # noqa: E402
+
+DATABASE_URL = os.getenv("BENCH_DATABASE_URL") or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+SCALE = os.getenv("BENCH_SCALE", "small")
+api_harness.configure(DATABASE_URL)
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def ctx(loop):
+    from benchmarks.datagen import generate
+    from app.db.session import engine
+
+    dataset = loop.run_until_complete(generate(engine, SCALE, 1))
+    ctx = loop.run_until_complete(api_harness.open_context(dataset))
+    yield ctx
+    loop.run_until_complete(api_harness.close_context(ctx))
+
+
+@pytest.mark.parametrize("name", list(api_harness.SCENARIOS))
+def test_endpoint(benchmark, loop, ctx, name):
+    scenario = api_harness.SCENARIOS[name]
+    setup = (lambda: loop.run_until_complete(scenario.setup(ctx))) if scenario.setup else None
+    benchmark.group = f"api ({ctx.dataset.scale}, {DATABASE_URL.split(':', 1)[0]})"
+    benchmark.extra_info["rows"] = ctx.dataset.rows
+    resp = benchmark.pedantic(
+        lambda: loop.run_until_complete(api_harness.call(ctx, name)),
+        setup=setup,
+        rounds=20,
+        warmup_rounds=2,
+    )
+    benchmark.extra_info["server_timing"] = resp.headers.get("server-timing")
+    benchmark.extra_info["wire_bytes"] = resp.num_bytes_downloaded
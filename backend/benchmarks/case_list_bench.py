@@ -0,0 +1,175 @@
+"""
+Compare the case selector (GET /cases/select) with the paginated case list (GET /cases).
+
+Builds ``--cases`` cases (10k and 100k by default, one run each), a handful of
+teams, an admin with CASES.ALL_CASES and a regular user who can see about
+``--visible`` of the cases (half assigned directly, half through a team). For both
+users it times:
+
+- ``select``: the existing selector, every active case in one response
+- ``page1``: first page of GET /cases (default fields, name order)
+- ``page10``: tenth page, following next_cursor
+- ``filtered``: first page filtered by state and intake date range, by intake date
+
+Usage (from backend/):
+    python -m benchmarks.case_list_bench [--cases 10000 100000] [--limit 50] [--url sqlite+aiosqlite:///bench.db]
+
+Without --url a throwaway SQLite file is used; pass a PostgreSQL URL for numbers
+that reflect production.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker  # noqa: E402
+
+from app.api.v1.endpoints.case import _list_cases, list_cases_for_select  # noqa: E402
+from app.db import Base  # noqa: E402
+from app.db.models.app_user import AppUser  # noqa: E402
+from app.db.models.app_user_case import AppUserCase  # noqa: E402
+from app.db.models.app_user_role import AppUserRole  # noqa: E402
+from app.db.models.case import Case  # noqa: E402
+from app.db.models.case_circumstances import CaseCircumstances  # noqa: E402
+from app.db.models.permission import Permission  # noqa: E402
+from app.db.models.person import Person  # noqa: E402
+from app.db.models.person_team import PersonTeam  # noqa: E402
+from app.db.models.role import Role  # noqa: E402
+from app.db.models.role_permission import RolePermission  # noqa: E402
+from app.db.models.subject import Subject  # noqa: E402
+from app.db.models.team import Team  # noqa: E402
+from app.db.models.team_case import TeamCase  # noqa: E402
+
+CHUNK = 20000
+N_TEAMS = 20
+N_STATES = 50
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez"]
+
+
+async def _bulk(conn, model, rows):
+    for i in range(0, len(rows), CHUNK):
+        await conn.execute(insert(model), rows[i:i + CHUNK])
+
+
+async def build(engine, n_cases: int, visible: float, seed: int):
+    rnd = random.Random(seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await _bulk(conn, AppUser, [
+            {"id": 1, "email": "admin@bench", "password_hash": "-", "is_active": True},
+            {"id": 2, "email": "user@bench", "password_hash": "-", "is_active": True},
+        ])
+        await _bulk(conn, Person, [{"id": 1, "first_name": "Bench", "last_name": "User", "app_user_id": 2}])
+        await _bulk(conn, Permission, [{"id": 1, "name": "All cases", "code": "CASES.ALL_CASES"}])
+        await _bulk(conn, Role, [{"id": 1, "name": "Admin", "code": "ADMIN"}])
+        await _bulk(conn, RolePermission, [{"role_id": 1, "permission_id": 1}])
+        await _bulk(conn, AppUserRole, [{"app_user_id": 1, "role_id": 1}])
+        await _bulk(conn, Team, [{"id": t + 1, "name": f"Team {t}"} for t in range(N_TEAMS)])
+        await _bulk(conn, PersonTeam, [{"person_id": 1, "team_id": 1, "team_role_id": 1}])
+
+        start = date(2020, 1, 1)
+        subjects, cases, circumstances, direct, team_cases = [], [], [], [], []
+        for i in range(1, n_cases + 1):
+            subjects.append({"id": i, "first_name": f"First{i}", "last_name": rnd.choice(LAST_NAMES)})
+            cases.append({
+                "id": i,
+                "subject_id": i,
+                "case_number": f"BENCH-{i:07d}",
+                "inactive": rnd.random() < 0.2,
+                "date_intake": start + timedelta(days=rnd.randint(0, 2000)),
+            })
+            circumstances.append({"case_id": i, "state_id": rnd.randint(1, N_STATES)})
+            # Every case belongs to some team; the user's team (1) gets its share of ``visible``
+            team = 1 if rnd.random() < visible / 2 else rnd.randint(2, N_TEAMS)
+            team_cases.append({"team_id": team, "case_id": i})
+            if rnd.random() < visible / 2:
+                direct.append({"app_user_id": 2, "case_id": i})
+        await _bulk(conn, Subject, subjects)
+        await _bulk(conn, Case, cases)
+        await _bulk(conn, CaseCircumstances, circumstances)
+        await _bulk(conn, TeamCase, team_cases)
+        await _bulk(conn, AppUserCase, direct)
+
+
+async def _time(fn, repeats: int):
+    samples = []
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = await fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return round(statistics.median(samples), 2), result
+
+
+async def measure(maker, user_id: int, limit: int, repeats: int) -> dict:
+    user = SimpleNamespace(id=user_id)
+    out = {}
+    async with maker() as db:
+        ms, rows = await _time(lambda: list_cases_for_select(db=db, current_user=user), repeats)
+        out["select"] = {"ms": ms, "rows": len(rows)}
+
+        ms, page = await _time(lambda: _list_cases(db, user_id, limit=limit), repeats)
+        out["page1"] = {"ms": ms, "rows": len(page["items"])}
+
+        cursor = None
+        for _ in range(9):
+            page = await _list_cases(db, user_id, limit=limit, cursor=cursor)
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        if cursor:
+            ms, page = await _time(lambda: _list_cases(db, user_id, limit=limit, cursor=cursor), repeats)
+            out["page10"] = {"ms": ms, "rows": len(page["items"])}
+
+        ms, page = await _time(
+            lambda: _list_cases(
+                db, user_id, limit=limit, state_id=7, intake_from=date(2021, 1, 1), intake_to=date(2022, 12, 31),
+                sort="date_intake", fields=["id", "case_number", "date_intake", "state"],
+            ),
+            repeats,
+        )
+        out["filtered"] = {"ms": ms, "rows": len(page["items"])}
+    return out
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--visible", type=float, default=0.1, help="share of cases the regular user can see")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", default=None)
+    args = parser.parse_args()
+
+    report = []
+    for n_cases in args.cases:
+        url = args.url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'case_list_bench.db')}"
+        engine = create_async_engine(url)
+        try:
+            await build(engine, n_cases, args.visible, args.seed)
+            maker = async_sessionmaker(engine, expire_on_commit=False)
+            report.append({
+                "cases": n_cases,
+                "url": url.split("@")[-1],
+                "admin": await measure(maker, 1, args.limit, args.repeats),
+                "user": await measure(maker, 2, args.limit, args.repeats),
+            })
+        finally:
+            await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
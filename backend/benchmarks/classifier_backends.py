@@ -0,0 +1,230 @@
+"""
+Per-image latency and memory of each photo/document classifier backend on CPU.
+
+Every backend runs in a fresh process. That process loads the classifier the way
+a worker does and classifies ``--images`` images: ``tests/test_images`` plus
+synthetic photos/scans, each encoded as JPEG. It reports:
+
+- latency: median / p95 / mean ms per image (decode, preprocessing and
+  inference), after ``--warmup`` images
+- memory: RSS and PSS after import+load and after the run, plus peak RSS. These
+  come from /proc/self/smaps_rollup and /proc/self/status on Linux.
+- P(photo) for the test images next to the torch backend's, for a parity check
+
+Exported models are created in a temp directory when the weights have none yet:
+int8 always, ONNX when the ``onnx`` package is installed. A backend whose runtime
+or export is missing is reported as unavailable, not silently replaced by torch.
+Without ``best_model.pt`` the weights are random resnet18 weights (same cost,
+meaningless predictions).
+
+Usage (from backend/):
+    python -m benchmarks.classifier_backends [--backends torch quantized onnx] [--images 100] [--threads 1] [--out cls.json]
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+BACKENDS = ("torch", "quantized", "onnx")
+TEST_IMAGES = Path(BACKEND_DIR) / "tests" / "test_images"
+
+
+def _memory() -> dict:
+    out = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if parts and parts[0] in ("Rss:", "Pss:"):
+                    out[parts[0][:-1].lower() + "_mib"] = round(int(parts[1]) / 1024.0, 1)
+    except OSError:
+        pass
+    return out
+
+
+def _peak_rss_mib():
+    # VmHWM starts again at exec (ru_maxrss would include the parent's high-water mark)
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024.0, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _images(n: int) -> list:
+    from PIL import Image, ImageDraw
+
+    images = [p.read_bytes() for p in sorted(TEST_IMAGES.glob("*.jpg"))]
+    i = 0
+    while len(images) < n:
+        if i % 2:
+            im = Image.effect_noise((1024, 768), 60).convert("RGB")
+        else:
+            im = Image.new("RGB", (1240, 1754), "white")
+            draw = ImageDraw.Draw(im)
+            for y in range(80, 1700, 28):
+                draw.line((100, y, 1100 - (y * 7) % 300, y), fill="black", width=3)
+        buf = io.BytesIO()
+        im.save(buf, "JPEG", quality=85)
+        images.append(buf.getvalue())
+        i += 1
+    return images[:n]
+
+
+def run_backend(backend: str, weights: Path, n_images: int, warmup: int, threads: int) -> dict:
+    """Child side: load ``backend`` explicitly (no fallback) and time it."""
+    os.environ["CLASSIFIER_THREADS"] = str(threads)
+    images = _images(n_images + warmup)
+    base = _memory()
+    started = time.perf_counter()
+    from app.services.image_classifier import image_classifier as ic
+
+    ic.configure_threads()
+    if backend == "torch":
+        classifier = ic._load_torch(weights, mmap=True)
+    elif backend == "quantized":
+        classifier = ic._load_quantized(ic.quantized_path(weights))
+    else:
+        classifier = ic._load_onnx(ic.onnx_path(weights))
+    load_seconds = time.perf_counter() - started
+    loaded = _memory()
+
+    for data in images[:warmup]:
+        classifier.predict(data)
+    samples = []
+    for data in images[warmup:]:
+        t = time.perf_counter()
+        classifier.predict(data)
+        samples.append((time.perf_counter() - t) * 1000.0)
+    samples.sort()
+    return {
+        "backend": backend,
+        "threads": threads,
+        "load_seconds": round(load_seconds, 2),
+        "median_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 2),
+        "mean_ms": round(statistics.fmean(samples), 2),
+        "images": len(samples),
+        "memory": {
+            "baseline": base,
+            "loaded": loaded,
+            "after_run": _memory(),
+            "peak_rss_mib": _peak_rss_mib(),
+        },
+        "p_photo": {p.name: round(classifier.predict(p.read_bytes()), 4) for p in sorted(TEST_IMAGES.glob("*.jpg"))},
+    }
+
+
+def _prepare(weights: Path, backends, workdir: Path) -> tuple:
+    """Copy of the weights in ``workdir`` with the exports the chosen backends need; reasons for the ones that cannot run."""
+    from app.services.image_classifier import export
+    from app.services.image_classifier.image_classifier import onnx_path, quantized_path
+
+    local = workdir / "best_model.pt"
+    shutil.copyfile(weights, local)
+    unavailable = {}
+    for backend, path in (("quantized", quantized_path(weights)), ("onnx", onnx_path(weights))):
+        if backend not in backends:
+            continue
+        target = quantized_path(local) if backend == "quantized" else onnx_path(local)
+        if path.exists():
+            shutil.copyfile(path, target)
+            continue
+        try:
+            if backend == "quantized":
+                images = sorted(TEST_IMAGES.glob("*.jpg"))
+                export.export_quantized(local, target, export.calibration_batches(images))
+            else:
+                export.export_onnx(local, target)
+        except Exception as e:
+            unavailable[backend] = f"export failed: {e}"
+    if "onnx" in backends and "onnx" not in unavailable:
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            unavailable["onnx"] = "onnxruntime not installed"
+    return local, unavailable
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--images", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=1, help="inference threads (one worker's share of the CPUs)")
+    parser.add_argument("--weights", type=Path, default=None, help="fp32 weights (default: the app's, else random)")
+    parser.add_argument("--out", default=None, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--single", default=None, choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_backend(args.single, args.weights, args.images, args.warmup, args.threads)))
+        return
+
+    from app.services.image_classifier.image_classifier import LABEL_MAP, MODEL_NAME, build_model, weights_path
+
+    workdir = Path(tempfile.mkdtemp(prefix="cls-bench-"))
+    weights = args.weights or weights_path()
+    random_weights = not weights.exists()
+    if random_weights:
+        import torch
+
+        torch.manual_seed(0)
+        model, _ = build_model(MODEL_NAME, num_classes=len(LABEL_MAP))
+        weights = workdir / "random.pt"
+        torch.save(model.state_dict(), weights)
+    local, unavailable = _prepare(weights, args.backends, workdir)
+
+    runs = []
+    for backend in args.backends:
+        if backend in unavailable:
+            runs.append({"backend": backend, "unavailable": unavailable[backend]})
+            print(f"{backend:<10} unavailable: {unavailable[backend]}", file=sys.stderr)
+            continue
+        cmd = [
+            sys.executable, "-m", "benchmarks.classifier_backends", "--single", backend, "--weights", str(local),
+            "--images", str(args.images), "--warmup", str(args.warmup), "--threads", str(args.threads),
+        ]
+        proc = subprocess.run(cmd, cwd=BACKEND_DIR, stdout=subprocess.PIPE, text=True, env={**os.environ, "EMAIL_BACKEND": "memory"})
+        if proc.returncode != 0:
+            runs.append({"backend": backend, "unavailable": f"run failed (exit {proc.returncode})"})
+            continue
+        run = json.loads(proc.stdout.strip().splitlines()[-1])
+        runs.append(run)
+        mem = run["memory"]
+        print(
+            f"{backend:<10} median {run['median_ms']:>7.2f} ms  p95 {run['p95_ms']:>7.2f} ms  "
+            f"rss after run {mem['after_run'].get('rss_mib', 0):>6.1f}  peak {mem['peak_rss_mib'] or 0:>6.1f} MiB  p_photo {run['p_photo']}",
+            file=sys.stderr,
+        )
+
+    report = {
+        "cpus": os.cpu_count(),
+        "random_weights": random_weights,
+        "weights_mib": round(weights.stat().st_size / 2**20, 1),
+        "runs": runs,
+    }
+    shutil.rmtree(workdir, ignore_errors=True)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Deterministic synthetic data for the API benchmarks.
+
+Builds, for a ``Scale`` and a seed, the same rows every time (explicit ids, one
+``random.Random(seed)``): teams of persons, cases with subjects assigned to teams,
+and per case messages (replies, reactions with their counters, unseen rows for the
+other team members), tasks, timeline entries, files and social media.
+
+Person 1 / app_user 1 (``BENCH_EMAIL`` / ``BENCH_PASSWORD``) is the benchmark
+user, a member of team 1 with an investigator role (TEAMS, TASKS.CREATE; not
+CASES.ALL_CASES, so case access goes through the team/assignment ACL). Case 1 (the
+"hot" case) and every case of team 1 are visible to them.
+
+Usage (from backend/):
+    python -m benchmarks.datagen --url sqlite+aiosqlite:///bench.db [--scale medium] [--seed 1]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, time as dtime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import insert, text  # noqa: E402
+
+from app.db import Base  # noqa: E402
+from app.db.models.app_user import AppUser  # noqa: E402
+from app.db.models.app_user_case import AppUserCase  # noqa: E402
+from app.db.models.app_user_role import AppUserRole  # noqa: E402
+from app.db.models.case import Case  # noqa: E402
+from app.db.models.file import File  # noqa: E402
+from app.db.models.message import Message  # noqa: E402
+from app.db.models.message_not_seen import MessageNotSeen  # noqa: E402
+from app.db.models.message_person import MessagePerson  # noqa: E402
+from app.db.models.message_reaction_count import MessageReactionCount  # noqa: E402
+from app.db.models.person import Person  # noqa: E402
+from app.db.models.person_case import PersonCase  # noqa: E402
+from app.db.models.permission import Permission  # noqa: E402
+from app.db.models.person_team import PersonTeam  # noqa: E402
+from app.db.models.ref_type import RefType  # noqa: E402
+from app.db.models.ref_value import RefValue  # noqa: E402
+from app.db.models.role import Role  # noqa: E402
+from app.db.models.role_permission import RolePermission  # noqa: E402
+from app.db.models.social_media import SocialMedia  # noqa: E402
+from app.db.models.subject import Subject  # noqa: E402
+from app.db.models.subject_case import SubjectCase  # noqa: E402
+from app.db.models.task import Task  # noqa: E402
+from app.db.models.team import Team  # noqa: E402
+from app.db.models.team_case import TeamCase  # noqa: E402
+from app.db.models.timeline import Timeline  # noqa: E402
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "BenchPassw0rd!"
+CHUNK = 5000
+
+FIRST_NAMES = ["Ava", "Ben", "Cara", "Dan", "Eli", "Fay", "Gus", "Hana", "Ian", "Jo", "Kai", "Lia"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez"]
+WORDS = (
+    "seen near the bus station wearing a red jacket vehicle sighting reported by caller "
+    "friend says phone was off since monday follow up with school counselor checked shelter "
+    "no match at hospital social media account active last night possible contact downtown"
+).split()
+REACTIONS = ["+1", "heart", "eyes", "check"]
+PLATFORMS = ["Instagram", "TikTok", "Snapchat", "Facebook", "X"]
+
+
+@dataclass(frozen=True)
+class Scale:
+    cases: int
+    teams: int
+    persons_per_team: int
+    messages_per_case: int
+    tasks_per_case: int
+    timeline_per_case: int
+    files_per_case: int
+    social_per_case: int
+    # Share of a message's other team members that have not seen it yet
+    unseen_ratio: float = 0.3
+    # Share of messages with at least one reaction
+    reaction_ratio: float = 0.2
+    # Share of all cases assigned to team 1 (the benchmark user's team)
+    team1_share: float = 0.1
+
+
+SCALES = {
+    "small": Scale(cases=50, teams=5, persons_per_team=4, messages_per_case=40, tasks_per_case=3,
+                   timeline_per_case=10, files_per_case=3, social_per_case=2),
+    "medium": Scale(cases=1000, teams=25, persons_per_team=8, messages_per_case=150, tasks_per_case=8,
+                    timeline_per_case=40, files_per_case=10, social_per_case=5),
+    # Roughly a busy production tenant: 5,000 cases, ~1M messages; the hot case has 5,000 messages
+    "production": Scale(cases=5000, teams=60, persons_per_team=12, messages_per_case=200, tasks_per_case=12,
+                        timeline_per_case=60, files_per_case=20, social_per_case=8),
+}
+HOT_CASE_MESSAGES = {"small": 400, "medium": 2000, "production": 5000}
+
+
+@dataclass
+class Dataset:
+    scale: str
+    seed: int
+    email: str
+    password: str
+    hot_case_id: int
+    hot_case_number: str
+    hot_case_last_message_id: int
+    search_term: str
+    rows: dict
+
+
+async def _bulk(conn, model, rows):
+    for i in range(0, len(rows), CHUNK):
+        await conn.execute(insert(model), rows[i:i + CHUNK])
+
+
+async def _reset_sequences(conn, tables):
+    # Rows carry explicit ids; move PostgreSQL sequences past them so the API can insert
+    if conn.dialect.name != "postgresql":
+        return
+    for table in tables:
+        await conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), COALESCE((SELECT MAX(id) FROM \"{table}\"), 0) + 1, false)"
+        ))
+
+
+def _sentence(rnd: random.Random, n_min: int = 6, n_max: int = 24) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(n_min, n_max))).capitalize()
+
+
+async def generate(engine, scale_name: str = "small", seed: int = 1) -> Dataset:
+    """Drop and recreate every table on ``engine`` and fill it; returns what the benchmarks need."""
+    from app.core.security import get_password_hash
+
+    scale = SCALES[scale_name]
+    rnd = random.Random(seed)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    counts = {}
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+        # Reference values used by foreign keys (enforced on PostgreSQL)
+        ref_types = [
+            {"id": 1, "name": "Team role", "code": "TEAM_ROLE"},
+            {"id": 2, "name": "Timeline type", "code": "TIMELINE_TYPE"},
+            {"id": 3, "name": "Social platform", "code": "SOCIAL_PLATFORM"},
+        ]
+        refs = [{"id": 1, "name": "Member", "code": "MEMBER", "sort_order": 1, "ref_type_id": 1}]
+        refs += [{"id": 10 + i, "name": n, "code": n.upper(), "sort_order": i, "ref_type_id": 2}
+                 for i, n in enumerate(["Sighting", "Contact", "Tip", "Travel"])]
+        refs += [{"id": 20 + i, "name": n, "code": n.upper(), "sort_order": i, "ref_type_id": 3}
+                 for i, n in enumerate(PLATFORMS)]
+        await _bulk(conn, RefType, ref_types)
+        await _bulk(conn, RefValue, refs)
+
+        # People: one shared bcrypt hash (hashing is not what we measure)
+        password_hash = get_password_hash(BENCH_PASSWORD)
+        n_persons = scale.teams * scale.persons_per_team
+        users, persons, person_teams = [], [], []
+        members = {}
+        for p in range(1, n_persons + 1):
+            team = (p - 1) // scale.persons_per_team + 1
+            email = BENCH_EMAIL if p == 1 else f"person{p}@bench.example.com"
+            users.append({"id": p, "email": email, "password_hash": password_hash, "is_active": True})
+            persons.append({
+                "id": p, "first_name": rnd.choice(FIRST_NAMES), "last_name": rnd.choice(LAST_NAMES),
+                "email": email, "app_user_id": p,
+            })
+            person_teams.append({"id": p, "person_id": p, "team_id": team, "team_role_id": 1})
+            members.setdefault(team, []).append(p)
+        await _bulk(conn, AppUser, users)
+        await _bulk(conn, Person, persons)
+        await _bulk(conn, Team, [{"id": t, "name": f"Team {t}"} for t in range(1, scale.teams + 1)])
+        await _bulk(conn, PersonTeam, person_teams)
+        await _bulk(conn, Permission, [
+            {"id": 1, "name": "Teams", "code": "TEAMS"},
+            {"id": 2, "name": "Create tasks", "code": "TASKS.CREATE"},
+        ])
+        await _bulk(conn, Role, [{"id": 1, "name": "Investigator", "code": "INVESTIGATOR"}])
+        await _bulk(conn, RolePermission, [{"role_id": 1, "permission_id": 1}, {"role_id": 1, "permission_id": 2}])
+        await _bulk(conn, AppUserRole, [{"app_user_id": 1, "role_id": 1}])
+
+        subjects, cases, subject_cases, team_cases, person_cases = [], [], [], [], []
+        case_team = {}
+        for c in range(1, scale.cases + 1):
+            team = 1 if c == 1 or rnd.random() < scale.team1_share else rnd.randint(2, max(2, scale.teams))
+            team = min(team, scale.teams)
+            case_team[c] = team
+            subjects.append({"id": c, "first_name": rnd.choice(FIRST_NAMES), "last_name": rnd.choice(LAST_NAMES)})
+            cases.append({
+                "id": c, "subject_id": c, "case_number": f"25-BN-{c:06d}",
+                "date_intake": date(2024, 1, 1) + timedelta(days=rnd.randint(0, 600)),
+            })
+            subject_cases.append({"id": c, "subject_id": c, "case_id": c})
+            team_cases.append({"id": c, "team_id": team, "case_id": c})
+            person_cases.append({"id": c, "person_id": members[team][0], "case_id": c})
+        await _bulk(conn, Subject, subjects)
+        await _bulk(conn, Case, cases)
+        await _bulk(conn, SubjectCase, subject_cases)
+        await _bulk(conn, TeamCase, team_cases)
+        await _bulk(conn, PersonCase, person_cases)
+        await _bulk(conn, AppUserCase, [{"app_user_id": 1, "case_id": 1}])
+
+        mid = tid = tlid = fid = smid = mpid = nsid = rcid = 0
+        hot_last = 0
+        for c in range(1, scale.cases + 1):
+            team_members = members[case_team[c]]
+            n_messages = HOT_CASE_MESSAGES[scale_name] if c == 1 else scale.messages_per_case
+            messages, message_persons, not_seen, reaction_counts = [], [], [], []
+            tasks, timeline, files, social = [], [], [], []
+            first_mid = mid + 1
+            for i in range(n_messages):
+                mid += 1
+                writer = rnd.choice(team_members)
+                created = base + timedelta(minutes=c * 10 + i)
+                messages.append({
+                    "id": mid, "case_id": c, "written_by_id": writer, "message": _sentence(rnd),
+                    "reply_to_id": rnd.randint(first_mid, mid - 1) if i and rnd.random() < 0.15 else None,
+                    "created_at": created, "updated_at": created,
+                })
+                if rnd.random() < scale.reaction_ratio:
+                    per_reaction = {}
+                    for person in rnd.sample(team_members, rnd.randint(1, min(3, len(team_members)))):
+                        mpid += 1
+                        r = rnd.choice(REACTIONS)
+                        message_persons.append({"id": mpid, "message_id": mid, "person_id": person, "reaction": r})
+                        per_reaction[r] = per_reaction.get(r, 0) + 1
+                    for r, n in per_reaction.items():
+                        rcid += 1
+                        reaction_counts.append({"id": rcid, "message_id": mid, "reaction": r, "count": n})
+                for person in team_members:
+                    if person != writer and rnd.random() < scale.unseen_ratio:
+                        nsid += 1
+                        not_seen.append({"id": nsid, "message_id": mid, "person_id": person})
+            if c == 1:
+                hot_last = mid
+            for _ in range(scale.tasks_per_case):
+                tid += 1
+                tasks.append({
+                    "id": tid, "case_id": c, "assigned_by_id": rnd.choice(team_members),
+                    "title": _sentence(rnd, 3, 6), "description": _sentence(rnd), "completed": rnd.random() < 0.4,
+                })
+            for _ in range(scale.timeline_per_case):
+                tlid += 1
+                timeline.append({
+                    "id": tlid, "case_id": c, "entered_by_id": rnd.choice(team_members),
+                    "date": date(2025, 1, 1) + timedelta(days=rnd.randint(0, 90)),
+                    "time": dtime(rnd.randint(0, 23), rnd.randint(0, 59)),
+                    "type_id": rnd.randint(10, 13), "details": _sentence(rnd), "where": "Springfield",
+                    "who_id": c if rnd.random() < 0.5 else None,
+                })
+            for _ in range(scale.files_per_case):
+                fid += 1
+                is_image = rnd.random() < 0.6
+                files.append({
+                    "id": fid, "case_id": c, "created_by_id": rnd.choice(team_members),
+                    "file_name": f"evidence-{fid}.{'jpg' if is_image else 'pdf'}",
+                    "mime_type": "image/jpeg" if is_image else "application/pdf",
+                    "is_image": is_image, "is_document": not is_image, "source": "Family",
+                })
+            for _ in range(scale.social_per_case):
+                smid += 1
+                platform = rnd.randint(0, len(PLATFORMS) - 1)
+                social.append({
+                    "id": smid, "case_id": c, "subject_id": c, "platform_id": 20 + platform,
+                    "url": f"https://{PLATFORMS[platform].lower()}.example.com/user{smid}", "notes": _sentence(rnd, 3, 8),
+                })
+            await _bulk(conn, Message, messages)
+            await _bulk(conn, MessagePerson, message_persons)
+            await _bulk(conn, MessageReactionCount, reaction_counts)
+            await _bulk(conn, MessageNotSeen, not_seen)
+            await _bulk(conn, Task, tasks)
+            await _bulk(conn, Timeline, timeline)
+            await _bulk(conn, File, files)
+            await _bulk(conn, SocialMedia, social)
+
+        counts = {
+            "persons": n_persons, "teams": scale.teams, "cases": scale.cases, "messages": mid,
+            "message_reactions": mpid, "message_not_seen": nsid, "tasks": tid, "timeline": tlid,
+            "files": fid, "social_media": smid,
+        }
+        await _reset_sequences(conn, [t.name for t in Base.metadata.sorted_tables if "id" in t.c])
+
+    return Dataset(
+        scale=scale_name,
+        seed=seed,
+        email=BENCH_EMAIL,
+        password=BENCH_PASSWORD,
+        hot_case_id=1,
+        hot_case_number="25-BN-000001",
+        hot_case_last_message_id=hot_last,
+        search_term="vehicle",
+        rows=counts,
+    )
+
+
+async def main() -> None:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.url)
+    started = time.perf_counter()
+    try:
+        dataset = await generate(engine, args.scale, args.seed)
+    finally:
+        await engine.dispose()
+    print(f"{asdict(SCALES[args.scale])}")
+    print(f"generated {dataset.rows} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
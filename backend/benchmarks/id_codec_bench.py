@@ -0,0 +1,85 @@
+"""
+Per-id cost of the opaque ID codec.
+
+Times, for ``--rows`` ids in one request context (one session):
+
+- ``legacy``: the previous v2 path (SHA-256 master, HKDF and a new AESSIV per call,
+  JSON payload), reproduced here for comparison
+- ``encode_id`` / ``decode_id``: one call per id (cached session key)
+- ``encode_many`` / ``decode_many``: the whole result set at once
+
+Usage (from backend/):
+    python -m benchmarks.id_codec_bench [--rows 1000] [--repeats 20]
+"""
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cryptography.hazmat.primitives import hashes  # noqa: E402
+from cryptography.hazmat.primitives.ciphers.aead import AESSIV  # noqa: E402
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF  # noqa: E402
+from hashlib import sha256  # noqa: E402
+
+from app.core import id_codec  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+
+def legacy_encode(model: str, pk: int, session_id: str) -> str:
+    master = sha256((settings.id_secret_key or settings.jwt_secret_key).encode("utf-8")).digest()
+    key = HKDF(
+        algorithm=hashes.SHA256(), length=64, salt=None, info=b"idcodec|v2|session:" + session_id.encode("utf-8")
+    ).derive(master)
+    ct = AESSIV(key).encrypt(json.dumps({"m": model, "k": pk}, separators=(",", ":")).encode("utf-8"), [model.encode("utf-8")])
+    return "2." + base64.urlsafe_b64encode(ct).decode("utf-8")
+
+
+def _time(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    settings.id_encryption_enabled = True
+    session_id = "bench-session"
+    token = id_codec.set_current_session(session_id)
+    try:
+        pks = list(range(100000, 100000 + args.rows))
+        tokens = id_codec.encode_many("case", pks)
+        assert id_codec.decode_many("case", tokens) == pks
+
+        timings = {
+            "legacy_encode": _time(lambda: [legacy_encode("case", pk, session_id) for pk in pks], max(1, args.repeats // 4)),
+            "encode_id": _time(lambda: [id_codec.encode_id("case", pk) for pk in pks], args.repeats),
+            "encode_many": _time(lambda: id_codec.encode_many("case", pks), args.repeats),
+            "decode_id": _time(lambda: [id_codec.decode_id("case", t) for t in tokens], args.repeats),
+            "decode_many": _time(lambda: id_codec.decode_many("case", tokens), args.repeats),
+        }
+    finally:
+        id_codec.reset_current_session(token)
+
+    report = {
+        "rows": args.rows,
+        "token_length": {"v3": len(tokens[0]), "legacy_v2": len(legacy_encode("case", pks[0], session_id))},
+        "per_id_us": {k: round(v / args.rows * 1e6, 2) for k, v in timings.items()},
+        "per_response_ms": {k: round(v * 1000, 2) for k, v in timings.items()},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
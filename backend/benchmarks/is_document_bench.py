@@ -0,0 +1,164 @@
+"""
+Per-image cost of the /is_document feature pipeline on ``tests/test_images`` (or ``--images-dir``).
+
+Times, per image (median of ``--repeats``):
+
+- ``legacy``: the pipeline before staging, reproduced here for comparison. It decodes at
+  full size, LANCZOS-resizes to 1600 px, runs Canny twice and a separate HSV/histogram
+  pass, and runs OCR on every call when Tesseract is installed.
+- ``staged@<side>``: analyze_image with analysis side ``<side>``. It uses the same decode
+  and resize, shares one gray image and one edge map, and runs OCR only in the uncertain
+  band. It is split into decode / features / OCR. Only ``staged@1600`` (the default) is
+  calibrated; other sides show what a smaller analysis would save and how far it moves
+  the scores.
+- ``batch``: one POST /is_document/batch with every image vs one POST /is_document
+  per image, through the in-process app.
+
+For each image it also reports the score and label of each variant, and whether stage two
+would run OCR with the configured band (``ocr_would_run``, even without Tesseract).
+
+Usage (from backend/):
+    python -m benchmarks.is_document_bench [--sides 512 1600] [--repeats 5] [--images-dir DIR] [--out doc.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("EMAIL_BACKEND", "memory")
+
+from app.api.v1.endpoints import is_document as isdoc  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff"}
+
+
+def legacy_features(data: bytes) -> isdoc.Features:
+    np, cv2 = isdoc.np, isdoc.cv2
+    rgb = isdoc.load_image_from_bytes(data)
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).flatten()
+    p = hist / (hist.sum() + 1e-9)
+    return isdoc.Features(
+        text_area_ratio=isdoc.ocr_text_area_ratio(rgb),
+        laplacian_var=float(cv2.Laplacian(gray, cv2.CV_64F).var()),
+        edge_density=float(cv2.Canny(gray, 100, 200).mean() / 255.0),
+        rectangularity=isdoc.largest_contour_rectangularity(gray),
+        saturation_mean=float(cv2.cvtColor(rgb, cv2.COLOR_RGB2HSV)[..., 1].mean() / 255.0),
+        entropy_gray=float(-np.sum(p * np.log2(p + 1e-12))),
+    )
+
+
+def _median_ms(fn, repeats: int):
+    samples, result = [], None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return round(statistics.median(samples), 2), result
+
+
+def staged_breakdown(data: bytes, side: int, repeats: int) -> dict:
+    decode_ms, rgb = _median_ms(lambda: isdoc.load_image_from_bytes(data, side), repeats)
+    features_ms, feat = _median_ms(lambda: isdoc.image_features(rgb), repeats)
+    total_ms, analysis = _median_ms(lambda: isdoc.analyze_image(data, analysis_side=side), repeats)
+    return {
+        "total_ms": total_ms,
+        "decode_ms": decode_ms,
+        "features_ms": features_ms,
+        "ocr": analysis.ocr,
+        "ocr_would_run": isdoc.needs_ocr(isdoc.rule_based_score(feat), settings.is_document_ocr_band),
+        "score": round(analysis.score, 3),
+        "label": analysis.label,
+    }
+
+
+async def _http(images: dict, repeats: int) -> dict:
+    from httpx import ASGITransport, AsyncClient
+    from app.api.dependencies import get_current_user
+    from main import app
+
+    # Both endpoints need a signed-in user; this measures classification, not auth
+    app.dependency_overrides[get_current_user] = lambda: None
+    files = [("files", (name, data, "application/octet-stream")) for name, data in images.items()]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        async def singles():
+            for name, data in images.items():
+                (await client.post("/api/v1/is_document", files={"file": (name, data)})).raise_for_status()
+
+        async def batch():
+            (await client.post("/api/v1/is_document/batch", files=files)).raise_for_status()
+
+        out = {}
+        for label, fn in (("single_requests", singles), ("batch_request", batch)):
+            await fn()
+            samples = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                await fn()
+                samples.append((time.perf_counter() - started) * 1000.0)
+            out[label + "_ms"] = round(statistics.median(samples), 2)
+    out["images"] = len(images)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images-dir", type=Path, default=Path(BACKEND_DIR) / "tests" / "test_images")
+    parser.add_argument("--sides", type=int, nargs="+", default=[512, 1600])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--out", default=None, help="write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    isdoc._load_libs()
+    images = {p.name: p.read_bytes() for p in sorted(args.images_dir.iterdir()) if p.suffix.lower() in IMAGE_SUFFIXES}
+    if not images:
+        raise SystemExit(f"no images in {args.images_dir}")
+
+    per_image = {}
+    for name, data in images.items():
+        legacy_ms, feat = _median_ms(lambda: legacy_features(data), args.repeats)
+        label, _, score = isdoc.classify(feat)
+        row = {"legacy": {"total_ms": legacy_ms, "score": round(score, 3), "label": label}}
+        for side in args.sides:
+            row[f"staged@{side}"] = staged_breakdown(data, side, args.repeats)
+        per_image[name] = row
+        print(
+            f"{name:<20} legacy {legacy_ms:>7.1f} ms  "
+            + "  ".join(f"@{side} {row[f'staged@{side}']['total_ms']:>6.1f} ms" for side in args.sides),
+            file=sys.stderr,
+        )
+
+    variants = ["legacy"] + [f"staged@{side}" for side in args.sides]
+    summary = {
+        v: {
+            "mean_ms": round(statistics.fmean(r[v]["total_ms"] for r in per_image.values()), 2),
+            "labels_match_legacy": sum(r[v]["label"] == r["legacy"]["label"] for r in per_image.values()),
+        }
+        for v in variants
+    }
+    report = {
+        "images": len(images),
+        "tesseract": isdoc.tesseract_available(),
+        "ocr_band": settings.is_document_ocr_band,
+        "summary": summary,
+        "per_image": per_image,
+        "http": asyncio.run(_http(images, args.repeats)),
+    }
+    print(f"http: {report['http']}", file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
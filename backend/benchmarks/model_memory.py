@@ -0,0 +1,208 @@
+"""
+Memory per worker and in total for the image classifier hosting modes (Linux).
+
+Each mode runs in its own process that plays the gunicorn master: it imports the
+app (``preload_app``), optionally loads the classifier, then forks ``--workers``
+workers. Each worker classifies ``--requests`` images and the master reads every
+worker's ``/proc/<pid>/smaps_rollup``:
+
+- ``rss``: resident pages, shared ones counted in full for every process. It
+  cannot show sharing, so its sum overstates the total.
+- ``pss``: shared pages split between the processes sharing them. The sum over
+  master + workers is the real footprint.
+- ``private``: pages only this worker has (what an extra worker costs).
+
+Modes:
+
+- ``per_request`` (before): every request loads the weights again (the old
+  predict_photo_probability)
+- ``per_worker`` (before): each worker loads its own copy once, with no mmap and
+  no thread limit
+- ``mmap``: each worker loads with ``torch.load(mmap=True)`` on first use
+  (``uvicorn --workers`` or gunicorn with ``PRELOAD_MODEL=false``)
+- ``preload``: the master loads the classifier before fork (no mmap)
+- ``preload_mmap``: the master loads it memory-mapped before fork (gunicorn.conf.py default)
+
+The three sharing modes limit torch to CPUs / workers threads per worker (post_fork).
+Without ``best_model.pt`` the weights are random resnet18 weights of the same size.
+
+Usage (from backend/):
+    python -m benchmarks.model_memory [--workers 4] [--requests 20] [--modes per_request preload_mmap] [--out mem.json]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+MODES = ("per_request", "per_worker", "mmap", "preload", "preload_mmap")
+_SHARING = {"mmap", "preload", "preload_mmap"}
+
+
+def smaps_rollup(pid: int) -> dict:
+    """rss / pss / private / shared in MiB from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    mib = lambda kb: round(kb / 1024.0, 1)  # noqa: E731
+    return {
+        "rss": mib(fields.get("Rss", 0)),
+        "pss": mib(fields.get("Pss", 0)),
+        "private": mib(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)),
+        "shared": mib(fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)),
+    }
+
+
+def _sample_image() -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.effect_noise((640, 480), 40).convert("RGB").save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def _worker(mode: str, workers: int, requests: int, ready_w: int, hold_r: int) -> None:
+    from app.services.image_classifier import image_classifier as ic
+
+    threads = ic.configure_threads(workers) if mode in _SHARING else None
+    image = _sample_image()
+    started = time.perf_counter()
+    for _ in range(requests):
+        if mode == "per_request":
+            ic.load_classifier(mmap=False).predict(image)
+        else:
+            ic.predict_photo_probability(image)
+    elapsed = time.perf_counter() - started
+    import torch
+
+    os.write(ready_w, (json.dumps({"threads": threads or torch.get_num_threads(), "ms_per_request": round(elapsed * 1000 / requests, 1)}) + "\n").encode())
+    # Stay alive (and resident) until the master has measured us
+    os.read(hold_r, 1)
+    os._exit(0)
+
+
+def run_mode(mode: str, workers: int, requests: int) -> dict:
+    """Master side; runs in a fresh process per mode (see ``--single``)."""
+    import main  # noqa: F401  (preload_app)
+
+    if mode.startswith("preload"):
+        from app.services.image_classifier.image_classifier import preload_model
+
+        if not preload_model():
+            raise SystemExit("no weights file")
+
+    ready_r, ready_w = os.pipe()
+    hold_r, hold_w = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            os.close(hold_w)
+            try:
+                _worker(mode, workers, requests, ready_w, hold_r)
+            finally:
+                os._exit(1)
+        pids.append(pid)
+    os.close(ready_w)
+    os.close(hold_r)
+
+    reports = []
+    with os.fdopen(ready_r) as ready:
+        for _ in range(workers):
+            line = ready.readline()
+            if not line:
+                raise SystemExit(f"{mode}: a worker exited early")
+            reports.append(json.loads(line))
+
+    master = smaps_rollup(os.getpid())
+    per_worker = [smaps_rollup(pid) for pid in pids]
+    os.close(hold_w)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    total = lambda key: round(master[key] + sum(w[key] for w in per_worker), 1)  # noqa: E731
+    return {
+        "mode": mode,
+        "workers": workers,
+        "torch_threads_per_worker": reports[0]["threads"],
+        "ms_per_request": round(sum(r["ms_per_request"] for r in reports) / len(reports), 1),
+        "master": master,
+        "worker_mean": {k: round(sum(w[k] for w in per_worker) / workers, 1) for k in ("rss", "pss", "private", "shared")},
+        "total_rss": total("rss"),
+        "total_pss": total("pss"),
+    }
+
+
+def _random_weights(path: str) -> None:
+    import torch
+    from app.services.image_classifier.image_classifier import LABEL_MAP, MODEL_NAME, build_model
+
+    model, _ = build_model(MODEL_NAME, num_classes=len(LABEL_MAP))
+    torch.save(model.state_dict(), path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20, help="images classified by each worker before measuring")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--weights", default=None, help="weights file (default: the app's, else random resnet18 weights)")
+    parser.add_argument("--out", default=None, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--single", default=None, choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_mode(args.single, args.workers, args.requests)))
+        return
+
+    from app.services.image_classifier.image_classifier import weights_path
+
+    weights = args.weights or (str(weights_path()) if weights_path().exists() else None)
+    if weights is None:
+        weights = os.path.join(tempfile.mkdtemp(), "random_resnet18.pt")
+        _random_weights(weights)
+
+    runs = []
+    for mode in args.modes:
+        env = {
+            **os.environ,
+            "CLASSIFIER_WEIGHTS_PATH": os.path.abspath(weights),
+            "CLASSIFIER_MMAP": "true" if mode.endswith("mmap") else "false",
+            "WEB_CONCURRENCY": str(args.workers),
+            "EMAIL_BACKEND": "memory",
+        }
+        env.pop("CLASSIFIER_THREADS", None)
+        cmd = [sys.executable, "-m", "benchmarks.model_memory", "--single", mode, "--workers", str(args.workers), "--requests", str(args.requests)]
+        proc = subprocess.run(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            raise SystemExit(f"mode {mode} failed")
+        run = json.loads(proc.stdout.strip().splitlines()[-1])
+        runs.append(run)
+        print(
+            f"{mode:<13} worker rss {run['worker_mean']['rss']:>7.1f}  pss {run['worker_mean']['pss']:>7.1f}  "
+            f"private {run['worker_mean']['private']:>7.1f}  total rss {run['total_rss']:>7.1f}  total pss {run['total_pss']:>7.1f} MiB  "
+            f"{run['ms_per_request']:>7.1f} ms/img",
+            file=sys.stderr,
+        )
+
+    report = {"weights_mib": round(os.path.getsize(weights) / 2**20, 1), "cpus": os.cpu_count(), "runs": runs}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
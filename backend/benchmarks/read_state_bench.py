@@ -0,0 +1,184 @@
+"""
+Compare the message read-state backends (rows vs watermark).
+
+Builds one case watched by ``--users`` persons with ``--messages`` recent messages
+(a quarter of them in task threads). Every reader has read a random prefix of the
+chat (or, with --unread-max, is at most that many messages behind); the rows backend holds a message_not_seen row for each unread message and the
+watermark backend one message_read_state row per thread. It then reports:
+
+- rows written per posted message (the chat-line write amplification)
+- time to post messages through each store
+- latency of the unseen-counts query for a sample of readers
+
+Usage (from backend/):
+    python -m benchmarks.read_state_bench [--messages 10000] [--users 100] [--url sqlite+aiosqlite:///bench.db]
+
+Without --url a throwaway SQLite file is used; pass a PostgreSQL URL for numbers
+that reflect production.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import insert, select, func  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker  # noqa: E402
+
+from app.db import Base  # noqa: E402
+from app.db.models.case import Case  # noqa: E402
+from app.db.models.message import Message  # noqa: E402
+from app.db.models.message_not_seen import MessageNotSeen  # noqa: E402
+from app.db.models.message_read_state import MessageReadState  # noqa: E402
+from app.db.models.person import Person  # noqa: E402
+from app.db.models.person_case import PersonCase  # noqa: E402
+from app.db.models.subject import Subject  # noqa: E402
+from app.db.models.task import Task  # noqa: E402
+from app.services.read_state import RowsReadState, WatermarkReadState, thread_of  # noqa: E402
+
+CHUNK = 20000
+
+
+async def _bulk(conn, model, rows):
+    for i in range(0, len(rows), CHUNK):
+        await conn.execute(insert(model), rows[i:i + CHUNK])
+
+
+async def build(engine, n_messages: int, n_users: int, seed: int, unread_max=None):
+    rnd = random.Random(seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as db:
+        subject = Subject(first_name="Bench", last_name="Subject")
+        db.add(subject)
+        await db.flush()
+        case = Case(subject_id=subject.id, case_number="BENCH-0001")
+        db.add(case)
+        await db.flush()
+        persons = [Person(first_name="User", last_name=str(i)) for i in range(n_users)]
+        db.add_all(persons)
+        await db.flush()
+        db.add_all([PersonCase(person_id=p.id, case_id=case.id) for p in persons])
+        tasks = [Task(case_id=case.id, assigned_by_id=persons[0].id, title=f"Task {i}", description="-") for i in range(10)]
+        db.add_all(tasks)
+        await db.commit()
+        case_id = case.id
+        person_ids = [p.id for p in persons]
+        task_ids = [t.id for t in tasks]
+
+    messages = []
+    for i in range(n_messages):
+        messages.append({
+            "id": i + 1,
+            "case_id": case_id,
+            "written_by_id": rnd.choice(person_ids),
+            "message": f"message {i}",
+            "task_id": rnd.choice(task_ids) if rnd.random() < 0.25 else None,
+        })
+
+    not_seen = []
+    watermarks = []
+    for pid in person_ids:
+        if unread_max is None:
+            read_upto = rnd.randint(0, n_messages)
+        else:
+            read_upto = n_messages - rnd.randint(0, min(unread_max, n_messages))
+        marks = {}
+        for m in messages[:read_upto]:
+            marks[thread_of(None, None, m["task_id"])] = m["id"]
+        for (thread_type, thread_id), last_id in marks.items():
+            watermarks.append({
+                "person_id": pid, "case_id": case_id, "thread_type": thread_type,
+                "thread_id": thread_id, "last_read_message_id": last_id,
+            })
+        not_seen.extend(
+            {"message_id": m["id"], "person_id": pid}
+            for m in messages[read_upto:]
+            if m["written_by_id"] != pid
+        )
+
+    async with engine.begin() as conn:
+        await _bulk(conn, Message, messages)
+        await _bulk(conn, MessageNotSeen, not_seen)
+        await _bulk(conn, MessageReadState, watermarks)
+    return case_id, person_ids
+
+
+async def time_posts(maker, store, case_id: int, author_id: int, n_posts: int):
+    written = 0
+    started = time.perf_counter()
+    async with maker() as db:
+        for i in range(n_posts):
+            m = Message(case_id=case_id, written_by_id=author_id, message=f"bench post {i}")
+            db.add(m)
+            await db.flush()
+            written += await store.on_message_created(db, m.id, case_id, author_id)
+            await db.commit()
+    elapsed = time.perf_counter() - started
+    return written / n_posts, elapsed / n_posts * 1000.0
+
+
+async def time_counts(maker, store, person_ids, repeats: int):
+    samples = []
+    async with maker() as db:
+        for pid in person_ids:
+            for _ in range(repeats):
+                started = time.perf_counter()
+                (await db.execute(store.unseen_counts_query(pid))).all()
+                samples.append((time.perf_counter() - started) * 1000.0)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--posts", type=int, default=50, help="messages posted per store when timing writes")
+    parser.add_argument("--sample", type=int, default=20, help="readers sampled for the counts query")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--unread-max", type=int, default=None, help="readers are at most this many messages behind")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", default=None)
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'read_state_bench.db')}"
+    engine = create_async_engine(url)
+    try:
+        case_id, person_ids = await build(engine, args.messages, args.users, args.seed, args.unread_max)
+        maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with maker() as db:
+            sizes = {
+                "message_not_seen_rows": (await db.execute(select(func.count()).select_from(MessageNotSeen))).scalar(),
+                "message_read_state_rows": (await db.execute(select(func.count()).select_from(MessageReadState))).scalar(),
+            }
+
+        sample = random.Random(args.seed).sample(person_ids, min(args.sample, len(person_ids)))
+        report = {"messages": args.messages, "users": args.users, "unread_max": args.unread_max, "url": url.split("@")[-1], **sizes, "backends": {}}
+        for store in (RowsReadState(), WatermarkReadState()):
+            counts = await time_counts(maker, store, sample, args.repeats)
+            writes, post_ms = await time_posts(maker, store, case_id, person_ids[0], args.posts)
+            report["backends"][store.name] = {
+                "rows_written_per_post": writes,
+                "post_ms": round(post_ms, 3),
+                "counts_query": counts,
+            }
+        print(json.dumps(report, indent=2))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
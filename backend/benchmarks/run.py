@@ -0,0 +1,162 @@
+"""
+Standalone API benchmark runner.
+
+For each ``--url`` (SQLite by default; add a local PostgreSQL URL for production-like
+numbers) it generates the ``--scale`` dataset (benchmarks.datagen), drives the
+top endpoints in-process (benchmarks.api_harness) and writes one JSON report:
+
+    {"meta": {commit, python, platform, scale, seed, ...},
+     "runs": [{"database": "sqlite", "dataset": {...}, "results": {scenario: {median_ms, p95_ms, ...}}}]}
+
+``--compare baseline.json`` prints the median change per scenario against an
+earlier report and, with ``--fail-on-regression``, exits 1 when any scenario is
+slower by more than ``--threshold``.
+
+Usage (from backend/):
+    python -m benchmarks.run [--scale small] [--url sqlite+aiosqlite:///bench.db --url postgresql+psycopg://...]
+        [--scenarios search message_list] [--out bench.json] [--compare baseline.json]
+
+Each database runs in its own process: the app binds its engine at import time.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks import api_harness  # noqa: E402
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+
+def _redact(url: str) -> str:
+    return url.split("@")[-1] if "@" in url else url
+
+
+async def run_single(url: str, scale: str, seed: int, scenarios, repeats: int, warmup: int) -> dict:
+    api_harness.configure(url)
+    from benchmarks.datagen import generate
+    from app.db.session import engine
+
+    started = time.perf_counter()
+    dataset = await generate(engine, scale, seed)
+    generate_seconds = time.perf_counter() - started
+
+    ctx = await api_harness.open_context(dataset)
+    results = {}
+    try:
+        for name in scenarios:
+            results[name] = await api_harness.time_scenario(ctx, name, repeats=repeats, warmup=warmup)
+            print(f"  {name:<16} median {results[name]['median_ms']:>9.2f} ms  queries {results[name]['queries']}", file=sys.stderr)
+    finally:
+        await api_harness.close_context(ctx)
+    return {
+        "database": engine.dialect.name,
+        "url": _redact(url),
+        "dataset": dataset.rows,
+        "generate_seconds": round(generate_seconds, 2),
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> bool:
+    """Print the median change per scenario; True when any is slower than ``threshold``."""
+    regressed = False
+    base_runs = {r["database"]: r for r in baseline.get("runs", [])}
+    print(f"{'database':<11} {'scenario':<16} {'base ms':>9} {'now ms':>9} {'change':>8}")
+    for run in report["runs"]:
+        base = base_runs.get(run["database"])
+        if base is None:
+            continue
+        for name, now in run["results"].items():
+            before = base["results"].get(name)
+            if not before:
+                continue
+            change = now["median_ms"] / before["median_ms"] - 1.0 if before["median_ms"] else 0.0
+            flag = ""
+            if change > threshold:
+                regressed = True
+                flag = "  REGRESSION"
+            print(f"{run['database']:<11} {name:<16} {before['median_ms']:>9.2f} {now['median_ms']:>9.2f} {change:>+7.1%}{flag}")
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", default=None, help="database URL (repeatable); default: a temp SQLite file")
+    parser.add_argument("--scale", default="small", help="datagen scale: small | medium | production")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scenarios", nargs="+", default=list(api_harness.SCENARIOS), choices=list(api_harness.SCENARIOS))
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--out", default=None, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", default=None, help="earlier JSON report to compare medians with")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative median slowdown counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    urls = args.url or [f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"]
+
+    if args.single:
+        # Child process: one database, JSON on stdout
+        run = asyncio.run(run_single(urls[0], args.scale, args.seed, args.scenarios, args.repeats, args.warmup))
+        print(json.dumps(run))
+        return
+
+    runs = []
+    for url in urls:
+        print(f"{_redact(url)} ({args.scale})", file=sys.stderr)
+        cmd = [
+            sys.executable, "-m", "benchmarks.run", "--single", "--url", url, "--scale", args.scale,
+            "--seed", str(args.seed), "--repeats", str(args.repeats), "--warmup", str(args.warmup),
+            "--scenarios", *args.scenarios,
+        ]
+        proc = subprocess.run(cmd, cwd=BACKEND_DIR, stdout=subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            raise SystemExit(f"benchmark run failed for {_redact(url)}")
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    report = {
+        "meta": {
+            "commit": _git("rev-parse", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "seed": args.seed,
+            "repeats": args.repeats,
+            "warmup": args.warmup,
+        },
+        "runs": runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold) and args.fail_on_regression:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Response serialization cost for large list endpoints.
+
+Times building the response body for ``--messages`` MessageRead items (the case
+messages list) and ``--timeline`` timeline rows (dicts with date/time values):
+
+- ``fastapi``: the default path: dump the models, validate them again against
+  ``response_model``, ``jsonable_encoder``, then ``json.dumps`` (JSONResponse)
+- ``fast``: ``validated_response`` (one pydantic ``dump_json``) for models and
+  ``FastJSONResponse`` (orjson) for dict rows
+
+Both paths must produce the same JSON document; the benchmark checks that first.
+
+Usage (from backend/):
+    python -m benchmarks.serialization_bench [--messages 5000] [--timeline 1000] [--repeats 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from app.api.responses import FastJSONResponse, validated_response  # noqa: E402
+from app.core.id_codec import encode_id  # noqa: E402
+from app.schemas.message import MessageRead, ReactionGroup  # noqa: E402
+
+
+def make_messages(n: int, rng: random.Random) -> list:
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    items = []
+    for i in range(1, n + 1):
+        created = base + timedelta(minutes=i)
+        has_file = i % 10 == 0
+        items.append(
+            MessageRead(
+                id=i,
+                case_id=42,
+                written_by_id=rng.randint(1, 50),
+                message=f"Message {i} " + "lorem ipsum " * rng.randint(1, 20),
+                reply_to_id=i - 1 if i % 7 == 0 else None,
+                rule_out=i % 13 == 0,
+                task_id=rng.randint(1, 200) if i % 5 == 0 else None,
+                file_id=i if has_file else None,
+                file_name=f"file-{i}.jpg" if has_file else None,
+                file_mime_type="image/jpeg" if has_file else None,
+                file_is_image=True if has_file else None,
+                created_at=created,
+                updated_at=created,
+                writer_name="Jane Doe",
+                seen=bool(i % 2),
+                reactions=[ReactionGroup(emoji="+1", count=rng.randint(1, 5))] if i % 4 == 0 else [],
+                reply_to_text="Previous message" if i % 7 == 0 else None,
+                is_mine=i % 3 == 0,
+                writer_photo_url="/images/pfp-generic.png",
+                my_photo_url="/images/pfp-generic.png",
+            )
+        )
+    return items
+
+
+def make_timeline(n: int, rng: random.Random) -> list:
+    start = date(2025, 1, 1)
+    return [
+        {
+            "id": encode_id("timeline", i),
+            "date": start + timedelta(days=i // 4),
+            "time": dtime(rng.randint(0, 23), rng.randint(0, 59)),
+            "who_id": encode_id("subject", rng.randint(1, 20)),
+            "who_name": "John Doe",
+            "where": "Springfield",
+            "details": "Seen near the station " * rng.randint(1, 5),
+            "rule_out": False,
+            "type_id": encode_id("ref_value", rng.randint(1, 10)),
+            "type_other": None,
+            "type_name": "Sighting",
+            "type_code": "SIGHTING",
+            "comments": None,
+            "questions": None,
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def fastapi_body(field, content) -> bytes:
+    # What APIRoute does with a response_model and the default JSONResponse
+    value = asyncio.run(serialize_response(field=field, response_content=content, is_coroutine=True))
+    return JSONResponse(value).body
+
+
+def _time(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--timeline", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    messages = make_messages(args.messages, rng)
+    timeline = make_timeline(args.timeline, rng)
+    message_field = create_model_field(name="Response_messages", type_=List[MessageRead], mode="serialization")
+    timeline_field = None  # the timeline route has no response_model
+
+    cases = [
+        (
+            f"messages ({args.messages})",
+            lambda: fastapi_body(message_field, messages),
+            lambda: validated_response(messages, List[MessageRead]).body,
+        ),
+        (
+            f"timeline ({args.timeline})",
+            lambda: fastapi_body(timeline_field, timeline),
+            lambda: FastJSONResponse(timeline).body,
+        ),
+    ]
+
+    print(f"{'payload':<20} {'fastapi ms':>11} {'fast ms':>9} {'speedup':>8} {'bytes':>9}")
+    for name, standard, fast in cases:
+        if json.loads(standard()) != json.loads(fast()):
+            raise SystemExit(f"{name}: fast path output differs from the FastAPI path")
+        t_std = _time(standard, args.repeats)
+        t_fast = _time(fast, args.repeats)
+        print(f"{name:<20} {t_std * 1000:>11.2f} {t_fast * 1000:>9.2f} {t_std / t_fast:>7.1f}x {len(fast()):>9}")
+
+
+if __name__ == "__main__":
+    main()
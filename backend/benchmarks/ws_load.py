@@ -0,0 +1,642 @@
+"""
+WebSocket and concurrency load test for the messaging subsystem.
+
+Seeds ``--users`` users spread round-robin over ``--cases`` cases directly in the
+server's database (one server session per user, so sockets use the same
+``uid``/``sid`` query parameters as the web client) and opens one socket per
+user. It then drives the REST API at fixed, open-loop rates for ``--duration``
+seconds:
+
+- ``--rate`` messages per second, posted by random users on their own case
+- ``--reaction-rate`` reactions per second on messages the reacting user has seen
+- ``--seen-rate`` mark-seen-up-to calls per second
+
+Each message embeds a sequence number and its send time. Protocol-2 clients
+(hello + subscribe, batched full payloads) use them to measure delivery latency
+(post -> frame received) and to count dropped frames. Expected deliveries are one
+``created`` event per message and one ``updated`` event per reaction for every
+socket subscribed to the case. Protocol-1 clients only get thin events and
+debounced counts, so drops are not computed for them.
+
+The server's ``/metrics`` endpoint is scraped before and after the load and sampled
+while it runs. The JSON report has:
+
+- achieved request rates, HTTP latency and errors per action
+- delivery latency percentiles and dropped/duplicate frames
+- SQL statements per event (all server queries, including WebSocket fan-out and
+  debounced recounts, over actions completed) and per route
+- ``_CaseWSManager`` memory (``ws_manager_bytes``), queued events and server RSS at
+  baseline, once connected, at peak, after draining and after every socket closed
+- frames/bytes per second, events per frame and server CPU seconds per second (Linux /proc)
+
+By default it runs fully locally. It creates a SQLite database in a temp
+directory, starts ``uvicorn main:app`` against it on a free port and stops it at
+the end. ``--db-url`` selects another local database for the spawned server; it
+must already have the schema unless ``--create-schema`` is given. To load an
+already running server instead:
+
+    uvicorn main:app --port 8000 &
+    python -m benchmarks.ws_load --server http://127.0.0.1:8000 --server-pid $! --db-url <its DATABASE_URL>
+
+Usage (from backend/):
+    python -m benchmarks.ws_load [--users 500 --cases 50 --rate 20 --reaction-rate 10 --seen-rate 10]
+        [--duration 30] [--protocol 1|2] [--out ws_report.json]
+
+Run it once with --protocol 1 and once with --protocol 2 to compare the legacy
+thin-event protocol with subscriptions and batching. The manager lives in one
+process, so the spawned server runs a single worker.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, deque
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx  # noqa: E402
+import websockets  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.id_codec import encode_id, set_current_session, reset_current_session  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db import Base  # noqa: E402
+from app.db.models.app_user import AppUser  # noqa: E402
+from app.db.models.app_user_case import AppUserCase  # noqa: E402
+from app.db.models.case import Case  # noqa: E402
+from app.db.models.person import Person  # noqa: E402
+from app.db.models.subject import Subject  # noqa: E402
+from app.services.auth import create_user_session  # noqa: E402
+
+MARKER = "wsload:"
+REACTIONS = ("👍", "❤️", "😂", "👀")
+
+
+async def seed(db_url: str, n_users: int, n_cases: int, run_id: str, create_schema: bool = False) -> list[dict]:
+    """Create users, persons, cases and assignments; one user per socket, round-robin over cases."""
+    engine = create_async_engine(db_url)
+    if create_schema:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    clients = []
+    async with maker() as db:
+        cases = []
+        for i in range(n_cases):
+            subject = Subject(first_name="Load", last_name=f"{run_id}-{i}")
+            db.add(subject)
+            await db.flush()
+            case = Case(subject_id=subject.id, case_number=f"WS-{run_id}-{i:04d}")
+            db.add(case)
+            cases.append(case)
+        await db.flush()
+        for i in range(n_users):
+            email = f"wsload-{run_id}-{i}@example.com"
+            user = AppUser(email=email, password_hash="-", is_active=True)
+            db.add(user)
+            await db.flush()
+            db.add(Person(first_name="Load", last_name=f"User {i}", app_user_id=user.id))
+            case = cases[i % n_cases]
+            db.add(AppUserCase(app_user_id=user.id, case_id=case.id))
+            jti = uuid.uuid4().hex
+            await create_user_session(db, user.id, jti, 240)
+            ctx = set_current_session(jti)
+            try:
+                enc_uid = encode_id("app_user", int(user.id))
+                enc_case = encode_id("case", int(case.id))
+            finally:
+                reset_current_session(ctx)
+            clients.append({
+                "case": i % n_cases,
+                "uid": enc_uid,
+                "sid": jti,
+                "case_id": enc_case,
+                "token": create_access_token(sub=email, jti=jti),
+                # Message ids this user can address (encoded under its own session), newest last
+                "known": deque(maxlen=50),
+            })
+        await db.commit()
+    await engine.dispose()
+    return clients
+
+
+# ---------------------------------------------------------------------------
+# Local server
+# ---------------------------------------------------------------------------
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(db_url: str, port: int, log_path: str) -> subprocess.Popen:
+    """``uvicorn main:app`` on 127.0.0.1:``port`` against ``db_url``, output to ``log_path``."""
+    env = {**os.environ, "DATABASE_URL": db_url, "METRICS_ENABLED": "true", "MAINTENANCE_ENABLED": "false", "EMAIL_BACKEND": "memory"}
+    for name in ("DATABASE_READ_URL", "METRICS_TOKEN", "FRONTEND_AUTOSTART"):
+        env.pop(name, None)
+    log = open(log_path, "wb")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_ready(server: str, proc: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=server, timeout=2) as http:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {proc.returncode}")
+            try:
+                if (await http.get("/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime and stime are fields 14 and 15 of the full line
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _rss_bytes(pid: int):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Server metrics
+# ---------------------------------------------------------------------------
+_SAMPLE = re.compile(r"^([a-zA-Z_:][\w:]*)(\{.*\})?\s+(\S+)$")
+
+
+class Metrics:
+    """Scraper for the server's Prometheus text endpoint."""
+
+    def __init__(self, server: str, token=None):
+        self.server = server
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    async def scrape(self) -> dict:
+        async with httpx.AsyncClient(base_url=self.server, timeout=10) as http:
+            r = await http.get("/metrics", headers=self.headers)
+            r.raise_for_status()
+        samples = {}
+        for line in r.text.splitlines():
+            m = _SAMPLE.match(line)
+            if m:
+                samples[(m.group(1), m.group(2) or "")] = float(m.group(3))
+        return samples
+
+
+def _value(samples: dict, name: str, labels: str = ""):
+    return samples.get((name, labels))
+
+
+def _route_queries(before: dict, after: dict) -> dict:
+    """Per-route request count, SQL statements and DB ms per request during the load."""
+    out = {}
+    for (name, labels), count in after.items():
+        if name != "http_request_db_queries_count":
+            continue
+        n = count - before.get((name, labels), 0.0)
+        route = labels[len('{route="'):-len('"}')]
+        if n <= 0 or route == "/metrics":
+            continue
+        queries = after[("http_request_db_queries_sum", labels)] - before.get(("http_request_db_queries_sum", labels), 0.0)
+        db_s = after.get(("http_request_db_seconds_sum", labels), 0.0) - before.get(("http_request_db_seconds_sum", labels), 0.0)
+        out[route] = {"requests": int(n), "queries_per_request": round(queries / n, 2), "db_ms_per_request": round(db_s * 1000 / n, 3)}
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+class Stats:
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.events = 0
+        self.events_by_type: Counter = Counter()
+        self.latencies_ms: list[float] = []
+        self.deflate = 0
+        self.connected = 0
+        self.errors = 0
+        self.closed_by_server = 0
+        # Case index -> sockets subscribed to the whole case (protocol 2)
+        self.subscribed: Counter = Counter()
+        # Deliveries each socket should see (protocol 2) and what arrived
+        self.expected: Counter = Counter()
+        self.received: Counter = Counter()
+        self.duplicates = 0
+        # Per action: successes, HTTP errors, request latencies
+        self.sent: Counter = Counter()
+        self.http_errors: Counter = Counter()
+        self.http_ms: dict[str, list[float]] = {"message": [], "reaction": [], "seen": []}
+
+    def record_event(self, event: dict, now_ns: int, info: dict, seen_seqs: set) -> None:
+        self.events += 1
+        kind = event.get("type")
+        if kind == "message":
+            kind = f"message.{event.get('event')}"
+            message = event.get("message") or {}
+            if message.get("id"):
+                info["known"].append(message["id"])
+        self.events_by_type[kind] += 1
+        if kind == "message.updated":
+            self.received["updated"] += 1
+        if kind != "message.created":
+            return
+        text = (event.get("message") or {}).get("message") or ""
+        if not text.startswith(MARKER):
+            return
+        seq, sent_ns = text[len(MARKER):].split(":")
+        if seq in seen_seqs:
+            self.duplicates += 1
+            return
+        seen_seqs.add(seq)
+        self.received["created"] += 1
+        self.latencies_ms.append((now_ns - int(sent_ns)) / 1e6)
+
+
+async def client(ws_base: str, info: dict, protocol: int, stats: Stats, stop: asyncio.Event) -> None:
+    url = f"{ws_base}/api/v1/cases/messages/ws?uid={info['uid']}&sid={info['sid']}"
+    seen_seqs: set = set()
+    subscribed = False
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            stats.connected += 1
+            if "permessage-deflate" in (ws.response.headers.get("Sec-WebSocket-Extensions") or ""):
+                stats.deflate += 1
+            if protocol >= 2:
+                await ws.send(json.dumps({"action": "hello", "protocol": protocol}))
+                await ws.send(json.dumps({"action": "subscribe", "case_id": info["case_id"]}))
+            while not stop.is_set():
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                now_ns = time.time_ns()
+                stats.frames += 1
+                stats.bytes += len(raw)
+                frame = json.loads(raw)
+                kind = frame.get("type")
+                if kind == "batch":
+                    for event in frame.get("events") or []:
+                        stats.record_event(event, now_ns, info, seen_seqs)
+                elif kind == "subscribed" and not subscribed:
+                    subscribed = True
+                    stats.subscribed[info["case"]] += 1
+                elif kind not in ("hello", "subscribed", "ok", "pong"):
+                    stats.record_event(frame, now_ns, info, seen_seqs)
+    except websockets.ConnectionClosed:
+        stats.closed_by_server += 1
+    except Exception:
+        stats.errors += 1
+
+
+class Actions:
+    """The REST calls the simulated users make; each records latency and expected deliveries."""
+
+    def __init__(self, http: httpx.AsyncClient, clients: list[dict], stats: Stats, rnd: random.Random):
+        self.http = http
+        self.clients = clients
+        self.stats = stats
+        self.rnd = rnd
+        self.seq = 0
+
+    async def _request(self, action: str, info: dict, path: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            r = await self.http.post(path, headers={"Authorization": f"Bearer {info['token']}"}, **kwargs)
+        except httpx.HTTPError:
+            self.stats.http_errors[action] += 1
+            return None
+        self.stats.http_ms[action].append((time.perf_counter() - started) * 1000.0)
+        if r.status_code != 200:
+            self.stats.http_errors[action] += 1
+            return None
+        self.stats.sent[action] += 1
+        return r
+
+    async def message(self) -> None:
+        info = self.rnd.choice(self.clients)
+        self.seq += 1
+        # Counted before sending: a frame can arrive before the response
+        expected = self.stats.subscribed[info["case"]]
+        self.stats.expected["created"] += expected
+        r = await self._request(
+            "message", info, f"/api/v1/cases/{info['case_id']}/messages", json={"message": f"{MARKER}{self.seq}:{time.time_ns()}"},
+        )
+        if r is None:
+            self.stats.expected["created"] -= expected
+            return
+        info["known"].append(r.json()["id"])
+
+    def _with_known(self):
+        candidates = [c for c in self.clients if c["known"]]
+        return self.rnd.choice(candidates) if candidates else None
+
+    async def reaction(self) -> None:
+        info = self._with_known()
+        if info is None:
+            return
+        expected = self.stats.subscribed[info["case"]]
+        self.stats.expected["updated"] += expected
+        r = await self._request(
+            "reaction", info, f"/api/v1/cases/{info['case_id']}/messages/{self.rnd.choice(info['known'])}/reaction",
+            json={"reaction": self.rnd.choice(REACTIONS)},
+        )
+        if r is None:
+            self.stats.expected["updated"] -= expected
+
+    async def seen(self) -> None:
+        info = self._with_known()
+        if info is None:
+            return
+        await self._request("seen", info, f"/api/v1/cases/{info['case_id']}/messages/mark_seen_up_to/{info['known'][-1]}")
+
+
+async def paced(rate: float, fire, stop: asyncio.Event) -> None:
+    """Call ``fire`` ``rate`` times a second without waiting for earlier calls (open loop)."""
+    if rate <= 0:
+        return
+    interval = 1.0 / rate
+    in_flight: set = set()
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        task = asyncio.create_task(fire())
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+    if in_flight:
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+class Sampler:
+    """Samples WebSocket manager gauges and server RSS while the load runs."""
+
+    def __init__(self, metrics: Metrics, pid=None):
+        self.metrics = metrics
+        self.pid = pid
+        self.started = time.perf_counter()
+        self.samples: list[dict] = []
+
+    async def sample(self) -> dict:
+        m = await self.metrics.scrape()
+        point = {
+            "t": round(time.perf_counter() - self.started, 2),
+            "manager_bytes": _value(m, "ws_manager_bytes"),
+            "queued_events": _value(m, "ws_queued_events"),
+            "connections": _value(m, "ws_connections"),
+            "rss_bytes": _rss_bytes(self.pid) if self.pid else None,
+        }
+        self.samples.append(point)
+        return point
+
+    async def run(self, interval: float, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                await self.sample()
+            except httpx.HTTPError:
+                pass
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def peak(self, key: str):
+        values = [s[key] for s in self.samples if s[key] is not None]
+        return max(values) if values else None
+
+
+def _pct(values: list[float], q: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 2)
+
+
+def _latency(values: list[float]) -> dict:
+    return {
+        "samples": len(values),
+        "p50": _pct(values, 0.50),
+        "p95": _pct(values, 0.95),
+        "p99": _pct(values, 0.99),
+        "max": round(max(values), 2) if values else None,
+        "mean": round(statistics.fmean(values), 2) if values else None,
+    }
+
+
+async def run(args, server: str, db_url: str, server_pid, create_schema: bool) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    clients = await seed(db_url, args.users, args.cases, run_id, create_schema=create_schema)
+    ws_base = server.replace("http://", "ws://").replace("https://", "wss://")
+    metrics = Metrics(server, args.metrics_token)
+    sampler = Sampler(metrics, server_pid)
+    phases = {"baseline": await sampler.sample()}
+
+    stats = Stats()
+    close = asyncio.Event()
+    readers = [asyncio.create_task(client(ws_base, info, args.protocol, stats, close)) for info in clients]
+    # Let every socket connect (and subscribe) and the server register it before measuring
+    deadline = time.monotonic() + max(10.0, args.users / 20.0)
+    while time.monotonic() < deadline:
+        point = await sampler.sample()
+        settled = stats.connected + stats.errors >= len(clients) and (point["connections"] or 0) >= stats.connected
+        if settled and (args.protocol < 2 or sum(stats.subscribed.values()) >= stats.connected):
+            break
+        await asyncio.sleep(0.2)
+    sampler.samples.clear()
+    phases["connected"] = await sampler.sample()
+    before = await metrics.scrape()
+
+    cpu_start = _cpu_seconds(server_pid) if server_pid else None
+    frames_start, bytes_start, events_start = stats.frames, stats.bytes, stats.events
+    stop_load, stop_sampling = asyncio.Event(), asyncio.Event()
+    sampling = asyncio.create_task(sampler.run(args.sample_interval, stop_sampling))
+    started = time.perf_counter()
+    limits = httpx.Limits(max_connections=args.http_connections, max_keepalive_connections=args.http_connections)
+    async with httpx.AsyncClient(base_url=server, timeout=60, limits=limits) as http:
+        actions = Actions(http, clients, stats, random.Random(args.seed))
+        load = [
+            asyncio.create_task(paced(args.rate, actions.message, stop_load)),
+            asyncio.create_task(paced(args.reaction_rate, actions.reaction, stop_load)),
+            asyncio.create_task(paced(args.seen_rate, actions.seen, stop_load)),
+        ]
+        await asyncio.sleep(args.duration)
+        stop_load.set()
+        await asyncio.gather(*load)
+    load_seconds = time.perf_counter() - started
+    # In-flight batches, debounced counts and slow sends still arrive
+    await asyncio.sleep(args.drain)
+    elapsed = time.perf_counter() - started
+    cpu_end = _cpu_seconds(server_pid) if server_pid else None
+    stop_sampling.set()
+    await sampling
+    phases["drained"] = await sampler.sample()
+    after = await metrics.scrape()
+
+    close.set()
+    await asyncio.gather(*readers)
+    await asyncio.sleep(1.0)
+    phases["closed"] = await sampler.sample()
+
+    frames = stats.frames - frames_start
+    actions_done = sum(stats.sent.values())
+    queries = (_value(after, "db_queries_total") or 0) - (_value(before, "db_queries_total") or 0)
+    send_errors = (_value(after, "ws_send_errors_total") or 0) - (_value(before, "ws_send_errors_total") or 0)
+    delivery = None
+    if args.protocol >= 2:
+        delivery = {
+            kind: {
+                "expected": stats.expected[kind],
+                "received": stats.received[kind],
+                "dropped": max(0, stats.expected[kind] - stats.received[kind]),
+                "drop_rate": round(max(0, stats.expected[kind] - stats.received[kind]) / stats.expected[kind], 4) if stats.expected[kind] else None,
+            }
+            for kind in ("created", "updated")
+        }
+        delivery["duplicates"] = stats.duplicates
+    connected_bytes = phases["connected"]["manager_bytes"]
+    return {
+        "protocol": args.protocol,
+        "users": args.users,
+        "cases": args.cases,
+        "connected": stats.connected,
+        "client_errors": stats.errors,
+        "closed_by_server": stats.closed_by_server,
+        "subscribed": sum(stats.subscribed.values()),
+        "permessage_deflate": stats.deflate,
+        "seconds": round(load_seconds, 2),
+        "drain_seconds": args.drain,
+        "actions": {
+            action: {
+                "target_per_second": rate,
+                "sent": stats.sent[action],
+                "per_second": round(stats.sent[action] / load_seconds, 2),
+                "http_errors": stats.http_errors[action],
+                "http_ms": _latency(stats.http_ms[action]),
+            }
+            for action, rate in (("message", args.rate), ("reaction", args.reaction_rate), ("seen", args.seen_rate))
+        },
+        "delivery_latency_ms": _latency(stats.latencies_ms),
+        "delivery": delivery,
+        "server_send_errors": int(send_errors),
+        "frames_per_second": round(frames / elapsed, 1),
+        "kib_per_second": round((stats.bytes - bytes_start) / 1024 / elapsed, 1),
+        "events_per_frame": round((stats.events - events_start) / frames, 2) if frames else None,
+        "events_by_type": dict(stats.events_by_type),
+        "server_queries": {
+            "total": int(queries),
+            "per_event": round(queries / actions_done, 2) if actions_done else None,
+            "by_route": _route_queries(before, after),
+        },
+        "memory": {
+            **phases,
+            "peak_manager_bytes": sampler.peak("manager_bytes"),
+            "peak_queued_events": sampler.peak("queued_events"),
+            "peak_rss_bytes": sampler.peak("rss_bytes"),
+            "manager_growth_bytes": (
+                phases["drained"]["manager_bytes"] - connected_bytes
+                if connected_bytes is not None and phases["drained"]["manager_bytes"] is not None else None
+            ),
+            "samples": sampler.samples,
+        },
+        "server_cpu_per_second": round((cpu_end - cpu_start) / elapsed, 3) if cpu_start is not None else None,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", default=None, help="load this running server instead of spawning one")
+    parser.add_argument("--server-pid", type=int, default=None, help="pid of --server, for CPU and RSS (Linux)")
+    parser.add_argument("--db-url", default=None, help="database the server uses (default: the app's with --server, a temp SQLite file otherwise)")
+    parser.add_argument("--create-schema", action="store_true", help="create missing tables in --db-url before seeding")
+    parser.add_argument("--metrics-token", default=settings.metrics_token)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--cases", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=20.0, help="messages posted per second (all cases)")
+    parser.add_argument("--reaction-rate", type=float, default=10.0, help="reactions per second (0 disables)")
+    parser.add_argument("--seen-rate", type=float, default=10.0, help="mark-seen calls per second (0 disables)")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--drain", type=float, default=3.0, help="seconds to keep reading after the load stops")
+    parser.add_argument("--protocol", type=int, default=2, choices=(1, 2))
+    parser.add_argument("--http-connections", type=int, default=100)
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None, help="write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    proc = None
+    workdir = tempfile.mkdtemp(prefix="ws_load-")
+    server, server_pid, create_schema = args.server, args.server_pid, args.create_schema
+    if server is None:
+        db_url = args.db_url or f"sqlite+aiosqlite:///{os.path.join(workdir, 'ws_load.db')}"
+        create_schema = create_schema or args.db_url is None
+        if create_schema:
+            # Tables must exist before the server warms its caches
+            engine = create_async_engine(db_url)
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            await engine.dispose()
+            create_schema = False
+        port = _free_port()
+        server = f"http://127.0.0.1:{port}"
+        log_path = os.path.join(workdir, "server.log")
+        proc = spawn_server(db_url, port, log_path)
+        server_pid = proc.pid
+        print(f"server {server} (pid {proc.pid}, log {log_path})", file=sys.stderr)
+        await wait_ready(server, proc)
+    else:
+        db_url = args.db_url or settings.database_url
+
+    try:
+        report = await run(args, server, db_url, server_pid, create_schema)
+    finally:
+        if proc is not None:
+            stop_server(proc)
+    report["server"] = "spawned" if proc is not None else server
+    report["database"] = db_url.split(":", 1)[0]
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Gunicorn settings for serving the API (pip install gunicorn):
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master (``preload_app``). The image classifier is
+loaded there too, before the workers fork, so the torch runtime and the weights are
+shared copy-on-write instead of loaded once per worker. Workers never write to the
+weights. With ``CLASSIFIER_MMAP`` (the default) the weights are also backed by the
+file's page cache.
+
+Each worker limits inference to CPUs / workers threads (or ``CLASSIFIER_THREADS``), so
+the workers do not oversubscribe the host. ``PRELOAD_MODEL=false`` (implied by
+``CLASSIFIER_BACKEND=onnx``) skips loading the classifier in the master. Workers then load it on their first image upload, or at
+startup with ``ML_WARMUP=true``.
+
+``python -m benchmarks.model_memory`` measures per-worker and total memory for
+these modes.
+
+``WEB_CONCURRENCY`` defaults to 1. The case WebSocket manager
+(``app.api.v1.endpoints.messages._ws_manager``) keeps its connections and fans out
+messages, reactions and unread counts inside one process; there is no cross-worker
+broadcast yet. With more workers, an event handled by one worker never reaches
+sockets held by the others. Raise it only once that fan-out exists (e.g. PostgreSQL
+``LISTEN/NOTIFY``), or behind a proxy that sends every WebSocket of a deployment to
+the same worker. The read-your-writes pins (``app.db.session.ReadWriteRouter``)
+survive multiple workers only because they are also carried in the signed
+``primary_until`` cookie; bearer-only clients that drop cookies get the per-process
+pin alone.
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# OpenMP reads this when torch is first imported (in the master, inherited by workers)
+os.environ.setdefault("OMP_NUM_THREADS", str(max(1, (os.cpu_count() or 1) // max(1, workers))))
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+
+
+def on_starting(server):
+    if server.cfg.workers > 1:
+        server.log.warning(
+            "%s workers: case WebSocket events only reach sockets on the worker that handled them",
+            server.cfg.workers,
+        )
+    if os.getenv("PRELOAD_MODEL", "true").lower() not in {"1", "true", "yes", "y"}:
+        return
+    from app.core.config import settings
+    from app.services.image_classifier.image_classifier import preload_model
+
+    if settings.classifier_backend == "onnx":
+        # An ONNX Runtime session starts its thread pool on creation, which would not survive fork
+        server.log.info("Classifier backend onnx: workers load their own session")
+        return
+    # No inference here: the OpenMP thread pool must not exist before fork
+    if preload_model():
+        server.log.info("Image classifier loaded in the master (shared with workers)")
+
+
+def post_fork(server, worker):
+    from app.services.image_classifier.image_classifier import configure_threads
+
+    threads = configure_threads(server.cfg.workers)
+    server.log.info("Worker %s: inference threads=%s", worker.pid, threads)
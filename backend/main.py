@@ -5,6 +5,10 @@ from fastapi.staticfiles import StaticFiles
 from starlette.requests import Request
 from app.core.config import settings
 from app.api.v1.router import api_router
+from app.api.responses import FastJSONResponse
+import asyncio
+import hmac
+import time
 import traceback
 import uuid
 import logging
@@ -21,13 +25,53 @@ from contextlib import asynccontextmanager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Use new FastAPI lifespan events instead of deprecated on_event
+    from app.services.reference_data import warm_reference_cache
+    from app.services.notifications import notification_worker
+    from app.services.scheduler import maintenance_scheduler
+    warn_if_metrics_open()
+    await warm_reference_cache()
+    notification_worker.start()
+    if settings.maintenance_enabled:
+        maintenance_scheduler.start()
     await maybe_start_vite()
+    warmup = asyncio.create_task(asyncio.to_thread(warm_up_ml)) if settings.ml_warmup else None
     try:
         yield
     finally:
+        if warmup is not None and not warmup.done():
+            warmup.cancel()
+        await maintenance_scheduler.stop()
+        await notification_worker.stop()
         await stop_vite()
 
-app = FastAPI(title=settings.project_name, lifespan=lifespan)
+def warn_if_metrics_open() -> bool:
+    """Log a warning when /metrics is served to anyone (enabled without metrics_token)."""
+    if settings.metrics_enabled and not settings.metrics_token:
+        logger.warning(
+            "/metrics is enabled without METRICS_TOKEN: route inventory, latencies and query counts "
+            "are readable by anonymous clients"
+        )
+        return True
+    return False
+
+
+def warm_up_ml() -> None:
+    """Import the image classification stacks and load the classifier (blocking; run off the event loop)."""
+    from app.services.image_classifier.image_classifier import preload_model, warm_up
+    from app.api.v1.endpoints.is_document import _load_libs
+
+    started = time.perf_counter()
+    try:
+        warm_up()
+        _load_libs()
+        preload_model()
+    except Exception:
+        logger.exception("ML warm-up failed; libraries will load on first use")
+        return
+    logger.info("ML libraries warmed up in %.1f s", time.perf_counter() - started)
+
+
+app = FastAPI(title=settings.project_name, lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Middleware to set session context for deterministic opaque IDs
 from app.core.id_codec import set_current_session, reset_current_session
@@ -37,7 +81,7 @@ from typing import Optional as _Optional
 async def opaque_id_session_middleware(request: Request, call_next):
     # Establish a stable session context for opaque IDs using the JWT jti (server session id)
     from jose import jwt
-    from app.db.session import async_session_maker
+    from app.db.session import async_session_maker, db_router, set_client_pinned, reset_client_pinned
     from app.services.auth import validate_session as _validate_session
 
     sid: _Optional[str] = None
@@ -64,10 +108,27 @@ async def opaque_id_session_middleware(request: Request, call_next):
             sid = None
 
     ctx_token = set_current_session(sid)
+    pin_cookie = settings.read_after_write_cookie_name
+    pinned_token = set_client_pinned(db_router.client_pinned(sid, request.cookies.get(pin_cookie)))
     try:
         response = await call_next(request)
     finally:
+        reset_client_pinned(pinned_token)
         reset_current_session(ctx_token)
+    # Hand a fresh read-your-writes pin to the client so any worker honours it
+    pin = db_router.pin_cookie(sid)
+    if pin:
+        max_age = int(settings.read_after_write_pin_seconds) + 1
+        response.set_cookie(
+            key=pin_cookie,
+            value=pin,
+            httponly=True,
+            secure=settings.cookie_secure,
+            samesite=settings.cookie_samesite,
+            max_age=max_age,
+            path=settings.cookie_path,
+            domain=settings.cookie_domain,
+        )
     return response
 
 # Configure a basic logger if not already configured
@@ -90,6 +151,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Conditional GET (weak ETags / 304) and gzip/brotli compression
+from app.api.compression import ResponseOptimizerMiddleware
+app.add_middleware(ResponseOptimizerMiddleware)
+
+# Outermost: per-route latency, per-request query counts, Server-Timing in debug
+from app.core.instrumentation import InstrumentationMiddleware, registry as metrics_registry
+app.add_middleware(InstrumentationMiddleware)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus text exposition for this process."""
+    from fastapi.responses import PlainTextResponse
+
+    if not settings.metrics_enabled:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    if settings.metrics_token:
+        auth = request.headers.get("authorization") or ""
+        if not hmac.compare_digest(auth.encode(), f"Bearer {settings.metrics_token}".encode()):
+            return JSONResponse(status_code=401, content={"detail": "Not authenticated"})
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 # Global handler for unhandled exceptions to include stack trace in responses
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
@@ -217,7 +300,14 @@ if __name__ == "__main__":
         reload_flag = (os.getenv("UVICORN_RELOAD") or os.getenv("RELOAD") or "").lower() in {"1", "true", "yes", "y"}
         if os.getenv("PORT") and not os.getenv("LOOMA_HOST") and not (os.getenv("UVICORN_RELOAD") or os.getenv("RELOAD")):
             reload_flag = False
-        uvicorn.run("main:app", host=host, port=port, reload=reload_flag, env_file=".env")
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            reload=reload_flag,
+            env_file=".env",
+            ws_per_message_deflate=settings.ws_per_message_deflate,
+        )
     except Exception as e:
         # Avoid crashing if uvicorn not installed in some environments
         raise SystemExit(f"Failed to start uvicorn: {e}")
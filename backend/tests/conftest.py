@@ -11,7 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from main import app
 from app.db import Base
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db, get_read_session_maker
 
 
 @pytest.fixture(scope="session")
@@ -62,8 +62,12 @@ def override_dependency(async_session_maker):
                 await session.rollback()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_read_session_maker] = lambda: async_session_maker
     yield
     app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_read_db, None)
+    app.dependency_overrides.pop(get_read_session_maker, None)
 
 
 @pytest_asyncio.fixture
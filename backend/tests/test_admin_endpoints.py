@@ -0,0 +1,46 @@
+import pytest
+from httpx import AsyncClient
+from pydantic.v1 import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.app_user_role import AppUserRole
+from app.db.models.permission import Permission
+from app.db.models.role import Role
+from app.db.models.role_permission import RolePermission
+from app.schemas.user import UserCreate
+from app.services.user import create_user
+
+ADMIN_PATHS = [
+    "/api/v1/admin/maintenance/jobs",
+    "/api/v1/admin/http/responses",
+    "/api/v1/admin/db/slow-queries",
+    "/api/v1/cases/messages/ws/stats",
+]
+
+
+async def _login_with(db: AsyncSession, client: AsyncClient, email: str, codes) -> dict:
+    password = "StrongPassw0rd!"
+    user = await create_user(db, UserCreate(first_name="Admin", last_name="Tester", email=EmailStr(email), password=password))
+    role = Role(name=f"Role {email}", code=f"role.{email}")
+    perms = [Permission(name=code, code=code) for code in codes]
+    db.add_all([role, *perms])
+    await db.flush()
+    db.add_all([RolePermission(role_id=role.id, permission_id=p.id) for p in perms])
+    db.add(AppUserRole(app_user_id=user.id, role_id=role.id))
+    await db.commit()
+    resp = await client.post("/api/v1/auth/login", json={"email": email, "password": password})
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_admin_endpoints_require_admin_permission(client: AsyncClient, db_session: AsyncSession):
+    # Seeing every case is not the same as administering the process
+    investigator = await _login_with(db_session, client, "all.cases@example.com", ["CASES.ALL_CASES"])
+    for path in ADMIN_PATHS:
+        resp = await client.get(path, headers=investigator)
+        assert resp.status_code == 403, path
+        assert resp.json()["detail"] == "Insufficient permissions: ADMIN"
+
+    admin = await _login_with(db_session, client, "admin.panel@example.com", ["ADMIN"])
+    for path in ADMIN_PATHS:
+        assert (await client.get(path, headers=admin)).status_code == 200, path
@@ -0,0 +1,73 @@
+from datetime import date
+
+import pytest
+from httpx import AsyncClient
+from pydantic.v1 import EmailStr
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.app_user_case import AppUserCase
+from app.db.models.case import Case
+from app.db.models.subject import Subject
+from app.schemas.user import UserCreate
+from app.services.case_header import bump_case_header, case_header_cache
+from app.services.user import create_user
+
+
+@pytest.mark.asyncio
+async def test_case_header_etag_cache_and_invalidation(client: AsyncClient, db_session: AsyncSession):
+    password = "StrongPassw0rd!"
+    user = await create_user(db_session, UserCreate(first_name="Head", last_name="Er", email=EmailStr("caseheader@example.com"), password=password))
+    subject = Subject(first_name="Header", last_name="Subject")
+    db_session.add(subject)
+    await db_session.flush()
+    case = Case(subject_id=subject.id, case_number="25-HD-06001", date_intake=date(2025, 6, 1))
+    db_session.add(case)
+    await db_session.flush()
+    db_session.add(AppUserCase(app_user_id=user.id, case_id=case.id))
+    await db_session.commit()
+    case_id = int(case.id)
+
+    resp = await client.post("/api/v1/auth/login", json={"email": "caseheader@example.com", "password": password})
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    first = await client.get("/api/v1/cases/by-number/25-HD-06001", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.json()["subject"]["last_name"] == "Subject"
+    assert first.json()["demographics"]["height"] is None
+
+    # Same validator by id; revalidation is a 304 without a body
+    by_id = await client.get(f"/api/v1/cases/{case_id}/by-id", headers=headers)
+    assert by_id.headers["etag"] == etag
+    assert by_id.json() == first.json()
+    hits = case_header_cache.hits
+    not_modified = await client.get("/api/v1/cases/by-number/25-HD-06001", headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    # The second full read was served from the cache
+    await client.get("/api/v1/cases/by-number/25-HD-06001", headers=headers)
+    assert case_header_cache.hits > hits
+
+    # Saving a header section bumps the version: new ETag, fresh content
+    resp = await client.put(
+        f"/api/v1/cases/{case_id}/demographics",
+        json={"case_id": str(case_id), "height": "5'6\""},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    changed = await client.get("/api/v1/cases/by-number/25-HD-06001", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["demographics"]["height"] == "5'6\""
+
+    # Subject edits invalidate every case the subject heads
+    etag = changed.headers["etag"]
+    row = (await db_session.execute(select(Subject).where(Subject.id == subject.id))).scalar_one()
+    row.last_name = "Renamed"
+    await bump_case_header(db_session, subject_id=int(subject.id))
+    await db_session.commit()
+    renamed = await client.get(f"/api/v1/cases/{case_id}/by-id", headers={**headers, "If-None-Match": etag})
+    assert renamed.status_code == 200
+    assert renamed.json()["subject"]["last_name"] == "Renamed"
@@ -0,0 +1,100 @@
+import pytest
+from httpx import AsyncClient
+from pydantic.v1 import EmailStr
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.app_user_case import AppUserCase
+from app.db.models.case import Case
+from app.db.models.case_exploitation import CaseExploitation
+from app.db.models.case_management import CaseManagement
+from app.db.models.case_search_urgency import CaseSearchUrgency
+from app.db.models.case_victimology import CaseVictimology
+from app.db.models.ref_type import RefType
+from app.db.models.ref_value import RefValue
+from app.db.models.subject import Subject
+from app.db.models.victimology import victimology as Victimology
+from app.db.models.victimology_category import victimologyCategory as VictimologyCategory
+from app.schemas.user import UserCreate
+from app.services.reference_data import reference_cache
+from app.services.user import create_user
+
+
+@pytest.mark.asyncio
+async def test_intake_batch_saves_all_sections_in_one_request(client: AsyncClient, db_session: AsyncSession):
+    password = "StrongPassw0rd!"
+    user = await create_user(db_session, UserCreate(first_name="In", last_name="Take", email=EmailStr("intake@example.com"), password=password))
+    subject = Subject(first_name="Intake", last_name="Subject")
+    rt = RefType(name="Intake test", code="INTAKE_TEST")
+    category = VictimologyCategory(category="Home")
+    db_session.add_all([subject, rt, category])
+    await db_session.flush()
+    refs = [RefValue(name=f"V{i}", code=f"IT{i}", sort_order=i, ref_type_id=rt.id) for i in range(1, 8)]
+    questions = [Victimology(victimology_category_id=category.id, question=f"Q{i}") for i in range(2)]
+    db_session.add_all(refs + questions)
+    await db_session.flush()
+    case = Case(subject_id=subject.id, case_number="25-IT-06001")
+    db_session.add(case)
+    await db_session.flush()
+    db_session.add(AppUserCase(app_user_id=user.id, case_id=case.id))
+    await db_session.commit()
+    reference_cache.invalidate()
+    case_id = int(case.id)
+    ref_ids = [str(r.id) for r in refs]
+
+    resp = await client.post("/api/v1/auth/login", json={"email": "intake@example.com", "password": password})
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    urgency = dict(zip(
+        ["age_id", "physical_condition_id", "medical_condition_id", "personal_risk_id", "online_risk_id", "family_risk_id", "behavioral_risk_id"],
+        ref_ids,
+    ))
+    payload = {
+        "demographics": {"height": "5'2\"", "sex_id": ref_ids[0]},
+        "management": {"ottic": True, "le_case_number": "LE-1"},
+        "pattern_of_life": {"school": "Central High"},
+        "circumstances": {"city": "Springfield", "state_id": ref_ids[1]},
+        "search_urgency": urgency,
+        "exploitation_ids": ref_ids[:2],
+        "victimology": [
+            {"victimology_id": str(questions[0].id), "answer_id": ref_ids[2], "details": "first"},
+            {"victimology_id": str(questions[1].id)},  # no answer: skipped
+        ],
+    }
+    # Addressed by case number: one request for the whole form
+    resp = await client.put("/api/v1/cases/25-IT-06001/intake", json=payload, headers=headers)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["ok"] is True
+    assert set(body["sections"]) == {
+        "demographics", "management", "pattern_of_life", "circumstances", "search_urgency", "exploitation", "victimology",
+    }
+    assert body["sections"]["search_urgency"]["score"] == 28
+    assert body["sections"]["exploitation"] == {"ok": True, "added": 2, "removed": 0}
+    assert body["sections"]["victimology"] == {"ok": True, "saved": 1, "skipped": [str(questions[1].id)]}
+
+    header = (await client.get(f"/api/v1/cases/{case_id}/by-id", headers=headers)).json()
+    assert header["demographics"]["height"] == "5'2\""
+    assert header["management"]["ottic"] is True
+    assert header["pattern_of_life"]["school"] == "Central High"
+
+    # Saving again updates rows in place (ON CONFLICT) and re-syncs the selection
+    payload = {
+        "management": {"ottic": False, "le_case_number": "LE-2"},
+        "exploitation_ids": [ref_ids[1], ref_ids[3]],
+        "victimology": [{"victimology_id": str(questions[0].id), "answer_id": ref_ids[4], "details": "second"}],
+        "search_urgency": {"age_id": ref_ids[0]},
+    }
+    resp = await client.put(f"/api/v1/cases/{case_id}/intake", json=payload, headers=headers)
+    body = resp.json()
+    assert body["sections"]["exploitation"] == {"ok": True, "added": 1, "removed": 1}
+    assert body["sections"]["search_urgency"]["score"] is None
+
+    mgmt = (await db_session.execute(select(CaseManagement).where(CaseManagement.case_id == case_id))).scalars().all()
+    assert [(m.ottic, m.le_case_number) for m in mgmt] == [(False, "LE-2")]
+    expl = (await db_session.execute(select(CaseExploitation.exploitation_id).where(CaseExploitation.case_id == case_id))).scalars().all()
+    assert sorted(expl) == sorted([refs[1].id, refs[3].id])
+    answers = (await db_session.execute(select(CaseVictimology).where(CaseVictimology.case_id == case_id))).scalars().all()
+    assert [(a.answer_id, a.details) for a in answers] == [(refs[4].id, "second")]
+    urgency_rows = (await db_session.execute(select(CaseSearchUrgency).where(CaseSearchUrgency.case_id == case_id))).scalars().all()
+    assert len(urgency_rows) == 1 and urgency_rows[0].physical_condition_id is None
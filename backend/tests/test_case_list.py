@@ -0,0 +1,132 @@
+from datetime import date
+
+import pytest
+from httpx import AsyncClient
+from pydantic.v1 import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.endpoints.case import _encode_case_cursor
+from app.db.models.app_user_case import AppUserCase
+from app.db.models.case import Case
+from app.db.models.case_circumstances import CaseCircumstances
+from app.db.models.person import Person
+from app.db.models.person_team import PersonTeam
+from app.db.models.subject import Subject
+from app.db.models.team import Team
+from app.db.models.team_case import TeamCase
+from app.schemas.user import UserCreate
+from app.services.user import create_user
+
+
+async def _setup(client: AsyncClient, db: AsyncSession, tag: str = ""):
+    password = "StrongPassw0rd!"
+    user = await create_user(db, UserCreate(first_name="List", last_name="Er", email=EmailStr(f"caselist{tag}@example.com"), password=password))
+    person = Person(first_name="List", last_name="Er", app_user_id=user.id)
+    team = Team(name="Canvass team")
+    db.add_all([person, team])
+    await db.flush()
+    db.add(PersonTeam(person_id=person.id, team_id=team.id, team_role_id=1))
+
+    cases = {}
+    # (last name, direct, via team, inactive, intake day)
+    for last, direct, via_team, inactive, day in [
+        ("Adams", True, False, False, 5),
+        ("Baker", True, False, False, 1),
+        ("Clark", False, True, False, 3),
+        ("Davis", True, True, False, None),
+        ("Evans", True, False, True, 2),
+        ("Fox", False, False, False, 4),
+    ]:
+        subject = Subject(first_name="Case", last_name=f"List{last}")
+        db.add(subject)
+        await db.flush()
+        case = Case(
+            subject_id=subject.id,
+            case_number=f"25-CL{tag}-{last.upper()}",
+            inactive=inactive,
+            date_intake=date(2025, 6, day) if day else None,
+        )
+        db.add(case)
+        await db.flush()
+        if direct:
+            db.add(AppUserCase(app_user_id=user.id, case_id=case.id))
+        if via_team:
+            db.add(TeamCase(team_id=team.id, case_id=case.id))
+        cases[last] = case
+    db.add(CaseCircumstances(case_id=cases["Baker"].id, date_missing=date(2025, 5, 30)))
+    await db.commit()
+
+    resp = await client.post("/api/v1/auth/login", json={"email": f"caselist{tag}@example.com", "password": password})
+    assert resp.status_code == 200
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}, cases, team
+
+
+@pytest.mark.asyncio
+async def test_case_list_pages_filters_and_projects(client: AsyncClient, db_session: AsyncSession):
+    headers, cases, team = await _setup(client, db_session)
+
+    # Walk every page: accessible, active cases only, in name order, no duplicates
+    names, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = await client.get("/api/v1/cases", params=params, headers=headers)
+        assert resp.status_code == 200
+        body = resp.json()
+        names += [item["name"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert names == ["Case ListAdams", "Case ListBaker", "Case ListClark", "Case ListDavis"]
+
+    # Descending intake date; the undated case sorts last
+    resp = await client.get(
+        "/api/v1/cases",
+        params={"status": "all", "sort": "date_intake", "order": "desc", "fields": "case_number,date_intake"},
+        headers=headers,
+    )
+    items = resp.json()["items"]
+    assert [i["case_number"] for i in items] == ["25-CL-ADAMS", "25-CL-CLARK", "25-CL-EVANS", "25-CL-BAKER", "25-CL-DAVIS"]
+    assert items[0] == {"case_number": "25-CL-ADAMS", "date_intake": "2025-06-05"}
+
+    # Filters
+    resp = await client.get("/api/v1/cases", params={"team_id": str(team.id), "fields": "case_number"}, headers=headers)
+    assert resp.json()["items"] == [{"case_number": "25-CL-CLARK"}, {"case_number": "25-CL-DAVIS"}]
+    resp = await client.get(
+        "/api/v1/cases",
+        params={"intake_from": "2025-06-02", "intake_to": "2025-06-04", "status": "all", "fields": "case_number"},
+        headers=headers,
+    )
+    assert resp.json()["items"] == [{"case_number": "25-CL-CLARK"}, {"case_number": "25-CL-EVANS"}]
+    resp = await client.get(
+        "/api/v1/cases", params={"missing_from": "2025-05-01", "fields": "case_number,date_missing"}, headers=headers
+    )
+    assert resp.json()["items"] == [{"case_number": "25-CL-BAKER", "date_missing": "2025-05-30"}]
+
+
+@pytest.mark.asyncio
+async def test_case_list_rejects_bad_parameters(client: AsyncClient, db_session: AsyncSession):
+    headers, cases, team = await _setup(client, db_session, tag="X")
+
+    assert (await client.get("/api/v1/cases", params={"fields": "id,password"}, headers=headers)).status_code == 400
+    assert (await client.get("/api/v1/cases", params={"sort": "bogus"}, headers=headers)).status_code == 400
+    assert (await client.get("/api/v1/cases", params={"cursor": "!!"}, headers=headers)).status_code == 400
+
+    first = (await client.get("/api/v1/cases", params={"limit": 1}, headers=headers)).json()
+    resp = await client.get("/api/v1/cases", params={"cursor": first["next_cursor"], "sort": "case_number"}, headers=headers)
+    assert resp.status_code == 400
+
+    # Well-formed cursors of the wrong shape are a client error, not a 500
+    for sort, values in [
+        ("name", {"last": "A"}),
+        ("name", ["A", 1]),
+        ("name", ["A", "B", "1"]),
+        ("name", [1, "B", 1]),
+        ("case_number", ["25-CL-A", 1, 2]),
+        ("date_intake", [123, 1]),
+        ("date_intake", ["not a date", 1]),
+        ("created", [None, 1]),
+    ]:
+        bad = _encode_case_cursor(sort, values)
+        resp = await client.get("/api/v1/cases", params={"cursor": bad, "sort": sort}, headers=headers)
+        assert resp.status_code == 400, (sort, values)
+        assert resp.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,99 @@
+import asyncio
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.case import Case
+from app.db.models.subject import Subject
+from app.services.case import create_case_number, reserve_case_numbers
+
+# The contention case needs a server database: SQLite serializes writers and can refuse a
+# lock upgrade outright. Set TEST_POSTGRES_URL (postgresql+psycopg://...) to run it.
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+async def _intakes(session_maker, subject_id: int, when: date, count: int, concurrency: int) -> list:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def intake() -> str:
+        async with gate, session_maker() as db:
+            number = await create_case_number(db, "ca", when)
+            db.add(Case(subject_id=subject_id, case_number=number, date_intake=when))
+            await db.commit()
+            return number
+
+    return list(await asyncio.gather(*(intake() for _ in range(count))))
+
+
+def _sequences(numbers: list, prefix: str) -> list:
+    assert all(n.startswith(prefix) for n in numbers)
+    return sorted(int(n[len(prefix):]) for n in numbers)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_intakes_get_unique_contiguous_numbers(db_session: AsyncSession, async_session_maker):
+    subject = Subject(first_name="Intake", last_name="Race")
+    db_session.add(subject)
+    await db_session.commit()
+    when = date(2031, 3, 14)
+
+    # The first intake creates the year's counter row; the rest only bump it, so with
+    # bounded concurrency every SQLite writer waits on the busy timeout instead of failing
+    numbers = await _intakes(async_session_maker, subject.id, when, 1, 1)
+    numbers += await _intakes(async_session_maker, subject.id, when, 19, 4)
+
+    assert _sequences(numbers, "31-CA-03") == list(range(1, 21))
+    stored = (await db_session.execute(select(Case.case_number).where(Case.case_number.like("31-%")))).scalars().all()
+    assert sorted(stored) == sorted(numbers)
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_simultaneous_intakes_on_postgres():
+    from sqlalchemy import delete
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.db import Base
+
+    engine = create_async_engine(POSTGRES_URL, pool_size=20, max_overflow=0)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_maker() as db:
+            subject = Subject(first_name="Intake", last_name="Race")
+            db.add(subject)
+            await db.commit()
+        try:
+            # 200 writers at once, the first ones racing to create the year's counter row
+            numbers = await _intakes(session_maker, subject.id, date(2031, 3, 14), 200, 200)
+            seqs = _sequences(numbers, "31-CA-03")
+            assert seqs == list(range(seqs[0], seqs[0] + 200))
+        finally:
+            async with session_maker() as db:
+                await db.execute(delete(Case).where(Case.subject_id == subject.id))
+                await db.execute(delete(Subject).where(Subject.id == subject.id))
+                await db.commit()
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reservation_is_a_block_and_rollback_releases_it(db_session: AsyncSession):
+    when = date(2032, 11, 2)
+    block = await reserve_case_numbers(db_session, "TX", 3, when)
+    assert block == ["32-TX-11001", "32-TX-11002", "32-TX-11003"]
+    await db_session.rollback()
+
+    # Nothing was committed, so the next allocation reuses the block's first number
+    assert await create_case_number(db_session, "TX", when) == "32-TX-11001"
+    assert await reserve_case_numbers(db_session, "NY", 2, when) == ["32-NY-11002", "32-NY-11003"]
+    await db_session.commit()
+
+    with pytest.raises(ValueError):
+        await reserve_case_numbers(db_session, "TX", 0, when)
+    with pytest.raises(ValueError):
+        await create_case_number(db_session, "Texas", when)
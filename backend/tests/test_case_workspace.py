@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+from pydantic.v1 import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.app_user_case import AppUserCase
+from app.db.models.case import Case
+from app.db.models.person import Person
+from app.db.models.subject import Subject
+from app.db.models.timeline import Timeline
+from app.schemas.user import UserCreate
+from app.services.user import create_user
+
+
+async def _login_with_case(client: AsyncClient, db: AsyncSession, email: str, case_number: str, assign: bool = True):
+    password = "StrongPassw0rd!"
+    user = await create_user(db, UserCreate(first_name="Work", last_name="Space", email=EmailStr(email), password=password))
+    person = Person(first_name="Work", last_name="Space", app_user_id=user.id)
+    subject = Subject(first_name="Missing", last_name="Person")
+    db.add_all([person, subject])
+    await db.flush()
+    case = Case(subject_id=subject.id, case_number=case_number)
+    db.add(case)
+    await db.flush()
+    if assign:
+        db.add(AppUserCase(app_user_id=user.id, case_id=case.id))
+    db.add(Timeline(case_id=case.id, entered_by_id=person.id, details="Last seen"))
+    await db.commit()
+
+    resp = await client.post("/api/v1/auth/login", json={"email": email, "password": password})
+    assert resp.status_code == 200
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}, case
+
+
+@pytest.mark.asyncio
+async def test_workspace_streams_requested_sections(client: AsyncClient, db_session: AsyncSession):
+    headers, case = await _login_with_case(client, db_session, "workspace@example.com", "25-TX-01001")
+
+    resp = await client.get(
+        f"/api/v1/cases/{case.id}/workspace",
+        params={"sections": "header,subjects,timeline,tasks"},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in resp.text.splitlines() if line.strip()]
+    assert lines[-1] == {"done": True}
+    by_section = {line["section"]: line for line in lines[:-1]}
+    assert set(by_section) == {"header", "subjects", "timeline", "tasks"}
+    assert by_section["header"]["data"]["case"]["case_number"] == "25-TX-01001"
+    assert by_section["subjects"]["data"] == []
+    assert [t["details"] for t in by_section["timeline"]["data"]] == ["Last seen"]
+    assert by_section["tasks"]["data"] == []
+
+
+@pytest.mark.asyncio
+async def test_workspace_authorizes_once_and_rejects_unknown_sections(client: AsyncClient, db_session: AsyncSession):
+    headers, case = await _login_with_case(client, db_session, "workspace2@example.com", "25-TX-01002", assign=False)
+
+    resp = await client.get(f"/api/v1/cases/{case.id}/workspace", headers=headers)
+    assert resp.status_code == 404
+
+    resp = await client.get(f"/api/v1/cases/{case.id}/workspace", params={"sections": "header,bogus"}, headers=headers)
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_workspace_section_failure_does_not_leak_details(client: AsyncClient, db_session: AsyncSession, monkeypatch, caplog):
+    from app.api.v1.endpoints import workspace
+
+    headers, case = await _login_with_case(client, db_session, "workspace-err@example.com", "25-TX-01003")
+
+    async def broken(db, pk, user):
+        raise RuntimeError('duplicate key value violates unique constraint "case_secret_idx"')
+
+    monkeypatch.setitem(workspace.SECTIONS, "tasks", broken)
+    with caplog.at_level("ERROR"):
+        resp = await client.get(f"/api/v1/cases/{case.id}/workspace", params={"sections": "header,tasks"}, headers=headers)
+    lines = [json.loads(line) for line in resp.text.splitlines() if line.strip()]
+    by_section = {line["section"]: line for line in lines[:-1]}
+    assert by_section["tasks"]["error"] == {"status": 500, "detail": "Internal error"}
+    assert "case_secret_idx" not in resp.text
+    assert "case_secret_idx" in caplog.text
+    assert "data" in by_section["header"]
@@ -0,0 +1,115 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.api.compression import ResponseOptimizerMiddleware, ResponseStats, choose_encoding
+
+
+def _app(stats: ResponseStats) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ResponseOptimizerMiddleware, stats=stats)
+
+    @app.get("/big")
+    async def big():
+        return [{"id": i, "name": f"row {i}", "url": "https://example.com/" + "x" * 40} for i in range(200)]
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/tagged")
+    async def tagged():
+        return Response(b'{"v":1}', media_type="application/json", headers={"ETag": 'W/"own-1"'})
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(5):
+                yield (f"line {i} " * 100 + "\n").encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_json_is_compressed_and_revalidates_with_304():
+    stats = ResponseStats()
+    async with AsyncClient(transport=ASGITransport(app=_app(stats)), base_url="http://test") as c:
+        resp = await c.get("/big", headers={"Accept-Encoding": "gzip"})
+        assert resp.status_code == 200
+        assert resp.headers["content-encoding"] == "gzip"
+        assert resp.headers["vary"] == "Accept-Encoding"
+        assert int(resp.headers["content-length"]) < len(resp.content)
+        assert len(resp.json()) == 200
+        etag = resp.headers["etag"]
+        assert etag.startswith('W/"r-')
+
+        resp = await c.get("/big", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp.headers["etag"] == etag
+        assert "content-encoding" not in resp.headers
+
+        # Below the size threshold: tagged but sent as is
+        resp = await c.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in resp.headers and resp.headers["etag"]
+
+        # An endpoint's own ETag is kept and honoured
+        resp = await c.get("/tagged", headers={"If-None-Match": 'W/"own-1"'})
+        assert resp.status_code == 304 and resp.headers["etag"] == 'W/"own-1"'
+
+    s = stats.snapshot()
+    assert s["responses_compressed"] == 1
+    assert s["not_modified"] == 2
+    assert s["bytes_in"] > s["bytes_out"] > 0
+    assert s["bytes_saved"] >= s["bytes_in"] - s["bytes_out"]
+
+
+@pytest.mark.asyncio
+async def test_streamed_body_is_compressed_per_chunk():
+    stats = ResponseStats()
+    app = _app(stats)
+    messages = []
+    received = []
+
+    async def receive():
+        if received:
+            # StreamingResponse listens for a disconnect until the body is sent
+            await asyncio.Event().wait()
+        received.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/stream", "raw_path": b"/stream", "query_string": b"",
+        "headers": [(b"accept-encoding", b"gzip")], "http_version": "1.1", "scheme": "http",
+        "server": ("test", 80), "client": ("test", 1), "root_path": "",
+    }
+    await app(scope, receive, send)
+
+    start = messages[0]
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"etag" not in headers and b"content-length" not in headers
+    bodies = [m for m in messages[1:] if m["type"] == "http.response.body"]
+    assert len(bodies) > 2  # still streamed
+    # Every chunk is flushed, so a client can decode what it has so far
+    d = zlib.decompressobj(31)
+    assert d.decompress(bodies[0]["body"]).startswith(b"line 0")
+    assert gzip.decompress(b"".join(m["body"] for m in bodies)).count(b"\n") == 5
+    assert stats.snapshot()["responses_streamed"] == 1
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("") is None
+    assert choose_encoding("identity") is None
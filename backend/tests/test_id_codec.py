@@ -0,0 +1,104 @@
+import base64
+import json
+
+import pytest
+from cryptography.hazmat.primitives.ciphers.aead import AESSIV
+
+from app.core import id_codec
+from app.core.config import settings
+from app.core.id_codec import (
+    OpaqueIdError,
+    decode_id,
+    decode_many,
+    encode_id,
+    encode_many,
+    reset_current_session,
+    set_current_session,
+)
+
+
+@pytest.fixture
+def encrypted(monkeypatch):
+    monkeypatch.setattr(settings, "id_encryption_enabled", True)
+    token = set_current_session("session-a")
+    yield
+    reset_current_session(token)
+    id_codec._aead_cache.clear()
+
+
+def test_tokens_round_trip_and_are_bound_to_model_and_session(encrypted):
+    pks = [0, 1, 127, 128, 300, 2**31, 2**40]
+    tokens = encode_many("case", pks)
+    assert tokens == [encode_id("case", pk) for pk in pks]
+    assert all(t.startswith("3.") and len(t) <= 36 for t in tokens)
+    assert decode_many("case", tokens) == pks
+    assert decode_id("case", tokens[3]) == 128
+
+    with pytest.raises(OpaqueIdError):
+        decode_id("subject", tokens[1])
+    with pytest.raises(OpaqueIdError):
+        decode_id("case", "128")
+    with pytest.raises(OpaqueIdError):
+        decode_id("case", tokens[1][:-2])
+
+    other = set_current_session("session-b")
+    try:
+        assert encode_id("case", 1) != tokens[1]
+        with pytest.raises(OpaqueIdError):
+            decode_id("case", tokens[1])
+    finally:
+        reset_current_session(other)
+
+
+def test_rotated_keys_and_v2_tokens_still_decode(encrypted, monkeypatch):
+    old = encode_id("team", 42)
+
+    # Rotate: the previous secret moves to the keyring under its version
+    monkeypatch.setitem(id_codec._KEYRING, settings.id_codec_version, (settings.id_secret_key or settings.jwt_secret_key).encode("utf-8"))
+    monkeypatch.setattr(settings, "id_codec_version", settings.id_codec_version + 1)
+    monkeypatch.setattr(settings, "id_secret_key", "rotated-secret")
+    assert encode_id("team", 42) != old
+    assert decode_id("team", old) == 42
+    assert decode_id("team", encode_id("team", 42)) == 42
+
+    # Version 2 (JSON payload) tokens issued under the current key
+    master = id_codec._derive_master_bytes(b"rotated-secret")
+    key = id_codec._derive_session_key(master, "session-a", b"idcodec|v2|session:")
+    ct = AESSIV(key).encrypt(json.dumps({"m": "team", "k": 7}).encode("utf-8"), [b"team"])
+    assert decode_id("team", "2." + base64.urlsafe_b64encode(ct).decode("ascii")) == 7
+
+
+def test_disabled_codec_passes_plain_ids_through():
+    assert settings.id_encryption_enabled is False
+    assert encode_id("case", 5) == "5"
+    assert encode_many("case", [1, 2]) == ["1", "2"]
+    assert decode_id("case", "12") == 12
+    assert decode_many("case", ["3", 4]) == [3, 4]
+    with pytest.raises(OpaqueIdError):
+        decode_id("case", "abc")
+
+
+def test_intake_refs_follow_the_codec_rules(encrypted):
+    from app.services.case_intake import decode_ref
+
+    token = encode_id("victimology", 12)
+    assert decode_ref(token, "victimology") == 12
+    # Raw numbers are not accepted while encryption is on, for any section
+    assert decode_ref("12", "victimology") is None
+    assert decode_ref("12") is None
+    assert decode_ref(token) is None  # bound to its model
+    assert decode_ref("") is None and decode_ref(None) is None
+
+
+def test_session_keys_are_bounded_by_the_aead_cache(encrypted, monkeypatch):
+    monkeypatch.setattr(id_codec._aead_cache, "max_entries", 3)
+    for i in range(10):
+        token = set_current_session(f"sess-bound-{i}")
+        try:
+            assert decode_id("case", encode_id("case", i)) == i
+            assert decode_many("task", encode_many("task", [i, i + 1])) == [i, i + 1]
+        finally:
+            reset_current_session(token)
+    # Nothing else holds on to a session's derived key
+    assert len(id_codec._aead_cache._entries) == 3
+    assert not any(isinstance(v, AESSIV) for v in vars(id_codec._codec("case")).values())
@@ -1,7 +1,11 @@
+import io
+import tempfile
 import unittest
 from pathlib import Path
 
 # Import the predictor
+from app.core.config import settings
+from app.services.image_classifier import image_classifier
 from app.services.image_classifier.image_classifier import predict_photo_probability
 
 
@@ -47,3 +51,169 @@ class TestImageClassifier(unittest.TestCase):
         # Assertions per requirement
         self.assertLess(doc_prob, 0.5, msg=f"Expected document.jpg prob < 0.5, got {doc_prob}")
         self.assertGreater(photo_prob, 0.5, msg=f"Expected photo.jpg prob > 0.5, got {photo_prob}")
+
+
+class TestClassifierCache(unittest.TestCase):
+    def setUp(self):
+        try:
+            import torch  # noqa: F401
+            from PIL import Image
+        except ImportError:
+            self.skipTest("torch/Pillow not installed")
+        self.tmp = tempfile.TemporaryDirectory()
+        model, _ = image_classifier.build_model(image_classifier.MODEL_NAME, num_classes=len(image_classifier.LABEL_MAP))
+        self.weights = Path(self.tmp.name) / "weights.pt"
+        torch.save(model.state_dict(), self.weights)
+        self.expected = model.state_dict()
+        buf = io.BytesIO()
+        Image.new("RGB", (64, 48), (200, 30, 30)).save(buf, "PNG")
+        self.image = buf.getvalue()
+        self._saved = (settings.classifier_weights_path, settings.classifier_mmap, image_classifier._classifier)
+        settings.classifier_weights_path = str(self.weights)
+        image_classifier._classifier = None
+
+    def tearDown(self):
+        settings.classifier_weights_path, settings.classifier_mmap, image_classifier._classifier = self._saved
+        self.tmp.cleanup()
+
+    def test_weights_load_once_per_process(self):
+        import torch
+
+        loads = []
+        real_load = image_classifier.load_classifier
+        image_classifier.load_classifier = lambda *a, **kw: loads.append(1) or real_load(*a, **kw)
+        try:
+            self.assertTrue(image_classifier.preload_model())
+            first = predict_photo_probability(self.image)
+            second = predict_photo_probability(self.image)
+        finally:
+            image_classifier.load_classifier = real_load
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(first, second)
+        self.assertTrue(0.0 <= first <= 1.0)
+        state = image_classifier.get_classifier().model.state_dict()
+        self.assertTrue(torch.equal(state["fc.weight"], self.expected["fc.weight"]))
+
+    def test_mmap_and_copy_loads_agree(self):
+        mapped = image_classifier.load_classifier(self.weights, mmap=True)
+        copied = image_classifier.load_classifier(self.weights, mmap=False)
+        self.assertEqual(mapped.predict(self.image), copied.predict(self.image))
+
+    def test_preload_without_weights_is_a_no_op(self):
+        settings.classifier_weights_path = str(Path(self.tmp.name) / "missing.pt")
+        self.assertFalse(image_classifier.preload_model())
+        self.assertIsNone(image_classifier._classifier)
+
+
+def _synthetic_images(out_dir: Path, count: int = 12):
+    """Page-like and photo-like JPEGs for int8 calibration, disjoint from tests/test_images."""
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    rng = np.random.default_rng(7)
+    paths = []
+    for i in range(count):
+        w, h = int(rng.integers(480, 900)), int(rng.integers(480, 900))
+        if i % 2:
+            # Light page with dark text lines at a slight tilt
+            im = Image.new("RGB", (w, h), tuple(int(v) for v in rng.integers(225, 256, 3)))
+            draw = ImageDraw.Draw(im)
+            for y in range(40, h - 40, int(rng.integers(18, 32))):
+                x = 40
+                while x < w - 60:
+                    word = int(rng.integers(15, 70))
+                    draw.rectangle((x, y, x + word, y + 7), fill=tuple(int(v) for v in rng.integers(0, 60, 3)))
+                    x += word + int(rng.integers(6, 14))
+            im = im.rotate(float(rng.uniform(-4, 4)), fillcolor=(90, 90, 90))
+        else:
+            # Smooth colour gradients plus noise and blobs
+            yy, xx = np.mgrid[0:h, 0:w] / max(w, h)
+            base = np.stack([np.sin(xx * rng.uniform(2, 9) + c) * rng.uniform(40, 110) for c in range(3)], axis=-1)
+            base += 128 + rng.normal(0, 18, (h, w, 3)) + (yy[..., None] * rng.uniform(-80, 80, 3))
+            im = Image.fromarray(np.clip(base, 0, 255).astype("uint8"))
+            draw = ImageDraw.Draw(im)
+            for _ in range(int(rng.integers(3, 9))):
+                x, y, r = int(rng.integers(0, w)), int(rng.integers(0, h)), int(rng.integers(20, 120))
+                draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(int(v) for v in rng.integers(0, 256, 3)))
+        path = out_dir / f"calibration-{i:02d}.jpg"
+        im.save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+class TestBackendParity(unittest.TestCase):
+    """
+    The int8 and ONNX backends must agree with the fp32 torch model on tests/test_images.
+    The int8 model is calibrated on synthetic images only, so parity is measured on
+    images its activation ranges never saw.
+    """
+
+    TOLERANCE = {"quantized": 0.05, "onnx": 1e-3}
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            import torch
+        except ImportError:
+            raise unittest.SkipTest("torch not installed")
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.images = sorted((Path(__file__).parent / "test_images").glob("*.jpg"))
+        if not cls.images:
+            raise unittest.SkipTest("no test images")
+        real = image_classifier.DEFAULT_WEIGHTS_PATH
+        cls.weights = Path(cls.tmp.name) / "best_model.pt"
+        if real.exists():
+            cls.weights.write_bytes(real.read_bytes())
+        else:
+            torch.manual_seed(0)
+            model, _ = image_classifier.build_model(image_classifier.MODEL_NAME, num_classes=len(image_classifier.LABEL_MAP))
+            torch.save(model.state_dict(), cls.weights)
+        cls.reference = image_classifier.load_classifier(cls.weights, mmap=False, backend="torch")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def _assert_parity(self, backend: str):
+        classifier = image_classifier.load_classifier(self.weights, backend=backend)
+        self.assertEqual(classifier.backend, backend)
+        for path in self.images:
+            data = path.read_bytes()
+            expected, got = self.reference.predict(data), classifier.predict(data)
+            self.assertAlmostEqual(got, expected, delta=self.TOLERANCE[backend], msg=f"{backend} on {path.name}")
+
+    def test_quantized_matches_torch(self):
+        from app.services.image_classifier import export
+
+        calibration_dir = Path(self.tmp.name) / "calibration"
+        calibration_dir.mkdir(exist_ok=True)
+        calibration = _synthetic_images(calibration_dir)
+        self.assertFalse({p.read_bytes() for p in calibration} & {p.read_bytes() for p in self.images})
+        export.export_quantized(self.weights, image_classifier.quantized_path(self.weights), export.calibration_batches(calibration))
+        self._assert_parity("quantized")
+
+    def test_onnx_matches_torch(self):
+        try:
+            import onnx  # noqa: F401
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            self.skipTest("onnx/onnxruntime not installed")
+        from app.services.image_classifier import export
+
+        export.export_onnx(self.weights, image_classifier.onnx_path(self.weights))
+        self._assert_parity("onnx")
+
+    def test_numpy_preprocessing_matches_torchvision(self):
+        transform = image_classifier.build_eval_transform()
+        for path in self.images:
+            im = image_classifier._open_rgb(path.read_bytes())
+            expected = transform(im).numpy()[None]
+            self.assertLess(abs(image_classifier.preprocess_numpy(im) - expected).max(), 1e-5)
+
+    def test_missing_export_falls_back_to_torch(self):
+        other = Path(self.tmp.name) / "other" / "best_model.pt"
+        other.parent.mkdir(exist_ok=True)
+        other.write_bytes(self.weights.read_bytes())
+        with self.assertLogs(image_classifier.logger, "WARNING"):
+            classifier = image_classifier.load_classifier(other, backend="quantized")
+        self.assertEqual(classifier.backend, "torch")
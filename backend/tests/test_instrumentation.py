@@ -0,0 +1,81 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app.core import instrumentation
+from app.core.config import settings
+from app.core.instrumentation import InstrumentationMiddleware, install_query_hooks, normalize_sql
+
+
+def test_normalize_sql():
+    sql = "SELECT a.x::text FROM t WHERE t.id IN (1, 2, 3) AND name = 'o''b' AND k = %(k_1)s AND y = $1 LIMIT 10"
+    assert normalize_sql(sql) == "SELECT a.x::text FROM t WHERE t.id IN (?) AND name = ? AND k = ? AND y = ? LIMIT ?"
+    assert normalize_sql("select *\n  from   t where id = ?") == "select * from t where id = ?"
+
+
+@pytest.mark.asyncio
+async def test_request_metrics_n_plus_one_and_server_timing(async_session_maker, monkeypatch):
+    install_query_hooks(async_session_maker.kw["bind"])
+    monkeypatch.setattr(settings, "debug", True)
+    monkeypatch.setattr(settings, "slow_query_ms", 0.0)
+    monkeypatch.setattr(settings, "n_plus_one_threshold", 5)
+
+    app = FastAPI()
+    app.add_middleware(InstrumentationMiddleware)
+
+    @app.get("/things/{thing_id}")
+    async def thing(thing_id: int):
+        async with async_session_maker() as db:
+            for i in range(6):
+                await db.execute(text("SELECT :i"), {"i": i})
+        return {"id": thing_id}
+
+    route = "/things/{thing_id}"
+    n_plus_one_before = instrumentation.db_n_plus_one_total.value(route)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        resp = await c.get("/things/41")
+    assert resp.status_code == 200
+    timing = resp.headers["server-timing"]
+    assert timing.startswith("app;dur=") and 'desc="6 queries"' in timing
+
+    assert instrumentation.http_request_duration.count("GET", route, "200") >= 1
+    assert instrumentation.db_n_plus_one_total.value(route) == n_plus_one_before + 1
+    assert instrumentation.slow_queries[-1]["sql"] == "SELECT ?"
+    assert instrumentation.slow_queries[-1]["route"] == route
+
+    text_out = instrumentation.registry.render()
+    assert 'http_request_duration_seconds_count{method="GET",route="/things/{thing_id}",status="200"}' in text_out
+    assert 'http_request_db_queries_bucket{route="/things/{thing_id}",le="10"}' in text_out
+    assert "# TYPE http_response_compressed_total counter" in text_out
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient, monkeypatch):
+    # Off unless configured
+    assert (await client.get("/metrics")).status_code == 404
+
+    monkeypatch.setattr(settings, "metrics_enabled", True)
+    resp = await client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_request_duration_seconds histogram" in resp.text
+
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    assert (await client.get("/metrics")).status_code == 401
+    assert (await client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})).status_code == 200
+
+
+def test_startup_warns_about_open_metrics(monkeypatch, caplog):
+    from main import warn_if_metrics_open
+
+    monkeypatch.setattr(settings, "metrics_enabled", True)
+    monkeypatch.setattr(settings, "metrics_token", None)
+    with caplog.at_level("WARNING"):
+        assert warn_if_metrics_open()
+    assert "METRICS_TOKEN" in caplog.text
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    assert not warn_if_metrics_open()
+    monkeypatch.setattr(settings, "metrics_enabled", False)
+    monkeypatch.setattr(settings, "metrics_token", None)
+    assert not warn_if_metrics_open()
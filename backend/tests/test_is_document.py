@@ -0,0 +1,119 @@
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from pydantic.v1 import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.endpoints import is_document as isdoc
+from app.core.config import settings
+from app.schemas.user import UserCreate
+from app.services.user import create_user
+
+IMAGES = Path(__file__).parent / "test_images"
+
+
+def _legacy_features(rgb) -> isdoc.Features:
+    """The feature code the scoring constants were tuned with: separate Canny passes, numpy var, calcHist."""
+    np, cv2 = isdoc.np, isdoc.cv2
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).flatten()
+    p = hist / (hist.sum() + 1e-9)
+    return isdoc.Features(
+        text_area_ratio=0.0,
+        laplacian_var=float(cv2.Laplacian(gray, cv2.CV_64F).var()),
+        edge_density=float(cv2.Canny(gray, 100, 200).mean() / 255.0),
+        rectangularity=isdoc.largest_contour_rectangularity(gray),
+        saturation_mean=float(cv2.cvtColor(rgb, cv2.COLOR_RGB2HSV)[..., 1].mean() / 255.0),
+        entropy_gray=float(-np.sum(p * np.log2(p + 1e-12))),
+    )
+
+
+def test_shared_intermediates_match_separate_passes():
+    isdoc._load_libs()
+    for path in sorted(IMAGES.glob("*.jpg")):
+        rgb = isdoc.load_image_from_bytes(path.read_bytes(), 512)
+        got, want = isdoc.image_features(rgb), _legacy_features(rgb)
+        for field in ("laplacian_var", "edge_density", "rectangularity", "saturation_mean", "entropy_gray"):
+            assert getattr(got, field) == pytest.approx(getattr(want, field), rel=1e-6), (path.name, field)
+
+
+def test_default_analysis_scores_like_the_calibrated_pipeline(monkeypatch):
+    # The constants in rule_based_score were tuned on full decodes LANCZOS-resized to 1600 px
+    monkeypatch.setattr(isdoc, "_TESSERACT_OK", False)
+    assert settings.is_document_analysis_side == isdoc.CALIBRATION_SIDE
+    for path in sorted(IMAGES.glob("*.jpg")):
+        data = path.read_bytes()
+        want = _legacy_features(isdoc.load_image_from_bytes(data, isdoc.CALIBRATION_SIDE))
+        analysis = isdoc.analyze_image(data)
+        assert analysis.ocr == "unavailable"
+        assert analysis.score == pytest.approx(isdoc.rule_based_score(want), rel=1e-6), path.name
+
+
+def test_ocr_runs_only_when_it_can_change_the_label(monkeypatch):
+    calls = []
+    monkeypatch.setattr(isdoc, "_TESSERACT_OK", True)
+    monkeypatch.setattr(isdoc, "ocr_text_area_ratio", lambda rgb: calls.append(rgb.shape) or 0.3)
+    data = (IMAGES / "photo.jpg").read_bytes()
+    base = isdoc.rule_based_score(isdoc.image_features(isdoc.load_image_from_bytes(data, 512)))
+    assert base < 0
+
+    ran = isdoc.analyze_image(data, analysis_side=512, ocr_side=800, ocr_band=isdoc.MAX_TEXT_SCORE)
+    assert ran.ocr == "run" and calls and max(calls[0][:2]) == 800
+    assert ran.features.text_area_ratio == 0.3
+    assert ran.score == pytest.approx(base + isdoc.MAX_TEXT_SCORE)
+
+    # Same size: OCR reads the stage-one image instead of decoding again
+    calls.clear()
+    loads = []
+    load = isdoc.load_image_from_bytes
+    monkeypatch.setattr(isdoc, "load_image_from_bytes", lambda d, side: loads.append(side) or load(d, side))
+    isdoc.analyze_image(data, analysis_side=512, ocr_side=512, ocr_band=isdoc.MAX_TEXT_SCORE)
+    assert loads == [512] and max(calls[0][:2]) == 512
+    monkeypatch.setattr(isdoc, "load_image_from_bytes", load)
+
+    calls.clear()
+    skipped = isdoc.analyze_image(data, analysis_side=512, ocr_band=abs(base) / 2)
+    assert skipped.ocr == "skipped" and not calls
+    assert skipped.label == "photo"
+
+    assert not isdoc.needs_ocr(0.1, isdoc.MAX_TEXT_SCORE)
+    assert not isdoc.needs_ocr(-isdoc.MAX_TEXT_SCORE - 0.1, isdoc.MAX_TEXT_SCORE)
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(isdoc, "_TESSERACT_OK", False)
+    files = [("files", (p.name, p.read_bytes(), "image/jpeg")) for p in sorted(IMAGES.glob("*.jpg"))]
+    files.append(("files", ("notes.txt", b"not an image", "text/plain")))
+
+    # Signed-in users only, one image or many
+    assert (await client.post("/api/v1/is_document/batch", files=files)).status_code == 419  # no token
+    assert (await client.post("/api/v1/is_document", files={"file": files[1][1]})).status_code == 419
+    password = "StrongPassw0rd!"
+    await create_user(db_session, UserCreate(first_name="Doc", last_name="Batch", email=EmailStr("docbatch@example.com"), password=password))
+    resp = await client.post("/api/v1/auth/login", json={"email": "docbatch@example.com", "password": password})
+    client.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+
+    resp = await client.post("/api/v1/is_document/batch", files=files)
+    assert resp.status_code == 200, resp.text
+    results = resp.json()["results"]
+    assert [r["image"] for r in results] == ["document.jpg", "photo.jpg", "notes.txt"]
+    assert all(r["prediction"] in ("document", "photo") and r["ocr"] == "unavailable" for r in results[:2])
+    assert results[2]["error"] == "Unsupported image format"
+
+    single = await client.post("/api/v1/is_document", files={"file": files[1][1]})
+    assert single.status_code == 200
+    assert single.json()["prob_document"] == results[1]["prob_document"]
+
+    # Oversized images are rejected per image (document.jpg is the larger one), without decoding them
+    limit = len(files[1][1][1])
+    monkeypatch.setattr(settings, "is_document_max_bytes", limit)
+    resp = await client.post("/api/v1/is_document/batch", files=files)
+    errors = [r.get("error") for r in resp.json()["results"]]
+    assert errors == [f"Image larger than {limit} bytes", None, "Unsupported image format"]
+    assert (await client.post("/api/v1/is_document", files={"file": files[0][1]})).status_code == 413
+
+    monkeypatch.setattr(settings, "is_document_batch_max", 2)
+    resp = await client.post("/api/v1/is_document/batch", files=files)
+    assert resp.status_code == 400
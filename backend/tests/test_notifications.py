@@ -0,0 +1,235 @@
+import smtplib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.notification_outbox import NotificationOutbox
+from app.services.email import get_outbox, clear_outbox
+from app.services.notifications import (
+    NotificationWorker,
+    EmailTransport,
+    RateLimited,
+    enqueue_email,
+    enqueue_telegram,
+)
+
+
+class FakeTelegram:
+    def __init__(self, fail_with=None):
+        self.sent = []
+        self.fail_with = fail_with
+
+    async def send(self, item):
+        if self.fail_with is not None:
+            raise self.fail_with
+        self.sent.append((item.recipient, item.body_text))
+
+    async def close(self):
+        pass
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+async def _reset(db: AsyncSession) -> None:
+    await db.execute(delete(NotificationOutbox))
+    await db.commit()
+    clear_outbox()
+
+
+@pytest.mark.asyncio
+async def test_worker_delivers_email_and_telegram(db_session: AsyncSession):
+    await _reset(db_session)
+    enqueue_email(db_session, to="a@example.com", subject="Hello", text="Body")
+    enqueue_telegram(db_session, to="@someone", text="Ping")
+    await db_session.commit()
+
+    telegram = FakeTelegram()
+    worker = NotificationWorker(transports={"email": EmailTransport(), "telegram": telegram})
+    assert await worker.drain(db_session) == 2
+
+    assert len(get_outbox()) == 1
+    assert get_outbox()[0]["Subject"] == "Hello"
+    assert telegram.sent == [("@someone", "Ping")]
+    rows = (await db_session.execute(select(NotificationOutbox))).scalars().all()
+    assert {r.status for r in rows} == {"sent"}
+    assert all(r.sent_at is not None for r in rows)
+
+    # Nothing left to do
+    assert await worker.run_once(db_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_defers_channel_without_counting_attempt(db_session: AsyncSession):
+    await _reset(db_session)
+    enqueue_telegram(db_session, to="@one", text="1")
+    enqueue_telegram(db_session, to="@two", text="2")
+    enqueue_email(db_session, to="b@example.com", subject="Still sent", text="x")
+    await db_session.commit()
+
+    worker = NotificationWorker(
+        transports={"email": EmailTransport(), "telegram": FakeTelegram(fail_with=RateLimited(120))}
+    )
+    before = datetime.now(timezone.utc)
+    await worker.run_once(db_session)
+
+    telegram_rows = (
+        await db_session.execute(select(NotificationOutbox).where(NotificationOutbox.channel == "telegram"))
+    ).scalars().all()
+    assert len(telegram_rows) == 2
+    for row in telegram_rows:
+        assert row.status == "pending"
+        assert row.attempts == 0
+        assert _as_utc(row.next_attempt_at) >= before + timedelta(seconds=119)
+    # The email channel is not affected by the Telegram flood wait
+    assert len(get_outbox()) == 1
+    assert await worker.run_once(db_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_failures_back_off_then_dead_letter(db_session: AsyncSession):
+    await _reset(db_session)
+    item = enqueue_telegram(db_session, to="@broken", text="x")
+    await db_session.commit()
+
+    worker = NotificationWorker(
+        transports={"telegram": FakeTelegram(fail_with=RuntimeError("boom"))},
+        max_attempts=2,
+        retry_base_seconds=60,
+    )
+    await worker.run_once(db_session)
+    await db_session.refresh(item)
+    assert item.status == "pending"
+    assert item.attempts == 1
+    assert "boom" in item.last_error
+    assert _as_utc(item.next_attempt_at) > datetime.now(timezone.utc) + timedelta(seconds=50)
+
+    # Make it due again; the second failure reaches max_attempts
+    item.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    await db_session.commit()
+    await worker.run_once(db_session)
+    await db_session.refresh(item)
+    assert item.status == "dead"
+    assert item.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_send_runs_outside_a_transaction(db_session: AsyncSession):
+    await _reset(db_session)
+    enqueue_telegram(db_session, to="@slow", text="x")
+    await db_session.commit()
+
+    class Probe(FakeTelegram):
+        async def send(self, item):
+            # No row locks or open transaction while the remote side is slow
+            self.in_transaction = db_session.in_transaction()
+            await super().send(item)
+
+    probe = Probe()
+    worker = NotificationWorker(transports={"telegram": probe})
+    assert await worker.run_once(db_session) == 1
+    assert probe.in_transaction is False
+    assert probe.sent == [("@slow", "x")]
+    status = (await db_session.execute(select(NotificationOutbox.status))).scalar_one()
+    assert status == "sent"
+
+
+@pytest.mark.asyncio
+async def test_purge_removes_old_sent_and_dead_rows(db_session: AsyncSession):
+    from app.services.notifications import purge_notifications
+
+    await _reset(db_session)
+    old = datetime.now(timezone.utc) - timedelta(days=40)
+    db_session.add_all([
+        NotificationOutbox(channel="email", recipient="old-sent", status="sent", sent_at=old),
+        NotificationOutbox(channel="email", recipient="new-sent", status="sent", sent_at=datetime.now(timezone.utc)),
+        NotificationOutbox(channel="email", recipient="old-dead", status="dead", updated_at=old),
+        NotificationOutbox(channel="email", recipient="old-pending", status="pending", updated_at=old),
+    ])
+    await db_session.commit()
+
+    assert await purge_notifications(db_session, timedelta(days=7), timedelta(days=30)) == 2
+    await db_session.commit()
+    left = (await db_session.execute(select(NotificationOutbox.recipient))).scalars().all()
+    assert sorted(left) == ["new-sent", "old-pending"]
+
+
+class FakeSMTP:
+    """Records SMTP sessions; ``fail`` holds exceptions to raise from the next send_message calls."""
+
+    opened = []
+    fail = []
+
+    def __init__(self, host, port, timeout=None):
+        self.sent, self.alive, self.closed = [], True, False
+        FakeSMTP.opened.append(self)
+
+    def ehlo(self):
+        pass
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        return 250, b"OK"
+
+    def send_message(self, msg, from_addr=None, to_addrs=None):
+        if FakeSMTP.fail:
+            raise FakeSMTP.fail.pop(0)
+        self.sent.append(msg["Subject"])
+
+    def quit(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    from app.core.config import settings
+    from app.services import email
+
+    FakeSMTP.opened, FakeSMTP.fail = [], []
+    monkeypatch.setattr(email.smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(settings, "smtp_use_tls", False)
+    monkeypatch.setattr(settings, "smtp_username", None)
+    return FakeSMTP
+
+
+def _message(subject: str):
+    from app.services.email import build_email_message
+
+    return build_email_message("to@example.com", subject, text="hi", sender="from@example.com")
+
+
+def test_smtp_failures_are_not_resent(fake_smtp):
+    from app.services.email import SMTPConnection
+
+    conn = SMTPConnection(probe_after=0)
+    msg, sender, rcpt = _message("one")
+    conn.send(msg, sender, rcpt)
+
+    # A refusal or a drop mid-transaction goes back to the caller, never a second attempt
+    for error in (
+        smtplib.SMTPRecipientsRefused({"to@example.com": (550, b"No such user")}),
+        smtplib.SMTPDataError(554, b"Rejected"),
+        smtplib.SMTPServerDisconnected("Connection unexpectedly closed"),
+        TimeoutError("timed out"),
+    ):
+        fake_smtp.fail.append(error)
+        with pytest.raises(type(error)):
+            conn.send(*_message("retry?"))
+    assert [s.sent for s in fake_smtp.opened] == [["one"], []]
+
+    # A connection the server dropped while idle is replaced before the transaction starts
+    conn.send(*_message("two"))
+    fake_smtp.opened[-1].alive = False
+    conn.send(*_message("three"))
+    assert [s.sent for s in fake_smtp.opened] == [["one"], [], ["two"], ["three"]]
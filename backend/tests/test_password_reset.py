@@ -9,6 +9,13 @@ from app.schemas.user import UserCreate
 from app.services.user import create_user
 from app.db.models.app_user_session import AppUserSession
 from app.services.email import get_outbox, clear_outbox
+from app.services.notifications import NotificationWorker, EmailTransport
+
+
+async def deliver_emails(db: AsyncSession) -> None:
+    # Emails are queued by the endpoint; deliver them through the memory backend
+    worker = NotificationWorker(transports={"email": EmailTransport()})
+    await worker.drain(db)
 
 
 async def create_test_user(db: AsyncSession, email: str = "resetuser@example.com", password: str = "test_password123"):
@@ -26,6 +33,7 @@ async def create_test_user(db: AsyncSession, email: str = "resetuser@example.com
 async def test_request_password_reset_success(client: AsyncClient, db_session: AsyncSession):
     # Arrange: create user and clear outbox
     user = await create_test_user(db_session, "reset.success@example.com")
+    await deliver_emails(db_session)
     clear_outbox()
 
     # Act: call endpoint
@@ -37,6 +45,7 @@ async def test_request_password_reset_success(client: AsyncClient, db_session: A
     assert body.get("message")
 
     # Assert: email sent
+    await deliver_emails(db_session)
     outbox = get_outbox()
     assert len(outbox) == 1
     msg = outbox[0]
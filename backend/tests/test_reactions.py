@@ -0,0 +1,139 @@
+import asyncio
+import os
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.case import Case
+from app.db.models.message import Message
+from app.db.models.message_person import MessagePerson
+from app.db.models.message_reaction_count import MessageReactionCount
+from app.db.models.person import Person
+from app.db.models.subject import Subject
+from app.services.reactions import _insert_counter, reaction_counts, reconcile_reaction_counts, set_reaction
+
+# SQLite serialises writers, so the sweep-vs-reaction race only exists on PostgreSQL.
+# Set TEST_POSTGRES_URL (postgresql+psycopg://...) to run it.
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+async def _setup(db: AsyncSession, case_number: str):
+    persons = [Person(first_name="React", last_name=str(i)) for i in range(3)]
+    subject = Subject(first_name="Missing", last_name="Person")
+    db.add_all([*persons, subject])
+    await db.flush()
+    case = Case(subject_id=subject.id, case_number=case_number)
+    db.add(case)
+    await db.flush()
+    messages = [Message(case_id=case.id, written_by_id=persons[0].id, message=f"m{i}") for i in range(2)]
+    db.add_all(messages)
+    await db.commit()
+    return persons, messages
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_reaction_changes(db_session: AsyncSession):
+    persons, (m1, m2) = await _setup(db_session, "25-RX-00001")
+
+    for person in persons:
+        await set_reaction(db_session, m1.id, person.id, "👍")
+    # Switching emoji moves one count; clearing removes the emptied counter
+    assert await set_reaction(db_session, m1.id, persons[1].id, "❤️") == "👍"
+    await set_reaction(db_session, m2.id, persons[2].id, "😮")
+    await set_reaction(db_session, m2.id, persons[2].id, None)
+    # Re-sending the same reaction is a no-op
+    await set_reaction(db_session, m1.id, persons[0].id, "👍")
+    await db_session.commit()
+
+    assert await reaction_counts(db_session, [m1.id, m2.id]) == {
+        m1.id: [{"emoji": "👍", "count": 2}, {"emoji": "❤️", "count": 1}],
+    }
+    assert await reconcile_reaction_counts(db_session, [m1.id, m2.id]) == 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_rebuilds_drifted_counters(db_session: AsyncSession):
+    persons, (m1, m2) = await _setup(db_session, "25-RX-00002")
+    await set_reaction(db_session, m1.id, persons[0].id, "👍")
+    await db_session.commit()
+
+    # Writes that bypassed set_reaction
+    db_session.add(MessagePerson(message_id=m2.id, person_id=persons[1].id, reaction="🙏"))
+    await db_session.execute(sa.update(MessageReactionCount).where(MessageReactionCount.message_id == m1.id).values(count=7))
+    db_session.add(MessageReactionCount(message_id=m1.id, reaction="🔥", count=2))
+    await db_session.commit()
+
+    assert await reconcile_reaction_counts(db_session) >= 3
+    await db_session.commit()
+    assert await reaction_counts(db_session, [m1.id, m2.id]) == {
+        m1.id: [{"emoji": "👍", "count": 1}],
+        m2.id: [{"emoji": "🙏", "count": 1}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_reconcile_insert_recounts_when_a_bump_created_the_row(db_session: AsyncSession):
+    persons, (m1, _) = await _setup(db_session, "25-RX-00003")
+    for person in persons[:2]:
+        db_session.add(MessagePerson(message_id=m1.id, person_id=person.id, reaction="👍"))
+    await db_session.commit()
+
+    # The sweep counted one reaction before a concurrent first set_reaction committed
+    # both its message_person row and the counter row
+    db_session.add(MessageReactionCount(message_id=m1.id, reaction="👍", count=1))
+    await db_session.commit()
+    await _insert_counter(db_session, m1.id, "👍", 1)
+    await db_session.commit()
+    assert await reaction_counts(db_session, [m1.id]) == {m1.id: [{"emoji": "👍", "count": 2}]}
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+async def test_reconcile_next_to_concurrent_reactions_on_postgres():
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.db import Base
+
+    engine = create_async_engine(POSTGRES_URL, pool_size=30, max_overflow=0)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_maker() as db:
+            persons = [Person(first_name="React", last_name=f"pg{i}") for i in range(20)]
+            subject = Subject(first_name="Missing", last_name="Reactions")
+            db.add_all([*persons, subject])
+            await db.flush()
+            case = Case(subject_id=subject.id, case_number="25-RX-PG001")
+            db.add(case)
+            await db.flush()
+            message = Message(case_id=case.id, written_by_id=persons[0].id, message="race")
+            db.add(message)
+            await db.commit()
+
+        async def react(person_id: int, emoji: str) -> None:
+            async with session_maker() as db:
+                await set_reaction(db, message.id, person_id, emoji)
+                await db.commit()
+
+        async def sweep() -> None:
+            for _ in range(10):
+                async with session_maker() as db:
+                    await reconcile_reaction_counts(db, [message.id])
+                    await db.commit()
+
+        try:
+            await asyncio.gather(sweep(), *(react(p.id, "👍" if i % 2 else "🔥") for i, p in enumerate(persons)))
+            async with session_maker() as db:
+                assert await reconcile_reaction_counts(db, [message.id]) == 0
+                counts = await reaction_counts(db, [message.id])
+            assert sorted((c["emoji"], c["count"]) for c in counts[message.id]) == [("👍", 10), ("🔥", 10)]
+        finally:
+            async with session_maker() as db:
+                await db.execute(sa.delete(Case).where(Case.id == case.id))
+                await db.execute(sa.delete(Subject).where(Subject.id == subject.id))
+                await db.execute(sa.delete(Person).where(Person.id.in_([p.id for p in persons])))
+                await db.commit()
+    finally:
+        await engine.dispose()
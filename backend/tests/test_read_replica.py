@@ -0,0 +1,148 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.models.app_user_session import AppUserSession
+from app.db.models.system_setting import SystemSetting
+from app.db.session import ReadWriteRouter, reset_client_pinned, set_client_pinned
+
+
+async def _make_db(path, marker: str):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(SystemSetting.__table__.create)
+        await conn.execute(text("INSERT INTO system_setting (name, value) VALUES ('marker', :v)"), {"v": marker})
+    return engine
+
+
+@pytest_asyncio.fixture
+async def makers(tmp_path):
+    primary = await _make_db(tmp_path / "primary.db", "primary")
+    replica = await _make_db(tmp_path / "replica.db", "replica")
+    try:
+        yield (
+            async_sessionmaker(primary, class_=AsyncSession, expire_on_commit=False),
+            async_sessionmaker(replica, class_=AsyncSession, expire_on_commit=False),
+        )
+    finally:
+        await primary.dispose()
+        await replica.dispose()
+
+
+async def _marker(maker) -> str:
+    async with maker() as db:
+        return (await db.execute(text("SELECT value FROM system_setting WHERE name = 'marker'"))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_until_session_writes(makers):
+    primary, replica = makers
+    router = ReadWriteRouter(primary, replica, pin_seconds=60)
+
+    assert await _marker(router.reader_for("sid-1")) == "replica"
+
+    # A write through the primary pins only the writing session
+    async with primary() as db:
+        router.track_writes(db, "sid-1")
+        db.add(SystemSetting(name="other", value="x"))
+        await db.commit()
+
+    assert await _marker(router.reader_for("sid-1")) == "primary"
+    assert await _marker(router.reader_for("sid-2")) == "replica"
+    assert await _marker(router.reader_for(None)) == "replica"
+
+    # So does a raw text() write
+    async with primary() as db:
+        router.track_writes(db, "sid-4")
+        await db.execute(text("SELECT value FROM system_setting WHERE name = 'marker'"))
+        assert not router.is_pinned("sid-4")
+        await db.execute(text("UPDATE system_setting SET value = 'x' WHERE name = 'other'"))
+        await db.commit()
+    assert router.is_pinned("sid-4")
+
+
+@pytest.mark.asyncio
+async def test_pin_expires_and_session_table_writes_do_not_pin(makers):
+    primary, replica = makers
+    router = ReadWriteRouter(primary, replica, pin_seconds=0)
+
+    async with primary() as db:
+        router.track_writes(db, "sid-1")
+        await db.execute(text("UPDATE system_setting SET value = 'p' WHERE name = 'marker'"))
+        await db.commit()
+    # Zero-length window: the pin has already lapsed
+    assert router.reader_for("sid-1") is replica
+
+    # Touching the session row (every authenticated request does) must not pin
+    router.pin_seconds = 60
+    expires = datetime.now(timezone.utc) + timedelta(days=1)
+    async with primary() as db:
+        await db.run_sync(lambda s: AppUserSession.__table__.create(s.connection()))
+        db.add(AppUserSession(app_user_id=1, jti="jti-1", expires_at=expires))
+        await db.commit()
+    async with primary() as db:
+        router.track_writes(db, "sid-2")
+        row = (await db.execute(select(AppUserSession).where(AppUserSession.jti == "jti-1"))).scalar_one()
+        row.last_used_at = datetime.now(timezone.utc)
+        await db.flush()
+        await db.execute(update(AppUserSession).where(AppUserSession.id == row.id).values(is_active=True))
+        await db.execute(text("UPDATE app_user_session SET last_used_at = CURRENT_TIMESTAMP WHERE jti = 'jti-1'"))
+        await db.execute(text("SELECT value FROM system_setting"))
+        await db.commit()
+    assert router.reader_for("sid-2") is replica
+
+    assert not router.is_pinned("sid-3")
+    router.pin("sid-3")
+    assert router.reader_for("sid-3") is primary
+
+
+def test_without_replica_everything_reads_primary():
+    sentinel = object()
+    router = ReadWriteRouter(sentinel)  # type: ignore[arg-type]
+    assert not router.has_replica
+    router.pin("sid-1")
+    assert router.reader_for("sid-1") is sentinel
+    assert router.reader_for(None) is sentinel
+
+
+@pytest.mark.asyncio
+async def test_pin_travels_with_the_client_to_other_workers(makers):
+    primary, replica = makers
+    # Two processes: same secret, separate pin maps
+    writer = ReadWriteRouter(primary, replica, pin_seconds=60, secret="s3cret")
+    other = ReadWriteRouter(primary, replica, pin_seconds=60, secret="s3cret")
+
+    assert writer.pin_cookie("sid-1") is None
+    writer.pin("sid-1")
+    cookie = writer.pin_cookie("sid-1")
+    assert cookie and not other.is_pinned("sid-1")
+
+    assert other.client_pinned("sid-1", cookie)
+    token = set_client_pinned(other.client_pinned("sid-1", cookie))
+    try:
+        assert other.reader_for("sid-1") is primary
+    finally:
+        reset_client_pinned(token)
+    assert other.reader_for("sid-1") is replica
+
+    # Bound to the session key and the secret, and only until it expires
+    assert not other.client_pinned("sid-2", cookie)
+    assert not ReadWriteRouter(primary, replica, secret="other").client_pinned("sid-1", cookie)
+    until, sig = cookie.split(".")
+    assert not other.client_pinned("sid-1", f"{int(until) + 3600}.{sig}")
+    assert not other.client_pinned("sid-1", f"{int(time.time()) - 1}.{other._sign('sid-1', int(time.time()) - 1)}")
+    assert not other.client_pinned("sid-1", "garbage")
+
+
+def test_expired_pins_are_pruned_on_pin():
+    sentinel, replica = object(), object()
+    router = ReadWriteRouter(sentinel, replica, pin_seconds=0)  # type: ignore[arg-type]
+    for i in range(100):
+        router.pin(f"write-only-{i}")
+    router._next_prune = 0.0
+    router.pin("sid-last")
+    assert list(router._pins) == ["sid-last"]
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.case import Case
+from app.db.models.message import Message
+from app.db.models.person import Person
+from app.db.models.person_case import PersonCase
+from app.db.models.subject import Subject
+from app.db.models.task import Task
+from app.services.read_state import RowsReadState, WatermarkReadState, backfill_watermarks
+
+rows_store = RowsReadState()
+watermark_store = WatermarkReadState()
+
+
+async def _counts(db: AsyncSession, store, person_id: int) -> dict:
+    rows = (await db.execute(store.unseen_counts_query(person_id))).all()
+    return {(r.case_id, r.task_id): int(r.cnt) for r in rows}
+
+
+async def _setup(db: AsyncSession, case_number: str):
+    author = Person(first_name="Auth", last_name="Or")
+    reader = Person(first_name="Rea", last_name="Der")
+    subject = Subject(first_name="Missing", last_name="Person")
+    db.add_all([author, reader, subject])
+    await db.flush()
+    case = Case(subject_id=subject.id, case_number=case_number)
+    db.add(case)
+    await db.flush()
+    db.add_all([PersonCase(person_id=author.id, case_id=case.id), PersonCase(person_id=reader.id, case_id=case.id)])
+    task = Task(case_id=case.id, assigned_by_id=author.id, title="Canvass", description="Canvass the area")
+    db.add(task)
+    await db.flush()
+
+    messages = []
+    for i, task_id in enumerate([None, None, task.id, None, task.id]):
+        m = Message(case_id=case.id, written_by_id=author.id, message=f"m{i}", task_id=task_id)
+        db.add(m)
+        await db.flush()
+        messages.append(m)
+        assert await rows_store.on_message_created(db, m.id, case.id, author.id) == 1
+    await db.commit()
+    return author, reader, case, task, messages
+
+
+@pytest.mark.asyncio
+async def test_watermark_matches_rows_backend(db_session: AsyncSession):
+    author, reader, case, task, messages = await _setup(db_session, "25-RS-00001")
+
+    expected = {(case.id, None): 3, (case.id, task.id): 2}
+    assert await _counts(db_session, rows_store, reader.id) == expected
+    assert await _counts(db_session, watermark_store, reader.id) == expected
+    # Authors never have unseen state for their own messages
+    assert await _counts(db_session, watermark_store, author.id) == {}
+
+    # Reading the task thread only clears that thread for watermarks
+    assert await watermark_store.mark_seen_up_to(db_session, reader.id, case.id, messages[2].id) == 1
+    await db_session.commit()
+    assert await _counts(db_session, watermark_store, reader.id) == {(case.id, None): 3, (case.id, task.id): 1}
+
+    # Reading the main chat covers every thread up to that message
+    assert await watermark_store.mark_seen_up_to(db_session, reader.id, case.id, messages[3].id) == 3
+    assert await rows_store.mark_seen_up_to(db_session, reader.id, case.id, messages[3].id) == 4
+    await db_session.commit()
+    expected = {(case.id, task.id): 1}
+    assert await _counts(db_session, rows_store, reader.id) == expected
+    assert await _counts(db_session, watermark_store, reader.id) == expected
+
+    # The batched per-message lookup (WebSocket updates) agrees with the counts
+    both = {author.id, reader.id}
+    for store in (rows_store, watermark_store):
+        assert await store.seen_by(db_session, messages[3].id, both) == both
+        assert await store.seen_by(db_session, messages[4].id, both) == {author.id}
+        assert await store.seen_by(db_session, messages[4].id, set()) == set()
+
+
+@pytest.mark.asyncio
+async def test_backfill_preserves_unseen_messages(db_session: AsyncSession):
+    author, reader, case, task, messages = await _setup(db_session, "25-RS-00002")
+    assert await rows_store.mark_seen_up_to(db_session, reader.id, case.id, messages[2].id) == 3
+    await db_session.commit()
+
+    assert await backfill_watermarks(db_session) > 0
+    await db_session.commit()
+
+    expected = {(case.id, None): 1, (case.id, task.id): 1}
+    assert await _counts(db_session, rows_store, reader.id) == expected
+    assert await _counts(db_session, watermark_store, reader.id) == expected
@@ -0,0 +1,54 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.ref_type import RefType
+from app.db.models.ref_value import RefValue
+from app.services.reference_data import get_reference_data, reference_cache
+
+
+@pytest.mark.asyncio
+async def test_reference_values_are_cached_and_served_with_etag(client: AsyncClient, db_session: AsyncSession):
+    rt = RefType(name="Hair", code="HAIR_TEST")
+    db_session.add(rt)
+    await db_session.flush()
+    db_session.add_all([
+        RefValue(name="Red", code="RED", sort_order=2, ref_type_id=rt.id),
+        RefValue(name="Black", code="BLK", sort_order=1, ref_type_id=rt.id),
+        RefValue(name="Other", code="OTH", sort_order=None, ref_type_id=rt.id),
+    ])
+    await db_session.commit()
+    reference_cache.invalidate()
+
+    resp = await client.get("/api/v1/reference/HAIR_TEST/values")
+    assert resp.status_code == 200
+    assert [v["code"] for v in resp.json()] == ["BLK", "RED", "OTH"]
+    etag = resp.headers["etag"]
+
+    resp = await client.get("/api/v1/reference/HAIR_TEST/values", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    # Creating a value bumps the version row: old validators stop matching
+    resp = await client.post("/api/v1/reference/HAIR_TEST/values", json={"name": "Blond", "code": "BLN", "sort_order": 0})
+    assert resp.status_code == 200
+    resp = await client.get("/api/v1/reference/HAIR_TEST/values", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert [v["code"] for v in resp.json()] == ["BLN", "BLK", "RED", "OTH"]
+    assert resp.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_snapshot_resolves_ids(db_session: AsyncSession):
+    rt = RefType(name="Sex", code="SEX_TEST")
+    db_session.add(rt)
+    await db_session.flush()
+    rv = RefValue(name="Female", code="F", ref_type_id=rt.id)
+    db_session.add(rv)
+    await db_session.commit()
+    reference_cache.invalidate()
+
+    snap = await get_reference_data(db_session)
+    assert snap.code(rv.id) == "F"
+    assert snap.name(rv.id) == "Female"
+    assert snap.code(None) is None
+    assert snap.get(rv.id).type_code == "SEX_TEST"
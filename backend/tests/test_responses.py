@@ -0,0 +1,65 @@
+import json
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import List
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.api.responses import FastJSONResponse, validated_response
+from app.core import id_codec
+from app.core.config import settings
+from app.schemas.message import MessageRead, ReactionGroup
+
+
+class _Color(Enum):
+    RED = "red"
+
+
+def _messages() -> list:
+    ts = datetime(2025, 3, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+    return [
+        MessageRead(
+            id=i, case_id=7, written_by_id=3, message=f"m{i}", reply_to_id=i - 1 if i > 1 else None,
+            task_id=9 if i == 2 else None, created_at=ts, updated_at=ts,
+            reactions=[ReactionGroup(emoji="+1", count=2)],
+        )
+        for i in range(1, 4)
+    ]
+
+
+def test_fast_json_response_matches_jsonable_encoder():
+    content = [{
+        "date": date(2025, 1, 2),
+        "time": time(9, 5, 7, 120),
+        "at": datetime(2025, 1, 2, 9, 5, tzinfo=timezone.utc),
+        "naive": datetime(2025, 1, 2, 9, 5),
+        "amount": Decimal("12.50"),
+        "count": Decimal("3"),
+        "tags": {"a"},
+        "color": _Color.RED,
+        "reaction": ReactionGroup(emoji="x", count=1),
+        "none": None,
+    }]
+    assert json.loads(FastJSONResponse(content).body) == jsonable_encoder(content)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encrypted", [False, True])
+async def test_validated_response_matches_response_model_path(encrypted, monkeypatch):
+    monkeypatch.setattr(settings, "id_encryption_enabled", encrypted)
+    token = id_codec.set_current_session("responses-test")
+    try:
+        items = _messages()
+        body = json.loads(validated_response(items, List[MessageRead]).body)
+        assert body[0]["case_id"] == id_codec.encode_id("case", 7)
+        assert body[2]["created_at"] == "2025-03-01T12:30:15.250000Z"
+        assert body[1]["id"].startswith("3.") if encrypted else body[1]["id"] == "2"
+        field = create_model_field(name="Response_messages", type_=List[MessageRead], mode="serialization")
+        standard = await serialize_response(field=field, response_content=items, is_coroutine=True)
+        assert body == standard
+    finally:
+        id_codec.reset_current_session(token)
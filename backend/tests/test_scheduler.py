@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.app_user import AppUser
+from app.db.models.app_user_session import AppUserSession
+from app.services.scheduler import MaintenanceJob, MaintenanceScheduler, purge_expired_sessions
+
+
+@pytest.mark.asyncio
+async def test_expired_sessions_are_purged_in_batches(db_session: AsyncSession, async_session_maker):
+    user = AppUser(email="scheduler@example.com", password_hash="x", is_active=True)
+    db_session.add(user)
+    await db_session.flush()
+    now = datetime.now(timezone.utc)
+    db_session.add_all(
+        [AppUserSession(app_user_id=user.id, jti=f"old-{i}", expires_at=now - timedelta(days=30)) for i in range(5)]
+        + [AppUserSession(app_user_id=user.id, jti="live", expires_at=now + timedelta(hours=1))]
+    )
+    await db_session.commit()
+
+    scheduler = MaintenanceScheduler(
+        [MaintenanceJob("expired_sessions", purge_expired_sessions, 3600)],
+        session_maker=async_session_maker,
+        batch_size=2,
+        max_batches=10,
+    )
+    await scheduler.tick()
+
+    remaining = (await db_session.execute(select(AppUserSession.jti).where(AppUserSession.app_user_id == user.id))).scalars().all()
+    assert remaining == ["live"]
+    [job] = scheduler.stats()["jobs"]
+    assert job["runs"] == 1 and job["failures"] == 0
+    assert job["last_processed"] == 5
+    assert job["last_batches"] == 3
+    assert job["next_run_in_seconds"] > 0
+
+    # Not due again until the interval has passed
+    await scheduler.tick()
+    assert scheduler.stats()["jobs"][0]["runs"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failing_job_is_recorded_and_others_still_run(async_session_maker):
+    calls = []
+
+    async def broken(db, limit):
+        raise RuntimeError("bucket unavailable")
+
+    async def fine(db, limit):
+        calls.append(limit)
+        return 0
+
+    scheduler = MaintenanceScheduler(
+        [MaintenanceJob("broken", broken, 60), MaintenanceJob("fine", fine, 60)],
+        session_maker=async_session_maker,
+        batch_size=50,
+    )
+    await scheduler.tick()
+
+    stats = {j["name"]: j for j in scheduler.stats()["jobs"]}
+    assert stats["broken"]["failures"] == 1
+    assert stats["broken"]["last_error"] == "RuntimeError: bucket unavailable"
+    assert stats["fine"]["runs"] == 1 and calls == [50]
+    assert scheduler.stats()["is_leader"] is True
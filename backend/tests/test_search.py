@@ -0,0 +1,40 @@
+import pytest
+from httpx import AsyncClient
+from pydantic.v1 import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.app_user_case import AppUserCase
+from app.db.models.case import Case
+from app.db.models.message import Message
+from app.db.models.person import Person
+from app.db.models.subject import Subject
+from app.db.models.task import Task
+from app.schemas.user import UserCreate
+from app.services.user import create_user
+
+
+@pytest.mark.asyncio
+async def test_global_search_across_case_task_and_message(client: AsyncClient, db_session: AsyncSession):
+    password = "StrongPassw0rd!"
+    user = await create_user(db_session, UserCreate(first_name="Se", last_name="Arch", email=EmailStr("search@example.com"), password=password))
+    person = Person(first_name="Se", last_name="Arch", app_user_id=user.id)
+    subject = Subject(first_name="Quill", last_name="Subject")
+    db_session.add_all([person, subject])
+    await db_session.flush()
+    case = Case(subject_id=subject.id, case_number="25-ZEBRA-1")
+    db_session.add(case)
+    await db_session.flush()
+    db_session.add_all([
+        AppUserCase(app_user_id=user.id, case_id=case.id),
+        Task(case_id=case.id, assigned_by_id=person.id, title="Call the zebra keeper", description="-"),
+        Message(case_id=case.id, written_by_id=person.id, message="A zebra was seen downtown"),
+    ])
+    await db_session.commit()
+
+    resp = await client.post("/api/v1/auth/login", json={"email": "search@example.com", "password": password})
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    # Three registry tables -> a three-part UNION ALL
+    resp = await client.get("/api/v1/search", params={"q": "zebra"}, headers=headers)
+    assert resp.status_code == 200
+    assert {h["entity_type"] for h in resp.json()["hits"]} == {"case", "task", "message"}
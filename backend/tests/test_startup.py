@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parents[1]
+
+# Loaded on first use only (image classification, OCR, Telegram, migrations)
+HEAVY_MODULES = ("torch", "torchvision", "cv2", "numpy", "pytesseract", "PIL", "telethon", "alembic")
+
+# Wall-clock budget for `import main` in a fresh interpreter. The default leaves room for noisy
+# CI machines and catches gross regressions; heavy libraries themselves are caught exactly by
+# the module check below. Tighten it on a dedicated perf runner (e.g. IMPORT_BUDGET_SECONDS=3)
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "10"))
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def _import_main() -> dict:
+    env = {**os.environ, "EMAIL_BACKEND": "memory"}
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_main_imports_without_heavy_optional_libraries():
+    result = _import_main()
+    assert result["loaded"] == []
+
+
+def test_main_imports_within_budget():
+    # Best of two: the first run may pay for cold disk caches and .pyc writes
+    seconds = min(_import_main()["seconds"] for _ in range(2))
+    assert seconds < IMPORT_BUDGET_SECONDS, f"import main took {seconds:.2f}s (budget {IMPORT_BUDGET_SECONDS}s)"
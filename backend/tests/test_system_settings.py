@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.system_setting import SystemSetting
+from app.services import system_settings as ss
+
+
+@pytest.mark.asyncio
+async def test_snapshot_serves_reads_and_writes_through(db_session: AsyncSession, async_session_maker, monkeypatch):
+    # The snapshot loads through its own session, on the test database
+    monkeypatch.setattr(ss, "async_session_maker", async_session_maker)
+    db_session.add(SystemSetting(name="test_limit", value=" 42 "))
+    await db_session.commit()
+    ss.invalidate_settings_cache()
+
+    assert await ss.get_setting_int("test_limit", db_session) == 42
+    assert await ss.has_setting("test_limit", db_session)
+    assert not await ss.has_setting("test_missing", db_session)
+    with pytest.raises(ss.SettingNotFoundError):
+        await ss.get_setting("test_missing", db_session)
+
+    # An out-of-band change is not visible until the snapshot is invalidated
+    row = (await db_session.execute(select(SystemSetting).where(SystemSetting.name == "test_limit"))).scalar_one()
+    row.value = "7"
+    await db_session.commit()
+    assert await ss.get_setting("test_limit", db_session) == " 42 "
+    ss.invalidate_settings_cache()
+    assert await ss.get_setting("test_limit", db_session) == "7"
+
+    # set_setting with a caller session joins its transaction; the snapshot takes the
+    # value only once that transaction commits
+    await ss.set_setting("test_new", "hello", db_session)
+    assert not await ss.has_setting("test_new")
+    await db_session.commit()
+    assert await ss.get_setting("test_new") == "hello"
+    stored = (await db_session.execute(select(SystemSetting.value).where(SystemSetting.name == "test_new"))).scalar_one()
+    assert stored == "hello"
+
+    # A rolled-back change never reaches the snapshot
+    await ss.set_setting("test_new", "rolled back", db_session)
+    await db_session.rollback()
+    await db_session.commit()
+    assert await ss.get_setting("test_new") == "hello"
+    ss.invalidate_settings_cache()
+    assert await ss.get_setting("test_new", db_session) == "hello"
+
+    # A reload while the caller's write is still open must not cache that write for everyone
+    await ss.set_setting("test_new", "uncommitted", db_session)
+    ss.invalidate_settings_cache()
+    assert await ss.get_setting("test_new", db_session) == "hello"
+    await db_session.rollback()
+    assert await ss.get_setting("test_new") == "hello"
+    ss.invalidate_settings_cache()
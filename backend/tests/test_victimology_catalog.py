@@ -0,0 +1,67 @@
+import pytest
+from httpx import AsyncClient
+from pydantic.v1 import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.app_user_case import AppUserCase
+from app.db.models.case import Case
+from app.db.models.case_victimology import CaseVictimology
+from app.db.models.ref_type import RefType
+from app.db.models.ref_value import RefValue
+from app.db.models.subject import Subject
+from app.db.models.victimology import victimology as Victimology
+from app.db.models.victimology_category import victimologyCategory as VictimologyCategory
+from app.schemas.user import UserCreate
+from app.services.reference_data import bump_reference_version
+from app.services.user import create_user
+
+
+@pytest.mark.asyncio
+async def test_catalog_is_cached_and_answers_map_merges(client: AsyncClient, db_session: AsyncSession):
+    password = "StrongPassw0rd!"
+    user = await create_user(db_session, UserCreate(first_name="Vic", last_name="Tim", email=EmailStr("viccatalog@example.com"), password=password))
+    subject = Subject(first_name="Catalog", last_name="Subject")
+    rt = RefType(name="Yes/no test", code="VIC_YN_TEST")
+    category = VictimologyCategory(category="Catalog test", sort_order=-1)
+    db_session.add_all([subject, rt, category])
+    await db_session.flush()
+    yes = RefValue(name="Yes", code="Y", ref_type_id=rt.id)
+    q1 = Victimology(victimology_category_id=category.id, question="Runs away?", sort_order=1)
+    q2 = Victimology(victimology_category_id=category.id, question="Online friends?", sort_order=2)
+    case = Case(subject_id=subject.id, case_number="25-VC-06001")
+    db_session.add_all([yes, q1, q2, case])
+    await db_session.flush()
+    db_session.add(AppUserCase(app_user_id=user.id, case_id=case.id))
+    db_session.add(CaseVictimology(case_id=case.id, victimology_id=q2.id, answer_id=yes.id, details="discord"))
+    await bump_reference_version(db_session)
+    await db_session.commit()
+
+    resp = await client.post("/api/v1/auth/login", json={"email": "viccatalog@example.com", "password": password})
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    first = await client.get("/api/v1/cases/victimology/catalog", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    cat = next(c for c in first.json() if c["category"] == "Catalog test")
+    assert [q["question"] for q in cat["questions"]] == ["Runs away?", "Online friends?"]
+
+    again = await client.get("/api/v1/cases/victimology/catalog", headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304
+
+    # A new question only shows up after a reference-data version bump
+    db_session.add(Victimology(victimology_category_id=category.id, question="Curfew?", sort_order=3))
+    await db_session.commit()
+    stale = await client.get("/api/v1/cases/victimology/catalog", headers={**headers, "If-None-Match": etag})
+    assert stale.status_code == 304
+    await bump_reference_version(db_session)
+    await db_session.commit()
+    fresh = await client.get("/api/v1/cases/victimology/catalog", headers={**headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    cat = next(c for c in fresh.json() if c["category"] == "Catalog test")
+    assert len(cat["questions"]) == 3
+
+    # Answers keyed like questions[].id
+    resp = await client.get(f"/api/v1/cases/{case.id}/victimology", params={"format": "map"}, headers=headers)
+    assert resp.status_code == 200
+    answers = resp.json()["answers"]
+    assert answers == {cat["questions"][1]["id"]: {"answer_id": str(yes.id), "details": "discord"}}
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.api.v1.endpoints.messages import _CaseWSManager, _WSConnection
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_json(self, data):
+        self.frames.append(data)
+
+    async def close(self):
+        pass
+
+
+async def _connect(manager: _CaseWSManager, user_id: int, session_id: str) -> FakeWebSocket:
+    ws = FakeWebSocket()
+    await manager.subscribe_user(_WSConnection(ws, user_id, session_id))
+    return ws
+
+
+@pytest.mark.asyncio
+async def test_counts_are_targeted_and_coalesced():
+    recounts = []
+
+    async def fake_counts(enc_uid: str, session_id: str) -> dict:
+        recounts.append((enc_uid, session_id))
+        return {"count": len(recounts)}
+
+    manager = _CaseWSManager(counts_fn=fake_counts, debounce_seconds=0.05)
+    reader = await _connect(manager, 1, "sess-a")
+    reader_tab = await _connect(manager, 1, "sess-a")
+    bystander = await _connect(manager, 2, "sess-b")
+
+    # Three mark-seen calls from the same reader inside the debounce window
+    for _ in range(3):
+        await manager.publish_count_change(10, user_ids=[1])
+    # User 3 has no socket open
+    await manager.publish_count_change(10, user_ids=[3])
+    await asyncio.sleep(0.15)
+
+    # One recount for the reader's session, one frame per open tab, nothing for the bystander
+    assert len(recounts) == 1
+    assert reader.frames == [{"type": "counts.update", "counts": {"count": 1}}]
+    assert reader_tab.frames == reader.frames
+    assert bystander.frames == []
+
+    stats = manager.stats()
+    assert stats["counts_requested"] == 4
+    assert stats["counts_coalesced"] == 2
+    assert stats["frames_suppressed"] == 2
+    assert stats["counts_not_connected"] == 1
+    assert stats["counts_frames_sent"] == 2
+    assert stats["pending_users"] == 0
+    assert stats["connections"] == 3
+
+
+@pytest.mark.asyncio
+async def test_new_message_excludes_author():
+    async def fake_counts(enc_uid: str, session_id: str) -> dict:
+        return {"count": 1}
+
+    manager = _CaseWSManager(counts_fn=fake_counts, debounce_seconds=0)
+    author = await _connect(manager, 1, "sess-a")
+    other = await _connect(manager, 2, "sess-b")
+
+    await manager.publish_count_change(10, user_ids=[1, 2], exclude_user_ids=[1])
+    await manager.flush_counts()
+
+    assert author.frames == []
+    assert other.frames == [{"type": "counts.update", "counts": {"count": 1}}]
@@ -0,0 +1,171 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.endpoints.messages import _CaseWSManager, _WSConnection, _load_case_message
+from app.db.models.app_user import AppUser
+from app.db.models.app_user_case import AppUserCase
+from app.db.models.case import Case
+from app.db.models.message import Message
+from app.db.models.person import Person
+from app.db.models.person_case import PersonCase
+from app.db.models.subject import Subject
+from app.db.models.task import Task
+from app.services.reactions import set_reaction
+from app.services.read_state import MAIN_THREAD, get_read_state_store
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_json(self, data):
+        self.frames.append(data)
+
+    async def close(self):
+        pass
+
+
+async def _seed(db: AsyncSession, tag: str):
+    users, persons = [], []
+    for i in range(2):
+        user = AppUser(email=f"ws-{tag}-{i}@example.com", password_hash="x", is_active=True)
+        db.add(user)
+        await db.flush()
+        person = Person(first_name=f"P{i}", last_name=tag, app_user_id=user.id)
+        db.add(person)
+        users.append(user)
+        persons.append(person)
+    subject = Subject(first_name="Missing", last_name=tag)
+    db.add(subject)
+    await db.flush()
+    case = Case(subject_id=subject.id, case_number=f"25-WS-{tag}")
+    db.add(case)
+    await db.flush()
+    db.add_all([AppUserCase(app_user_id=u.id, case_id=case.id) for u in users])
+    task = Task(case_id=case.id, assigned_by_id=persons[0].id, title="Canvass", description="Canvass the area")
+    db.add(task)
+    await db.commit()
+    return users, persons, case, task
+
+
+async def _connect(manager: _CaseWSManager, user: AppUser, person: Person, protocol: int = 2) -> _WSConnection:
+    conn = _WSConnection(FakeWebSocket(), user.id, f"sess-{user.id}")
+    await manager.subscribe_user(conn)
+    if protocol >= 2:
+        manager.upgrade(conn, person.id, "/images/pfp-generic.png")
+    return conn
+
+
+@pytest.mark.asyncio
+async def test_created_message_reaches_thread_followers_in_one_batch(db_session: AsyncSession, async_session_maker):
+    users, persons, case, task = await _seed(db_session, "00001")
+
+    async def fake_counts(enc_uid: str, session_id: str) -> dict:
+        return {"count": 1}
+
+    manager = _CaseWSManager(counts_fn=fake_counts, debounce_seconds=60, batch_tick_ms=10_000, session_maker=async_session_maker)
+    author = await _connect(manager, users[0], persons[0])
+    task_reader = await _connect(manager, users[1], persons[1])
+    manager.set_subscription(author, case.id, None, True)
+    manager.set_subscription(task_reader, case.id, ("task", task.id), True)
+
+    for i, (task_id, thread) in enumerate([(task.id, ("task", task.id)), (None, MAIN_THREAD), (task.id, ("task", task.id))]):
+        m = Message(case_id=case.id, written_by_id=persons[0].id, message=f"m{i}", task_id=task_id)
+        db_session.add(m)
+        await db_session.commit()
+        model = await _load_case_message(db_session, case.id, m.id, None)
+        await manager.publish_message_created(case.id, model, thread, users[0].id)
+    # Close the debounce window now instead of waiting for it
+    manager._flush_task.cancel()
+    await manager.flush_counts()
+
+    # Nothing is sent until the tick
+    assert author.websocket.frames == [] and task_reader.websocket.frames == []
+    await manager.flush_batches()
+
+    [batch] = task_reader.websocket.frames
+    assert batch["type"] == "batch"
+    created = [e for e in batch["events"] if e["type"] == "message"]
+    assert [e["message"]["message"] for e in created] == ["m0", "m2"]
+    assert created[0]["thread"] == {"type": "task", "id": str(task.id)}
+    assert created[0]["message"]["is_mine"] is False and created[0]["message"]["seen"] is False
+    assert [e for e in batch["events"] if e["type"] == "counts.update"] == [{"type": "counts.update", "counts": {"count": 1}}]
+
+    # The author follows the whole case and gets their own messages back, but no counts
+    [batch] = author.websocket.frames
+    assert [e["message"]["message"] for e in batch["events"]] == ["m0", "m1", "m2"]
+    assert all(e["message"]["is_mine"] for e in batch["events"])
+    assert manager.stats()["batch_frames_sent"] == 2
+
+
+@pytest.mark.asyncio
+async def test_message_change_is_thin_for_v1_and_full_for_v2(db_session: AsyncSession, async_session_maker):
+    users, persons, case, task = await _seed(db_session, "00002")
+    # The reader receives unread state for the case
+    db_session.add(PersonCase(person_id=persons[1].id, case_id=case.id))
+    m = Message(case_id=case.id, written_by_id=persons[0].id, message="hello")
+    db_session.add(m)
+    await db_session.flush()
+    await get_read_state_store().on_message_created(db_session, m.id, case.id, persons[0].id)
+    await set_reaction(db_session, m.id, persons[1].id, "👍")
+    await db_session.commit()
+
+    manager = _CaseWSManager(debounce_seconds=0, batch_tick_ms=10_000, session_maker=async_session_maker)
+    legacy = await _connect(manager, users[0], persons[0], protocol=1)
+    reader = await _connect(manager, users[1], persons[1])
+    manager.set_subscription(reader, case.id, None, True)
+
+    await manager.publish_message_change(case.id, m.id)
+    assert legacy.websocket.frames == [
+        {"type": "messages.change", "case_id": str(case.id), "message_id": str(m.id), "reaction": None}
+    ]
+    await manager.flush_batches()
+    [batch] = reader.websocket.frames
+    [event] = batch["events"]
+    assert event["event"] == "updated" and event["thread"] is None
+    assert event["message"]["reaction"] == "👍"
+    assert event["message"]["reactions"] == [{"emoji": "👍", "count": 1}]
+    assert event["message"]["seen"] is False
+
+    # Each follower's own read state, not the viewer-less base row's
+    await get_read_state_store().mark_seen_up_to(db_session, persons[1].id, case.id, m.id)
+    await db_session.commit()
+    await manager.publish_message_change(case.id, m.id)
+    await manager.flush_batches()
+    assert reader.websocket.frames[-1]["events"][0]["message"]["seen"] is True
+    reader.websocket.frames.pop()
+    legacy.websocket.frames.pop()
+
+    # Once unsubscribed the reader no longer hears about the case
+    manager.set_subscription(reader, case.id, None, False)
+    await manager.publish_message_deleted(case.id, m.id, MAIN_THREAD)
+    await manager.flush_batches()
+    assert len(reader.websocket.frames) == 1
+    assert len(legacy.websocket.frames) == 2
+
+
+@pytest.mark.asyncio
+async def test_stats_report_queued_events_and_memory(db_session: AsyncSession, async_session_maker):
+    users, persons, case, task = await _seed(db_session, "00003")
+    m = Message(case_id=case.id, written_by_id=persons[0].id, message="x" * 2000)
+    db_session.add(m)
+    await db_session.commit()
+
+    manager = _CaseWSManager(debounce_seconds=60, batch_tick_ms=10_000, session_maker=async_session_maker)
+    empty = manager.stats()["approx_bytes"]
+    reader = await _connect(manager, users[1], persons[1])
+    manager.set_subscription(reader, case.id, None, True)
+    connected = manager.stats()["approx_bytes"]
+    assert connected > empty
+
+    await manager.publish_message_change(case.id, m.id)
+    stats = manager.stats()
+    assert stats["subscriptions"] == 1 and stats["queued_events"] == 1
+    assert stats["approx_bytes"] > connected + 2000
+
+    await manager.flush_batches()
+    assert manager.stats()["queued_events"] == 0
+    await manager.disconnect(reader)
+    # Only the emptied dict's own allocation remains
+    assert manager.stats()["approx_bytes"] < connected
+    manager._ticker.cancel()